@@ -4,8 +4,8 @@ Export Routes - API endpoints for PDF/CSV export functionality.
 V8 Feature: Download candidate analysis reports in various formats.
 """
 
-import io
 import logging
+from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query
@@ -27,71 +27,65 @@ def get_session_manager(mode: Mode):
     return session_manager
 
 
+def _start_stream(session_id: str, mode: Mode, export_format: str, export_id: Optional[str]):
+    """Session summary, paged message iterator and progress record for an export."""
+    mgr = get_session_manager(mode)
+    session = mgr.get_session_summary(session_id)
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    export_service = get_export_service()
+    progress = export_service.start_export(
+        session_id, export_format, session["message_count"], export_id=export_id
+    )
+    logger.info(
+        f"[EXPORT] Streaming {export_format} export {progress.export_id}: "
+        f"{session['message_count']} messages from session {session_id}"
+    )
+    
+    # Messages are paged from the store while the response is being written
+    messages = export_service.iter_messages(
+        lambda offset, limit: mgr.get_messages_page(session_id, offset, limit),
+        progress=progress
+    )
+    return session, messages, progress
+
+
 @router.get("/{session_id}/csv")
 async def export_session_csv(
     session_id: str,
     query: Optional[str] = None,
+    export_id: Optional[str] = None,
     mode: Mode = Query(default=settings.default_mode)
 ):
     """
     Export session analysis results as CSV.
     
+    Rows are streamed as they are produced; poll /api/export/progress/{export_id}
+    for progress on very large sessions.
+    
     Args:
         session_id: Session ID to export
         query: Optional specific query to export (defaults to last analysis)
+        export_id: Optional client-chosen ID for progress polling
         mode: Operating mode (local/cloud)
     
     Returns:
         CSV file download
     """
-    mgr = get_session_manager(mode)
-    session = mgr.get_session(session_id)
-    
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    # Get ALL messages from the session (not just recent ones)
-    # For export, we need the complete conversation history
-    all_messages = session.messages if hasattr(session, 'messages') else session.get('messages', [])
-    logger.info(f"[EXPORT] Exporting {len(all_messages)} messages from session {session_id}")
-    
-    messages_list = [
-        {
-            "role": msg.role if hasattr(msg, 'role') else msg.get('role'),
-            "content": msg.content if hasattr(msg, 'content') else msg.get('content'),
-            "structured_output": msg.structured_output if hasattr(msg, 'structured_output') else msg.get('structured_output')
-        }
-        for msg in all_messages
-    ]
-    
-    # Convert session to dict if needed
-    session_dict = session if isinstance(session, dict) else {
-        "id": session.id,
-        "name": session.name,
-        "cvs": [{"id": cv.id, "filename": cv.filename} for cv in session.cvs]
-    }
+    session, messages, progress = _start_stream(session_id, mode, "csv", export_id)
     
-    # Generate report
     export_service = get_export_service()
-    report = export_service.create_report_from_session(
-        session=session_dict,
-        messages=messages_list,
-        query=query
-    )
-    
-    # Generate CSV
-    csv_content = export_service.generate_csv(report)
-    
-    # Create filename
-    safe_name = "".join(c if c.isalnum() or c in "._- " else "_" for c in report.session_name)
-    filename = f"cv_analysis_{safe_name}_{report.generated_at.strftime('%Y%m%d')}.csv"
+    filename = export_service.export_filename(session.get("name", "Unnamed Session"), datetime.utcnow(), "csv")
     
     return StreamingResponse(
-        io.BytesIO(csv_content),
+        export_service.stream_csv(session, messages, progress),
         media_type="text/csv",
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"',
-            "Content-Type": "text/csv; charset=utf-8-sig"
+            "Content-Type": "text/csv; charset=utf-8-sig",
+            "X-Export-Id": progress.export_id
         }
     )
 
@@ -100,74 +94,51 @@ async def export_session_csv(
 async def export_session_pdf(
     session_id: str,
     query: Optional[str] = None,
+    export_id: Optional[str] = None,
     mode: Mode = Query(default=settings.default_mode)
 ):
     """
     Export session analysis results as PDF.
     
+    The document is built incrementally from paged messages and streamed in
+    chunks; poll /api/export/progress/{export_id} for progress.
+    
     Args:
         session_id: Session ID to export
         query: Optional specific query to export (defaults to last analysis)
+        export_id: Optional client-chosen ID for progress polling
         mode: Operating mode (local/cloud)
     
     Returns:
         PDF file download
     """
-    mgr = get_session_manager(mode)
-    session = mgr.get_session(session_id)
-    
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    # Get ALL messages from the session (not just recent ones)
-    # For export, we need the complete conversation history
-    all_messages = session.messages if hasattr(session, 'messages') else session.get('messages', [])
-    logger.info(f"[EXPORT PDF] Exporting {len(all_messages)} messages from session {session_id}")
-    
-    messages_list = [
-        {
-            "role": msg.role if hasattr(msg, 'role') else msg.get('role'),
-            "content": msg.content if hasattr(msg, 'content') else msg.get('content'),
-            "structured_output": msg.structured_output if hasattr(msg, 'structured_output') else msg.get('structured_output')
-        }
-        for msg in all_messages
-    ]
-    
-    # Convert session to dict if needed
-    session_dict = session if isinstance(session, dict) else {
-        "id": session.id,
-        "name": session.name,
-        "cvs": [{"id": cv.id, "filename": cv.filename} for cv in session.cvs]
-    }
-    
-    # Generate report
     export_service = get_export_service()
-    report = export_service.create_report_from_session(
-        session=session_dict,
-        messages=messages_list,
-        query=query
-    )
-    
-    try:
-        # Generate PDF
-        pdf_content = export_service.generate_pdf(report)
-    except RuntimeError as e:
-        raise HTTPException(status_code=501, detail=str(e))
+    if not export_service._pdf_available:
+        raise HTTPException(status_code=501, detail="PDF export unavailable: fpdf2 not installed")
     
-    # Create filename
-    safe_name = "".join(c if c.isalnum() or c in "._- " else "_" for c in report.session_name)
-    filename = f"cv_analysis_{safe_name}_{report.generated_at.strftime('%Y%m%d')}.pdf"
+    session, messages, progress = _start_stream(session_id, mode, "pdf", export_id)
+    filename = export_service.export_filename(session.get("name", "Unnamed Session"), datetime.utcnow(), "pdf")
     
     return StreamingResponse(
-        io.BytesIO(pdf_content),
+        export_service.stream_pdf(session, messages, progress),
         media_type="application/pdf",
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"',
-            "Content-Type": "application/pdf"
+            "Content-Type": "application/pdf",
+            "X-Export-Id": progress.export_id
         }
     )
 
 
+@router.get("/progress/{export_id}")
+async def get_export_progress(export_id: str):
+    """Progress of a streaming export (messages processed, bytes sent)."""
+    progress = get_export_service().get_progress(export_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return progress.to_dict()
+
+
 @router.get("/{session_id}/formats")
 async def get_available_formats(
     session_id: str,
@@ -16,8 +16,13 @@ from app.config import Mode, settings
 from app.models.sessions import ChatMessage, CVInfo, session_manager
 from app.providers.cloud.sessions import supabase_session_manager
 from app.providers.factory import ProviderFactory
+from app.services.candidate_scoring_service import get_scoring_service
+from app.services.rag_service_pool import api_key_fingerprint, get_rag_service_pool
+from app.services.session_corpus_cache import get_session_corpus_cache
+from app.services.single_flight_service import get_single_flight, make_flight_key
 from app.services.smart_chunking_service import SmartChunkingService
 from app.utils.debug_logger import log_chunks_created, set_current_session
+from app.utils.upstream_limiter import Priority, upstream_async_client, with_upstream_priority
 
 # Directory to store uploaded PDFs - in project root /storage/
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
@@ -35,6 +40,21 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
 
+def session_cv_ids(mgr, session_id: str) -> List[str]:
+    """CV ids of a chat session, 404 if it doesn't exist.
+
+    A warm working set already holds them: CV uploads/removals and session
+    deletion invalidate it, so the turn skips the session store. Otherwise a
+    single read of the session's CV list (no messages, no counts).
+    """
+    cv_ids = get_session_corpus_cache().session_cv_ids(session_id)
+    if cv_ids is None:
+        cv_ids = mgr.get_session_cv_ids(session_id)
+        if cv_ids is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+    return cv_ids
+
+
 def calculate_content_hash(content: bytes) -> str:
     """Calculate SHA256 hash of PDF content for duplicate detection."""
     return hashlib.sha256(content).hexdigest()
@@ -114,6 +134,8 @@ class ChatResponse(BaseModel):
     reranking_info: Optional[dict] = None       # Re-ranking step info
     verification_info: Optional[dict] = None    # Verification step info
     pipeline_steps: List[dict] = Field(default_factory=list)  # Pipeline execution steps for UI
+    generation_model: Optional[str] = None      # Model that actually generated the answer
+    used_fallback_model: bool = False           # It differs from the requested generation_model
 
 
 class UploadResponse(BaseModel):
@@ -198,13 +220,24 @@ async def create_session(request: CreateSessionRequest, mode: Mode = Query(defau
 
 
 @router.get("/{session_id}", response_model=SessionDetailResponse)
-async def get_session(session_id: str, mode: Mode = Query(default=settings.default_mode)):
+async def get_session(
+    session_id: str,
+    background_tasks: BackgroundTasks,
+    mode: Mode = Query(default=settings.default_mode)
+):
     """Get a session by ID."""
     mgr = get_session_manager(mode)
     session = mgr.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
+    # Opening a session warms its working set for the first chat turn
+    cvs = session.get("cvs", []) if isinstance(session, dict) else session.cvs
+    corpus_cache = get_session_corpus_cache()
+    if settings.session_corpus_cache_enabled and cvs and corpus_cache.session_cv_ids(session_id) is None:
+        cv_ids = [cv.get("id") if isinstance(cv, dict) else cv.id for cv in cvs]
+        background_tasks.add_task(corpus_cache.load, session_id, cv_ids, ProviderFactory.get_vector_store(mode))
+    
     if isinstance(session, dict):
         return SessionDetailResponse(
             id=session["id"],
@@ -305,6 +338,7 @@ def _save_pdf_sync(pdf_path: Path, content: bytes):
         f.write(content)
 
 
+@with_upstream_priority(Priority.INGESTION)
 async def process_cvs_for_session(
     job_id: str,
     session_id: str,
@@ -382,7 +416,9 @@ async def process_cvs_for_session(
             
             # Index chunks (create embeddings) - this is already async
             jobs[job_id]["current_phase"] = "embedding"
-            await rag_service.index_documents(chunks)
+            indexing = await rag_service.index_documents(chunks)
+            get_scoring_service().index_cv_chunks(chunks)
+            jobs[job_id]["embeddings_skipped"] += indexing.reused
             
             # Add CV to session (use mode-based manager) with content_hash for duplicate detection
             jobs[job_id]["current_phase"] = "indexing"
@@ -470,7 +506,8 @@ async def upload_cvs_to_session(
         "current_file": None,
         "current_phase": None,
         "errors": [],
-        "duplicates": duplicates
+        "duplicates": duplicates,
+        "embeddings_skipped": 0  # Chunk texts whose stored embedding was reused
     }
     
     # Process in background
@@ -529,65 +566,82 @@ async def remove_cv_from_session(
 async def chat_in_session(
     session_id: str,
     request: ChatRequest,
-    mode: Mode = Query(default=settings.default_mode)
+    mode: Mode = Query(default=settings.default_mode),
+    api_key: Optional[str] = Depends(get_openrouter_api_key)
 ):
     """Send a chat message in a session context (queries only session's CVs)."""
     mgr = get_session_manager(mode)
-    session = mgr.get_session(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
     
-    cvs = session.get("cvs", []) if isinstance(session, dict) else session.cvs
-    if not cvs:
+    cv_ids = session_cv_ids(mgr, session_id)
+    if not cv_ids:
         raise HTTPException(status_code=400, detail="No CVs in this session. Please upload CVs first.")
-    
-    # Get CV IDs for this session
-    cv_ids = mgr.get_cv_ids_for_session(session_id)
-    total_cvs = len(cvs)
+    total_cvs = len(cv_ids)
+    
+    # Identical question already running for this session/corpus: attach to it
+    # instead of re-running the pipeline (and don't persist the turn twice)
+    history = [
+        {"role": msg.role if hasattr(msg, 'role') else msg.get('role'),
+         "content": msg.content if hasattr(msg, 'content') else msg.get('content')}
+        for msg in mgr.get_conversation_history(session_id, limit=10)
+    ]
+    # Keyed per caller too: a request is never served by a run billed to another API key
+    flight_key = make_flight_key(
+        "chat", session_id, cv_ids, request.message, history,
+        {"mode": mode, "api_key": api_key_fingerprint(api_key), **request.model_dump()}
+    )
+    single_flight = get_single_flight()
     
     # Save user message
-    mgr.add_message(session_id, "user", request.message)
+    if not single_flight.is_in_flight(flight_key):
+        mgr.add_message(session_id, "user", request.message)
     
     # Query RAG with session's CVs only - pass session_id for logging
-    # Use custom models if provided, otherwise use defaults
-    # Import RAGServiceV3 directly to pass all pipeline parameters
-    from app.services.rag_service_v5 import RAGServiceV5
-    
-    logger.info(f"[CHAT] Creating RAG service with mode={mode}")
-    rag_service = RAGServiceV5.from_factory(mode)
-    
-    logger.info(f"[CHAT] Starting query for session={session_id}, cv_ids={cv_ids[:3] if cv_ids else []}, total_cvs={total_cvs}")
-    try:
-        result = await rag_service.query(
-            question=request.message, 
-            cv_ids=cv_ids,
-            session_id=session_id,
-            total_cvs_in_session=total_cvs
+    # Pooled service for this mode/models/API key (caches and breakers persist across turns)
+    
+    async def run_query():
+        logger.info(f"[CHAT] Getting RAG service with mode={mode}, generation={request.generation_model}")
+        rag_service = get_rag_service_pool().get(
+            mode,
+            understanding_model=request.understanding_model,
+            reranking_model=request.reranking_model,
+            reranking_enabled=request.reranking_enabled,
+            generation_model=request.generation_model,
+            verification_model=request.verification_model,
+            verification_enabled=request.verification_enabled,
+            api_key=api_key
         )
-        logger.info(f"[CHAT] Query completed successfully, answer length={len(result.answer)}")
-    except Exception as e:
-        logger.error(f"[CHAT] Query failed with error: {type(e).__name__}: {e}")
-        logger.exception("Full traceback:")
-        raise
+        
+        logger.info(f"[CHAT] Starting query for session={session_id}, cv_ids={cv_ids[:3] if cv_ids else []}, total_cvs={total_cvs}")
+        try:
+            result = await rag_service.query(
+                question=request.message, 
+                cv_ids=cv_ids,
+                session_id=session_id,
+                total_cvs_in_session=total_cvs
+            )
+            logger.info(f"[CHAT] Query completed successfully, answer length={len(result.answer)}")
+        except Exception as e:
+            logger.error(f"[CHAT] Query failed with error: {type(e).__name__}: {e}")
+            logger.exception("Full traceback:")
+            raise
+        
+        # Save assistant message with pipeline_steps and structured_output (once per execution)
+        mgr.add_message(
+            session_id, "assistant", result.answer, result.sources,
+            _pipeline_steps_of(result), _structured_output_of(result)
+        )
+        return result
+    
+    result, is_leader = await single_flight.run(flight_key, run_query)
+    if not is_leader:
+        logger.info(f"[CHAT] Served coalesced result for session={session_id}")
     
     # Convert metrics to dict if it has to_dict method
     metrics_dict = result.metrics.to_dict() if hasattr(result.metrics, 'to_dict') else result.metrics
     
-    # Extract pipeline_steps FIRST before saving
-    pipeline_steps = []
-    if hasattr(result, 'pipeline_steps') and result.pipeline_steps:
-        pipeline_steps = [s.to_dict() for s in result.pipeline_steps]
+    pipeline_steps = _pipeline_steps_of(result)
     logger.info(f"[CHAT] Extracted {len(pipeline_steps)} pipeline steps from result")
     
-    # Extract structured_output
-    structured_output = None
-    if hasattr(result, 'structured_output') and result.structured_output:
-        structured_output = result.structured_output.to_dict()
-        logger.info(f"[CHAT] Extracted structured_output: thinking={'✓' if structured_output.get('thinking') else '✗'}, table={'✓' if structured_output.get('table_data') else '✗'}")
-    
-    # Save assistant message with pipeline_steps and structured_output
-    mgr.add_message(session_id, "assistant", result.answer, result.sources, pipeline_steps, structured_output)
-    
     # Include query understanding info in response
     query_understanding_info = None
     if hasattr(result, 'query_understanding') and result.query_understanding:
@@ -617,10 +671,28 @@ async def chat_in_session(
         query_understanding=query_understanding_info,
         reranking_info=reranking_info,
         verification_info=verification_info,
-        pipeline_steps=pipeline_steps
+        pipeline_steps=pipeline_steps,
+        generation_model=getattr(result, "generation_model", None),
+        used_fallback_model=getattr(result, "used_fallback_model", False)
     )
 
 
+def _pipeline_steps_of(result) -> list:
+    """Serialized pipeline steps of a RAG response."""
+    if hasattr(result, 'pipeline_steps') and result.pipeline_steps:
+        return [s.to_dict() for s in result.pipeline_steps]
+    return []
+
+
+def _structured_output_of(result) -> Optional[dict]:
+    """Serialized structured output of a RAG response."""
+    if hasattr(result, 'structured_output') and result.structured_output:
+        structured_output = result.structured_output.to_dict()
+        logger.info(f"[CHAT] Extracted structured_output: thinking={'✓' if structured_output.get('thinking') else '✗'}, table={'✓' if structured_output.get('table_data') else '✗'}")
+        return structured_output
+    return None
+
+
 @router.delete("/{session_id}/chat")
 async def clear_chat_history(session_id: str, mode: Mode = Query(default=settings.default_mode)):
     """Clear chat history for a session."""
@@ -794,8 +866,6 @@ async def generate_session_name(
 ):
     """Generate a descriptive name for a session based on its CVs using a cheap AI model."""
     import random
-
-    import httpx
     
     # Validate API key is configured (from header or env)
     logger.info(f"[AUTO-NAME] API key received: {'Yes' if api_key else 'No'}")
@@ -868,7 +938,7 @@ Category:"""
         logger.info(f"[AUTO-NAME] Trying model: {model}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with upstream_async_client(timeout=30.0) as client:
                 response = await client.post(
                     "https://openrouter.ai/api/v1/chat/completions",
                     headers={
@@ -1,6 +1,7 @@
 """SSE streaming endpoint for real-time chat progress."""
 import json
 import logging
+from contextlib import aclosing
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -8,10 +9,12 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from app.api.dependencies import get_openrouter_api_key
+from app.api.routes_sessions import session_cv_ids
 from app.config import Mode, settings
 from app.models.sessions import session_manager
 from app.providers.cloud.sessions import supabase_session_manager
-from app.services.rag_service_v5 import RAGServiceV5
+from app.services.rag_service_pool import api_key_fingerprint, get_rag_service_pool
+from app.services.single_flight_service import StreamFlight, get_single_flight, make_flight_key
 from app.utils.debug_logger import log_final_response, log_query_start, save_session_log
 
 
@@ -27,6 +30,12 @@ class SafeJSONEncoder(json.JSONEncoder):
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/sessions", tags=["sessions-stream"])
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
 
 def get_session_manager(mode: Mode):
     """Get the appropriate session manager based on mode."""
@@ -45,8 +54,11 @@ class ChatStreamRequest(BaseModel):
     verification_enabled: bool = True
 
 
-async def event_generator(rag_service, question: str, session_id: str, cv_ids: list, total_cvs: int, mgr, conversation_history: list = None, context_history: list = None):
-    """Generate SSE events from RAG pipeline execution.
+async def pipeline_events(rag_service, question: str, session_id: str, cv_ids: list, total_cvs: int, mgr, conversation_history: list = None, context_history: list = None):
+    """Run the RAG pipeline and yield its raw events, saving the answer once at the end.
+    
+    Runs inside a single-flight task, so the assistant message is saved exactly
+    once however many clients are subscribed.
     
     Args:
         conversation_history: Short history (2 msgs) for LLM prompt
@@ -57,55 +69,63 @@ async def event_generator(rag_service, question: str, session_id: str, cv_ids: l
     # DEBUG LOGGING: Log query start
     log_query_start(session_id, question, cv_ids)
     
-    try:
-        logger.info(f"[STREAM] Starting query_stream for: {question[:50]}...")
-        async for event in rag_service.query_stream(
-            question=question,
-            conversation_history=conversation_history,
-            context_history=context_history,  # Pass long history for context resolution
-            session_id=session_id,
-            cv_ids=cv_ids,
-            total_cvs_in_session=total_cvs
-        ):
-            event_type = event.get("event", "message")
-            event_data = event.get("data", {})
-            
-            logger.debug(f"[STREAM] Event: {event_type}")
-            
-            # Capture final response to save
-            if event_type == "complete":
-                final_response = event_data
-                logger.info("[STREAM] Query completed successfully")
-            
-            # Format as SSE (use SafeJSONEncoder to handle sets)
-            yield f"event: {event_type}\n"
-            yield f"data: {json.dumps(event_data, cls=SafeJSONEncoder)}\n\n"
+    logger.info(f"[STREAM] Starting query_stream for: {question[:50]}...")
+    async for event in rag_service.query_stream(
+        question=question,
+        conversation_history=conversation_history,
+        context_history=context_history,  # Pass long history for context resolution
+        session_id=session_id,
+        cv_ids=cv_ids,
+        total_cvs_in_session=total_cvs
+    ):
+        event_type = event.get("event", "message")
+        logger.debug(f"[STREAM] Event: {event_type}")
+        
+        # Capture final response to save
+        if event_type == "complete":
+            final_response = event.get("data", {})
+            logger.info("[STREAM] Query completed successfully")
         
-        logger.info(f"[STREAM] Stream finished for session {session_id}")
+        yield event
+    
+    logger.info(f"[STREAM] Stream finished for session {session_id}")
+    
+    # Save assistant message to session with structured_output
+    if final_response and final_response.get("answer"):
+        structured_output_dict = None
+        if final_response.get("structured_output"):
+            structured_output_dict = final_response["structured_output"]
+        
+        pipeline_steps = final_response.get("pipeline_steps", [])
+        sources = final_response.get("sources", [])
+        
+        mgr.add_message(
+            session_id=session_id,
+            role="assistant",
+            content=final_response["answer"],
+            sources=sources,
+            pipeline_steps=pipeline_steps,
+            structured_output=structured_output_dict
+        )
+        logger.info(f"[STREAM] Saved assistant message with {len(sources)} sources to session {session_id}")
         
-        # Save assistant message to session with structured_output
-        if final_response and final_response.get("answer"):
-            structured_output_dict = None
-            if final_response.get("structured_output"):
-                structured_output_dict = final_response["structured_output"]
-            
-            pipeline_steps = final_response.get("pipeline_steps", [])
-            sources = final_response.get("sources", [])
-            
-            mgr.add_message(
-                session_id=session_id,
-                role="assistant",
-                content=final_response["answer"],
-                sources=sources,
-                pipeline_steps=pipeline_steps,
-                structured_output=structured_output_dict
-            )
-            logger.info(f"[STREAM] Saved assistant message with {len(sources)} sources to session {session_id}")
-            
-            # DEBUG LOGGING: Log final response and save session log
-            log_final_response(final_response["answer"], structured_output_dict)
-            save_session_log(session_id)
-            
+        # DEBUG LOGGING: Log final response and save session log
+        log_final_response(final_response["answer"], structured_output_dict)
+        save_session_log(session_id)
+
+
+async def event_generator(flight: StreamFlight):
+    """Format a (possibly shared) pipeline execution as SSE."""
+    try:
+        # aclosing: a disconnected client unsubscribes right away, not at GC
+        async with aclosing(flight.subscribe()) as events:
+            async for event in events:
+                event_type = event.get("event", "message")
+                event_data = event.get("data", {})
+                
+                # Format as SSE (use SafeJSONEncoder to handle sets)
+                yield f"event: {event_type}\n"
+                yield f"data: {json.dumps(event_data, cls=SafeJSONEncoder)}\n\n"
     except Exception as e:
         logger.exception(f"Stream error: {e}")
         yield "event: error\n"
@@ -128,10 +148,9 @@ async def chat_stream(
     - error: Error occurred
     """
     mgr = get_session_manager(mode)
-    session = mgr.get_session(session_id)
     
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    cv_ids = session_cv_ids(mgr, session_id)
+    total_cvs = len(cv_ids)
     
     # Get TWO different history lengths:
     # 1. LONG history (10 messages) for context resolution - to find ranking candidates
@@ -155,48 +174,60 @@ async def chat_stream(
     
     logger.info(f"[STREAM] Retrieved {len(context_history)} messages for context resolution, {len(conversation_history)} for LLM")
     
+    # Identical question already streaming for this session/corpus/models:
+    # subscribe to that execution instead of starting another one (same API
+    # key only: the shared run is billed to the key that started it)
+    single_flight = get_single_flight()
+    flight_key = make_flight_key(
+        "stream", session_id, cv_ids or [], request.message, context_history,
+        {"mode": mode, "api_key": api_key_fingerprint(api_key), **request.model_dump()}
+    )
+    flight = single_flight.attach_stream(flight_key) if cv_ids else None
+    if flight is not None:
+        logger.info(f"[STREAM] Joined in-flight stream for session {session_id}")
+        return StreamingResponse(
+            event_generator(flight),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+    
     # Save user message
     mgr.add_message(session_id, "user", request.message)
     
-    # Get CV IDs for this session
-    cv_ids = mgr.get_cv_ids_for_session(session_id)
-    # Handle both dict (cloud) and Session object (local)
-    total_cvs = len(session.get("cvs", [])) if isinstance(session, dict) else len(session.cvs)
-    
     if not cv_ids:
         raise HTTPException(status_code=400, detail="No CVs in session")
     
-    # Create RAG service with custom configuration
-    logger.info(f"[STREAM] Creating RAG service with mode={mode}, models: understanding={request.understanding_model}, reranking={request.reranking_model}, generation={request.generation_model}, verification={request.verification_model}")
+    # Pooled RAG service for this mode/model configuration/API key: its caches
+    # and circuit breakers carry over from previous turns
+    logger.info(f"[STREAM] Getting RAG service with mode={mode}, models: understanding={request.understanding_model}, reranking={request.reranking_model}, generation={request.generation_model}, verification={request.verification_model}")
     
     try:
-        rag_service = RAGServiceV5.from_factory(mode)
-        logger.info("[STREAM] RAG service created successfully")
-        
-        # Configure pipeline settings with models from frontend
-        rag_service.config.understanding_model = request.understanding_model
-        rag_service.config.reranking_model = request.reranking_model
-        rag_service.config.reranking_enabled = request.reranking_enabled
-        rag_service.config.generation_model = request.generation_model
-        rag_service.config.verification_model = request.verification_model
-        rag_service.config.claim_verification_enabled = request.verification_enabled
-        logger.info("[STREAM] Models configured in RAG service")
-        
-        # Now initialize providers with configured models
-        logger.info("[STREAM] Calling lazy_initialize_providers()")
-        rag_service.lazy_initialize_providers(api_key=api_key)
+        rag_service = get_rag_service_pool().get(
+            mode,
+            understanding_model=request.understanding_model,
+            reranking_model=request.reranking_model,
+            reranking_enabled=request.reranking_enabled,
+            generation_model=request.generation_model,
+            verification_model=request.verification_model,
+            verification_enabled=request.verification_enabled,
+            api_key=api_key
+        )
         logger.info(f"[STREAM] Providers initialized: {rag_service._providers_initialized}")
         
     except Exception as e:
         logger.exception(f"[STREAM] Error during RAG service initialization: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to initialize RAG service: {str(e)}")
     
+    flight, _ = single_flight.join_stream(
+        flight_key,
+        producer=lambda: pipeline_events(
+            rag_service, request.message, session_id, cv_ids, total_cvs, mgr,
+            conversation_history, context_history
+        )
+    )
+    
     return StreamingResponse(
-        event_generator(rag_service, request.message, session_id, cv_ids, total_cvs, mgr, conversation_history, context_history),
+        event_generator(flight),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+        headers=SSE_HEADERS
     )
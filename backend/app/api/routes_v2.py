@@ -16,6 +16,7 @@ from app.models.sessions import session_manager
 from app.providers.cloud.sessions import supabase_session_manager
 from app.services.chunking_service import ChunkingService
 from app.services.rag_service_v5 import RAGServiceV5
+from app.utils.upstream_limiter import Priority, upstream_async_client, with_upstream_priority
 
 # Directory to store uploaded PDFs - in project root /storage/
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
@@ -49,7 +50,7 @@ async def validate_api_key(
         raise HTTPException(status_code=400, detail="No API key provided")
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with upstream_async_client(timeout=10.0) as client:
             response = await client.get(
                 "https://openrouter.ai/api/v1/models",
                 headers={
@@ -182,6 +183,7 @@ def extract_text_from_pdf(content: bytes, filename: str) -> str:
 
 logger = logging.getLogger(__name__)
 
+@with_upstream_priority(Priority.INGESTION)
 async def process_cvs(job_id: str, file_data: List[tuple], mode: Mode):
     """Background task to process uploaded CVs.
     
@@ -17,11 +17,21 @@ from pydantic import BaseModel
 from app.config import Mode, settings
 from app.models.sessions import session_manager
 from app.providers.cloud.sessions import supabase_session_manager
+from app.providers.factory import ProviderFactory
 from app.services.candidate_scoring_service import get_scoring_service
+from app.services.eval_worker import get_eval_worker
+from app.services.fallback_chain_service import get_fallback_service
 from app.services.hybrid_search_service import get_hybrid_search_service
 from app.services.interview_questions_service import get_interview_service
+from app.services.local_reranker import get_rerank_score_cache
+from app.services.query_understanding_service import get_understanding_tier_stats
+from app.services.rag_service_pool import get_rag_service_pool
 from app.services.screening_rules_service import get_screening_service
 from app.services.semantic_cache_service import get_semantic_cache
+from app.services.session_corpus_cache import get_session_corpus_cache
+from app.services.single_flight_service import get_single_flight
+from app.utils.tracing import get_tracer
+from app.utils.upstream_limiter import get_upstream_limit_stats
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v8", tags=["v8-premium"])
@@ -143,6 +153,33 @@ async def assign_scoring_profile(
     return {"success": True}
 
 
+@router.get("/scoring/session/{session_id}/ranking")
+async def score_session(
+    session_id: str,
+    profile_id: Optional[str] = None,
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=50, ge=1, le=500),
+    mode: Mode = Query(default=settings.default_mode)
+):
+    """Rank every CV in a session against a profile (vectorized, paginated)."""
+    service = get_scoring_service()
+    if profile_id and not service.get_profile(profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    mgr = get_session_manager(mode)
+    cv_ids = mgr.get_cv_ids_for_session(session_id)
+    
+    await service.ensure_features(cv_ids, ProviderFactory.get_vector_store(mode))
+    
+    return service.score_session(
+        session_id=session_id,
+        cv_ids=cv_ids,
+        profile_id=profile_id,
+        page=page,
+        page_size=page_size
+    )
+
+
 # ============================================================================
 # Screening Rules Endpoints
 # ============================================================================
@@ -184,6 +221,8 @@ async def add_rule_to_set(rule_set_id: str, rule: ScreeningRuleCreate):
     result = service.add_rule(rule_set_id, rule.dict())
     if not result:
         raise HTTPException(status_code=404, detail="Rule set not found")
+    for session_id in service.sessions_using(rule_set_id):
+        get_semantic_cache().invalidate_session(session_id)
     return {"rule_id": result.id, "name": result.name}
 
 
@@ -211,6 +250,40 @@ async def evaluate_candidate(
     }
 
 
+@router.post("/screening/session/{session_id}/evaluate")
+async def screen_session(
+    session_id: str,
+    rule_set_id: Optional[str] = None,
+    mode: Mode = Query(default=settings.default_mode)
+):
+    """Screen every CV in a session in one vectorized pass."""
+    service = get_screening_service()
+    rule_set_id = rule_set_id or service.get_session_rule_set_id(session_id)
+    if not rule_set_id or not service.get_rule_set(rule_set_id):
+        raise HTTPException(status_code=404, detail="Rule set not found")
+    
+    scoring = get_scoring_service()
+    cv_ids = get_session_manager(mode).get_cv_ids_for_session(session_id)
+    await scoring.ensure_features(cv_ids, ProviderFactory.get_vector_store(mode))
+    table = scoring.get_feature_table(session_id, cv_ids)
+    
+    result = service.screen_table(table, rule_set_id=rule_set_id)
+    results = result.to_list() if result else [
+        {"candidate_id": cv_id, "candidate_name": name, "passed": True,
+         "score_modifier": 0.0, "flags": [], "exclusion_reason": None}
+        for cv_id, name in zip(table.cv_ids, table.names, strict=True)
+    ]
+    passed = [r["candidate_id"] for r in results if r["passed"]]
+    return {
+        "session_id": session_id,
+        "rule_set_id": rule_set_id,
+        "total": len(results),
+        "passed": len(passed),
+        "passed_cv_ids": passed,
+        "results": results,
+    }
+
+
 @router.post("/screening/session/{session_id}/assign")
 async def assign_rule_set(
     session_id: str,
@@ -222,6 +295,8 @@ async def assign_rule_set(
     success = service.assign_to_session(session_id, rule_set_id)
     if not success:
         raise HTTPException(status_code=404, detail="Rule set not found")
+    # Cached answers were generated over the previously screened-in CVs
+    get_semantic_cache().invalidate_session(session_id)
     return {"success": True}
 
 
@@ -316,6 +391,31 @@ async def get_hybrid_search_stats():
     return service.get_stats()
 
 
+@router.get("/stats/single-flight")
+async def get_single_flight_stats():
+    """Get in-flight query coalescing statistics."""
+    return get_single_flight().get_stats()
+
+
+@router.get("/stats/rag-pool")
+async def get_rag_pool_stats():
+    """Get pooled RAG service statistics (cache hit rates, breaker states)."""
+    return get_rag_service_pool().get_stats()
+
+
+@router.get("/stats/session-corpus")
+async def get_session_corpus_stats():
+    """Session working-set cache: memory, evictions, warm vs. cold query latency."""
+    return get_session_corpus_cache().get_stats()
+
+
+@router.get("/stats/models")
+async def get_model_health_stats():
+    """Per-model EWMA latency / error rate, p95 per stage, and hedging counters."""
+    fallback = get_fallback_service()
+    return {"models": fallback.get_status(), "hedging": fallback.get_hedge_stats()}
+
+
 @router.get("/stats/all")
 async def get_all_v8_stats():
     """Get all V8 service statistics."""
@@ -327,6 +427,53 @@ async def get_all_v8_stats():
     return {
         "semantic_cache": cache.get_stats(),
         "hybrid_search": hybrid.get_stats(),
+        "single_flight": get_single_flight().get_stats(),
+        "tracing": get_tracer().get_stats(),
+        "rag_service_pool": get_rag_service_pool().get_stats(),
+        "query_understanding": get_understanding_tier_stats().get_stats(),
+        "upstream_limits": get_upstream_limit_stats(),
+        "eval_worker": get_eval_worker().get_stats(),
+        "rerank_score_cache": get_rerank_score_cache().get_stats(),
+        "session_corpus_cache": get_session_corpus_cache().get_stats(),
+        "model_health": {
+            "models": get_fallback_service().get_status(),
+            "hedging": get_fallback_service().get_hedge_stats()
+        },
         "scoring_profiles": len(scoring.list_profiles()),
         "screening_rule_sets": len(screening.list_rule_sets())
     }
+
+
+# ============================================================================
+# Tracing Endpoints
+# ============================================================================
+
+@router.get("/traces")
+async def list_traces(limit: int = Query(20, ge=1, le=500)):
+    """Most recent request traces (newest first) with their latency breakdown."""
+    tracer = get_tracer()
+    return {
+        **tracer.get_stats(),
+        "traces": [trace.summary() for trace in tracer.recent(limit)]
+    }
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, format: str = Query("json", pattern="^(json|chrome)$")):
+    """
+    Full span tree of a trace.
+    
+    format=chrome returns Chrome trace-event JSON (load it in chrome://tracing,
+    Perfetto or speedscope for a flame graph).
+    """
+    trace = get_tracer().get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace not found: {trace_id}")
+    return trace.to_chrome() if format == "chrome" else trace.to_dict()
+
+
+@router.delete("/traces")
+async def clear_traces():
+    """Drop all buffered traces."""
+    get_tracer().clear()
+    return {"success": True}
@@ -82,11 +82,42 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
     log_file: str = "app.log"
+    debug_log_level: str = "INFO"  # Session debug log: DEBUG/INFO/WARNING/ERROR/OFF
+    debug_log_sample_rate: float = 1.0  # Fraction of DEBUG/INFO events recorded
+    debug_log_buffer_size: int = 200  # In-memory events per session (ring buffer)
+    debug_log_max_sessions: int = 100  # Sessions kept in memory (LRU)
+    tracing_enabled: bool = True  # Record per-request latency spans (/api/v8/traces)
+    trace_buffer_size: int = 50  # Recent traces kept in memory (ring buffer)
+    ragas_sample_rate: float = 0.25  # Fraction of answered queries evaluated with RAGAS (background)
+    eval_batch_size: int = 16  # Queries logged/evaluated per background batch
+    eval_worker_concurrency: int = 2  # Concurrent RAGAS evaluations in the background worker
+    eval_queue_size: int = 1000  # Pending evaluation jobs before new ones are dropped
     
     # RAG - Adaptive Retrieval Strategy
     retrieval_k: int = 50  # For top-k global (search/filter queries): multiple chunks per CV
     retrieval_score_threshold: float = 0.15  # Balanced threshold for quality vs coverage
     # Note: For ranking/comparison queries, k is automatically set to total_cvs_in_session
+    context_token_budget: int = 12000  # Max tokens of CV context per prompt (capped by model window)
+    output_module_workers: int = 4  # Threads for running independent output modules concurrently
+    output_parallel_min_chunks: int = 100  # Run structure modules concurrently from this many chunks
+    stream_structured_partials: bool = True  # Emit structured_partial SSE events while tokens stream
+    query_understanding_local_threshold: float = 0.85  # Local classifier confidence that skips the LLM (>1 = always LLM)
+    pipeline_profiles_enabled: bool = True  # Skip optional RAG stages per query type (pipeline_profiles.py)
+    pipeline_profile_overrides: str = ""  # Remap query types to profiles: "single_candidate=full,summary=lookup"
+    reranking_backend: str = "remote"  # remote (HF cross-encoder / LLM) | lexical | onnx (local_reranker.py)
+    local_reranker_model_dir: str = ""  # ONNX cross-encoder export: model.onnx + tokenizer.json
+    local_reranker_batch_size: int = 32  # (query, chunk) pairs per ONNX inference batch
+    rerank_score_cache_size: int = 50000  # Cached (query, chunk) cross-encoder scores (0 = off)
+    rerank_cascade_enabled: bool = True  # Only rerank chunks the cheap first stage can't decide (rerank_cascade.py)
+    rerank_cascade_accept: float = 0.8  # First-stage score kept on top without reranking
+    rerank_cascade_reject: float = 0.25  # First-stage score sent to the bottom without reranking
+    rerank_cascade_min_chunks: int = 10  # Smaller retrieved sets are reranked whole
+    rerank_cascade_max_ambiguous: int = 30  # Cap on chunks sent to the expensive reranker per query
+    rerank_cascade_batch_size: int = 10  # Chunks per expensive-reranker call (batches run in parallel)
+    session_corpus_cache_enabled: bool = True  # Keep session working sets warm (session_corpus_cache.py)
+    session_corpus_cache_mb: int = 256  # Memory budget for cached session working sets (LRU)
+    rag_service_pool_size: int = 8  # Initialized RAG services kept per (mode, models, API key)
+    rag_service_idle_ttl_seconds: int = 900  # Drop pooled services unused for this long
     
     # Adaptive retrieval configuration
     ranking_retrieval_percentage: float = 0.2  # Retrieve 20% of CVs for ranking queries
@@ -95,6 +126,15 @@ class Settings(BaseSettings):
     # LLM
     llm_temperature: float = 0.1
     llm_max_tokens: int = 4096  # Increased for longer structured responses
+    llm_hedging_enabled: bool = True  # Start a backup model when the primary is slower than its p95
+    llm_hedge_stages: str = "understanding,multi_query,reranking,generation"  # Stages that hedge
+    llm_hedge_min_delay_ms: int = 1500  # Never hedge earlier than this
+    llm_generation_fallback_enabled: bool = False  # Let other generation-chain models answer (hedge/failover); off = selected model only
+    upstream_limits_enabled: bool = True  # Shared priority queue + token buckets per upstream API
+    openrouter_rpm: int = 120  # Requests per minute across all OpenRouter calls (0 = unlimited)
+    openrouter_tpm: int = 0  # Estimated tokens per minute across all OpenRouter calls (0 = unlimited)
+    huggingface_rpm: int = 60  # Requests per minute across all HuggingFace Inference calls (0 = unlimited)
+    upstream_queue_timeout_seconds: float = 30.0  # Max queue wait for chat calls (ingestion/evaluation: 10x)
     
     @property
     def cors_origins_list(self) -> list[str]:
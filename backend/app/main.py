@@ -14,7 +14,9 @@ from app.api.routes_sessions_stream import router as sessions_stream_router
 from app.api.routes_v2 import router
 from app.api.v8_routes import router as v8_router
 from app.config import get_settings
+from app.services.eval_worker import get_eval_worker
 from app.utils.exceptions import CVScreenerException
+from app.utils.upstream_limiter import enable_upstream_limits
 
 # Configure logging
 logging.basicConfig(
@@ -154,6 +156,8 @@ async def startup_event():
         print(f"PORT={port}")
         print(f"Default mode: {settings.default_mode}")
         print(f"Static dir exists: {STATIC_DIR.exists()}")
+        if settings.upstream_limits_enabled:
+            enable_upstream_limits()
         print("=== STARTUP EVENT SUCCESS ===")
     except Exception as e:
         print(f"=== STARTUP EVENT FAILED: {e} ===")
@@ -167,6 +171,11 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("Shutting down CV Screener API...")
+    try:
+        # Flush pending query logs / evaluations
+        await get_eval_worker().drain(timeout=10)
+    except Exception as e:
+        logger.warning(f"Evaluation worker did not drain: {e}")
 
 
 if __name__ == "__main__":
@@ -8,6 +8,8 @@ from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
+from app.services.session_corpus_cache import get_session_corpus_cache
+
 logger = logging.getLogger(__name__)
 
 SESSIONS_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "data", "sessions.json")
@@ -119,6 +121,7 @@ class SessionManager:
         if session_id in self.sessions:
             del self.sessions[session_id]
             self._save()
+            get_session_corpus_cache().invalidate(session_id)
             logger.info(f"Deleted session: {session_id}")
             return True
         return False
@@ -131,6 +134,7 @@ class SessionManager:
             session.cvs.append(cv_info)
             session.updated_at = datetime.now().isoformat()
             self._save()
+            get_session_corpus_cache().invalidate(session_id)
             logger.info(f"Added CV {cv_id} to session {session_id}")
         return session
     
@@ -141,6 +145,7 @@ class SessionManager:
             session.cvs = [cv for cv in session.cvs if cv.id != cv_id]
             session.updated_at = datetime.now().isoformat()
             self._save()
+            get_session_corpus_cache().invalidate(session_id)
             logger.info(f"Removed CV {cv_id} from session {session_id}")
         return session
     
@@ -168,6 +173,30 @@ class SessionManager:
             return [cv.id for cv in session.cvs]
         return []
     
+    def get_session_cv_ids(self, session_id: str) -> Optional[List[str]]:
+        """CV IDs of a session, or None if it doesn't exist (no messages, no counts)."""
+        session = self.sessions.get(session_id)
+        return [cv.id for cv in session.cvs] if session else None
+    
+    def get_session_summary(self, session_id: str) -> Optional[Dict]:
+        """Session name, CVs and message count, without the messages."""
+        session = self.sessions.get(session_id)
+        if not session:
+            return None
+        return {
+            "id": session.id,
+            "name": session.name,
+            "cvs": [{"id": cv.id, "filename": cv.filename} for cv in session.cvs],
+            "message_count": len(session.messages)
+        }
+    
+    def get_messages_page(self, session_id: str, offset: int, limit: int) -> List[ChatMessage]:
+        """Messages [offset, offset + limit) ordered from oldest to newest."""
+        session = self.sessions.get(session_id)
+        if not session:
+            return []
+        return session.messages[offset:offset + limit]
+    
     def clear_messages(self, session_id: str) -> bool:
         """Clear chat history for a session."""
         session = self.sessions.get(session_id)
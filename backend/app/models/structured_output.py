@@ -154,6 +154,9 @@ class StructuredOutput:
     parsing_warnings: List[str] = field(default_factory=list)
     fallback_used: bool = False
     
+    # Runtime only (not serialized): per-module durations of the structure assembly
+    module_timings: Optional[Dict[str, float]] = None
+    
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
         return {
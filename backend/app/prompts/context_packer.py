@@ -0,0 +1,411 @@
+"""
+Token-budgeted context packing for LLM prompts.
+
+Turns the ranked chunks returned by retrieval/reranking into the subset that
+is actually sent to the model:
+
+1. Near-duplicate removal using word-shingle MinHash signatures and LSH
+   buckets, so each chunk is only compared with the few chunks that share a
+   bucket (linear in the number of chunks instead of pairwise).
+2. Ranking by a fused score (RRF over the incoming pipeline order and the raw
+   similarity score).
+3. Per-candidate token quotas so every CV keeps at least one excerpt before
+   the strongest candidates fill the remaining budget.
+
+Every packed chunk reports the tokens it consumed so callers can surface the
+prompt size in pipeline metrics.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import re
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.utils.text_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Share of a model's context window that retrieved CV context may use
+CONTEXT_WINDOW_SHARE = 0.5
+
+# Chunks are never truncated below this size (a stub excerpt is useless)
+MIN_CHUNK_TOKENS = 48
+
+# Same candidate name + shingle Jaccard above this = duplicate CV upload
+NEAR_DUPLICATE_THRESHOLD = 0.7
+
+# RRF constant used to fuse pipeline order and similarity order
+FUSION_RRF_K = 60
+
+_SHINGLE_SIZE = 4
+_NUM_PERMUTATIONS = 16
+_LSH_BANDS = 8
+_LSH_ROWS = _NUM_PERMUTATIONS // _LSH_BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# Deterministic permutations so signatures are stable across processes
+_rng = random.Random(1729)
+_PERMUTATIONS: list[tuple[int, int]] = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(_NUM_PERMUTATIONS)
+]
+
+_WORD_RE = re.compile(r"\w+")
+_TRUNCATION_MARKER = "... [truncated]"
+
+
+# =============================================================================
+# RESULT TYPES
+# =============================================================================
+
+@dataclass
+class PackedChunk:
+    """A chunk selected for the prompt with its token cost."""
+    chunk: dict[str, Any]
+    tokens: int
+    fused_score: float
+    truncated: bool = False
+
+
+@dataclass
+class PackedContext:
+    """Result of packing chunks into a token budget."""
+    chunks: list[PackedChunk]
+    token_budget: int | None
+    total_tokens: int
+    input_chunks: int
+    duplicates_dropped: int = 0
+    over_budget_dropped: int = 0
+    candidates_total: int = 0
+    candidates_included: int = 0
+
+    @property
+    def token_counts(self) -> list[int]:
+        return [p.tokens for p in self.chunks]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "input_chunks": self.input_chunks,
+            "packed_chunks": len(self.chunks),
+            "context_tokens": self.total_tokens,
+            "token_budget": self.token_budget,
+            "duplicates_dropped": self.duplicates_dropped,
+            "over_budget_dropped": self.over_budget_dropped,
+            "truncated_chunks": sum(1 for p in self.chunks if p.truncated),
+            "candidates_total": self.candidates_total,
+            "candidates_included": self.candidates_included,
+        }
+
+
+# =============================================================================
+# TOKEN BUDGETS
+# =============================================================================
+
+def get_context_token_budget(model: str | None = None) -> int:
+    """
+    Token budget for retrieved context when prompting `model`.
+
+    Uses the configured `context_token_budget`, capped at a share of the
+    model's context window when OpenRouter reported one.
+    """
+    from app.config import settings
+
+    budget = settings.context_token_budget
+    if not model:
+        return budget
+
+    try:
+        from app.providers.cloud.llm import get_available_models
+        for m in get_available_models():
+            if m.get("id") == model and m.get("context_length"):
+                return min(budget, int(m["context_length"] * CONTEXT_WINDOW_SHARE))
+    except Exception as e:
+        logger.debug(f"[CONTEXT_PACKER] Could not read context window for {model}: {e}")
+
+    return budget
+
+
+# =============================================================================
+# NEAR-DUPLICATE DETECTION
+# =============================================================================
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _shingles(text: str) -> set[int]:
+    """Hashed word shingles of normalized text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < _SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(words).encode())} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + _SHINGLE_SIZE]).encode())
+        for i in range(len(words) - _SHINGLE_SIZE + 1)
+    }
+
+
+def _minhash(shingles: set[int]) -> tuple[int, ...]:
+    """MinHash signature over the shingle set."""
+    return tuple(
+        min((a * s + b) % _MERSENNE_PRIME for s in shingles)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def _jaccard(a: set[int], b: set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def deduplicate_chunks(
+    chunks: list[dict[str, Any]],
+    threshold: float = NEAR_DUPLICATE_THRESHOLD
+) -> tuple[list[int], int]:
+    """
+    Find chunks to keep after duplicate removal.
+
+    - Identical content for the same cv_id (e.g. found by several query
+      variations) is kept once.
+    - Same candidate name + different cv_id + near-identical content is a
+      duplicate CV upload; only the first occurrence is kept. Same name with
+      different content is treated as a different person.
+
+    Returns:
+        (indices of chunks to keep in input order, number dropped)
+    """
+    kept: list[int] = []
+    exact_seen: set[tuple[str, bytes]] = set()
+    shingle_sets: dict[int, set[int]] = {}
+    cv_of: dict[int, str] = {}
+    buckets: dict[tuple[str, int, tuple[int, ...]], list[int]] = {}
+    dropped = 0
+
+    for idx, chunk in enumerate(chunks):
+        metadata = chunk.get("metadata", {}) or {}
+        content = (chunk.get("content") or "").strip()
+        cv_id = metadata.get("cv_id", "unknown")
+
+        exact_key = (cv_id, hashlib.blake2b(_normalize(content).encode(), digest_size=8).digest())
+        if exact_key in exact_seen:
+            dropped += 1
+            continue
+
+        name_key = (metadata.get("candidate_name") or "").lower().strip()
+        if not name_key or not content:
+            exact_seen.add(exact_key)
+            kept.append(idx)
+            continue
+
+        shingles = _shingles(content)
+        signature = _minhash(shingles) if shingles else ()
+        band_keys = [
+            (name_key, band, signature[band * _LSH_ROWS:(band + 1) * _LSH_ROWS])
+            for band in range(_LSH_BANDS)
+        ] if signature else []
+
+        is_duplicate = False
+        checked: set[int] = set()
+        for key in band_keys:
+            for other in buckets.get(key, ()):
+                if other in checked or cv_of[other] == cv_id:
+                    continue
+                checked.add(other)
+                if _jaccard(shingles, shingle_sets[other]) >= threshold:
+                    is_duplicate = True
+                    break
+            if is_duplicate:
+                break
+
+        if is_duplicate:
+            dropped += 1
+            continue
+
+        exact_seen.add(exact_key)
+        kept.append(idx)
+        shingle_sets[idx] = shingles
+        cv_of[idx] = cv_id
+        for key in band_keys:
+            buckets.setdefault(key, []).append(idx)
+
+    return kept, dropped
+
+
+# =============================================================================
+# PACKING
+# =============================================================================
+
+def _candidate_key(chunk: dict[str, Any]) -> str:
+    metadata = chunk.get("metadata", {}) or {}
+    return metadata.get("cv_id") or (metadata.get("candidate_name") or "unknown").lower()
+
+
+def fused_scores(chunks: list[dict[str, Any]], k: int = FUSION_RRF_K) -> list[float]:
+    """
+    RRF-fuse the incoming order (which reflects RRF/reranking) with the raw
+    similarity order, so neither signal alone decides what gets dropped.
+    """
+    n = len(chunks)
+    by_similarity = sorted(range(n), key=lambda i: -float(chunks[i].get("score") or 0.0))
+    similarity_rank = [0] * n
+    for rank, idx in enumerate(by_similarity):
+        similarity_rank[idx] = rank
+    return [
+        1.0 / (k + position + 1) + 1.0 / (k + similarity_rank[position] + 1)
+        for position in range(n)
+    ]
+
+
+def _truncate_to_tokens(
+    chunk: dict[str, Any],
+    max_tokens: int,
+    measure: Callable[[dict[str, Any]], int]
+) -> dict[str, Any] | None:
+    """Copy of `chunk` with content shortened so it renders in `max_tokens`."""
+    content = chunk.get("content") or ""
+    overhead = measure(chunk) - estimate_tokens(content)
+    content_tokens = max_tokens - overhead - estimate_tokens(_TRUNCATION_MARKER)
+    while content_tokens >= MIN_CHUNK_TOKENS:
+        truncated = content[:content_tokens * 4]
+        cut = truncated.rfind(" ")
+        if cut > len(truncated) // 2:
+            truncated = truncated[:cut]
+        shortened = {**chunk, "content": truncated + _TRUNCATION_MARKER}
+        excess = measure(shortened) - max_tokens
+        if excess <= 0:
+            return shortened
+        content_tokens -= excess
+    return None
+
+
+def pack_chunks(
+    chunks: list[dict[str, Any]],
+    token_budget: int | None = None,
+    render: Callable[[dict[str, Any], int], str] | None = None,
+    separator: str = ""
+) -> PackedContext:
+    """
+    Select and order chunks for a prompt within a token budget.
+
+    Args:
+        chunks: Ranked chunks (best first) with content and metadata
+        token_budget: Max tokens for the rendered context (None = no limit)
+        render: Renders a chunk exactly as it will appear in the prompt at a
+            position (0-based), used to count tokens including headers
+            (defaults to content)
+        separator: Text joining rendered chunks, counted with every chunk
+            after the first
+
+    Returns:
+        PackedContext with the selected chunks in their original order; each
+        chunk's tokens are measured at its final position
+    """
+    render = render or (lambda c, _: c.get("content") or "")
+
+    kept_indices, duplicates = deduplicate_chunks(chunks)
+    unique = [chunks[i] for i in kept_indices]
+    scores = fused_scores(unique)
+    candidates = [_candidate_key(c) for c in unique]
+    candidates_total = len(set(candidates))
+
+    def lay_out(packed: list[PackedChunk]) -> int:
+        """Render at the real positions; each chunk gets its share of the total."""
+        text, total = "", 0
+        for position, packed_chunk in enumerate(packed):
+            text += (separator if position else "") + render(packed_chunk.chunk, position)
+            packed_chunk.tokens = estimate_tokens(text) - total
+            total += packed_chunk.tokens
+        return total
+
+    def result(packed: list[PackedChunk]) -> PackedContext:
+        total = lay_out(packed)
+        # Guard for renderers whose size isn't monotonic in the position
+        while token_budget is not None and packed and total > token_budget:
+            packed.remove(min(packed, key=lambda p: p.fused_score))
+            total = lay_out(packed)
+        return PackedContext(
+            chunks=packed,
+            token_budget=token_budget,
+            total_tokens=total,
+            input_chunks=len(chunks),
+            duplicates_dropped=duplicates,
+            over_budget_dropped=len(unique) - len(packed),
+            candidates_total=candidates_total,
+            candidates_included=len({_candidate_key(p.chunk) for p in packed})
+        )
+
+    everything = [PackedChunk(chunk=c, tokens=0, fused_score=scores[i]) for i, c in enumerate(unique)]
+    if token_budget is None or lay_out(everything) <= token_budget:
+        return result(everything)
+
+    # Selection doesn't know final positions yet: cost every chunk at the last
+    # one (widest header) with a separator, plus one token of rounding, an
+    # upper bound on what it adds to the rendered context
+    worst_position = max(len(unique) - 1, 1)
+
+    def measure(chunk: dict[str, Any]) -> int:
+        return estimate_tokens(separator + render(chunk, worst_position)) + 1
+
+    costs = [measure(c) for c in unique]
+    ranked = sorted(range(len(unique)), key=lambda i: -scores[i])
+    quota = max(MIN_CHUNK_TOKENS, token_budget // max(candidates_total, 1))
+    selected: dict[int, PackedChunk] = {}
+    used_by_candidate: dict[str, int] = {}
+    remaining = token_budget
+
+    def take(idx: int, chunk: dict[str, Any], cost: int, truncated: bool = False) -> None:
+        nonlocal remaining
+        selected[idx] = PackedChunk(chunk=chunk, tokens=cost, fused_score=scores[idx], truncated=truncated)
+        used_by_candidate[candidates[idx]] = used_by_candidate.get(candidates[idx], 0) + cost
+        remaining -= cost
+
+    # Pass 1: coverage - best chunk of every candidate, truncated to the quota if needed
+    for idx in ranked:
+        if candidates[idx] in used_by_candidate:
+            continue
+        if remaining < MIN_CHUNK_TOKENS:
+            break
+        limit = min(quota, remaining)
+        if costs[idx] <= limit:
+            take(idx, unique[idx], costs[idx])
+            continue
+        shortened = _truncate_to_tokens(unique[idx], limit, measure)
+        if shortened is not None:
+            take(idx, shortened, measure(shortened), truncated=True)
+
+    # Pass 2: fill each candidate up to its quota, best chunks first
+    for idx in ranked:
+        if idx in selected or costs[idx] > remaining:
+            continue
+        if used_by_candidate.get(candidates[idx], 0) + costs[idx] <= quota:
+            take(idx, unique[idx], costs[idx])
+
+    # Pass 3: spend what is left on the highest scoring chunks regardless of candidate
+    for idx in ranked:
+        if idx not in selected and costs[idx] <= remaining:
+            take(idx, unique[idx], costs[idx])
+
+    return result([selected[i] for i in sorted(selected)])
+
+
+__all__ = [
+    "PackedChunk",
+    "PackedContext",
+    "get_context_token_budget",
+    "deduplicate_chunks",
+    "fused_scores",
+    "pack_chunks",
+    "CONTEXT_WINDOW_SHARE",
+    "MIN_CHUNK_TOKENS",
+    "NEAR_DUPLICATE_THRESHOLD",
+]
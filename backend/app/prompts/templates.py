@@ -13,9 +13,12 @@ Version: 2.0.0
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from functools import lru_cache
+from typing import Any
+
+from app.services.candidate_profile_service import get_profile_store
 
 # =============================================================================
 # CONFIGURATION & CONSTANTS
@@ -49,6 +52,7 @@ class PromptConfig:
     strict_mode: bool = True       # Stricter guardrails
     include_source_refs: bool = True
     reasoning_depth: str = "standard"  # minimal, standard, deep
+    context_token_budget: int | None = None  # Max tokens of CV context (None = unlimited)
 
 
 DEFAULT_CONFIG = PromptConfig()
@@ -936,20 +940,92 @@ class FormattedContext:
     num_unique_cvs: int
     candidate_names: list[str]
     cv_ids: list[str]
+    # Token accounting from the context packer (one entry per included chunk)
+    token_counts: list[int] = field(default_factory=list)
+    total_tokens: int = 0
+    packing: dict[str, Any] = field(default_factory=dict)
+
+
+def _render_context_chunk(
+    chunk: dict,
+    index: int,
+    include_metadata: bool = True,
+    max_chunk_length: int | None = None
+) -> str:
+    """Render a single chunk exactly as it appears in the prompt context."""
+    metadata = ChunkMetadata.from_dict(chunk.get("metadata", {}))
+    content = chunk.get("content", "").strip()
+    
+    if max_chunk_length and len(content) > max_chunk_length:
+        content = content[:max_chunk_length] + "... [truncated]"
+    
+    if not include_metadata:
+        return f"[{metadata.candidate_name} | {metadata.cv_id}]\n{content}"
+    
+    # Get full metadata from chunk
+    full_meta = chunk.get("metadata", {})
+    
+    header = (
+        f"### CV #{index + 1}: {metadata.candidate_name}\n"
+        f"- **CV_ID:** `{metadata.cv_id}`\n"
+        f"- **File:** {metadata.filename}\n"
+        f"- **Section:** {metadata.section_type}"
+    )
+    
+    # Add enriched metadata if available (CRITICAL for ranking queries)
+    if full_meta.get("total_experience_years") is not None:
+        years = full_meta.get("total_experience_years", 0)
+        header += f"\n- **Total Experience:** {years:.1f} years"
+    
+    if full_meta.get("job_hopping_score") is not None:
+        hop_score = full_meta.get("job_hopping_score", 0)
+        header += f"\n- **Job Hopping Score:** {hop_score:.2f} (lower is better)"
     
+    if full_meta.get("avg_tenure_years") is not None:
+        tenure = full_meta.get("avg_tenure_years", 0)
+        header += f"\n- **Avg Tenure:** {tenure:.1f} years per position"
+    
+    if full_meta.get("seniority_level"):
+        seniority = full_meta.get("seniority_level", "")
+        header += f"\n- **Seniority:** {seniority}"
+    
+    if full_meta.get("skills"):
+        skills = full_meta.get("skills", "")
+        # Truncate if too long
+        if len(skills) > 150:
+            skills = skills[:150] + "..."
+        header += f"\n- **Skills:** {skills}"
+    
+    if metadata.page_number:
+        header += f"\n- **Page:** {metadata.page_number}"
+    
+    return f"{header}\n\n{content}"
+
+
+# Between rendered chunks in the prompt context (counted by the packer)
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
 
 def format_context(
     chunks: list[dict],
     include_metadata: bool = True,
-    max_chunk_length: int | None = None
+    max_chunk_length: int | None = None,
+    token_budget: int | None = None
 ) -> FormattedContext:
     """
     Format retrieved chunks into context string for the prompt.
     
+    Chunks are packed with `pack_chunks`: near-duplicates (same candidate
+    name, different cv_id, near-identical content = duplicate CV upload)
+    are dropped in linear time, and when a token budget is given the
+    highest-scoring chunks are kept with a per-candidate quota so every CV
+    stays represented.
+    
     Args:
         chunks: List of chunk dictionaries with content and metadata
         include_metadata: Whether to include full metadata headers
         max_chunk_length: Optional truncation limit per chunk
+        token_budget: Optional max tokens for the whole context
         
     Returns:
         FormattedContext with formatted text and statistics
@@ -963,111 +1039,42 @@ def format_context(
             cv_ids=[]
         )
     
+    from app.prompts.context_packer import pack_chunks
+    
+    packed = pack_chunks(
+        chunks,
+        token_budget=token_budget,
+        render=lambda c, index: _render_context_chunk(c, index, include_metadata, max_chunk_length),
+        separator=CONTEXT_SEPARATOR
+    )
+    
     context_parts: list[str] = []
     unique_cvs: set[str] = set()
     candidate_names: list[str] = []
     cv_ids: list[str] = []
-    seen_candidates: set[str] = set()
-    # Map: (candidate_name, content_signature) -> cv_id
-    # This allows same name with DIFFERENT content to be treated as different people
-    candidate_content_to_cv_id: dict[tuple[str, str], str] = {}
-    # Track cv_ids we've already included to avoid duplicates
-    included_cv_ids: set[str] = set()
-    
-    chunk_counter = 0
-    for chunk in chunks:
+    
+    for index, packed_chunk in enumerate(packed.chunks):
+        chunk = packed_chunk.chunk
         metadata = ChunkMetadata.from_dict(chunk.get("metadata", {}))
-        content = chunk.get("content", "").strip()
-        
-        # SMART DEDUPLICATION:
-        # - Same name + same/similar content = same person (duplicate CV upload)
-        # - Same name + different content = different people (keep both)
-        candidate_key = metadata.candidate_name.lower().strip() if metadata.candidate_name else ""
-        
-        # Create a content signature from first 200 chars (captures role/title usually)
-        content_signature = content[:200].lower() if content else ""
-        
-        if candidate_key:
-            # Check if this exact (name, content) combination exists
-            is_duplicate = False
-            for (stored_name, stored_sig), stored_cv_id in candidate_content_to_cv_id.items():
-                if stored_name == candidate_key:
-                    # Same name - check if content is similar (>70% overlap in signature)
-                    if stored_cv_id != metadata.cv_id:
-                        # Different cv_id - check content similarity
-                        overlap = sum(1 for a, b in zip(content_signature, stored_sig, strict=False) if a == b)
-                        similarity = overlap / max(len(content_signature), len(stored_sig), 1)
-                        if similarity > 0.7:
-                            # Same person, duplicate CV - skip
-                            is_duplicate = True
-                            break
-            
-            if is_duplicate:
-                continue
-            
-            # Not a duplicate - register this chunk
-            if metadata.cv_id not in included_cv_ids:
-                candidate_content_to_cv_id[(candidate_key, content_signature)] = metadata.cv_id
-                included_cv_ids.add(metadata.cv_id)
-                candidate_names.append(metadata.candidate_name)
-                cv_ids.append(metadata.cv_id)
-                seen_candidates.add(metadata.candidate_name)
         
-        if max_chunk_length and len(content) > max_chunk_length:
-            content = content[:max_chunk_length] + "... [truncated]"
+        if metadata.candidate_name and metadata.cv_id not in cv_ids:
+            candidate_names.append(metadata.candidate_name)
+            cv_ids.append(metadata.cv_id)
         
         unique_cvs.add(metadata.filename)
-        
-        if include_metadata:
-            # Get full metadata from chunk
-            full_meta = chunk.get("metadata", {})
-            
-            header = (
-                f"### CV #{chunk_counter+1}: {metadata.candidate_name}\n"
-                f"- **CV_ID:** `{metadata.cv_id}`\n"
-                f"- **File:** {metadata.filename}\n"
-                f"- **Section:** {metadata.section_type}"
-            )
-            
-            # Add enriched metadata if available (CRITICAL for ranking queries)
-            if full_meta.get("total_experience_years") is not None:
-                years = full_meta.get("total_experience_years", 0)
-                header += f"\n- **Total Experience:** {years:.1f} years"
-            
-            if full_meta.get("job_hopping_score") is not None:
-                hop_score = full_meta.get("job_hopping_score", 0)
-                header += f"\n- **Job Hopping Score:** {hop_score:.2f} (lower is better)"
-            
-            if full_meta.get("avg_tenure_years") is not None:
-                tenure = full_meta.get("avg_tenure_years", 0)
-                header += f"\n- **Avg Tenure:** {tenure:.1f} years per position"
-            
-            if full_meta.get("seniority_level"):
-                seniority = full_meta.get("seniority_level", "")
-                header += f"\n- **Seniority:** {seniority}"
-            
-            if full_meta.get("skills"):
-                skills = full_meta.get("skills", "")
-                # Truncate if too long
-                if len(skills) > 150:
-                    skills = skills[:150] + "..."
-                header += f"\n- **Skills:** {skills}"
-            
-            if metadata.page_number:
-                header += f"\n- **Page:** {metadata.page_number}"
-            
-            context_parts.append(f"{header}\n\n{content}")
-        else:
-            context_parts.append(
-                f"[{metadata.candidate_name} | {metadata.cv_id}]\n{content}"
-            )
+        context_parts.append(
+            _render_context_chunk(chunk, index, include_metadata, max_chunk_length)
+        )
     
     return FormattedContext(
-        text="\n\n---\n\n".join(context_parts),
-        num_chunks=len(chunks),
+        text=CONTEXT_SEPARATOR.join(context_parts),
+        num_chunks=len(packed.chunks),
         num_unique_cvs=len(unique_cvs),
         candidate_names=candidate_names,
-        cv_ids=cv_ids
+        cv_ids=cv_ids,
+        token_counts=packed.token_counts,
+        total_tokens=packed.total_tokens,
+        packing=packed.stats()
     )
 
 
@@ -1092,13 +1099,26 @@ class PromptBuilder:
     def __init__(self, config: PromptConfig = DEFAULT_CONFIG):
         self.config = config
     
+    def _format_context(self, chunks: list[dict], packing: dict[str, Any] | None = None) -> FormattedContext:
+        """
+        Format chunks within the configured context token budget.
+        
+        Builders are shared by concurrent requests (pooled services), so packing
+        stats go to the caller's `packing` dict rather than onto the builder.
+        """
+        ctx = format_context(chunks, token_budget=self.config.context_token_budget)
+        if packing is not None:
+            packing.update(ctx.packing)
+        return ctx
+    
     def build_query_prompt(
         self,
         question: str,
         chunks: list[dict],
         total_cvs: int | None = None,
         response_format: ResponseFormat = ResponseFormat.FULL,
-        conversation_history: list[dict[str, str]] | None = None
+        conversation_history: list[dict[str, str]] | None = None,
+        packing: dict[str, Any] | None = None
     ) -> str:
         """
         Build the complete query prompt with context.
@@ -1109,11 +1129,12 @@ class PromptBuilder:
             total_cvs: Total CVs in session (if known)
             response_format: Desired response format
             conversation_history: Recent chat history for context
+            packing: Optional dict filled with the context packing stats
             
         Returns:
             Formatted prompt string
         """
-        ctx = format_context(chunks)
+        ctx = self._format_context(chunks, packing)
         actual_total = total_cvs if total_cvs is not None else ctx.num_unique_cvs
         
         template = {
@@ -1157,7 +1178,7 @@ class PromptBuilder:
         chunks: list[dict]
     ) -> str:
         """Build a comparison prompt for multiple candidates."""
-        ctx = format_context(chunks)
+        ctx = self._format_context(chunks)
         
         if isinstance(criteria, list):
             criteria_str = ", ".join(criteria)
@@ -1183,7 +1204,7 @@ class PromptBuilder:
         top_n: int = 5
     ) -> str:
         """Build a ranking prompt for top N candidates."""
-        ctx = format_context(chunks)
+        ctx = self._format_context(chunks)
         criteria_str = ", ".join(criteria) if isinstance(criteria, list) else criteria
         
         return RANKING_TEMPLATE.format(
@@ -1200,7 +1221,7 @@ class PromptBuilder:
         chunks: list[dict]
     ) -> str:
         """Build a verification prompt for a specific claim."""
-        ctx = format_context(chunks)
+        ctx = self._format_context(chunks)
         
         return VERIFICATION_TEMPLATE.format(
             claim=claim,
@@ -1216,7 +1237,7 @@ class PromptBuilder:
         focus_areas: str | list[str] = "all relevant areas"
     ) -> str:
         """Build a summarization prompt for a candidate."""
-        ctx = format_context(chunks)
+        ctx = self._format_context(chunks)
         focus = ", ".join(focus_areas) if isinstance(focus_areas, list) else focus_areas
         
         return SUMMARIZE_TEMPLATE.format(
@@ -1234,7 +1255,7 @@ class PromptBuilder:
         chunks: list[dict]
     ) -> str:
         """Build a job matching prompt."""
-        ctx = format_context(chunks)
+        ctx = self._format_context(chunks)
         
         return JOB_MATCH_TEMPLATE.format(
             job_description=job_description,
@@ -1260,7 +1281,8 @@ class PromptBuilder:
         candidate_name: str,
         cv_id: str,
         chunks: list[dict],
-        conversation_history: list[dict[str, str]] | None = None
+        conversation_history: list[dict[str, str]] | None = None,
+        packing: dict[str, Any] | None = None
     ) -> str:
         """
         Build a prompt for analyzing a SINGLE specific candidate.
@@ -1274,11 +1296,12 @@ class PromptBuilder:
             cv_id: CV ID of the target candidate
             chunks: Retrieved CV chunks (should be filtered to this candidate)
             conversation_history: Recent chat history for context
+            packing: Optional dict filled with the context packing stats
             
         Returns:
             Formatted prompt string for single candidate analysis
         """
-        ctx = format_context(chunks)
+        ctx = self._format_context(chunks, packing)
         
         # Extract enriched metadata for modular analysis sections
         sections = self._extract_enriched_metadata(chunks)
@@ -1378,23 +1401,26 @@ Base your analysis on the actual CV content provided.""",
             "stability_metrics": "**Analyze CV for stability metrics**"
         }
         
-        # CRITICAL: Find chunk with ACTUAL enriched metadata (not just total_exp)
-        enriched_chunk = None
-        for chunk in chunks:
-            meta = chunk.get("metadata", {})
-            # Require has_enriched_metadata flag OR actual job_hopping_score
-            if meta.get("has_enriched_metadata") or meta.get("job_hopping_score") is not None:
-                enriched_chunk = chunk
-                logger.info(f"[ENRICHED_METADATA] Found enriched chunk: job_hopping={meta.get('job_hopping_score')}, tenure={meta.get('avg_tenure_years')}")
-                break
+        # Profile computed at ingestion first (complete CV, no chunk scan)
+        profile = get_profile_store().for_candidate(chunks)
+        meta = profile.as_metadata() if profile else None
+        
+        # CRITICAL: Otherwise find chunk with ACTUAL enriched metadata (not just total_exp)
+        if meta is None:
+            for chunk in chunks:
+                chunk_meta = chunk.get("metadata", {})
+                # Require has_enriched_metadata flag OR actual job_hopping_score
+                if chunk_meta.get("has_enriched_metadata") or chunk_meta.get("job_hopping_score") is not None:
+                    meta = chunk_meta
+                    logger.info(f"[ENRICHED_METADATA] Found enriched chunk: job_hopping={meta.get('job_hopping_score')}, tenure={meta.get('avg_tenure_years')}")
+                    break
         
-        if not enriched_chunk:
+        if meta is None:
             logger.warning("[ENRICHED_METADATA] No chunk with enriched metadata found!")
             if chunks:
                 logger.info(f"[ENRICHED_METADATA] First chunk keys: {list(chunks[0].get('metadata', {}).keys())}")
             return sections
         
-        meta = enriched_chunk.get("metadata", {})
         job_hopping_score = meta.get("job_hopping_score")
         total_exp = meta.get("total_experience_years")
         avg_tenure = meta.get("avg_tenure_years")
@@ -1482,12 +1508,16 @@ Base your analysis on the actual CV content provided.""",
         if not chunks:
             return ""
         
-        # Group chunks by candidate
+        # Group chunks by candidate; the ingestion profile (summary metadata of
+        # the whole CV) replaces whichever chunk happened to be retrieved first
+        profiles = get_profile_store().for_chunks(chunks)
         candidates = {}
         for chunk in chunks:
             meta = chunk.get("metadata", {})
             cv_id = meta.get("cv_id", "")
             if cv_id not in candidates:
+                if cv_id in profiles:
+                    meta = profiles[cv_id].as_metadata()
                 candidates[cv_id] = {
                     "name": meta.get("candidate_name", "Unknown"),
                     "metadata": meta
@@ -88,6 +88,10 @@ class VectorStoreProvider(ABC):
     async def get_stats(self) -> Dict[str, Any]:
         """Get store statistics."""
         pass
+    
+    async def get_cv_metadata(self, cv_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Summary-chunk metadata (enriched at ingestion) per CV id."""
+        return {}
 
 
 class LLMProvider(ABC):
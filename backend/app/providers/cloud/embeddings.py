@@ -1,10 +1,9 @@
 import time
 from typing import List
 
-import httpx
-
 from app.config import settings
 from app.providers.base import EmbeddingProvider, EmbeddingResult
+from app.utils.upstream_limiter import upstream_async_client
 
 
 class OpenRouterEmbeddingProvider(EmbeddingProvider):
@@ -25,7 +24,7 @@ class OpenRouterEmbeddingProvider(EmbeddingProvider):
         # Add task prefix for better results
         prefixed_texts = [f"search_document: {t}" for t in texts]
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with upstream_async_client(timeout=60.0) as client:
             response = await client.post(
                 f"{self.base_url}/embeddings",
                 headers={
@@ -57,7 +56,7 @@ class OpenRouterEmbeddingProvider(EmbeddingProvider):
         # Add task prefix for queries
         prefixed_query = f"search_query: {query}"
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with upstream_async_client(timeout=30.0) as client:
             response = await client.post(
                 f"{self.base_url}/embeddings",
                 headers={
@@ -6,6 +6,8 @@ import httpx
 
 from app.config import settings
 from app.providers.base import LLMProvider, LLMResult
+from app.utils.tracing import retry_sleep
+from app.utils.upstream_limiter import upstream_async_client, upstream_limits_active
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +20,7 @@ async def fetch_openrouter_models() -> List[Dict]:
     global _cached_models
     try:
         from app.providers.base import get_openrouter_url
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with upstream_async_client(timeout=30.0) as client:
             response = await client.get(
                 get_openrouter_url("models"),
                 headers={"Authorization": f"Bearer {settings.openrouter_api_key}"}
@@ -134,7 +136,7 @@ class OpenRouterLLMProvider(LLMProvider):
         prompt_tokens = 0
         completion_tokens = 0
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        async with upstream_async_client(timeout=120.0) as client:
             async with client.stream(
                 "POST",
                 f"{self.base_url}/chat/completions",
@@ -211,7 +213,6 @@ class OpenRouterLLMProvider(LLMProvider):
         temperature: float = 0.1,
         max_tokens: int = 2048
     ) -> LLMResult:
-        import asyncio
         start = time.perf_counter()
         
         model = self.model
@@ -226,7 +227,7 @@ class OpenRouterLLMProvider(LLMProvider):
         max_retries = 3
         retry_delay = 2
         
-        async with httpx.AsyncClient(timeout=90.0) as client:
+        async with upstream_async_client(timeout=90.0) as client:
             for attempt in range(max_retries):
                 try:
                     response = await client.post(
@@ -246,9 +247,13 @@ class OpenRouterLLMProvider(LLMProvider):
                     )
                     
                     if response.status_code == 429:
-                        wait_time = retry_delay * (attempt + 1)
-                        logger.warning(f"Rate limited, waiting {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                        await asyncio.sleep(wait_time)
+                        if upstream_limits_active():
+                            # The shared limiter paused OpenRouter; the retry waits in its queue
+                            logger.warning(f"Rate limited, retrying through the upstream queue (attempt {attempt + 1}/{max_retries})")
+                        else:
+                            wait_time = retry_delay * (attempt + 1)
+                            logger.warning(f"Rate limited, waiting {wait_time}s (attempt {attempt + 1}/{max_retries})")
+                            await retry_sleep(wait_time, reason="429", attempt=attempt + 1, model=model)
                         continue
                     
                     response.raise_for_status()
@@ -257,9 +262,10 @@ class OpenRouterLLMProvider(LLMProvider):
                 except httpx.HTTPStatusError as e:
                     logger.error(f"OpenRouter error {e.response.status_code}: {e.response.text}")
                     if e.response.status_code == 429 and attempt < max_retries - 1:
-                        wait_time = retry_delay * (attempt + 1)
-                        logger.warning(f"Rate limited, waiting {wait_time}s")
-                        await asyncio.sleep(wait_time)
+                        if not upstream_limits_active():
+                            wait_time = retry_delay * (attempt + 1)
+                            logger.warning(f"Rate limited, waiting {wait_time}s")
+                            await retry_sleep(wait_time, reason="429", attempt=attempt + 1, model=model)
                         continue
                     if e.response.status_code == 400:
                         # Bad request - likely invalid model, try fallback
@@ -4,6 +4,8 @@ import uuid
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from app.services.session_corpus_cache import get_session_corpus_cache
+
 logger = logging.getLogger(__name__)
 
 # Lazy import to avoid startup errors
@@ -160,6 +162,7 @@ class SupabaseSessionManager:
             self.client.table("session_cvs").delete().eq("session_id", session_id).execute()
             # Delete session
             self.client.table("sessions").delete().eq("id", session_id).execute()
+            get_session_corpus_cache().invalidate(session_id)
             
             logger.info(f"Deleted Supabase session: {session_id}")
             return True
@@ -182,6 +185,7 @@ class SupabaseSessionManager:
         }
         
         self.client.table("session_cvs").insert(data).execute()
+        get_session_corpus_cache().invalidate(session_id)
         
         # Update session timestamp
         self.client.table("sessions").update({"updated_at": datetime.now().isoformat()}).eq("id", session_id).execute()
@@ -194,6 +198,7 @@ class SupabaseSessionManager:
         self._ensure_client()
         
         self.client.table("session_cvs").delete().eq("session_id", session_id).eq("cv_id", cv_id).execute()
+        get_session_corpus_cache().invalidate(session_id)
         
         # Update session timestamp
         self.client.table("sessions").update({"updated_at": datetime.now().isoformat()}).eq("id", session_id).execute()
@@ -243,6 +248,56 @@ class SupabaseSessionManager:
         result = self.client.table("session_cvs").select("cv_id").eq("session_id", session_id).execute()
         return [row["cv_id"] for row in result.data]
     
+    def get_session_cv_ids(self, session_id: str) -> Optional[List[str]]:
+        """CV IDs of a session, or None if it doesn't exist, in one round-trip."""
+        self._ensure_client()
+        
+        result = self.client.table("sessions").select("id,session_cvs(cv_id)").eq("id", session_id).execute()
+        if not result.data:
+            return None
+        return [row["cv_id"] for row in result.data[0].get("session_cvs") or []]
+    
+    def get_session_summary(self, session_id: str) -> Optional[Dict]:
+        """Session name, CVs and message count, without the messages."""
+        self._ensure_client()
+        
+        result = self.client.table("sessions").select("*").eq("id", session_id).execute()
+        if not result.data:
+            return None
+        
+        cvs_result = self.client.table("session_cvs").select("cv_id,filename").eq("session_id", session_id).execute()
+        msgs = self.client.table("session_messages").select("id", count="exact").eq("session_id", session_id).execute()
+        return {
+            **result.data[0],
+            "cvs": [{"id": cv["cv_id"], "filename": cv["filename"]} for cv in cvs_result.data],
+            "message_count": msgs.count or 0
+        }
+    
+    def get_messages_page(self, session_id: str, offset: int, limit: int) -> List[Dict]:
+        """Messages [offset, offset + limit) ordered from oldest to newest."""
+        self._ensure_client()
+        
+        result = (
+            self.client.table("session_messages")
+            .select("*")
+            .eq("session_id", session_id)
+            .order("timestamp")
+            .range(offset, offset + limit - 1)
+            .execute()
+        )
+        return [
+            {
+                "id": msg["id"],
+                "role": msg["role"],
+                "content": msg["content"],
+                "sources": msg.get("sources", []),
+                "pipeline_steps": msg.get("pipeline_steps", []),
+                "structured_output": msg.get("structured_output"),
+                "timestamp": msg["timestamp"]
+            }
+            for msg in result.data
+        ]
+    
     def clear_messages(self, session_id: str) -> bool:
         """Clear chat history for a session."""
         self._ensure_client()
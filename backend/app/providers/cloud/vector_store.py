@@ -1,8 +1,12 @@
+import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from app.config import settings
 from app.providers.base import SearchResult, VectorStoreProvider
+from app.services.candidate_profile_service import get_profile_store
+from app.services.incremental_indexing import content_hash
+from app.services.session_corpus_cache import get_session_corpus_cache
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +82,7 @@ class SupabaseVectorStore(VectorStoreProvider):
                 import traceback
                 logger.error(traceback.format_exc())
         
+        get_session_corpus_cache().invalidate_cvs(unique_cvs)
         logger.info(f"Successfully added {len(documents)} embeddings to Supabase")
     
     async def search(
@@ -124,6 +129,8 @@ class SupabaseVectorStore(VectorStoreProvider):
             self.client.table("cv_embeddings").delete().eq("cv_id", cv_id).execute()
             # Then delete from cvs table
             self.client.table("cvs").delete().eq("id", cv_id).execute()
+            get_profile_store().delete(cv_id)
+            get_session_corpus_cache().invalidate_cvs([cv_id])
             logger.info(f"Deleted CV {cv_id} from Supabase")
             return True
         except Exception as e:
@@ -135,6 +142,8 @@ class SupabaseVectorStore(VectorStoreProvider):
         try:
             self.client.table("cv_embeddings").delete().neq("cv_id", "").execute()
             self.client.table("cvs").delete().neq("id", "").execute()
+            get_profile_store().clear()
+            get_session_corpus_cache().clear()
             logger.info("Deleted all CVs from Supabase")
             return True
         except Exception as e:
@@ -145,6 +154,55 @@ class SupabaseVectorStore(VectorStoreProvider):
         response = self.client.table("cvs").select("*").execute()
         return response.data
     
+    async def get_cv_metadata(self, cv_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Summary-chunk metadata (chunk 0, enriched at ingestion) per CV id."""
+        if not cv_ids:
+            return {}
+        response = (
+            self.client.table("cv_embeddings")
+            .select("cv_id,filename,metadata")
+            .in_("cv_id", cv_ids)
+            .eq("chunk_index", 0)
+            .execute()
+        )
+        return {
+            row["cv_id"]: {**(row.get("metadata") or {}), "cv_id": row["cv_id"], "filename": row["filename"]}
+            for row in response.data or []
+        }
+    
+    async def get_cv_chunks(self, cv_ids: List[str]) -> tuple[List[Dict[str, Any]], List[List[float]]]:
+        """Every stored chunk of the CVs with its embedding (session working sets)."""
+        if not cv_ids:
+            return [], []
+        response = (
+            self.client.table("cv_embeddings")
+            .select("id,cv_id,filename,chunk_index,content,embedding,metadata")
+            .in_("cv_id", cv_ids)
+            .execute()
+        )
+        rows, embeddings = [], []
+        for row in response.data or []:
+            embedding = row.pop("embedding")
+            # pgvector columns come back as "[0.1,0.2,...]" strings
+            embeddings.append(json.loads(embedding) if isinstance(embedding, str) else embedding)
+            rows.append({**row, "id": str(row["id"]), "metadata": row.get("metadata") or {}})
+        return rows, embeddings
+    
+    async def get_embeddings_by_hash(self, hashes: Set[str], cv_ids: List[str]) -> Dict[str, List[float]]:
+        """Stored embeddings of the CVs' chunk texts with these content hashes."""
+        rows, embeddings = await self.get_cv_chunks(cv_ids)
+        by_hash = {content_hash(row["content"]): emb for row, emb in zip(rows, embeddings, strict=False)}
+        return {h: by_hash[h] for h in hashes if h in by_hash}
+    
+    async def delete_chunks(self, cv_id: str, keep_indexes: Set[int]) -> int:
+        """Delete the CV's chunks whose chunk_index is not kept (left over from a longer chunking)."""
+        response = self.client.table("cv_embeddings").select("chunk_index").eq("cv_id", cv_id).execute()
+        stale = sorted({row["chunk_index"] for row in response.data or []} - set(keep_indexes))
+        if stale:
+            self.client.table("cv_embeddings").delete().eq("cv_id", cv_id).in_("chunk_index", stale).execute()
+            get_session_corpus_cache().invalidate_cvs([cv_id])
+        return len(stale)
+    
     async def get_stats(self) -> Dict[str, Any]:
         chunks = self.client.table("cv_embeddings").select("id", count="exact").execute()
         cvs = self.client.table("cvs").select("id", count="exact").execute()
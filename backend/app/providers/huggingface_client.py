@@ -8,7 +8,6 @@ Provides access to FREE HuggingFace models for:
 
 All models have 30K req/hour rate limit on free tier.
 """
-import asyncio
 import logging
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
@@ -16,6 +15,8 @@ from typing import Any, Dict, List, Optional
 import httpx
 
 from app.config import settings
+from app.utils.tracing import retry_sleep
+from app.utils.upstream_limiter import upstream_async_client, upstream_limits_active
 
 logger = logging.getLogger(__name__)
 
@@ -108,7 +109,7 @@ class HuggingFaceClient:
         last_error = None
         for attempt in range(self.config.MAX_RETRIES):
             try:
-                async with httpx.AsyncClient(timeout=timeout) as client:
+                async with upstream_async_client(timeout=timeout) as client:
                     response = await client.post(
                         url,
                         headers=self.headers,
@@ -120,7 +121,7 @@ class HuggingFaceClient:
                         data = response.json()
                         estimated_time = data.get("estimated_time", 20)
                         logger.info(f"Model {model} is loading, waiting {estimated_time}s...")
-                        await asyncio.sleep(min(estimated_time, 30))
+                        await retry_sleep(min(estimated_time, 30), reason="model_loading", model=model)
                         continue
                     
                     response.raise_for_status()
@@ -129,14 +130,16 @@ class HuggingFaceClient:
             except httpx.HTTPStatusError as e:
                 last_error = e
                 logger.warning(f"HuggingFace API error (attempt {attempt + 1}): {e}")
+                if e.response.status_code == 429 and upstream_limits_active():
+                    continue  # The shared limiter paused HuggingFace; the retry waits in its queue
                 if attempt < self.config.MAX_RETRIES - 1:
-                    await asyncio.sleep(self.config.RETRY_DELAY * (attempt + 1))
+                    await retry_sleep(self.config.RETRY_DELAY * (attempt + 1), attempt=attempt + 1, model=model)
                     
             except Exception as e:
                 last_error = e
                 logger.warning(f"HuggingFace request failed (attempt {attempt + 1}): {e}")
                 if attempt < self.config.MAX_RETRIES - 1:
-                    await asyncio.sleep(self.config.RETRY_DELAY * (attempt + 1))
+                    await retry_sleep(self.config.RETRY_DELAY * (attempt + 1), attempt=attempt + 1, model=model)
         
         raise last_error or Exception("All HuggingFace API retries failed")
     
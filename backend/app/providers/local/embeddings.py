@@ -6,7 +6,6 @@ This module provides semantic embeddings with fallback options:
 2. OpenRouter API (nomic-embed-text) - 768 dims  
 3. Hash-based fallback (for development only)
 """
-import asyncio
 import hashlib
 import logging
 import math
@@ -14,9 +13,9 @@ import os
 import time
 from typing import List
 
-import httpx
-
 from app.providers.base import EmbeddingProvider, EmbeddingResult
+from app.utils.tracing import traced_to_thread
+from app.utils.upstream_limiter import upstream_client
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +30,7 @@ class OpenRouterEmbeddings:
         self.api_key = os.getenv("OPENROUTER_API_KEY", "")
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY not set")
-        self.client = httpx.Client(timeout=30.0)
+        self.client = upstream_client(timeout=30.0)
     
     def encode(self, texts: List[str], **kwargs) -> List[List[float]]:
         """Generate embeddings via API."""
@@ -175,7 +174,7 @@ class LocalEmbeddingProvider(EmbeddingProvider):
         self._ensure_model()
         
         # Run encoding in thread pool to avoid blocking
-        embeddings = await asyncio.to_thread(self._encode_sync, texts)
+        embeddings = await traced_to_thread(self._encode_sync, texts)
         
         latency = (time.perf_counter() - start) * 1000
         tokens_used = sum(len(t.split()) for t in texts)
@@ -211,7 +210,7 @@ class LocalEmbeddingProvider(EmbeddingProvider):
         self._ensure_model()
         
         # Run encoding in thread pool to avoid blocking
-        embedding = await asyncio.to_thread(self._encode_query_sync, query)
+        embedding = await traced_to_thread(self._encode_query_sync, query)
         
         latency = (time.perf_counter() - start) * 1000
         
@@ -0,0 +1,161 @@
+"""
+Metadata Index - Secondary index over candidate metadata for the local store.
+
+The Supabase RPC (hybrid_search_cv_chunks) applies FASE 1 metadata filters
+in SQL; locally they used to be left to the LLM after a full semantic search.
+SimpleVectorStore keeps this index over each CV's summary-chunk metadata so
+filters detected by RAGServiceV5._detect_metadata_filters narrow the CV set
+before any vector is scored:
+
+- boolean facets (speaks_french, has_mba, ...): one bitmap per facet, an int
+  whose bit i is set when the CV in slot i has the flag
+- numeric facets (total_experience_years, ...): (value, slot) pairs kept
+  sorted, so a range is a bisect plus a slice
+
+A query ANDs the bitmaps of every filter. Removed CVs leave a free slot that
+is compacted away once half the slots are unused.
+"""
+
+import logging
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Boolean flags set on the summary chunk by SmartChunkingService.chunk_cv
+BOOLEAN_FACETS = (
+    "speaks_english", "speaks_french", "speaks_spanish", "speaks_german", "speaks_chinese",
+    "has_mba", "has_phd",
+    "has_aws_cert", "has_azure_cert", "has_gcp_cert", "has_pmp", "has_cbap", "has_scrum",
+)
+
+NUMERIC_FACETS = ("total_experience_years", "avg_tenure_years", "job_hopping_score", "position_count")
+
+# Range filters -> (numeric facet, bound); min/max are inclusive, above/below strict
+RANGE_FILTERS = {
+    "min_experience": ("total_experience_years", "min"),
+    "max_experience": ("total_experience_years", "max"),
+    "above_experience": ("total_experience_years", "above"),
+    "below_experience": ("total_experience_years", "below"),
+}
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class MetadataIndex:
+    """Bitmap/sorted-array index of per-CV summary metadata."""
+
+    def __init__(self):
+        self._slot_of: Dict[str, int] = {}
+        self._cv_at: List[Optional[str]] = []
+        self._alive = 0
+        self._bitmaps: Dict[str, int] = dict.fromkeys(BOOLEAN_FACETS, 0)
+        self._sorted: Dict[str, List[Tuple[float, int]]] = {facet: [] for facet in NUMERIC_FACETS}
+        self._values: Dict[str, Dict[int, float]] = {facet: {} for facet in NUMERIC_FACETS}
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, cv_id: str) -> bool:
+        return cv_id in self._slot_of
+
+    @staticmethod
+    def supports(key: str) -> bool:
+        return key in BOOLEAN_FACETS or key in RANGE_FILTERS
+
+    def add(self, cv_id: str, metadata: Dict[str, Any]) -> None:
+        """Index (or re-index) a CV from its summary-chunk metadata."""
+        if cv_id in self._slot_of:
+            self.remove(cv_id)
+
+        slot = len(self._cv_at)
+        bit = 1 << slot
+        self._cv_at.append(cv_id)
+        self._slot_of[cv_id] = slot
+        self._alive |= bit
+
+        for facet in BOOLEAN_FACETS:
+            if metadata.get(facet):
+                self._bitmaps[facet] |= bit
+        for facet in NUMERIC_FACETS:
+            value = _float(metadata.get(facet))
+            self._values[facet][slot] = value
+            insort(self._sorted[facet], (value, slot))
+
+    def remove(self, cv_id: str) -> None:
+        slot = self._slot_of.pop(cv_id, None)
+        if slot is None:
+            return
+        clear = ~(1 << slot)
+        self._cv_at[slot] = None
+        self._alive &= clear
+        for facet in BOOLEAN_FACETS:
+            self._bitmaps[facet] &= clear
+        for facet in NUMERIC_FACETS:
+            pairs = self._sorted[facet]
+            del pairs[bisect_left(pairs, (self._values[facet].pop(slot), slot))]
+
+        if len(self._cv_at) > 64 and len(self._slot_of) * 2 < len(self._cv_at):
+            self._compact()
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def query(self, filters: Dict[str, Any], cv_ids: Optional[Iterable[str]] = None) -> List[str]:
+        """Indexed CVs (optionally within `cv_ids`) matching every supported filter."""
+        bits = self._alive if cv_ids is None else self._mask(cv_ids)
+        for key, value in filters.items():
+            if key in self._bitmaps:
+                bits &= self._bitmaps[key] if value else ~self._bitmaps[key]
+            elif key in RANGE_FILTERS:
+                facet, bound = RANGE_FILTERS[key]
+                bits &= self._range(facet, _float(value), bound)
+        return self._cv_ids_of(bits)
+
+    def _mask(self, cv_ids: Iterable[str]) -> int:
+        mask = 0
+        for cv_id in cv_ids:
+            slot = self._slot_of.get(cv_id)
+            if slot is not None:
+                mask |= 1 << slot
+        return mask
+
+    def _range(self, facet: str, value: float, bound: str) -> int:
+        pairs = self._sorted[facet]
+        if bound == "min":
+            selected = pairs[bisect_left(pairs, (value, -1)):]
+        elif bound == "above":
+            selected = pairs[bisect_right(pairs, (value, len(self._cv_at))):]
+        elif bound == "below":
+            selected = pairs[:bisect_left(pairs, (value, -1))]
+        else:
+            selected = pairs[:bisect_right(pairs, (value, len(self._cv_at)))]
+        mask = 0
+        for _, slot in selected:
+            mask |= 1 << slot
+        return mask
+
+    def _cv_ids_of(self, bits: int) -> List[str]:
+        cv_ids = []
+        while bits:
+            low = bits & -bits
+            cv_ids.append(self._cv_at[low.bit_length() - 1])
+            bits ^= low
+        return cv_ids
+
+    def _compact(self) -> None:
+        """Re-slot the live CVs after many removals."""
+        live = [
+            (cv_id, {facet: bool(self._bitmaps[facet] >> slot & 1) for facet in BOOLEAN_FACETS}
+             | {facet: self._values[facet][slot] for facet in NUMERIC_FACETS})
+            for slot, cv_id in enumerate(self._cv_at) if cv_id is not None
+        ]
+        self.clear()
+        for cv_id, metadata in live:
+            self.add(cv_id, metadata)
+        logger.debug(f"[METADATA_INDEX] Compacted to {len(live)} slots")
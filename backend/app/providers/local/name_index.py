@@ -0,0 +1,183 @@
+"""
+Candidate Name Index - Name -> cv_ids lookups for targeted retrieval.
+
+Single-candidate queries ("tell me about Maria López") used to scan every
+chunk of the local store with bidirectional substring matches. The index keeps
+each CV's normalized candidate name (accents folded, punctuation dropped,
+lowercase) in a token trie, so a query name resolves to cv_ids with:
+
+1. exact normalized name
+2. every query token equal to, or a prefix of, a token of the name
+   ("maria", "maria lop" -> "maria lopez")
+3. every name token present in the query ("dr maria lopez garcia" -> "maria lopez")
+4. fuzzy fallback: every query token within a small edit distance of a name
+   token ("mria lopes" -> "maria lopez")
+
+The first step that matches wins.
+"""
+
+import logging
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """'  María-José  LÓPEZ ' -> 'maria jose lopez'."""
+    folded = unicodedata.normalize("NFKD", name or "")
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", folded.lower()).strip()
+
+
+def _max_edits(token: str) -> int:
+    return 0 if len(token) < 4 else 1 if len(token) < 8 else 2
+
+
+def _within_distance(a: str, b: str, limit: int) -> bool:
+    """Edit distance(a, b) <= limit, adjacent transpositions counting as one edit."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+
+class _TrieNode:
+    __slots__ = ("children", "names")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.names: Set[str] = set()      # Names with a token under this prefix
+
+
+class CandidateNameIndex:
+    """Normalized candidate names -> cv_ids, with token prefix and fuzzy matching."""
+
+    def __init__(self):
+        self._cvs_by_name: Dict[str, Set[str]] = {}
+        self._name_of_cv: Dict[str, str] = {}
+        self._names_by_token: Dict[str, Set[str]] = {}
+        self._root = _TrieNode()
+
+    def __len__(self) -> int:
+        return len(self._name_of_cv)
+
+    def add(self, cv_id: str, candidate_name: str) -> None:
+        name = normalize_name(candidate_name)
+        if not name or self._name_of_cv.get(cv_id) == name:
+            return
+        self.remove(cv_id)
+        self._name_of_cv[cv_id] = name
+        cvs = self._cvs_by_name.setdefault(name, set())
+        if not cvs:
+            for token in set(name.split()):
+                self._names_by_token.setdefault(token, set()).add(name)
+                self._trie_update(token, name, add=True)
+        cvs.add(cv_id)
+
+    def remove(self, cv_id: str) -> None:
+        name = self._name_of_cv.pop(cv_id, None)
+        if name is None:
+            return
+        cvs = self._cvs_by_name[name]
+        cvs.discard(cv_id)
+        if not cvs:
+            del self._cvs_by_name[name]
+            for token in set(name.split()):
+                names = self._names_by_token[token]
+                names.discard(name)
+                if not names:
+                    del self._names_by_token[token]
+                self._trie_update(token, name, add=False)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def lookup(self, candidate_name: str, cv_ids: Optional[Iterable[str]] = None) -> List[str]:
+        """cv_ids whose candidate name matches, optionally restricted to `cv_ids`."""
+        query = normalize_name(candidate_name)
+        if not query:
+            return []
+        wanted = set(cv_ids) if cv_ids is not None else None
+
+        for step in (self._exact, self._token_prefixes, self._name_in_query, self._fuzzy):
+            names = step(query)
+            matched = sorted(
+                cv_id for name in names for cv_id in self._cvs_by_name[name]
+                if wanted is None or cv_id in wanted
+            )
+            if matched:
+                logger.debug(f"[NAME_INDEX] '{candidate_name}' -> {len(matched)} CV(s) via {step.__name__}")
+                return matched
+        return []
+
+    # --- matching steps -------------------------------------------------------
+
+    def _exact(self, query: str) -> Set[str]:
+        return {query} if query in self._cvs_by_name else set()
+
+    def _token_prefixes(self, query: str) -> Set[str]:
+        names: Optional[Set[str]] = None
+        for token in query.split():
+            node = self._root
+            for ch in token:
+                node = node.children.get(ch)
+                if node is None:
+                    return set()
+            names = set(node.names) if names is None else names & node.names
+            if not names:
+                return set()
+        return names or set()
+
+    def _name_in_query(self, query: str) -> Set[str]:
+        tokens = set(query.split())
+        hits: Dict[str, int] = {}
+        for token in tokens:
+            for name in self._names_by_token.get(token, ()):
+                hits[name] = hits.get(name, 0) + 1
+        return {name for name, count in hits.items() if count == len(set(name.split()))}
+
+    def _fuzzy(self, query: str) -> Set[str]:
+        names: Optional[Set[str]] = None
+        for token in query.split():
+            limit = _max_edits(token)
+            close = set()
+            if limit:
+                for vocab_token, token_names in self._names_by_token.items():
+                    if _within_distance(token, vocab_token, limit):
+                        close |= token_names
+            names = close if names is None else names & close
+            if not names:
+                return set()
+        return names or set()
+
+    def _trie_update(self, token: str, name: str, add: bool) -> None:
+        node = self._root
+        path = []
+        for ch in token:
+            if add:
+                node = node.children.setdefault(ch, _TrieNode())
+                node.names.add(name)
+            else:
+                path.append((node, ch))
+                node = node.children[ch]
+                node.names.discard(name)
+        if not add:
+            # Prune branches no name goes through anymore
+            for parent, ch in reversed(path):
+                if parent.children[ch].names:
+                    break
+                del parent.children[ch]
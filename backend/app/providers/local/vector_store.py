@@ -4,15 +4,20 @@ Local Vector Store with JSON persistence.
 This module provides persistent vector storage using JSON files with
 cosine similarity search. Works without external dependencies.
 """
-import asyncio
 import json
 import logging
 import math
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from app.config import settings
 from app.providers.base import SearchResult, VectorStoreProvider
+from app.providers.local.metadata_index import MetadataIndex
+from app.providers.local.name_index import CandidateNameIndex
+from app.services.candidate_profile_service import get_profile_store
+from app.services.incremental_indexing import content_hash
+from app.services.session_corpus_cache import get_session_corpus_cache
+from app.utils.tracing import traced_to_thread
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +30,8 @@ class SimpleVectorStore(VectorStoreProvider):
     - No external dependencies (pure Python)
     - JSON persistence to disk
     - Cosine similarity search
-    - Metadata filtering support
+    - Metadata filtering support (MetadataIndex over summary-chunk metadata)
+    - Candidate name lookups (CandidateNameIndex) for targeted retrieval
     """
     
     def __init__(self):
@@ -34,6 +40,10 @@ class SimpleVectorStore(VectorStoreProvider):
         self._storage_file = self._persist_dir / "vectors.json"
         self._documents: List[Dict[str, Any]] = []
         self._embeddings: List[List[float]] = []
+        self._metadata_index = MetadataIndex()
+        self._name_index = CandidateNameIndex()
+        self._docs_by_cv: Dict[str, Dict[str, Dict[str, Any]]] = {}  # cv_id -> chunk id -> doc
+        self._hash_index: Optional[Dict[str, int]] = None  # content hash -> row (built on demand)
         self._load()
         logger.info(f"SimpleVectorStore initialized. Documents: {len(self._documents)}")
     
@@ -45,11 +55,35 @@ class SimpleVectorStore(VectorStoreProvider):
                     data = json.load(f)
                     self._documents = data.get("documents", [])
                     self._embeddings = data.get("embeddings", [])
+                for doc in self._documents:
+                    self._index_document(doc)
                 logger.debug(f"Loaded {len(self._documents)} documents from disk")
             except Exception as e:
                 logger.warning(f"Failed to load vector store: {e}")
                 self._documents = []
                 self._embeddings = []
+                self._clear_indexes()
+    
+    def _index_document(self, doc: Dict[str, Any]) -> None:
+        """Keep the secondary indexes in step with an added/updated chunk."""
+        cv_id = doc["cv_id"]
+        metadata = doc.get("metadata", {})
+        self._docs_by_cv.setdefault(cv_id, {})[doc["id"]] = doc
+        if metadata.get("candidate_name"):
+            self._name_index.add(cv_id, metadata["candidate_name"])
+        # Summary chunks carry the CV-level facets the metadata index serves
+        if metadata.get("is_summary"):
+            self._metadata_index.add(cv_id, metadata)
+    
+    def _unindex_cv(self, cv_id: str) -> None:
+        self._docs_by_cv.pop(cv_id, None)
+        self._name_index.remove(cv_id)
+        self._metadata_index.remove(cv_id)
+    
+    def _clear_indexes(self) -> None:
+        self._docs_by_cv = {}
+        self._name_index.clear()
+        self._metadata_index.clear()
     
     def _save(self):
         """Save data to disk."""
@@ -101,6 +135,8 @@ class SimpleVectorStore(VectorStoreProvider):
         if not documents:
             return
         
+        self._hash_index = None
+        
         # Build index of existing docs by ID for upsert
         existing_ids = {doc["id"]: i for i, doc in enumerate(self._documents)}
         
@@ -123,9 +159,11 @@ class SimpleVectorStore(VectorStoreProvider):
                 # Add new
                 self._documents.append(doc_data)
                 self._embeddings.append(emb)
+            self._index_document(doc_data)
+        get_session_corpus_cache().invalidate_cvs({doc["cv_id"] for doc in documents})
         
         # Run save in thread pool to avoid blocking event loop
-        await asyncio.to_thread(self._save)
+        await traced_to_thread(self._save)
         logger.info(f"Added/updated {len(documents)} documents. Total: {len(self._documents)}")
     
     async def search(
@@ -152,11 +190,12 @@ class SimpleVectorStore(VectorStoreProvider):
         
         # Calculate similarities
         similarities = []
+        wanted = set(cv_ids) if cv_ids else None
         for i, emb in enumerate(self._embeddings):
             doc = self._documents[i]
             
             # Filter by cv_ids if provided
-            if cv_ids and doc["cv_id"] not in cv_ids:
+            if wanted is not None and doc["cv_id"] not in wanted:
                 continue
             
             sim = self._cosine_similarity(embedding, emb)
@@ -213,8 +252,12 @@ class SimpleVectorStore(VectorStoreProvider):
             for idx in reversed(indices_to_remove):
                 del self._documents[idx]
                 del self._embeddings[idx]
+            self._hash_index = None
             
             self._save()
+            self._unindex_cv(cv_id)
+            get_profile_store().delete(cv_id)
+            get_session_corpus_cache().invalidate_cvs([cv_id])
             logger.info(f"Deleted {len(indices_to_remove)} chunks for CV {cv_id}")
             return True
         except Exception as e:
@@ -227,7 +270,11 @@ class SimpleVectorStore(VectorStoreProvider):
             count = len(self._documents)
             self._documents = []
             self._embeddings = []
+            self._hash_index = None
             self._save()
+            self._clear_indexes()
+            get_profile_store().clear()
+            get_session_corpus_cache().clear()
             logger.info(f"Deleted all {count} documents")
             return True
         except Exception as e:
@@ -258,19 +305,116 @@ class SimpleVectorStore(VectorStoreProvider):
             "persist_dir": str(self._persist_dir)
         }
     
+    async def get_cv_metadata(self, cv_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Summary-chunk metadata (enriched at ingestion) per CV id."""
+        wanted = set(cv_ids)
+        result: Dict[str, Dict[str, Any]] = {}
+        for doc in self._documents:
+            cv_id = doc["cv_id"]
+            if cv_id not in wanted:
+                continue
+            metadata = doc.get("metadata", {})
+            if metadata.get("is_summary") or (cv_id not in result and doc.get("chunk_index") == 0):
+                result[cv_id] = {**metadata, "cv_id": cv_id, "filename": doc["filename"]}
+        return result
+    
+    async def get_cv_chunks(self, cv_ids: List[str]) -> tuple[List[Dict[str, Any]], List[List[float]]]:
+        """Every stored chunk of the CVs with its embedding (session working sets)."""
+        wanted = set(cv_ids)
+        rows, embeddings = [], []
+        for doc, emb in zip(self._documents, self._embeddings, strict=False):
+            if doc["cv_id"] in wanted:
+                rows.append(doc)
+                embeddings.append(emb)
+        return rows, embeddings
+    
+    async def get_embeddings_by_hash(self, hashes: Set[str], cv_ids: List[str]) -> Dict[str, List[float]]:
+        """Stored embeddings of chunk texts with these content hashes (any CV)."""
+        if self._hash_index is None:
+            self._hash_index = {content_hash(doc["content"]): i for i, doc in enumerate(self._documents)}
+        return {h: self._embeddings[self._hash_index[h]] for h in hashes if h in self._hash_index}
+    
+    async def delete_chunks(self, cv_id: str, keep_indexes: Set[int]) -> int:
+        """Delete the CV's chunks whose chunk_index is not kept (left over from a longer chunking)."""
+        stale = [
+            i for i, doc in enumerate(self._documents)
+            if doc["cv_id"] == cv_id and doc["chunk_index"] not in keep_indexes
+        ]
+        if not stale:
+            return 0
+        for idx in reversed(stale):
+            del self._documents[idx]
+            del self._embeddings[idx]
+        self._hash_index = None
+        self._unindex_cv(cv_id)
+        for doc in self._documents:
+            if doc["cv_id"] == cv_id:
+                self._index_document(doc)
+        await traced_to_thread(self._save)
+        get_session_corpus_cache().invalidate_cvs([cv_id])
+        return len(stale)
+    
+    def filter_cv_ids(
+        self,
+        filters: Dict[str, Any],
+        cv_ids: Optional[List[str]] = None
+    ) -> Optional[List[str]]:
+        """
+        CV ids passing the metadata filters, from the metadata index (no vector scoring).
+        
+        CVs without an indexed summary chunk cannot be evaluated and are kept.
+        Returns None when none of the filters is indexed.
+        """
+        indexable = {k: v for k, v in filters.items() if MetadataIndex.supports(k)}
+        if not indexable:
+            return None
+        
+        if cv_ids is None:
+            cv_ids = list(dict.fromkeys(doc["cv_id"] for doc in self._documents))
+        matched = set(self._metadata_index.query(indexable, cv_ids))
+        return [cv_id for cv_id in cv_ids if cv_id in matched or cv_id not in self._metadata_index]
+    
+    def is_metadata_indexed(self, cv_ids: List[str]) -> bool:
+        """True when every CV has indexed metadata (so filters can be fully answered)."""
+        return all(cv_id in self._metadata_index for cv_id in cv_ids)
+    
+    def get_summary_chunks(self, cv_ids: List[str]) -> List[Dict[str, Any]]:
+        """Summary chunk of each CV, in the shape of retrieved chunks (score=1.0)."""
+        chunks = []
+        for cv_id in cv_ids:
+            for doc in self._docs_by_cv.get(cv_id, {}).values():
+                metadata = doc.get("metadata", {})
+                if not metadata.get("is_summary"):
+                    continue
+                chunks.append({
+                    "content": doc["content"],
+                    "metadata": {**metadata, "cv_id": doc["cv_id"], "filename": doc["filename"]},
+                    "score": 1.0
+                })
+                break
+        return chunks
+    
+    def find_candidate_cv_ids(
+        self,
+        candidate_name: str,
+        cv_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """CV ids whose candidate name matches (see CandidateNameIndex.lookup)."""
+        return self._name_index.lookup(candidate_name, cv_ids or None)
+    
     def get_all_chunks_by_candidate(
         self, 
         candidate_name: str, 
         cv_ids: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
-        Get ALL chunks for a specific candidate (case-insensitive partial match).
+        Get ALL chunks for a specific candidate (name index lookup).
         
         This is used for targeted retrieval when querying about a specific person,
         ensuring we get their complete CV information, not just semantically similar chunks.
         
         Args:
-            candidate_name: Name to search for (partial match, case-insensitive)
+            candidate_name: Name to search for (normalized; token prefix and fuzzy match)
             cv_ids: Optional list of CV IDs to filter by (e.g., session CVs)
             
         Returns:
@@ -280,40 +424,28 @@ class SimpleVectorStore(VectorStoreProvider):
             logger.warning("[TARGETED_RETRIEVAL] No documents in vector store")
             return []
         
-        candidate_name_lower = candidate_name.lower().strip()
-        matching_chunks = []
-        
-        # Log available candidates for debugging
-        unique_candidates = set()
-        for doc in self._documents:
-            name = doc.get("metadata", {}).get("candidate_name", "")
-            if name:
-                unique_candidates.add(name)
-        
-        logger.info(f"[TARGETED_RETRIEVAL] Searching for '{candidate_name}' in {len(self._documents)} chunks")
-        logger.info(f"[TARGETED_RETRIEVAL] Available candidates: {unique_candidates}")
+        matched_cvs = self.find_candidate_cv_ids(candidate_name, cv_ids)
+        logger.info(
+            f"[TARGETED_RETRIEVAL] '{candidate_name}' -> {len(matched_cvs)} CV(s) "
+            f"among {len(self._name_index)} indexed candidates"
+        )
         
-        for doc in self._documents:
-            # Filter by cv_ids if provided
-            if cv_ids and doc["cv_id"] not in cv_ids:
-                continue
-            
-            doc_candidate = doc.get("metadata", {}).get("candidate_name", "").lower()
-            
-            # Partial match (either direction)
-            if candidate_name_lower in doc_candidate or doc_candidate in candidate_name_lower:
+        matching_chunks = []
+        for cv_id in matched_cvs:
+            for doc in self._docs_by_cv.get(cv_id, {}).values():
+                metadata = doc.get("metadata", {})
                 matching_chunks.append({
                     "content": doc["content"],
                     "metadata": {
                         "cv_id": doc["cv_id"],
                         "filename": doc["filename"],
-                        "candidate_name": doc.get("metadata", {}).get("candidate_name", ""),
-                        "section_type": doc.get("metadata", {}).get("section_type", "general"),
-                        "current_role": doc.get("metadata", {}).get("current_role", ""),
-                        "current_company": doc.get("metadata", {}).get("current_company", ""),
-                        "total_experience_years": doc.get("metadata", {}).get("total_experience_years", 0),
-                        "is_current": doc.get("metadata", {}).get("is_current", False),
-                        "is_summary": doc.get("metadata", {}).get("is_summary", False),
+                        "candidate_name": metadata.get("candidate_name", ""),
+                        "section_type": metadata.get("section_type", "general"),
+                        "current_role": metadata.get("current_role", ""),
+                        "current_company": metadata.get("current_company", ""),
+                        "total_experience_years": metadata.get("total_experience_years", 0),
+                        "is_current": metadata.get("is_current", False),
+                        "is_summary": metadata.get("is_summary", False),
                     },
                     "score": 1.0  # Direct match = highest confidence
                 })
@@ -98,6 +98,20 @@ class BM25Service:
             if len(existing.documents) == len(chunks):
                 return True  # Index already exists
         
+        index = self.create_index(chunks)
+        if index is None:
+            logger.warning(f"[BM25] No tokens to index for session {session_id}")
+            return False
+        
+        self._indices[session_id] = index
+        logger.info(f"[BM25] Built index for session {session_id}: {len(index.documents)} documents")
+        return True
+    
+    def create_index(self, chunks: List[Dict[str, Any]]) -> Optional[BM25Index]:
+        """BM25 index over chunks, not registered to any session (None if nothing to index)."""
+        if not self._bm25_available:
+            return None
+        
         from rank_bm25 import BM25Okapi
         
         # Tokenize all documents
@@ -128,21 +142,15 @@ class BM25Service:
                 documents.append(chunk)
         
         if not tokenized_corpus:
-            logger.warning(f"[BM25] No tokens to index for session {session_id}")
-            return False
+            return None
         
         # Build BM25 index
-        bm25 = BM25Okapi(tokenized_corpus)
-        
-        self._indices[session_id] = BM25Index(
+        return BM25Index(
             documents=documents,
             doc_ids=doc_ids,
-            _bm25=bm25,
+            _bm25=BM25Okapi(tokenized_corpus),
             _tokenized_corpus=tokenized_corpus
         )
-        
-        logger.info(f"[BM25] Built index for session {session_id}: {len(documents)} documents")
-        return True
     
     def search(
         self,
@@ -170,6 +178,16 @@ class BM25Service:
             logger.warning(f"[BM25] No index for session {session_id}")
             return []
         
+        return self.search_index(index, query, k, threshold)
+    
+    def search_index(
+        self,
+        index: BM25Index,
+        query: str,
+        k: int = 10,
+        threshold: float = 0.0
+    ) -> List[BM25Result]:
+        """Search a BM25 index directly (see create_index)."""
         # Tokenize query
         query_tokens = self._tokenize(query)
         if not query_tokens:
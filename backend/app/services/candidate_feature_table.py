@@ -0,0 +1,171 @@
+"""
+Candidate Feature Table - Columnar per-session features for bulk scoring.
+
+Built once per session corpus from the enriched summary-chunk metadata that
+SmartChunkingService.chunk_cv produces (skills, total_experience_years,
+education_*, languages, certifications, location). Scoring criteria and
+screening rules are then evaluated as numpy operations over all candidates
+at once.
+
+List fields (skills, languages, certifications) are stored as a bitset per
+candidate over the session's vocabulary for that field, so "has skill X" for
+every candidate is one vocabulary scan plus a single AND.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Same hierarchy as CandidateScoringService._score_education
+EDUCATION_LEVEL_POINTS = {
+    "phd": 100,
+    "doctorate": 100,
+    "master": 85,
+    "mba": 85,
+    "bachelor": 70,
+    "degree": 70,
+    "associate": 55,
+    "diploma": 50,
+    "certificate": 40,
+    "high school": 30
+}
+
+LIST_COLUMNS = ("skills", "languages", "certifications")
+
+# Short text columns, stored lowercase as numpy string arrays
+TEXT_COLUMNS = ("education", "education_level", "current_role", "location", "filename")
+
+
+def _split_list(value: Any) -> List[str]:
+    """Comma-separated metadata string (or list) -> clean list."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def _education_base(text: str) -> tuple:
+    """(points, detected level) for an education description."""
+    score, detected = 30, None
+    for level, points in EDUCATION_LEVEL_POINTS.items():
+        if level in text and points > score:
+            score, detected = points, level
+    return score, detected
+
+
+@dataclass
+class ListColumn:
+    """A list-valued field as per-candidate bitsets over its vocabulary."""
+    items: List[List[str]]          # Original values per candidate
+    vocab: Dict[str, int]           # lowercase value -> bit index
+    bits: np.ndarray                # (n, words) uint64
+    counts: np.ndarray              # (n,) int
+
+    @classmethod
+    def build(cls, items: List[List[str]]) -> "ListColumn":
+        vocab: Dict[str, int] = {}
+        for values in items:
+            for value in values:
+                vocab.setdefault(value.lower(), len(vocab))
+
+        words = max(1, (len(vocab) + 63) // 64)
+        bits = np.zeros((len(items), words), dtype=np.uint64)
+        for i, values in enumerate(items):
+            for value in values:
+                b = vocab[value.lower()]
+                bits[i, b // 64] |= np.uint64(1) << np.uint64(b % 64)
+
+        counts = np.array([len(values) for values in items], dtype=np.int64)
+        return cls(items=items, vocab=vocab, bits=bits, counts=counts)
+
+    def mask(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        """Bitset of vocabulary entries satisfying `predicate`."""
+        mask = np.zeros(self.bits.shape[1], dtype=np.uint64)
+        for value, b in self.vocab.items():
+            if predicate(value):
+                mask[b // 64] |= np.uint64(1) << np.uint64(b % 64)
+        return mask
+
+    def any(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        """(n,) bool: candidates with at least one value satisfying `predicate`."""
+        return (self.bits & self.mask(predicate)).any(axis=1)
+
+
+@dataclass
+class CandidateFeatureTable:
+    """Columnar features for every candidate of a session."""
+    cv_ids: List[str]
+    names: List[str]
+    lists: Dict[str, ListColumn]                # skills / languages / certifications
+    text: Dict[str, np.ndarray]                 # TEXT_COLUMNS, lowercase
+    full_text: List[str]                        # Whole CV text when known at ingestion
+    experience_years: np.ndarray                # (n,) float
+    education_points: np.ndarray                # (n,) float, hierarchy score
+    education_levels: List[str]                 # Detected hierarchy level
+    corpus_key: tuple = field(default_factory=tuple)
+
+    def __len__(self) -> int:
+        return len(self.cv_ids)
+
+    @classmethod
+    def from_metadata(cls, rows: List[Dict[str, Any]], corpus_key: tuple = ()) -> "CandidateFeatureTable":
+        """Build the table from per-CV summary metadata dicts."""
+        text: Dict[str, List[str]] = {name: [] for name in TEXT_COLUMNS}
+        education_points = []
+        education_levels = []
+        for r in rows:
+            education = " ".join(
+                str(r.get(k) or "") for k in ("education_level", "education_field", "education_institution")
+            ).strip().lower()
+            points, detected = _education_base(education)
+            education_points.append(points)
+            education_levels.append(detected)
+            text["education"].append(education)
+            text["education_level"].append(str(r.get("education_level") or "").lower())
+            text["current_role"].append(str(r.get("current_role") or "").lower())
+            text["location"].append(str(r.get("location") or "").lower())
+            text["filename"].append(str(r.get("filename") or "").lower())
+
+        return cls(
+            cv_ids=[r.get("cv_id", "unknown") for r in rows],
+            names=[r.get("candidate_name") or r.get("filename") or "Unknown" for r in rows],
+            lists={name: ListColumn.build([_split_list(r.get(name)) for r in rows]) for name in LIST_COLUMNS},
+            text={name: np.array(values, dtype=str) for name, values in text.items()},
+            full_text=[str(r.get("full_text") or "") for r in rows],
+            experience_years=np.array(
+                [float(r.get("total_experience_years") or 0) for r in rows], dtype=np.float64
+            ),
+            education_points=np.array(education_points, dtype=np.float64),
+            education_levels=education_levels,
+            corpus_key=corpus_key,
+        )
+
+    def candidate_data(self, i: int) -> Dict[str, Any]:
+        """Row `i` in the dict shape score_candidate/evaluate_candidate expect."""
+        data = {
+            "cv_id": self.cv_ids[i],
+            "candidate_name": self.names[i],
+            "experience_years": float(self.experience_years[i]),
+            "full_text": self.full_text[i],
+        }
+        for name, column in self.lists.items():
+            data[name] = column.items[i]
+        for name, values in self.text.items():
+            data[name] = str(values[i])
+        return data
+
+    def has_skill(self, skill: str) -> np.ndarray:
+        """(n,) bool: candidates having `skill` (substring match either way)."""
+        needle = skill.lower()
+        return self.lists["skills"].any(lambda value: needle in value or value in needle)
+
+    def text_contains(self, column: str, needle: str) -> np.ndarray:
+        """(n,) bool: lowercase `needle` occurs in each value of a text column."""
+        if len(self) == 0:
+            return np.zeros(0, dtype=bool)
+        return np.char.find(self.text[column], needle.lower()) >= 0
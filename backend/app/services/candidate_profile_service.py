@@ -0,0 +1,259 @@
+"""
+Candidate Profile Service - Per-CV facts computed once at ingestion.
+
+SmartChunkingService.chunk_cv spreads each CV's derived facts over its chunks
+(summary metadata, one chunk per position). Output modules and prompt
+builders used to re-derive them from whichever chunks a query retrieved, on
+every answer. A CandidateProfile gathers them once per cv_id when the CV is
+indexed:
+
+- positions (title, company, years, duration), tenure stats, job hopping
+- employment gaps as (last year, next start year) pairs
+- skills, languages, certifications, education, seniority, location
+
+Profiles are persisted next to the vectors ({chroma_persist_dir}/
+candidate_profiles.json) and read by cv_id. CVs indexed before profiles
+existed (or by the legacy ChunkingService) have none; readers then fall back
+to chunk metadata as before.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Gaps longer than this many years between positions are recorded
+# (same threshold as SmartChunkingService._detect_employment_gaps)
+GAP_THRESHOLD_YEARS = 1
+
+# Boolean facets set on the summary chunk (speaks_*, has_*)
+FLAG_PREFIXES = ("speaks_", "has_")
+
+
+def _split_list(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+@dataclass
+class PositionRecord:
+    """One job position, as extracted by SmartChunkingService."""
+    title: str
+    company: str = ""
+    start_year: Optional[int] = None
+    end_year: Optional[int] = None
+    is_current: bool = False
+    duration_years: float = 0.0
+
+
+@dataclass
+class CandidateProfile:
+    """Everything the answer pipeline needs to know about one CV."""
+    cv_id: str
+    candidate_name: str
+    filename: str = ""
+    current_role: str = ""
+    current_company: str = ""
+    seniority_level: str = ""
+    total_experience_years: float = 0.0
+    positions: List[PositionRecord] = field(default_factory=list)   # Oldest first
+    position_count: int = 0
+    avg_tenure_years: float = 0.0
+    job_hopping_score: float = 0.0
+    employment_gaps: List[Tuple[int, int]] = field(default_factory=list)
+    skills: List[str] = field(default_factory=list)
+    languages: List[str] = field(default_factory=list)
+    language_primary: str = ""
+    certifications: List[str] = field(default_factory=list)
+    education_level: str = ""
+    education_field: str = ""
+    education_institution: str = ""
+    location: str = ""
+    flags: Dict[str, bool] = field(default_factory=dict)            # speaks_french, has_mba, ...
+    summary_metadata: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def employment_gaps_count(self) -> int:
+        return len(self.employment_gaps)
+
+    def as_metadata(self) -> Dict[str, Any]:
+        """Summary-chunk shaped metadata, for readers written against chunk metadata."""
+        return {
+            **self.summary_metadata,
+            "cv_id": self.cv_id,
+            "filename": self.filename,
+            "candidate_name": self.candidate_name,
+            "has_enriched_metadata": True,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CandidateProfile":
+        data = dict(data)
+        data["positions"] = [PositionRecord(**p) for p in data.get("positions", [])]
+        data["employment_gaps"] = [tuple(g) for g in data.get("employment_gaps", [])]
+        return cls(**data)
+
+
+def _employment_gaps(positions: List[PositionRecord]) -> List[Tuple[int, int]]:
+    dated = sorted(
+        (p for p in positions if p.start_year and p.end_year),
+        key=lambda p: p.start_year
+    )
+    return [
+        (prev.end_year, nxt.start_year)
+        for prev, nxt in zip(dated, dated[1:], strict=False)
+        if nxt.start_year - prev.end_year > GAP_THRESHOLD_YEARS
+    ]
+
+
+def build_profile(chunks: List[Dict[str, Any]]) -> Optional[CandidateProfile]:
+    """Profile of one CV from its chunk_cv output; None without a summary chunk."""
+    summary = next((c for c in chunks if c.get("metadata", {}).get("is_summary")), None)
+    if summary is None:
+        return None
+    meta = summary["metadata"]
+
+    positions = []
+    for chunk in chunks:
+        pmeta = chunk.get("metadata", {})
+        if pmeta.get("section_type") != "experience" or not pmeta.get("job_title"):
+            continue
+        positions.append(PositionRecord(
+            title=pmeta["job_title"],
+            company=pmeta.get("company") or "",
+            start_year=pmeta.get("start_year"),
+            end_year=pmeta.get("end_year"),
+            is_current=bool(pmeta.get("is_current")),
+            duration_years=float(pmeta.get("duration_years") or 0.0)
+        ))
+    # Chronological; undated positions first, in CV order
+    positions.sort(key=lambda p: p.start_year or 0)
+
+    return CandidateProfile(
+        cv_id=summary["cv_id"],
+        candidate_name=meta.get("candidate_name", ""),
+        filename=summary.get("filename", ""),
+        current_role=meta.get("current_role") or "",
+        current_company=meta.get("current_company") or "",
+        seniority_level=meta.get("seniority_level") or "",
+        total_experience_years=float(meta.get("total_experience_years") or 0.0),
+        positions=positions,
+        position_count=int(meta.get("position_count") or len(positions)),
+        avg_tenure_years=float(meta.get("avg_tenure_years") or 0.0),
+        job_hopping_score=float(meta.get("job_hopping_score") or 0.0),
+        employment_gaps=_employment_gaps(positions),
+        skills=_split_list(meta.get("skills")),
+        languages=_split_list(meta.get("languages")),
+        language_primary=meta.get("language_primary") or "",
+        certifications=_split_list(meta.get("certifications")),
+        education_level=meta.get("education_level") or "",
+        education_field=meta.get("education_field") or "",
+        education_institution=meta.get("education_institution") or "",
+        location=meta.get("location") or "",
+        flags={k: bool(v) for k, v in meta.items() if k.startswith(FLAG_PREFIXES)},
+        summary_metadata=dict(meta)
+    )
+
+
+def chunk_cv_id(chunk: Dict[str, Any]) -> str:
+    """cv_id of a chunk, whether retrieved (metadata) or freshly chunked (top level)."""
+    return chunk.get("metadata", {}).get("cv_id") or chunk.get("cv_id") or ""
+
+
+class CandidateProfileStore:
+    """cv_id -> CandidateProfile, persisted as JSON next to the vector store."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self._path = path or Path(settings.chroma_persist_dir) / "candidate_profiles.json"
+        self._profiles: Dict[str, CandidateProfile] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self._path.exists():
+            return
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._profiles = {cv_id: CandidateProfile.from_dict(p) for cv_id, p in data.items()}
+            logger.debug(f"[PROFILES] Loaded {len(self._profiles)} candidate profiles")
+        except Exception as e:
+            logger.warning(f"[PROFILES] Failed to load candidate profiles: {e}")
+            self._profiles = {}
+
+    def _save(self) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._path, "w", encoding="utf-8") as f:
+                json.dump({cv_id: p.to_dict() for cv_id, p in self._profiles.items()}, f, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"[PROFILES] Failed to save candidate profiles: {e}")
+
+    def index_cv_chunks(self, chunks: List[Dict[str, Any]]) -> List[CandidateProfile]:
+        """Build and store the profiles of the CVs in a batch of chunk_cv output."""
+        by_cv: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk in chunks:
+            by_cv.setdefault(chunk_cv_id(chunk), []).append(chunk)
+
+        built = [p for p in (build_profile(cv_chunks) for cv_chunks in by_cv.values()) if p]
+        if built:
+            with self._lock:
+                for profile in built:
+                    self._profiles[profile.cv_id] = profile
+                self._save()
+            logger.info(f"[PROFILES] Indexed {len(built)} candidate profile(s)")
+        return built
+
+    def get(self, cv_id: str) -> Optional[CandidateProfile]:
+        return self._profiles.get(cv_id)
+
+    def get_many(self, cv_ids: Iterable[str]) -> Dict[str, CandidateProfile]:
+        return {cv_id: self._profiles[cv_id] for cv_id in cv_ids if cv_id in self._profiles}
+
+    def for_chunks(self, chunks: List[Dict[str, Any]]) -> Dict[str, CandidateProfile]:
+        """Profiles of the CVs the given chunks belong to."""
+        return self.get_many({chunk_cv_id(c) for c in chunks})
+
+    def for_candidate(self, chunks: List[Dict[str, Any]]) -> Optional[CandidateProfile]:
+        """Profile of a single candidate's chunks (first chunk with a known cv_id)."""
+        for chunk in chunks:
+            profile = self._profiles.get(chunk_cv_id(chunk))
+            if profile:
+                return profile
+        return None
+
+    def delete(self, cv_id: str) -> None:
+        with self._lock:
+            if self._profiles.pop(cv_id, None) is not None:
+                self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles = {}
+            self._save()
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+
+_profile_store: Optional[CandidateProfileStore] = None
+
+
+def get_profile_store() -> CandidateProfileStore:
+    """Get singleton instance of CandidateProfileStore."""
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = CandidateProfileStore()
+    return _profile_store
@@ -6,10 +6,15 @@ Allows customizing weights for different criteria.
 """
 
 import logging
+import time
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
+import numpy as np
+
+from app.services.candidate_feature_table import CandidateFeatureTable
+
 logger = logging.getLogger(__name__)
 
 
@@ -134,6 +139,8 @@ class CandidateScoringService:
     def __init__(self):
         self._profiles: Dict[str, ScoringProfile] = {}
         self._session_profiles: Dict[str, str] = {}  # session_id -> profile_id
+        self._cv_features: Dict[str, Dict[str, Any]] = {}  # cv_id -> summary metadata
+        self._session_tables: Dict[str, CandidateFeatureTable] = {}  # session_id -> table
     
     def create_profile(
         self,
@@ -193,6 +200,28 @@ class CandidateScoringService:
         self._session_profiles[session_id] = profile_id
         return True
     
+    def _resolve_profile(
+        self,
+        profile_id: Optional[str],
+        session_id: Optional[str]
+    ) -> ScoringProfile:
+        """Explicit profile, else the session's assigned one, else the default."""
+        if profile_id:
+            profile = self._profiles.get(profile_id)
+        elif session_id:
+            assigned_id = self._session_profiles.get(session_id)
+            profile = self._profiles.get(assigned_id) if assigned_id else None
+        else:
+            profile = None
+        
+        if not profile:
+            profile = ScoringProfile(
+                id="default",
+                name="Default Profile",
+                weights=DEFAULT_WEIGHTS.copy()
+            )
+        return profile
+    
     def score_candidate(
         self,
         candidate_data: Dict[str, Any],
@@ -211,22 +240,7 @@ class CandidateScoringService:
         Returns:
             CandidateScore with detailed breakdown
         """
-        # Get profile
-        if profile_id:
-            profile = self._profiles.get(profile_id)
-        elif session_id:
-            assigned_id = self._session_profiles.get(session_id)
-            profile = self._profiles.get(assigned_id) if assigned_id else None
-        else:
-            profile = None
-        
-        # Use default profile if none specified
-        if not profile:
-            profile = ScoringProfile(
-                id="default",
-                name="Default Profile",
-                weights=DEFAULT_WEIGHTS.copy()
-            )
+        profile = self._resolve_profile(profile_id, session_id)
         
         candidate_id = candidate_data.get("cv_id", candidate_data.get("id", "unknown"))
         candidate_name = candidate_data.get("name", candidate_data.get("candidate_name", "Unknown"))
@@ -547,6 +561,178 @@ class CandidateScoringService:
             return "Weak match - Significant gaps in requirements"
         return "Not recommended - Does not meet key requirements"
     
+    # =========================================================================
+    # BULK SESSION SCORING
+    # =========================================================================
+    
+    def index_cv_chunks(self, chunks: List[Dict[str, Any]]) -> None:
+        """Record a CV's summary features from chunk_cv output at ingestion."""
+        summary = next((c for c in chunks if c.get("metadata", {}).get("is_summary")), None)
+        if summary is None:
+            return
+        cv_id = summary["cv_id"]
+        self._cv_features[cv_id] = {
+            **summary["metadata"],
+            "cv_id": cv_id,
+            "filename": summary.get("filename", ""),
+            "full_text": "\n".join(c.get("content", "") for c in chunks),
+        }
+        self._invalidate_cv(cv_id)
+    
+    def _invalidate_cv(self, cv_id: str) -> None:
+        for session_id, table in list(self._session_tables.items()):
+            if cv_id in table.corpus_key:
+                del self._session_tables[session_id]
+    
+    def add_cv_metadata(self, metadata_by_cv: Dict[str, Dict[str, Any]]) -> None:
+        """Cache summary metadata fetched from the vector store."""
+        for cv_id, metadata in metadata_by_cv.items():
+            self._cv_features[cv_id] = {**metadata, "cv_id": cv_id}
+    
+    async def ensure_features(self, cv_ids: List[str], vector_store: Any) -> None:
+        """Load features for CVs indexed before this process started."""
+        missing = [cv_id for cv_id in cv_ids if cv_id not in self._cv_features]
+        if missing:
+            self.add_cv_metadata(await vector_store.get_cv_metadata(missing))
+    
+    def get_feature_table(self, session_id: str, cv_ids: List[str]) -> CandidateFeatureTable:
+        """Columnar features for a session, rebuilt only when its corpus changes."""
+        corpus_key = tuple(sorted(cv_id for cv_id in cv_ids if cv_id in self._cv_features))
+        table = self._session_tables.get(session_id)
+        if table is None or table.corpus_key != corpus_key:
+            start = time.perf_counter()
+            table = CandidateFeatureTable.from_metadata(
+                [self._cv_features[cv_id] for cv_id in corpus_key],
+                corpus_key=corpus_key
+            )
+            self._session_tables[session_id] = table
+            logger.info(
+                f"[SCORING] Built feature table for session {session_id}: "
+                f"{len(table)} CVs, {len(table.lists['skills'].vocab)} skills in "
+                f"{(time.perf_counter() - start) * 1000:.1f}ms"
+            )
+        return table
+    
+    def score_table(self, table: CandidateFeatureTable, profile: ScoringProfile) -> Dict[ScoringCriteria, np.ndarray]:
+        """Raw 0-100 score per criterion for every candidate of the table.
+        
+        Mirrors the per-candidate `_score_*` rules without a query context.
+        """
+        n = len(table)
+        raw: Dict[ScoringCriteria, np.ndarray] = {}
+        for weight in profile.weights:
+            criteria = weight.criteria
+            if criteria == ScoringCriteria.SKILLS_MATCH:
+                raw[criteria] = self._score_skills_vectorized(table, profile)
+            elif criteria == ScoringCriteria.EXPERIENCE:
+                raw[criteria] = self._score_experience_vectorized(table, profile)
+            elif criteria == ScoringCriteria.EDUCATION:
+                score = table.education_points.copy()
+                if profile.required_education:
+                    meets = table.text_contains("education", profile.required_education)
+                    score = np.where(meets, np.minimum(100, score + 10), score)
+                raw[criteria] = score
+            elif criteria == ScoringCriteria.RELEVANCE:
+                raw[criteria] = np.full(n, 70.0)
+            elif criteria == ScoringCriteria.CERTIFICATIONS:
+                count = table.lists["certifications"].counts
+                raw[criteria] = np.where(count == 0, 50.0, np.minimum(100.0, 50 + count * 15.0))
+            elif criteria == ScoringCriteria.LANGUAGES:
+                count = table.lists["languages"].counts
+                raw[criteria] = np.where(count == 0, 50.0, np.minimum(100.0, 50 + count * 20.0))
+            elif criteria == ScoringCriteria.LOCATION:
+                if not profile.preferred_locations:
+                    raw[criteria] = np.full(n, 80.0)
+                else:
+                    prefs = [p.lower() for p in profile.preferred_locations]
+                    match = np.fromiter(
+                        (any(p in loc or loc in p for p in prefs) for loc in table.text["location"]),
+                        dtype=bool, count=n
+                    )
+                    raw[criteria] = np.where(match, 100.0, 60.0)
+            else:
+                raw[criteria] = np.zeros(n)
+        return raw
+    
+    def _score_skills_vectorized(self, table: CandidateFeatureTable, profile: ScoringProfile) -> np.ndarray:
+        required = profile.required_skills
+        preferred = profile.preferred_skills
+        if not required and not preferred:
+            return np.minimum(100.0, table.lists["skills"].counts * 10.0)
+        
+        score = np.zeros(len(table))
+        if required:
+            hits = sum(table.has_skill(skill).astype(np.float64) for skill in required)
+            score += hits / len(required) * 70
+        if preferred:
+            hits = sum(table.has_skill(skill).astype(np.float64) for skill in preferred)
+            score += hits / len(preferred) * 30
+        return score
+    
+    def _score_experience_vectorized(self, table: CandidateFeatureTable, profile: ScoringProfile) -> np.ndarray:
+        years = table.experience_years
+        min_years = profile.min_experience_years
+        ideal_years = profile.ideal_experience_years
+        
+        below = (years / min_years) * 50 if min_years > 0 else np.full(len(years), 50.0)
+        range_size = ideal_years - min_years
+        progress = (years - min_years) / range_size if range_size > 0 else np.ones(len(years))
+        between = 50 + progress * 50
+        return np.where(years < min_years, below, np.where(years >= ideal_years, 100.0, between))
+    
+    def score_session(
+        self,
+        session_id: str,
+        cv_ids: List[str],
+        profile_id: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 50
+    ) -> Dict[str, Any]:
+        """Rank every CV of a session against a profile in one vectorized pass.
+        
+        Features must already be cached (`index_cv_chunks` at ingestion or
+        `add_cv_metadata` for CVs indexed before startup). Full breakdowns are
+        only built for the requested page.
+        """
+        start = time.perf_counter()
+        profile = self._resolve_profile(profile_id, session_id)
+        table = self.get_feature_table(session_id, cv_ids)
+        raw = self.score_table(table, profile)
+        
+        total = np.zeros(len(table))
+        for weight in profile.weights:
+            total += raw[weight.criteria] * weight.weight
+        
+        # Stable sort: ties keep corpus order
+        order = np.argsort(-total, kind="stable")
+        page = max(1, page)
+        page_size = max(1, page_size)
+        page_rows = order[(page - 1) * page_size: page * page_size]
+        
+        stored_profile_id = profile.id if profile.id in self._profiles else None
+        results = []
+        for rank, i in enumerate(page_rows, start=(page - 1) * page_size + 1):
+            score = self.score_candidate(table.candidate_data(int(i)), profile_id=stored_profile_id)
+            entry = score.to_dict()
+            entry["rank"] = rank
+            results.append(entry)
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"[SCORING] Ranked {len(table)} CVs for session {session_id} "
+            f"(profile '{profile.name}') in {elapsed_ms:.1f}ms"
+        )
+        return {
+            "session_id": session_id,
+            "profile_id": profile.id,
+            "total": len(table),
+            "missing": len(cv_ids) - len(table),
+            "page": page,
+            "page_size": page_size,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "results": results,
+        }
+    
     def get_profile(self, profile_id: str) -> Optional[ScoringProfile]:
         """Get a scoring profile."""
         return self._profiles.get(profile_id)
@@ -8,9 +8,8 @@ import logging
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.config import settings, timeouts
+from app.utils.upstream_limiter import upstream_async_client
 
 logger = logging.getLogger(__name__)
 
@@ -216,7 +215,7 @@ class ClaimVerifierService:
         prompt = CLAIM_EXTRACTION_PROMPT.format(response=response[:3000])
         from app.providers.base import get_openrouter_url
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with upstream_async_client(timeout=30.0) as client:
             resp = await client.post(
                 get_openrouter_url("chat/completions"),
                 headers={
@@ -289,7 +288,7 @@ class ClaimVerifierService:
         
         try:
             from app.providers.base import get_openrouter_url
-            async with httpx.AsyncClient(timeout=timeouts.HTTP_SHORT) as client:
+            async with upstream_async_client(timeout=timeouts.HTTP_SHORT) as client:
                 resp = await client.post(
                     get_openrouter_url("chat/completions"),
                     headers={
@@ -3,10 +3,22 @@ Evaluation Service for CV Screener.
 
 This module provides logging and metrics collection for RAG system evaluation.
 All queries, responses, and metrics are logged for analysis and improvement.
+
+Storage layout (per day, in log_dir):
+- queries_YYYYMMDD.jsonl   full query log (append-only, source of truth)
+- stats_YYYYMMDD.json      pre-aggregated counters + latency sketch, updated on
+                           every log_query so dashboards never re-scan the log
+- index_YYYYMMDD.jsonl     compact secondary index of low-confidence queries and
+                           guardrail rejections for the detail views
+
+Days logged before the aggregates existed are rebuilt from the JSONL once.
 """
 import json
 import logging
-from dataclasses import asdict, dataclass
+import math
+import os
+import threading
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -42,6 +54,135 @@ class DailyStats:
     avg_llm_ms: float
     low_confidence_count: int
     unique_sessions: int
+    p50_latency_ms: float = 0.0
+    p95_latency_ms: float = 0.0
+    p99_latency_ms: float = 0.0
+
+
+class LatencySketch:
+    """
+    Mergeable quantile sketch with bounded relative error (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so any quantile is within
+    `relative_accuracy` of the true value and memory is O(log range).
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other: "LatencySketch") -> None:
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Bucket midpoint (in relative terms)
+                return 2 * self._gamma ** key / (self._gamma + 1)
+        return 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "buckets": {str(k): v for k, v in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencySketch":
+        sketch = cls(data.get("relative_accuracy", 0.01))
+        sketch.zero_count = data.get("zero_count", 0)
+        sketch.count = data.get("count", 0)
+        sketch.buckets = {int(k): v for k, v in data.get("buckets", {}).items()}
+        return sketch
+
+
+@dataclass
+class _DailyAggregate:
+    """Rolling counters for one day, persisted as stats_YYYYMMDD.json."""
+    date: str
+    total_queries: int = 0
+    confidence_sum: float = 0.0
+    guardrail_rejections: int = 0
+    low_confidence_count: int = 0
+    latency_sum_ms: float = 0.0
+    embedding_sum_ms: float = 0.0
+    search_sum_ms: float = 0.0
+    llm_sum_ms: float = 0.0
+    sessions: set = field(default_factory=set)
+    latency_sketch: LatencySketch = field(default_factory=LatencySketch)
+
+    def add(self, entry: Dict[str, Any], low_confidence_threshold: float) -> None:
+        metrics = entry.get("metrics") or {}
+        confidence = entry.get("confidence_score", 0) or 0
+        total_ms = metrics.get("total_ms", 0) or 0
+        self.total_queries += 1
+        self.confidence_sum += confidence
+        if not entry.get("guardrail_passed", True):
+            self.guardrail_rejections += 1
+        if confidence < low_confidence_threshold:
+            self.low_confidence_count += 1
+        self.latency_sum_ms += total_ms
+        self.embedding_sum_ms += metrics.get("embedding_ms", 0) or 0
+        self.search_sum_ms += metrics.get("search_ms", 0) or 0
+        self.llm_sum_ms += metrics.get("llm_ms", 0) or 0
+        if entry.get("session_id"):
+            self.sessions.add(entry["session_id"])
+        self.latency_sketch.add(total_ms)
+
+    def to_stats(self) -> DailyStats:
+        n = self.total_queries or 1
+        return DailyStats(
+            date=self.date,
+            total_queries=self.total_queries,
+            avg_confidence=self.confidence_sum / n if self.total_queries else 0,
+            guardrail_rejections=self.guardrail_rejections,
+            avg_latency_ms=self.latency_sum_ms / n if self.total_queries else 0,
+            avg_embedding_ms=self.embedding_sum_ms / n if self.total_queries else 0,
+            avg_search_ms=self.search_sum_ms / n if self.total_queries else 0,
+            avg_llm_ms=self.llm_sum_ms / n if self.total_queries else 0,
+            low_confidence_count=self.low_confidence_count,
+            unique_sessions=len(self.sessions),
+            p50_latency_ms=self.latency_sketch.quantile(0.50),
+            p95_latency_ms=self.latency_sketch.quantile(0.95),
+            p99_latency_ms=self.latency_sketch.quantile(0.99),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {k: v for k, v in self.__dict__.items() if k not in ("sessions", "latency_sketch")}
+        data["sessions"] = sorted(self.sessions)
+        data["latency_sketch"] = self.latency_sketch.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_DailyAggregate":
+        data = dict(data)
+        sessions = set(data.pop("sessions", []))
+        sketch = LatencySketch.from_dict(data.pop("latency_sketch", {}))
+        return cls(**data, sessions=sessions, latency_sketch=sketch)
 
 
 class EvalService:
@@ -50,12 +191,16 @@ class EvalService:
     
     Features:
     - JSONL logging for all queries
-    - Daily statistics aggregation
-    - Low confidence query tracking
+    - Daily statistics aggregation (incremental, O(1) per query)
+    - Low confidence query tracking (secondary index)
+    - Latency percentiles (p50/p95/p99 sketches)
     - Metrics analysis
     """
     
     LOW_CONFIDENCE_THRESHOLD = 0.5
+    # Entries below this confidence go to the secondary index, so detail
+    # queries with thresholds up to this value never touch the full log
+    INDEX_CONFIDENCE_CEILING = 0.7
     
     def __init__(self, log_dir: str = None):
         """
@@ -71,6 +216,10 @@ class EvalService:
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
         
+        # RAG services create their own EvalService; instances writing to the
+        # same directory share one lock and aggregate cache
+        self._lock, self._aggregates = _shared_state(self.log_dir)
+        
         logger.info(f"EvalService initialized. Log dir: {self.log_dir}")
     
     def _get_log_file(self, date: str = None) -> Path:
@@ -79,6 +228,17 @@ class EvalService:
             date = datetime.now().strftime('%Y%m%d')
         return self.log_dir / f"queries_{date}.jsonl"
     
+    def _get_stats_file(self, date: str) -> Path:
+        return self.log_dir / f"stats_{date}.json"
+    
+    def _get_index_file(self, date: str) -> Path:
+        return self.log_dir / f"index_{date}.jsonl"
+    
+    @staticmethod
+    def _recent_dates(days: int) -> List[str]:
+        now = datetime.now()
+        return [(now - timedelta(days=i)).strftime('%Y%m%d') for i in range(days)]
+    
     def log_query(
         self,
         query: str,
@@ -107,29 +267,14 @@ class EvalService:
             True if logging succeeded
         """
         try:
-            confidence = hallucination_check.get("confidence_score", 0.0)
-            
-            entry = QueryLogEntry(
-                timestamp=datetime.now().isoformat(),
-                session_id=session_id,
-                query=query,
-                response=response[:2000] if len(response) > 2000 else response,  # Truncate long responses
-                sources=sources,
-                metrics=metrics,
-                hallucination_check={
-                    k: v for k, v in hallucination_check.items()
-                    if k in ['is_valid', 'confidence_score', 'warnings', 'verified_cv_ids', 'unverified_cv_ids']
-                },
-                guardrail_passed=guardrail_passed,
-                confidence_score=confidence,
-                mode=mode
+            record = self.build_record(
+                query, response, sources, metrics, hallucination_check,
+                guardrail_passed, session_id=session_id, mode=mode
             )
-            
-            log_file = self._get_log_file()
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+            self.log_records([record])
             
             # Log warning for low confidence
+            confidence = record["confidence_score"]
             if confidence < self.LOW_CONFIDENCE_THRESHOLD:
                 logger.warning(f"Low confidence query logged: {confidence:.2f}")
             else:
@@ -141,6 +286,59 @@ class EvalService:
             logger.error(f"Failed to log query: {e}")
             return False
     
+    @staticmethod
+    def build_record(
+        query: str,
+        response: str,
+        sources: List[Dict[str, Any]],
+        metrics: Dict[str, float],
+        hallucination_check: Dict[str, Any],
+        guardrail_passed: bool,
+        session_id: Optional[str] = None,
+        mode: str = "local"
+    ) -> Dict[str, Any]:
+        """Query log record as written by log_query (arguments as in log_query)."""
+        entry = QueryLogEntry(
+            timestamp=datetime.now().isoformat(),
+            session_id=session_id,
+            query=query,
+            response=response[:2000] if len(response) > 2000 else response,  # Truncate long responses
+            sources=sources,
+            metrics=metrics,
+            hallucination_check={
+                k: v for k, v in hallucination_check.items()
+                if k in ['is_valid', 'confidence_score', 'warnings', 'verified_cv_ids', 'unverified_cv_ids']
+            },
+            guardrail_passed=guardrail_passed,
+            confidence_score=hallucination_check.get("confidence_score", 0.0),
+            mode=mode
+        )
+        return asdict(entry)
+    
+    def log_records(self, records: List[Dict[str, Any]]) -> None:
+        """Append a batch of records: one write per file and one aggregate save per day."""
+        by_date: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_date.setdefault(record["timestamp"][:10].replace("-", ""), []).append(record)
+        
+        with self._lock:
+            for date, day_records in by_date.items():
+                # Load (or rebuild) the aggregate before appending so a rebuild
+                # from the JSONL doesn't count these entries twice
+                aggregate = self._get_aggregate(date)
+                with open(self._get_log_file(date), "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in day_records))
+                index_lines = []
+                for record in day_records:
+                    aggregate.add(record, self.LOW_CONFIDENCE_THRESHOLD)
+                    index_record = self._index_record(record, date)
+                    if index_record:
+                        index_lines.append(json.dumps(index_record, ensure_ascii=False) + "\n")
+                self._save_aggregate(aggregate)
+                if index_lines:
+                    with open(self._get_index_file(date), "a", encoding="utf-8") as f:
+                        f.writelines(index_lines)
+    
     def get_daily_stats(self, date: str = None) -> DailyStats:
         """
         Get statistics for a specific day.
@@ -154,65 +352,25 @@ class EvalService:
         if date is None:
             date = datetime.now().strftime('%Y%m%d')
         
-        log_file = self._get_log_file(date)
-        
-        if not log_file.exists():
-            return DailyStats(
-                date=date,
-                total_queries=0,
-                avg_confidence=0.0,
-                guardrail_rejections=0,
-                avg_latency_ms=0.0,
-                avg_embedding_ms=0.0,
-                avg_search_ms=0.0,
-                avg_llm_ms=0.0,
-                low_confidence_count=0,
-                unique_sessions=0
-            )
-        
-        entries = self._read_log_file(log_file)
-        
-        if not entries:
-            return DailyStats(
-                date=date,
-                total_queries=0,
-                avg_confidence=0.0,
-                guardrail_rejections=0,
-                avg_latency_ms=0.0,
-                avg_embedding_ms=0.0,
-                avg_search_ms=0.0,
-                avg_llm_ms=0.0,
-                low_confidence_count=0,
-                unique_sessions=0
-            )
-        
-        # Calculate aggregates
-        confidences = [e.get("confidence_score", 0) for e in entries]
-        latencies = [e.get("metrics", {}).get("total_ms", 0) for e in entries]
-        embedding_ms = [e.get("metrics", {}).get("embedding_ms", 0) for e in entries]
-        search_ms = [e.get("metrics", {}).get("search_ms", 0) for e in entries]
-        llm_ms = [e.get("metrics", {}).get("llm_ms", 0) for e in entries]
-        
-        return DailyStats(
-            date=date,
-            total_queries=len(entries),
-            avg_confidence=sum(confidences) / len(confidences) if confidences else 0,
-            guardrail_rejections=sum(1 for e in entries if not e.get("guardrail_passed", True)),
-            avg_latency_ms=sum(latencies) / len(latencies) if latencies else 0,
-            avg_embedding_ms=sum(embedding_ms) / len(embedding_ms) if embedding_ms else 0,
-            avg_search_ms=sum(search_ms) / len(search_ms) if search_ms else 0,
-            avg_llm_ms=sum(llm_ms) / len(llm_ms) if llm_ms else 0,
-            low_confidence_count=sum(1 for c in confidences if c < self.LOW_CONFIDENCE_THRESHOLD),
-            unique_sessions=len({e.get("session_id") for e in entries if e.get("session_id")})
-        )
+        with self._lock:
+            return self._get_aggregate(date).to_stats()
     
     def get_weekly_stats(self) -> Dict[str, DailyStats]:
         """Get statistics for the last 7 days."""
-        stats = {}
-        for i in range(7):
-            date = (datetime.now() - timedelta(days=i)).strftime('%Y%m%d')
-            stats[date] = self.get_daily_stats(date)
-        return stats
+        return {date: self.get_daily_stats(date) for date in self._recent_dates(7)}
+    
+    def get_latency_percentiles(self, days: int = 7) -> Dict[str, float]:
+        """p50/p95/p99 end-to-end latency over the last `days` days (merged sketches)."""
+        merged = LatencySketch()
+        with self._lock:
+            for date in self._recent_dates(days):
+                merged.merge(self._get_aggregate(date).latency_sketch)
+        return {
+            "count": merged.count,
+            "p50_ms": merged.quantile(0.50),
+            "p95_ms": merged.quantile(0.95),
+            "p99_ms": merged.quantile(0.99),
+        }
     
     def get_low_confidence_queries(
         self,
@@ -236,22 +394,24 @@ class EvalService:
         
         low_confidence = []
         
-        for i in range(days):
-            date = (datetime.now() - timedelta(days=i)).strftime('%Y%m%d')
-            log_file = self._get_log_file(date)
-            
-            if log_file.exists():
-                entries = self._read_log_file(log_file)
-                for entry in entries:
-                    if entry.get("confidence_score", 1.0) < threshold:
-                        low_confidence.append({
-                            "date": date,
-                            "query": entry.get("query", ""),
-                            "response_preview": entry.get("response", "")[:200],
-                            "confidence": entry.get("confidence_score", 0),
-                            "guardrail_passed": entry.get("guardrail_passed", True),
-                            "warnings": entry.get("hallucination_check", {}).get("warnings", [])
-                        })
+        for date in self._recent_dates(days):
+            if threshold <= self.INDEX_CONFIDENCE_CEILING:
+                candidates = self._read_index(date)
+            else:
+                # Threshold above what the index covers: fall back to a full scan
+                log_file = self._get_log_file(date)
+                entries = self._read_log_file(log_file) if log_file.exists() else []
+                candidates = [self._index_record(e, date, force=True) for e in entries]
+            for record in candidates:
+                if record.get("confidence", 1.0) < threshold:
+                    low_confidence.append({
+                        "date": date,
+                        "query": record.get("query", ""),
+                        "response_preview": record.get("response_preview", ""),
+                        "confidence": record.get("confidence", 0),
+                        "guardrail_passed": record.get("guardrail_passed", True),
+                        "warnings": record.get("warnings", [])
+                    })
             
             if len(low_confidence) >= limit:
                 break
@@ -264,26 +424,111 @@ class EvalService:
         """Get queries that were rejected by guardrails."""
         rejections = []
         
-        for i in range(days):
-            date = (datetime.now() - timedelta(days=i)).strftime('%Y%m%d')
-            log_file = self._get_log_file(date)
-            
-            if log_file.exists():
-                entries = self._read_log_file(log_file)
-                for entry in entries:
-                    if not entry.get("guardrail_passed", True):
-                        rejections.append({
-                            "date": date,
-                            "timestamp": entry.get("timestamp", ""),
-                            "query": entry.get("query", ""),
-                            "response": entry.get("response", "")
-                        })
+        for date in self._recent_dates(days):
+            for record in self._read_index(date):
+                if not record.get("guardrail_passed", True):
+                    rejections.append({
+                        "date": date,
+                        "timestamp": record.get("timestamp", ""),
+                        "query": record.get("query", ""),
+                        "response": record.get("response", "")
+                    })
             
             if len(rejections) >= limit:
                 break
         
         return rejections[:limit]
     
+    # =========================================================================
+    # AGGREGATES AND SECONDARY INDEX
+    # =========================================================================
+    
+    def _index_record(
+        self,
+        entry: Dict[str, Any],
+        date: str,
+        force: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Compact index record for low-confidence/rejected entries (None otherwise)."""
+        confidence = entry.get("confidence_score", 1.0)
+        rejected = not entry.get("guardrail_passed", True)
+        if not force and not rejected and confidence >= self.INDEX_CONFIDENCE_CEILING:
+            return None
+        record = {
+            "timestamp": entry.get("timestamp", ""),
+            "query": entry.get("query", ""),
+            "response_preview": (entry.get("response") or "")[:200],
+            "confidence": confidence,
+            "guardrail_passed": not rejected,
+            "warnings": (entry.get("hallucination_check") or {}).get("warnings", []),
+        }
+        if rejected:
+            record["response"] = entry.get("response", "")
+        return record
+    
+    def _get_aggregate(self, date: str) -> _DailyAggregate:
+        """Cached aggregate for `date`; loads from disk or rebuilds once from the log."""
+        aggregate = self._aggregates.get(date)
+        if aggregate is not None:
+            return aggregate
+        
+        stats_file = self._get_stats_file(date)
+        if stats_file.exists():
+            try:
+                with open(stats_file, "r", encoding="utf-8") as f:
+                    aggregate = _DailyAggregate.from_dict(json.load(f))
+            except Exception as e:
+                logger.warning(f"Corrupt stats file {stats_file}, rebuilding: {e}")
+        
+        if aggregate is None:
+            aggregate = self._rebuild_day(date)
+        
+        self._aggregates[date] = aggregate
+        # Only recent days are hot; keep the cache bounded
+        if len(self._aggregates) > 62:
+            for old in sorted(self._aggregates)[:-31]:
+                del self._aggregates[old]
+        return aggregate
+    
+    def _rebuild_day(self, date: str) -> _DailyAggregate:
+        """Build aggregate and index for a day logged before they existed."""
+        aggregate = _DailyAggregate(date=date)
+        log_file = self._get_log_file(date)
+        if not log_file.exists():
+            return aggregate
+        
+        index_lines = []
+        for entry in self._read_log_file(log_file):
+            aggregate.add(entry, self.LOW_CONFIDENCE_THRESHOLD)
+            record = self._index_record(entry, date)
+            if record:
+                index_lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        
+        with open(self._get_index_file(date), "w", encoding="utf-8") as f:
+            f.writelines(index_lines)
+        self._save_aggregate(aggregate)
+        logger.info(f"[EVAL] Rebuilt aggregates for {date}: {aggregate.total_queries} queries")
+        return aggregate
+    
+    def _save_aggregate(self, aggregate: _DailyAggregate) -> None:
+        stats_file = self._get_stats_file(aggregate.date)
+        tmp_file = stats_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(aggregate.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_file, stats_file)
+    
+    def _read_index(self, date: str) -> List[Dict[str, Any]]:
+        """Secondary index entries for a day (rebuilt from the log if missing)."""
+        index_file = self._get_index_file(date)
+        if not index_file.exists():
+            if not self._get_log_file(date).exists():
+                return []
+            with self._lock:
+                self._aggregates.pop(date, None)
+                self._get_stats_file(date).unlink(missing_ok=True)
+                self._get_aggregate(date)
+        return self._read_log_file(index_file)
+    
     def _read_log_file(self, log_file: Path) -> List[Dict[str, Any]]:
         """Read all entries from a log file."""
         entries = []
@@ -303,8 +548,7 @@ class EvalService:
     def export_stats_json(self, days: int = 30) -> str:
         """Export statistics as JSON for external analysis."""
         stats = {}
-        for i in range(days):
-            date = (datetime.now() - timedelta(days=i)).strftime('%Y%m%d')
+        for date in self._recent_dates(days):
             daily = self.get_daily_stats(date)
             if daily.total_queries > 0:
                 stats[date] = asdict(daily)
@@ -312,6 +556,19 @@ class EvalService:
         return json.dumps(stats, indent=2, ensure_ascii=False)
 
 
+_shared_states: Dict[str, tuple] = {}
+_shared_states_lock = threading.Lock()
+
+
+def _shared_state(log_dir: Path) -> tuple:
+    """(lock, aggregate cache) shared by every EvalService on `log_dir`."""
+    key = str(log_dir.resolve())
+    with _shared_states_lock:
+        if key not in _shared_states:
+            _shared_states[key] = (threading.Lock(), {})
+        return _shared_states[key]
+
+
 # Singleton instance
 _eval_service: Optional[EvalService] = None
 
@@ -0,0 +1,207 @@
+"""
+Evaluation Worker - query logging and RAGAS evaluation off the request path.
+
+Finished responses are submitted as EvalJobs. Submitting never blocks: the
+queue is bounded and a full queue drops the job instead of slowing chats.
+A background task drains the queue in batches:
+
+- every job is appended to its EvalService query log with one batched write
+  per batch (EvalService.log_records)
+- a sample of jobs (settings.ragas_sample_rate) also gets RAGAS metrics,
+  computed with bounded concurrency and evaluation priority for upstream
+  calls. The evaluator writes them to eval_logs/ragas_eval_*.jsonl and the
+  scores are added to the job's query log record under "ragas"
+
+User-facing latency no longer includes any evaluation cost.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.utils.upstream_limiter import Priority, upstream_priority
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EvalJob:
+    """A returned response waiting to be logged and (maybe) evaluated."""
+    record: Dict[str, Any]  # EvalService.build_record() output
+    eval_service: Any = None  # EvalService to log to (None = don't log)
+    evaluate: Optional[Callable[..., Awaitable[Any]]] = None  # RAGAS evaluate() (None = never evaluate)
+    context_chunks: List[str] = field(default_factory=list)
+    query_type: Optional[str] = None
+    sampled: bool = False
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class EvalWorker:
+    """Bounded background queue for query logging and sampled RAGAS evaluation."""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.25,
+        batch_size: int = 16,
+        concurrency: int = 2,
+        max_queue: int = 1000,
+        flush_interval: float = 0.5
+    ):
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stats = {
+            "submitted": 0, "dropped": 0, "batches": 0, "processed": 0, "logged": 0, "log_failures": 0,
+            "evaluated": 0, "eval_failures": 0, "eval_ms_total": 0.0, "queue_lag_ms_total": 0.0,
+        }
+
+    def submit(self, job: EvalJob) -> bool:
+        """Queue a job without blocking; returns False if it was dropped.
+
+        Must be called from the event loop (the worker runs on it).
+        """
+        self._ensure_started()
+        job.sampled = job.evaluate is not None and random.random() < self.sample_rate
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+            logger.warning(f"[EVAL_WORKER] Queue full ({self.max_queue}), dropping evaluation job")
+            return False
+        self._stats["submitted"] += 1
+        return True
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            flush_at = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = flush_at - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._process(batch)
+            except Exception as e:
+                logger.error(f"[EVAL_WORKER] Batch of {len(batch)} failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _process(self, batch: List[EvalJob]) -> None:
+        self._stats["batches"] += 1
+        self._stats["processed"] += len(batch)
+        now = time.monotonic()
+        self._stats["queue_lag_ms_total"] += sum((now - job.enqueued_at) * 1000 for job in batch)
+
+        # RAGAS first, so the scores go into the query log records
+        sampled = [job for job in batch if job.sampled]
+        if sampled:
+            await asyncio.gather(*(self._evaluate(job) for job in sampled))
+
+        by_service: Dict[int, tuple] = {}
+        for job in batch:
+            if job.eval_service is not None:
+                by_service.setdefault(id(job.eval_service), (job.eval_service, []))[1].append(job.record)
+        for service, records in by_service.values():
+            try:
+                await asyncio.to_thread(service.log_records, records)
+                self._stats["logged"] += len(records)
+            except Exception as e:
+                self._stats["log_failures"] += len(records)
+                logger.error(f"[EVAL_WORKER] Failed to log {len(records)} queries: {e}")
+
+    async def _evaluate(self, job: EvalJob) -> None:
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                # Upstream calls queue behind chat and ingestion
+                with upstream_priority(Priority.EVALUATION):
+                    metrics = await job.evaluate(
+                        query=job.record.get("query", ""),
+                        response=job.record.get("response", ""),
+                        context_chunks=job.context_chunks,
+                        session_id=job.record.get("session_id"),
+                        query_type=job.query_type
+                    )
+                job.record["ragas"] = {
+                    "faithfulness": metrics.faithfulness,
+                    "answer_relevancy": metrics.answer_relevancy,
+                    "context_relevancy": metrics.context_relevancy,
+                    "context_precision": metrics.context_precision,
+                    "overall_score": metrics.overall_score,
+                }
+                self._stats["evaluated"] += 1
+            except Exception as e:
+                self._stats["eval_failures"] += 1
+                logger.warning(f"[EVAL_WORKER] RAGAS evaluation failed: {e}")
+            finally:
+                self._stats["eval_ms_total"] += (time.perf_counter() - start) * 1000
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait until every queued job has been processed (tests, shutdown)."""
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        await asyncio.wait_for(self._queue.join(), timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self._stats
+        batches = stats["batches"]
+        processed = stats["processed"]
+        return {
+            "sample_rate": self.sample_rate,
+            "batch_size": self.batch_size,
+            "concurrency": self.concurrency,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": stats["submitted"],
+            "dropped": stats["dropped"],
+            "batches": batches,
+            "processed": processed,
+            "logged": stats["logged"],
+            "log_failures": stats["log_failures"],
+            "evaluated": stats["evaluated"],
+            "eval_failures": stats["eval_failures"],
+            "avg_eval_ms": round(stats["eval_ms_total"] / max(1, stats["evaluated"] + stats["eval_failures"]), 1),
+            "avg_batch_size": round(processed / batches, 1) if batches else 0,
+            "avg_queue_lag_ms": round(stats["queue_lag_ms_total"] / max(1, processed), 1),
+        }
+
+
+# Singleton instance
+_eval_worker: Optional[EvalWorker] = None
+
+
+def get_eval_worker() -> EvalWorker:
+    """Get singleton evaluation worker."""
+    global _eval_worker
+    if _eval_worker is None:
+        _eval_worker = EvalWorker(
+            sample_rate=settings.ragas_sample_rate,
+            batch_size=settings.eval_batch_size,
+            concurrency=settings.eval_worker_concurrency,
+            max_queue=settings.eval_queue_size
+        )
+    return _eval_worker
@@ -9,16 +9,28 @@ FIXED: Now extracts data from actual structured_output keys:
 - table_data, direct_answer, thinking, conclusion, analysis
 """
 
+import codecs
 import csv
 import io
 import logging
 import re
+import uuid
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Messages fetched from the session store per page while streaming
+EXPORT_PAGE_SIZE = 200
+
+# Streamed response chunk size
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Finished exports kept for progress polling
+MAX_TRACKED_EXPORTS = 100
+
 
 @dataclass
 class ExportCandidate:
@@ -71,6 +83,131 @@ class ExportReport:
         return "General analysis"
 
 
+@dataclass
+class ExportProgress:
+    """Progress of a streaming export, for polling on large sessions."""
+    export_id: str
+    session_id: str
+    format: str
+    total_messages: int
+    processed_messages: int = 0
+    turns: int = 0
+    bytes_sent: int = 0
+    status: str = "running"  # running | done | failed
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    
+    def finish(self, status: str = "done"):
+        self.status = status
+        self.finished_at = datetime.utcnow()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        percent = 100.0 if self.status == "done" else (
+            round(100 * self.processed_messages / self.total_messages, 1) if self.total_messages else 0.0
+        )
+        return {
+            "export_id": self.export_id,
+            "session_id": self.session_id,
+            "format": self.format,
+            "status": self.status,
+            "total_messages": self.total_messages,
+            "processed_messages": self.processed_messages,
+            "turns": self.turns,
+            "bytes_sent": self.bytes_sent,
+            "percent": percent,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+def normalize_message(msg: Any) -> Dict[str, Any]:
+    """ChatMessage model or session-store dict -> role/content/structured_output dict."""
+    if isinstance(msg, dict):
+        return {
+            "role": msg.get('role'),
+            "content": msg.get('content'),
+            "structured_output": msg.get('structured_output')
+        }
+    return {
+        "role": msg.role,
+        "content": msg.content,
+        "structured_output": msg.structured_output
+    }
+
+
+class _ReportBuilder:
+    """Builds conversation turns one message at a time.
+    
+    Keeps only what the final sections need (latest ranking, first summary),
+    so exports don't hold the whole session in memory.
+    """
+    
+    def __init__(self, service: "ExportService"):
+        self._service = service
+        self._current_question: Optional[str] = None
+        self.turns = 0
+        self.candidates: List[ExportCandidate] = []
+        self.analysis_summary: Optional[str] = None
+    
+    def add(self, msg: Dict[str, Any]) -> Optional[ChatTurn]:
+        """Feed a message; returns the ChatTurn it completes, if any."""
+        role = msg.get('role', '')
+        content = msg.get('content', '')
+        
+        if role == 'user':
+            self._current_question = content
+            return None
+        
+        if role != 'assistant' or not self._current_question:
+            return None
+        
+        structured = msg.get('structured_output', {}) or {}
+        
+        # Create ChatTurn with all available data
+        turn = ChatTurn(
+            question=self._current_question,
+            answer=content[:1000] if content else '',
+            thinking=structured.get('thinking'),
+            analysis=structured.get('analysis'),
+            conclusion=structured.get('conclusion'),
+            direct_answer=structured.get('direct_answer'),
+            structure_type=structured.get('structure_type'),
+            table_data=self._service._extract_table_data(structured)
+        )
+        
+        # Extract candidates from this message's structured output
+        msg_candidates = self._service._extract_candidates_from_structured(structured)
+        if msg_candidates:
+            self.candidates = msg_candidates  # Use most recent ranking
+        
+        # Extract analysis summary from conclusion or direct answer
+        if not self.analysis_summary:
+            self.analysis_summary = (
+                structured.get('conclusion') or 
+                structured.get('direct_answer') or
+                structured.get('analysis') or
+                (content or '')[:800]
+            )
+        
+        self._current_question = None
+        self.turns += 1
+        return turn
+    
+    def final_candidates(self, cvs: List[Dict[str, Any]]) -> List[ExportCandidate]:
+        """Latest ranking, or the session's CVs when no analysis ranked anyone."""
+        if self.candidates or not cvs:
+            return self.candidates
+        return [
+            ExportCandidate(
+                name=self._service._extract_name_from_filename(cv.get('filename', '')),
+                cv_id=cv.get('id', ''),
+                filename=cv.get('filename', ''),
+                rank=i
+            )
+            for i, cv in enumerate(cvs, 1)
+        ]
+
+
 class ExportService:
     """Service for generating PDF and CSV exports of candidate analysis."""
     
@@ -81,6 +218,65 @@ class ExportService:
             self._pdf_available = True
         except ImportError:
             logger.warning("fpdf2 not installed. PDF export will be unavailable.")
+        self._exports: "OrderedDict[str, ExportProgress]" = OrderedDict()
+    
+    # =========================================================================
+    # PROGRESS / STREAMING INPUT
+    # =========================================================================
+    
+    def start_export(
+        self,
+        session_id: str,
+        export_format: str,
+        total_messages: int,
+        export_id: Optional[str] = None
+    ) -> ExportProgress:
+        """Register a streaming export so its progress can be polled."""
+        progress = ExportProgress(
+            export_id=export_id or uuid.uuid4().hex[:12],
+            session_id=session_id,
+            format=export_format,
+            total_messages=total_messages
+        )
+        self._exports[progress.export_id] = progress
+        while len(self._exports) > MAX_TRACKED_EXPORTS:
+            self._exports.popitem(last=False)
+        return progress
+    
+    def get_progress(self, export_id: str) -> Optional[ExportProgress]:
+        """Progress of a streaming export."""
+        return self._exports.get(export_id)
+    
+    def iter_messages(
+        self,
+        fetch_page: Callable[[int, int], List[Any]],
+        progress: Optional[ExportProgress] = None,
+        page_size: int = EXPORT_PAGE_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """Page messages from the session store, oldest first.
+        
+        Args:
+            fetch_page: (offset, limit) -> messages, e.g. a session manager's get_messages_page
+        """
+        offset = 0
+        while True:
+            page = fetch_page(offset, page_size)
+            for msg in page:
+                if progress:
+                    progress.processed_messages += 1
+                yield normalize_message(msg)
+            if len(page) < page_size:
+                return
+            offset += page_size
+    
+    def export_filename(self, session_name: str, generated_at: datetime, extension: str) -> str:
+        """Download filename for a session export."""
+        safe_name = "".join(c if c.isalnum() or c in "._- " else "_" for c in session_name)
+        return f"cv_analysis_{safe_name}_{generated_at.strftime('%Y%m%d')}.{extension}"
+    
+    # =========================================================================
+    # CSV
+    # =========================================================================
     
     def generate_csv(self, report: ExportReport) -> bytes:
         """Generate CSV export of candidate ranking/analysis.
@@ -96,75 +292,163 @@ class ExportService:
         output = io.StringIO()
         writer = csv.writer(output)
         
-        # Header with metadata
-        writer.writerow(['# CV Screener Export Report'])
-        writer.writerow([f'# Session: {report.session_name}'])
-        writer.writerow([f'# Generated: {report.generated_at.isoformat()}'])
-        writer.writerow([f'# Total CVs: {report.total_cvs}'])
-        writer.writerow([f'# Total Conversations: {len(report.conversation)}'])
-        writer.writerow([])
+        self._write_csv_header(
+            writer, report.session_name, report.generated_at, report.total_cvs,
+            f'# Total Conversations: {len(report.conversation)}'
+        )
         
         # ===== CONVERSATION HISTORY =====
         if report.conversation:
             writer.writerow(['# CONVERSATION HISTORY'])
             writer.writerow([])
-            
             for i, turn in enumerate(report.conversation, 1):
-                writer.writerow([f'--- Turn {i} ---'])
-                writer.writerow(['Question:', turn.question])
-                
-                if turn.direct_answer:
-                    writer.writerow(['Answer:', self._clean_csv_text(turn.direct_answer)])
-                
-                if turn.analysis:
-                    writer.writerow(['Analysis:', self._clean_csv_text(turn.analysis)])
-                
-                if turn.conclusion:
-                    writer.writerow(['Conclusion:', self._clean_csv_text(turn.conclusion)])
-                
-                if turn.thinking:
-                    writer.writerow(['Thinking:', self._clean_csv_text(turn.thinking[:500])])
-                
-                writer.writerow([])
-            
+                self._write_csv_turn(writer, i, turn)
             writer.writerow([])
         
-        # ===== CANDIDATE RANKING =====
-        if report.candidates:
-            writer.writerow(['# CANDIDATE RANKING'])
-            writer.writerow([])
+        self._write_csv_candidates(writer, report.candidates)
+        self._write_csv_summary(writer, report.analysis_summary)
+        
+        content = output.getvalue()
+        return content.encode('utf-8-sig')  # BOM for Excel compatibility
+    
+    def stream_csv(
+        self,
+        session: Dict[str, Any],
+        messages: Iterable[Dict[str, Any]],
+        progress: Optional[ExportProgress] = None
+    ) -> Iterator[bytes]:
+        """Stream a CSV export, writing rows as turns are produced.
+        
+        Same sections as generate_csv. The conversation count is only known at
+        the end, so the header reports the message count instead and the turn
+        count is written as the last row.
+        
+        Args:
+            session: Session summary (name, cvs, message_count)
+            messages: Normalized messages, oldest first (see iter_messages)
+            progress: Optional progress record to update
+        """
+        output = io.StringIO()
+        writer = csv.writer(output)
+        builder = _ReportBuilder(self)
+        
+        try:
+            self._write_csv_header(
+                writer, session.get('name', 'Unnamed Session'), datetime.utcnow(),
+                len(session.get('cvs', [])), f'# Total Messages: {session.get("message_count", 0)}'
+            )
+            # BOM for Excel compatibility, once at the start of the stream
+            yield codecs.BOM_UTF8 + self._take_chunk(output, progress)
             
-            # Column headers
-            headers = ['Rank', 'Name', 'Score', 'Current Role', 'Experience (Years)', 
-                       'Seniority', 'Skills', 'CV ID']
-            writer.writerow(headers)
+            for msg in messages:
+                turn = builder.add(msg)
+                if turn is None:
+                    continue
+                if builder.turns == 1:
+                    writer.writerow(['# CONVERSATION HISTORY'])
+                    writer.writerow([])
+                self._write_csv_turn(writer, builder.turns, turn)
+                if progress:
+                    progress.turns = builder.turns
+                if output.tell() >= STREAM_CHUNK_BYTES:
+                    yield self._take_chunk(output, progress)
             
-            # Candidate data
-            for candidate in report.candidates:
-                score_str = f'{candidate.score:.0f}%' if candidate.score else '-'
-                exp_str = f'{candidate.experience_years:.1f}' if candidate.experience_years else '-'
-                skills_str = ', '.join(candidate.skills[:5]) if candidate.skills else '-'
-                
-                writer.writerow([
-                    candidate.rank or '-',
-                    candidate.name,
-                    score_str,
-                    candidate.current_role or '-',
-                    exp_str,
-                    candidate.seniority or '-',
-                    skills_str,
-                    candidate.cv_id
-                ])
+            if builder.turns:
+                writer.writerow([])
+            self._write_csv_candidates(writer, builder.final_candidates(session.get('cvs', [])))
+            self._write_csv_summary(writer, builder.analysis_summary)
+            writer.writerow([f'# Total Conversations: {builder.turns}'])
+            yield self._take_chunk(output, progress)
+        except Exception:
+            if progress:
+                progress.finish("failed")
+            raise
+        
+        if progress:
+            progress.finish()
+        logger.info(f"[EXPORT] Streamed CSV with {builder.turns} turns")
+    
+    def _take_chunk(self, output: io.StringIO, progress: Optional[ExportProgress]) -> bytes:
+        """Encode and clear the CSV buffer."""
+        data = output.getvalue().encode('utf-8')
+        output.seek(0)
+        output.truncate(0)
+        if progress:
+            progress.bytes_sent += len(data)
+        return data
+    
+    def _write_csv_header(
+        self,
+        writer,
+        session_name: str,
+        generated_at: datetime,
+        total_cvs: int,
+        count_line: str
+    ):
+        """Metadata rows at the top of a CSV export."""
+        writer.writerow(['# CV Screener Export Report'])
+        writer.writerow([f'# Session: {session_name}'])
+        writer.writerow([f'# Generated: {generated_at.isoformat()}'])
+        writer.writerow([f'# Total CVs: {total_cvs}'])
+        writer.writerow([count_line])
+        writer.writerow([])
+    
+    def _write_csv_turn(self, writer, i: int, turn: ChatTurn):
+        """Rows for one conversation turn."""
+        writer.writerow([f'--- Turn {i} ---'])
+        writer.writerow(['Question:', turn.question])
+        
+        if turn.direct_answer:
+            writer.writerow(['Answer:', self._clean_csv_text(turn.direct_answer)])
+        
+        if turn.analysis:
+            writer.writerow(['Analysis:', self._clean_csv_text(turn.analysis)])
+        
+        if turn.conclusion:
+            writer.writerow(['Conclusion:', self._clean_csv_text(turn.conclusion)])
+        
+        if turn.thinking:
+            writer.writerow(['Thinking:', self._clean_csv_text(turn.thinking[:500])])
+        
+        writer.writerow([])
+    
+    def _write_csv_candidates(self, writer, candidates: List[ExportCandidate]):
+        """Candidate ranking section."""
+        if not candidates:
+            return
+        
+        writer.writerow(['# CANDIDATE RANKING'])
+        writer.writerow([])
+        
+        # Column headers
+        headers = ['Rank', 'Name', 'Score', 'Current Role', 'Experience (Years)', 
+                   'Seniority', 'Skills', 'CV ID']
+        writer.writerow(headers)
+        
+        # Candidate data
+        for candidate in candidates:
+            score_str = f'{candidate.score:.0f}%' if candidate.score else '-'
+            exp_str = f'{candidate.experience_years:.1f}' if candidate.experience_years else '-'
+            skills_str = ', '.join(candidate.skills[:5]) if candidate.skills else '-'
             
-            writer.writerow([])
+            writer.writerow([
+                candidate.rank or '-',
+                candidate.name,
+                score_str,
+                candidate.current_role or '-',
+                exp_str,
+                candidate.seniority or '-',
+                skills_str,
+                candidate.cv_id
+            ])
         
-        # ===== ANALYSIS SUMMARY =====
-        if report.analysis_summary:
+        writer.writerow([])
+    
+    def _write_csv_summary(self, writer, analysis_summary: Optional[str]):
+        """Analysis summary section."""
+        if analysis_summary:
             writer.writerow(['# ANALYSIS SUMMARY'])
-            writer.writerow([self._clean_csv_text(report.analysis_summary)])
-        
-        content = output.getvalue()
-        return content.encode('utf-8-sig')  # BOM for Excel compatibility
+            writer.writerow([self._clean_csv_text(analysis_summary)])
     
     def _clean_csv_text(self, text: str) -> str:
         """Clean text for CSV output."""
@@ -179,6 +463,10 @@ class ExportService:
         text = text.replace('\n', ' ').replace('\r', '')
         return text.strip()
     
+    # =========================================================================
+    # PDF
+    # =========================================================================
+    
     def generate_pdf(self, report: ExportReport) -> bytes:
         """Generate PDF export of candidate ranking/analysis.
         
@@ -188,6 +476,77 @@ class ExportService:
         Returns:
             PDF file content as bytes
         """
+        pdf = self._pdf_begin(
+            report.session_name, report.generated_at, report.total_cvs,
+            f'Conversations: {len(report.conversation)}'
+        )
+        
+        # ===== CONVERSATION HISTORY =====
+        if report.conversation:
+            self._pdf_conversation_heading(pdf)
+            for i, turn in enumerate(report.conversation, 1):
+                self._pdf_turn(pdf, i, turn)
+        
+        self._pdf_candidates(pdf, report.candidates)
+        self._pdf_summary(pdf, report.analysis_summary)
+        return self._pdf_finish(pdf)
+    
+    def stream_pdf(
+        self,
+        session: Dict[str, Any],
+        messages: Iterable[Dict[str, Any]],
+        progress: Optional[ExportProgress] = None
+    ) -> Iterator[bytes]:
+        """Stream a PDF export built incrementally from paged messages.
+        
+        Turns are laid out as messages arrive, so only the document (not the
+        session or an ExportReport) is held in memory. fpdf2 writes the
+        cross-reference table last, so the bytes are sent in chunks once the
+        document is rendered.
+        
+        Args:
+            session: Session summary (name, cvs, message_count)
+            messages: Normalized messages, oldest first (see iter_messages)
+            progress: Optional progress record to update
+        """
+        builder = _ReportBuilder(self)
+        try:
+            pdf = self._pdf_begin(
+                session.get('name', 'Unnamed Session'), datetime.utcnow(),
+                len(session.get('cvs', [])), f'Messages: {session.get("message_count", 0)}'
+            )
+            for msg in messages:
+                turn = builder.add(msg)
+                if turn is None:
+                    continue
+                if builder.turns == 1:
+                    self._pdf_conversation_heading(pdf)
+                self._pdf_turn(pdf, builder.turns, turn)
+                if progress:
+                    progress.turns = builder.turns
+            
+            self._pdf_candidates(pdf, builder.final_candidates(session.get('cvs', [])))
+            self._pdf_summary(pdf, builder.analysis_summary)
+            content = self._pdf_finish(pdf)
+            del pdf
+            
+            view = memoryview(content)
+            for start in range(0, len(content), STREAM_CHUNK_BYTES):
+                chunk = bytes(view[start:start + STREAM_CHUNK_BYTES])
+                if progress:
+                    progress.bytes_sent += len(chunk)
+                yield chunk
+        except Exception:
+            if progress:
+                progress.finish("failed")
+            raise
+        
+        if progress:
+            progress.finish()
+        logger.info(f"[EXPORT PDF] Streamed PDF with {builder.turns} turns ({len(content)} bytes)")
+    
+    def _pdf_begin(self, session_name: str, generated_at: datetime, total_cvs: int, count_text: str):
+        """New document with the report header and metadata box."""
         if not self._pdf_available:
             raise RuntimeError("PDF export unavailable: fpdf2 not installed")
         
@@ -207,7 +566,7 @@ class ExportService:
         pdf.cell(0, 10, 'CV Screener Analysis Report', ln=True, align='C')
         
         pdf.set_font('Helvetica', '', 10)
-        pdf.cell(0, 6, f'Session: {report.session_name}', ln=True, align='C')
+        pdf.cell(0, 6, f'Session: {session_name}', ln=True, align='C')
         
         pdf.set_y(40)
         
@@ -217,131 +576,139 @@ class ExportService:
         pdf.set_text_color(80, 80, 80)
         pdf.set_font('Helvetica', '', 9)
         pdf.set_xy(15, 43)
-        pdf.cell(60, 5, f'Generated: {report.generated_at.strftime("%Y-%m-%d %H:%M")}')
-        pdf.cell(60, 5, f'Total CVs: {report.total_cvs}')
-        pdf.cell(60, 5, f'Conversations: {len(report.conversation)}')
+        pdf.cell(60, 5, f'Generated: {generated_at.strftime("%Y-%m-%d %H:%M")}')
+        pdf.cell(60, 5, f'Total CVs: {total_cvs}')
+        pdf.cell(60, 5, count_text)
         pdf.ln(15)
+        return pdf
+    
+    def _pdf_conversation_heading(self, pdf):
+        pdf.set_y(65)
+        pdf.set_font('Helvetica', 'B', 14)
+        pdf.set_text_color(41, 128, 185)
+        pdf.cell(0, 10, 'Conversation History', ln=True)
+        pdf.set_draw_color(41, 128, 185)
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(5)
+    
+    def _pdf_turn(self, pdf, i: int, turn: ChatTurn):
+        """Lay out one conversation turn."""
+        # Check if we need a new page
+        if pdf.get_y() > 250:
+            pdf.add_page()
+        
+        # Question box
+        pdf.set_fill_color(232, 245, 233)  # Light green
+        pdf.set_font('Helvetica', 'B', 10)
+        pdf.set_text_color(33, 37, 41)
+        pdf.cell(0, 7, f'Q{i}: {self._clean_text(turn.question[:100])}', ln=True, fill=True)
+        
+        # Direct Answer (most important)
+        if turn.direct_answer:
+            pdf.set_font('Helvetica', 'B', 9)
+            pdf.set_text_color(25, 135, 84)  # Green
+            pdf.cell(0, 6, 'Answer:', ln=True)
+            pdf.set_font('Helvetica', '', 9)
+            pdf.set_text_color(33, 37, 41)
+            pdf.multi_cell(0, 5, self._clean_text(turn.direct_answer[:500]))
+            pdf.ln(2)
+        
+        # Analysis section
+        if turn.analysis:
+            pdf.set_font('Helvetica', 'B', 9)
+            pdf.set_text_color(13, 110, 253)  # Blue
+            pdf.cell(0, 6, 'Analysis:', ln=True)
+            pdf.set_font('Helvetica', '', 8)
+            pdf.set_text_color(33, 37, 41)
+            pdf.multi_cell(0, 4, self._clean_text(turn.analysis[:800]))
+            pdf.ln(2)
+        
+        # Conclusion
+        if turn.conclusion:
+            pdf.set_font('Helvetica', 'B', 9)
+            pdf.set_text_color(111, 66, 193)  # Purple
+            pdf.cell(0, 6, 'Conclusion:', ln=True)
+            pdf.set_font('Helvetica', '', 9)
+            pdf.set_text_color(33, 37, 41)
+            pdf.multi_cell(0, 5, self._clean_text(turn.conclusion[:500]))
+            pdf.ln(2)
         
-        # ===== CONVERSATION HISTORY =====
-        if report.conversation:
-            pdf.set_y(65)
-            pdf.set_font('Helvetica', 'B', 14)
-            pdf.set_text_color(41, 128, 185)
-            pdf.cell(0, 10, 'Conversation History', ln=True)
-            pdf.set_draw_color(41, 128, 185)
-            pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-            pdf.ln(5)
-            
-            for i, turn in enumerate(report.conversation, 1):
-                # Check if we need a new page
-                if pdf.get_y() > 250:
-                    pdf.add_page()
-                
-                # Question box
-                pdf.set_fill_color(232, 245, 233)  # Light green
-                pdf.set_font('Helvetica', 'B', 10)
-                pdf.set_text_color(33, 37, 41)
-                pdf.cell(0, 7, f'Q{i}: {self._clean_text(turn.question[:100])}', ln=True, fill=True)
-                
-                # Direct Answer (most important)
-                if turn.direct_answer:
-                    pdf.set_font('Helvetica', 'B', 9)
-                    pdf.set_text_color(25, 135, 84)  # Green
-                    pdf.cell(0, 6, 'Answer:', ln=True)
-                    pdf.set_font('Helvetica', '', 9)
-                    pdf.set_text_color(33, 37, 41)
-                    pdf.multi_cell(0, 5, self._clean_text(turn.direct_answer[:500]))
-                    pdf.ln(2)
-                
-                # Analysis section
-                if turn.analysis:
-                    pdf.set_font('Helvetica', 'B', 9)
-                    pdf.set_text_color(13, 110, 253)  # Blue
-                    pdf.cell(0, 6, 'Analysis:', ln=True)
-                    pdf.set_font('Helvetica', '', 8)
-                    pdf.set_text_color(33, 37, 41)
-                    pdf.multi_cell(0, 4, self._clean_text(turn.analysis[:800]))
-                    pdf.ln(2)
-                
-                # Conclusion
-                if turn.conclusion:
-                    pdf.set_font('Helvetica', 'B', 9)
-                    pdf.set_text_color(111, 66, 193)  # Purple
-                    pdf.cell(0, 6, 'Conclusion:', ln=True)
-                    pdf.set_font('Helvetica', '', 9)
-                    pdf.set_text_color(33, 37, 41)
-                    pdf.multi_cell(0, 5, self._clean_text(turn.conclusion[:500]))
-                    pdf.ln(2)
-                
-                # Table data if present
-                if turn.table_data:
-                    self._add_table_to_pdf(pdf, turn.table_data, turn.structure_type)
-                
-                pdf.ln(5)
+        # Table data if present
+        if turn.table_data:
+            self._add_table_to_pdf(pdf, turn.table_data, turn.structure_type)
         
-        # ===== CANDIDATE RANKING TABLE =====
-        if report.candidates:
-            if pdf.get_y() > 200:
-                pdf.add_page()
-            
-            pdf.set_font('Helvetica', 'B', 14)
-            pdf.set_text_color(41, 128, 185)
-            pdf.cell(0, 10, 'Candidate Summary', ln=True)
-            pdf.set_draw_color(41, 128, 185)
-            pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-            pdf.ln(5)
+        pdf.ln(5)
+    
+    def _pdf_candidates(self, pdf, candidates: List[ExportCandidate]):
+        """Candidate ranking table."""
+        if not candidates:
+            return
+        
+        if pdf.get_y() > 200:
+            pdf.add_page()
+        
+        pdf.set_font('Helvetica', 'B', 14)
+        pdf.set_text_color(41, 128, 185)
+        pdf.cell(0, 10, 'Candidate Summary', ln=True)
+        pdf.set_draw_color(41, 128, 185)
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(5)
+        
+        # Table header
+        pdf.set_font('Helvetica', 'B', 8)
+        pdf.set_fill_color(41, 128, 185)
+        pdf.set_text_color(255, 255, 255)
+        col_widths = [12, 45, 18, 45, 25, 45]
+        headers = ['#', 'Name', 'Score', 'Role', 'Exp', 'Skills']
+        
+        for header, width in zip(headers, col_widths, strict=False):
+            pdf.cell(width, 7, header, border=1, fill=True, align='C')
+        pdf.ln()
+        
+        # Table rows
+        pdf.set_font('Helvetica', '', 7)
+        pdf.set_text_color(33, 37, 41)
+        
+        for j, candidate in enumerate(candidates[:15]):
+            # Alternate row colors
+            if j % 2 == 0:
+                pdf.set_fill_color(249, 249, 249)
+            else:
+                pdf.set_fill_color(255, 255, 255)
             
-            # Table header
-            pdf.set_font('Helvetica', 'B', 8)
-            pdf.set_fill_color(41, 128, 185)
-            pdf.set_text_color(255, 255, 255)
-            col_widths = [12, 45, 18, 45, 25, 45]
-            headers = ['#', 'Name', 'Score', 'Role', 'Exp', 'Skills']
+            rank_text = str(candidate.rank) if candidate.rank else str(j + 1)
+            name = self._truncate(candidate.name, 20)
+            score = f'{candidate.score:.0f}%' if candidate.score else '-'
+            role = self._truncate(candidate.current_role or '-', 20)
+            exp = f'{candidate.experience_years:.0f}y' if candidate.experience_years else '-'
+            skills = self._truncate(', '.join(candidate.skills[:3]), 22) if candidate.skills else '-'
             
-            for header, width in zip(headers, col_widths, strict=False):
-                pdf.cell(width, 7, header, border=1, fill=True, align='C')
+            pdf.cell(col_widths[0], 6, rank_text, border=1, fill=True, align='C')
+            pdf.cell(col_widths[1], 6, name, border=1, fill=True)
+            pdf.cell(col_widths[2], 6, score, border=1, fill=True, align='C')
+            pdf.cell(col_widths[3], 6, role, border=1, fill=True)
+            pdf.cell(col_widths[4], 6, exp, border=1, fill=True, align='C')
+            pdf.cell(col_widths[5], 6, skills, border=1, fill=True)
             pdf.ln()
-            
-            # Table rows
-            pdf.set_font('Helvetica', '', 7)
-            pdf.set_text_color(33, 37, 41)
-            
-            for j, candidate in enumerate(report.candidates[:15]):
-                # Alternate row colors
-                if j % 2 == 0:
-                    pdf.set_fill_color(249, 249, 249)
-                else:
-                    pdf.set_fill_color(255, 255, 255)
-                
-                rank_text = str(candidate.rank) if candidate.rank else str(j + 1)
-                name = self._truncate(candidate.name, 20)
-                score = f'{candidate.score:.0f}%' if candidate.score else '-'
-                role = self._truncate(candidate.current_role or '-', 20)
-                exp = f'{candidate.experience_years:.0f}y' if candidate.experience_years else '-'
-                skills = self._truncate(', '.join(candidate.skills[:3]), 22) if candidate.skills else '-'
-                
-                pdf.cell(col_widths[0], 6, rank_text, border=1, fill=True, align='C')
-                pdf.cell(col_widths[1], 6, name, border=1, fill=True)
-                pdf.cell(col_widths[2], 6, score, border=1, fill=True, align='C')
-                pdf.cell(col_widths[3], 6, role, border=1, fill=True)
-                pdf.cell(col_widths[4], 6, exp, border=1, fill=True, align='C')
-                pdf.cell(col_widths[5], 6, skills, border=1, fill=True)
-                pdf.ln()
+    
+    def _pdf_summary(self, pdf, analysis_summary: Optional[str]):
+        """Analysis summary section."""
+        if not analysis_summary:
+            return
         
-        # ===== ANALYSIS SUMMARY =====
-        if report.analysis_summary:
-            if pdf.get_y() > 230:
-                pdf.add_page()
-            
-            pdf.ln(5)
-            pdf.set_font('Helvetica', 'B', 12)
-            pdf.set_text_color(41, 128, 185)
-            pdf.cell(0, 8, 'Summary', ln=True)
-            pdf.set_font('Helvetica', '', 9)
-            pdf.set_text_color(33, 37, 41)
-            pdf.multi_cell(0, 5, self._clean_text(report.analysis_summary[:1500]))
+        if pdf.get_y() > 230:
+            pdf.add_page()
         
-        # ===== FOOTER =====
+        pdf.ln(5)
+        pdf.set_font('Helvetica', 'B', 12)
+        pdf.set_text_color(41, 128, 185)
+        pdf.cell(0, 8, 'Summary', ln=True)
+        pdf.set_font('Helvetica', '', 9)
+        pdf.set_text_color(33, 37, 41)
+        pdf.multi_cell(0, 5, self._clean_text(analysis_summary[:1500]))
+    
+    def _pdf_finish(self, pdf) -> bytes:
+        """Footer and rendering."""
         pdf.set_y(-20)
         pdf.set_font('Helvetica', 'I', 8)
         pdf.set_text_color(150, 150, 150)
@@ -441,61 +808,10 @@ class ExportService:
         Returns:
             ExportReport ready for export
         """
-        conversation = []
-        candidates = []
-        analysis_summary = None
-        
-        # Process ALL messages to build conversation history
-        current_question = None
-        
-        for _i, msg in enumerate(messages):
-            role = msg.get('role', '')
-            content = msg.get('content', '')
-            
-            if role == 'user':
-                current_question = content
-            
-            elif role == 'assistant' and current_question:
-                structured = msg.get('structured_output', {}) or {}
-                
-                # Create ChatTurn with all available data
-                turn = ChatTurn(
-                    question=current_question,
-                    answer=content[:1000] if content else '',
-                    thinking=structured.get('thinking'),
-                    analysis=structured.get('analysis'),
-                    conclusion=structured.get('conclusion'),
-                    direct_answer=structured.get('direct_answer'),
-                    structure_type=structured.get('structure_type'),
-                    table_data=self._extract_table_data(structured)
-                )
-                conversation.append(turn)
-                
-                # Extract candidates from this message's structured output
-                msg_candidates = self._extract_candidates_from_structured(structured)
-                if msg_candidates:
-                    candidates = msg_candidates  # Use most recent ranking
-                
-                # Extract analysis summary from conclusion or direct answer
-                if not analysis_summary:
-                    analysis_summary = (
-                        structured.get('conclusion') or 
-                        structured.get('direct_answer') or
-                        structured.get('analysis') or
-                        content[:800]
-                    )
-                
-                current_question = None
-        
-        # If no candidates from structured output, extract from CVs in session
-        if not candidates and session.get('cvs'):
-            for i, cv in enumerate(session['cvs'], 1):
-                candidates.append(ExportCandidate(
-                    name=self._extract_name_from_filename(cv.get('filename', '')),
-                    cv_id=cv.get('id', ''),
-                    filename=cv.get('filename', ''),
-                    rank=i
-                ))
+        builder = _ReportBuilder(self)
+        conversation = [turn for msg in messages if (turn := builder.add(msg)) is not None]
+        candidates = builder.final_candidates(session.get('cvs', []))
+        analysis_summary = builder.analysis_summary
         
         logger.info(f"[EXPORT] Created report with {len(conversation)} turns, {len(candidates)} candidates")
         
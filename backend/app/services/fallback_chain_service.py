@@ -2,19 +2,55 @@
 Fallback Chain Service - Automatic model failover for reliability.
 
 V8 Feature: Auto-switch to backup models when primary fails or is rate-limited.
+
+Latency-aware hedging (execute_hedged / execute_hedged_stream):
+- ModelHealth keeps an EWMA of latency and error rate per model, plus a window
+  of recent latencies per stage for a p95 estimate
+- the primary model runs first; if it hasn't answered by its p95 for that
+  stage, a backup (the healthy model with the best EWMA latency/error score)
+  is started alongside it. The first answer wins and the other call is cancelled
+- a failure (429, timeout, error) starts the next model immediately instead of
+  backing off on the same one; rate-limited models go into cooldown
+- for streams the race is on the first chunk (time to first token)
+
+Generation passes only the user's selected model unless
+settings.llm_generation_fallback_enabled; the model that answered is reported
+in the response (generation_model / used_fallback_model).
 """
 
 import asyncio
 import logging
+import time
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Weight of the newest sample in the EWMAs
+EWMA_ALPHA = 0.2
+
+# Latency samples kept per (model, stage) for the p95 hedge delay
+LATENCY_WINDOW = 50
+
+# Below this many samples the stage default delay is used instead of the p95
+MIN_LATENCY_SAMPLES = 5
+
+# Hedge delay (ms) per stage until a model has enough samples
+DEFAULT_HEDGE_DELAY_MS = {
+    'understanding': 4000,
+    'multi_query': 4000,
+    'reranking': 6000,
+    'generation': 8000,       # Time to first token when streaming
+    'verification': 6000,
+}
+
 
 class FailureReason(Enum):
     """Reasons for model failure."""
@@ -35,6 +71,9 @@ class ModelHealth:
     total_failures: int = 0
     total_successes: int = 0
     cooldown_until: Optional[datetime] = None
+    ewma_latency_ms: Optional[float] = None
+    ewma_error_rate: float = 0.0
+    latencies: Dict[str, Deque[float]] = field(default_factory=dict)  # stage -> recent latencies (ms)
     
     @property
     def is_healthy(self) -> bool:
@@ -51,11 +90,36 @@ class ModelHealth:
             return 1.0
         return self.total_successes / total
     
-    def record_success(self):
+    @property
+    def routing_score(self) -> float:
+        """Lower is better: expected latency inflated by the error rate."""
+        latency = self.ewma_latency_ms if self.ewma_latency_ms is not None else 1000.0
+        return latency * (1 + 4 * self.ewma_error_rate)
+    
+    def record_latency(self, latency_ms: float, stage: str = "default") -> None:
+        """Add a latency sample (also used for calls cancelled after losing a hedge)."""
+        if self.ewma_latency_ms is None:
+            self.ewma_latency_ms = latency_ms
+        else:
+            self.ewma_latency_ms += EWMA_ALPHA * (latency_ms - self.ewma_latency_ms)
+        self.latencies.setdefault(stage, deque(maxlen=LATENCY_WINDOW)).append(latency_ms)
+    
+    def p95_latency_ms(self, stage: str = "default") -> Optional[float]:
+        """p95 of recent latencies for a stage (None until enough samples)."""
+        samples = self.latencies.get(stage)
+        if not samples or len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    
+    def record_success(self, latency_ms: Optional[float] = None, stage: str = "default"):
         """Record a successful call."""
         self.consecutive_failures = 0
         self.total_successes += 1
         self.cooldown_until = None
+        self.ewma_error_rate *= 1 - EWMA_ALPHA
+        if latency_ms is not None:
+            self.record_latency(latency_ms, stage)
     
     def record_failure(self, reason: FailureReason, cooldown_seconds: int = 60):
         """Record a failed call."""
@@ -63,6 +127,7 @@ class ModelHealth:
         self.total_failures += 1
         self.last_failure_time = datetime.utcnow()
         self.last_failure_reason = reason
+        self.ewma_error_rate += EWMA_ALPHA * (1 - self.ewma_error_rate)
         
         # Apply exponential cooldown based on consecutive failures
         cooldown = cooldown_seconds * (2 ** min(self.consecutive_failures - 1, 5))
@@ -83,6 +148,8 @@ class FallbackResult(Generic[T]):
     attempts: int = 0
     errors: List[Dict[str, Any]] = field(default_factory=list)
     used_fallback: bool = False
+    hedged: bool = False  # A backup was started while the primary was still running
+    latency_ms: float = 0.0
 
 
 # Default fallback chains for different use cases
@@ -103,6 +170,11 @@ FALLBACK_CHAINS = {
         "meta-llama/llama-3.1-8b-instruct:free",
         "google/gemma-2-9b-it:free",
     ],
+    'multi_query': [
+        "google/gemini-2.0-flash-exp:free",
+        "meta-llama/llama-3.1-8b-instruct:free",
+        "google/gemma-2-9b-it:free",
+    ],
     'verification': [
         "google/gemini-2.0-flash-exp:free",
         "meta-llama/llama-3.1-8b-instruct:free",
@@ -110,12 +182,33 @@ FALLBACK_CHAINS = {
 }
 
 
+def classify_failure(error: BaseException) -> Tuple[FailureReason, int]:
+    """Failure reason and cooldown (seconds) for an exception from a model call."""
+    if isinstance(error, asyncio.TimeoutError):
+        return FailureReason.TIMEOUT, 30
+    error_str = str(error).lower()
+    if "rate" in error_str or "429" in error_str or "quota" in error_str:
+        return FailureReason.RATE_LIMIT, 120  # Longer cooldown for rate limits
+    if "timeout" in error_str or "timed out" in error_str:
+        return FailureReason.TIMEOUT, 30
+    if "invalid" in error_str or "parse" in error_str:
+        return FailureReason.INVALID_RESPONSE, 10
+    return FailureReason.API_ERROR, 60
+
+
+def hedging_enabled(chain_type: str) -> bool:
+    """Whether hedged requests are enabled for a stage."""
+    stages = {s.strip() for s in settings.llm_hedge_stages.split(",") if s.strip()}
+    return settings.llm_hedging_enabled and chain_type in stages
+
+
 class FallbackChainService:
     """Service for managing model fallback chains."""
     
     def __init__(self):
         self._model_health: Dict[str, ModelHealth] = {}
         self._chains = FALLBACK_CHAINS.copy()
+        self._hedge_stats: Dict[str, Dict[str, int]] = {}
     
     def get_model_health(self, model_id: str) -> ModelHealth:
         """Get or create health tracker for a model."""
@@ -244,21 +337,7 @@ class FallbackChainService:
                 logger.warning(f"[FALLBACK] {model_id} timed out")
                 
             except Exception as e:
-                error_str = str(e).lower()
-                
-                # Detect failure reason
-                if "rate" in error_str or "429" in error_str or "quota" in error_str:
-                    reason = FailureReason.RATE_LIMIT
-                    cooldown = 120  # Longer cooldown for rate limits
-                elif "timeout" in error_str:
-                    reason = FailureReason.TIMEOUT
-                    cooldown = 30
-                elif "invalid" in error_str or "parse" in error_str:
-                    reason = FailureReason.INVALID_RESPONSE
-                    cooldown = 10
-                else:
-                    reason = FailureReason.API_ERROR
-                    cooldown = 60
+                reason, cooldown = classify_failure(e)
                 
                 error_info = {
                     "model": model_id,
@@ -279,6 +358,227 @@ class FallbackChainService:
             used_fallback=len(used_models) > 1
         )
     
+    # =========================================================================
+    # HEDGED EXECUTION
+    # =========================================================================
+    
+    def route(self, models: List[str]) -> List[str]:
+        """
+        Order models for a hedged call: the primary stays first while healthy,
+        backups by routing score (EWMA latency x error rate), unhealthy ones last.
+        """
+        models = list(dict.fromkeys(models))
+        if not models:
+            return []
+        primary, backups = models[0], models[1:]
+        healthy = sorted(
+            (m for m in backups if self.get_model_health(m).is_healthy),
+            key=lambda m: self.get_model_health(m).routing_score
+        )
+        unhealthy = [m for m in backups if not self.get_model_health(m).is_healthy]
+        if self.get_model_health(primary).is_healthy:
+            return [primary] + healthy + unhealthy
+        return healthy + [primary] + unhealthy
+    
+    def hedge_delay(self, model_id: str, chain_type: str) -> float:
+        """Seconds to wait for a model before starting a backup: its p95 for this stage."""
+        p95 = self.get_model_health(model_id).p95_latency_ms(chain_type)
+        delay_ms = p95 if p95 is not None else DEFAULT_HEDGE_DELAY_MS.get(chain_type, 5000)
+        return max(delay_ms, settings.llm_hedge_min_delay_ms) / 1000
+    
+    def _record_hedge(self, chain_type: str, key: str) -> None:
+        stats = self._hedge_stats.setdefault(chain_type, {"calls": 0, "hedges": 0, "backup_wins": 0, "failovers": 0})
+        stats[key] += 1
+    
+    def _record_outcome(self, model_id: str, chain_type: str, started: float, error: Optional[BaseException]) -> Optional[Dict[str, Any]]:
+        """Update a model's health after a call; returns the error info on failure."""
+        health = self.get_model_health(model_id)
+        latency_ms = (time.perf_counter() - started) * 1000
+        if error is None:
+            health.record_success(latency_ms, chain_type)
+            return None
+        reason, cooldown = classify_failure(error)
+        health.record_failure(reason, cooldown)
+        logger.warning(f"[FALLBACK] {chain_type}: {model_id} failed ({reason.value}) after {latency_ms:.0f}ms: {str(error)[:100]}")
+        return {"model": model_id, "reason": reason.value, "message": str(error)[:200]}
+    
+    async def execute_hedged(
+        self,
+        chain_type: str,
+        operation: Callable[[str], Any],
+        primary_model: Optional[str] = None,
+        models: Optional[List[str]] = None,
+        max_attempts: int = 3,
+        timeout: float = 60.0,
+        on_event: Optional[Callable[[str, str], Any]] = None
+    ) -> FallbackResult:
+        """Run `operation(model_id)` with hedging and immediate failover.
+        
+        Args:
+            chain_type: Stage name (chain and latency stats key)
+            operation: Async callable taking the model id
+            primary_model: Preferred model (ignored when `models` is given)
+            models: Explicit model list, primary first (default: the stage's chain)
+            max_attempts: Maximum number of models to start
+            timeout: Timeout per attempt in seconds
+            on_event: Optional async callback(event, model_id); event is
+                "hedge" (backup started) or "failover" (started after a failure)
+        """
+        candidates = self.route(models or self.get_chain(chain_type, primary_model))[:max_attempts]
+        hedge = hedging_enabled(chain_type)
+        self._record_hedge(chain_type, "calls")
+        
+        pending: Dict[asyncio.Task, Tuple[str, float]] = {}
+        queue = iter(candidates)
+        errors: List[Dict[str, Any]] = []
+        launched: List[str] = []
+        hedged = False
+        start = time.perf_counter()
+        
+        def launch() -> Optional[str]:
+            model_id = next(queue, None)
+            if model_id is not None:
+                task = asyncio.ensure_future(asyncio.wait_for(operation(model_id), timeout=timeout))
+                pending[task] = (model_id, time.perf_counter())
+                launched.append(model_id)
+            return model_id
+        
+        async def notify(event: str, model_id: str) -> None:
+            self._record_hedge(chain_type, "hedges" if event == "hedge" else "failovers")
+            if on_event:
+                try:
+                    await on_event(event, model_id)
+                except Exception as e:
+                    logger.warning(f"[FALLBACK] on_event callback failed: {e}")
+        
+        launch()
+        hedge_at = time.perf_counter() + self.hedge_delay(candidates[0], chain_type) if candidates else 0
+        
+        try:
+            while pending:
+                wait_timeout = None
+                if hedge and len(pending) == 1 and len(launched) < len(candidates):
+                    wait_timeout = max(0.0, hedge_at - time.perf_counter())
+                done, _ = await asyncio.wait(pending, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    model_id = launch()
+                    hedged = True
+                    logger.info(f"[FALLBACK] {chain_type}: primary slower than p95, hedging with {model_id}")
+                    await notify("hedge", model_id)
+                    continue
+                
+                for task in done:
+                    model_id, started = pending.pop(task)
+                    error = task.exception()
+                    error_info = self._record_outcome(model_id, chain_type, started, error)
+                    if error_info is None:
+                        if model_id != launched[0]:
+                            self._record_hedge(chain_type, "backup_wins")
+                        return FallbackResult(
+                            success=True,
+                            result=task.result(),
+                            model_used=model_id,
+                            attempts=len(launched),
+                            errors=errors,
+                            used_fallback=model_id != candidates[0],
+                            hedged=hedged,
+                            latency_ms=(time.perf_counter() - start) * 1000
+                        )
+                    errors.append(error_info)
+                    # Fail fast: the next model starts now, not after a backoff
+                    next_model = launch()
+                    if next_model:
+                        hedge_at = time.perf_counter() + self.hedge_delay(next_model, chain_type)
+                        await notify("failover", next_model)
+        finally:
+            await self._cancel_losers(pending, chain_type)
+        
+        return FallbackResult(
+            success=False,
+            attempts=len(launched),
+            errors=errors,
+            used_fallback=len(launched) > 1,
+            hedged=hedged,
+            latency_ms=(time.perf_counter() - start) * 1000
+        )
+    
+    async def execute_hedged_stream(
+        self,
+        chain_type: str,
+        stream_factory: Callable[[str], AsyncIterator[T]],
+        primary_model: Optional[str] = None,
+        models: Optional[List[str]] = None,
+        max_attempts: int = 3,
+        first_chunk_timeout: float = 60.0,
+        on_event: Optional[Callable[[str, str], Any]] = None
+    ) -> AsyncIterator[Tuple[str, T]]:
+        """Hedged streaming: models race for the first chunk, then the winner streams.
+        
+        Yields (model_id, chunk). Errors after the first chunk are raised as-is
+        (tokens were already emitted, so there is no failover mid-stream).
+        """
+        _DONE = object()
+        
+        async def pump(model_id: str, chunks: asyncio.Queue) -> None:
+            try:
+                async for chunk in stream_factory(model_id):
+                    await chunks.put(chunk)
+                await chunks.put(_DONE)
+            except Exception as e:
+                await chunks.put(e)
+        
+        async def first_item(chunks: asyncio.Queue):
+            item = await chunks.get()
+            if isinstance(item, BaseException):
+                raise item
+            return item
+        
+        producers: Dict[str, asyncio.Task] = {}
+        queues: Dict[str, asyncio.Queue] = {}
+        
+        async def stream_operation(model_id: str):
+            queues[model_id] = asyncio.Queue()
+            producers[model_id] = asyncio.ensure_future(pump(model_id, queues[model_id]))
+            return await first_item(queues[model_id])
+        
+        try:
+            result = await self.execute_hedged(
+                chain_type, stream_operation, primary_model=primary_model, models=models,
+                max_attempts=max_attempts, timeout=first_chunk_timeout, on_event=on_event
+            )
+            for model_id, producer in producers.items():
+                if model_id != result.model_used:
+                    producer.cancel()
+            if not result.success:
+                message = result.errors[-1]["message"] if result.errors else "no model available"
+                raise RuntimeError(f"All models failed for {chain_type}: {message}")
+            
+            winner = result.model_used
+            if result.result is not _DONE:
+                yield winner, result.result
+                while True:
+                    item = await queues[winner].get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, BaseException):
+                        reason, cooldown = classify_failure(item)
+                        self.get_model_health(winner).record_failure(reason, cooldown)
+                        raise item
+                    yield winner, item
+        finally:
+            for producer in producers.values():
+                producer.cancel()
+            await asyncio.gather(*producers.values(), return_exceptions=True)
+    
+    async def _cancel_losers(self, pending: Dict[asyncio.Task, Tuple[str, float]], chain_type: str) -> None:
+        """Cancel calls still running; their elapsed time is a latency lower bound."""
+        for task, (model_id, started) in pending.items():
+            task.cancel()
+            self.get_model_health(model_id).record_latency((time.perf_counter() - started) * 1000, chain_type)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
     def get_status(self) -> Dict[str, Any]:
         """Get current status of all tracked models."""
         return {
@@ -286,6 +586,13 @@ class FallbackChainService:
                 "healthy": health.is_healthy,
                 "consecutive_failures": health.consecutive_failures,
                 "success_rate": round(health.success_rate, 2),
+                "ewma_latency_ms": round(health.ewma_latency_ms, 1) if health.ewma_latency_ms is not None else None,
+                "ewma_error_rate": round(health.ewma_error_rate, 3),
+                "p95_latency_ms": {
+                    stage: round(p95, 1)
+                    for stage in health.latencies
+                    if (p95 := health.p95_latency_ms(stage)) is not None
+                },
                 "last_failure": health.last_failure_reason.value if health.last_failure_reason else None,
                 "cooldown_remaining": (
                     (health.cooldown_until - datetime.utcnow()).total_seconds()
@@ -296,6 +603,10 @@ class FallbackChainService:
             for model_id, health in self._model_health.items()
         }
     
+    def get_hedge_stats(self) -> Dict[str, Any]:
+        """Hedged-call counters per stage."""
+        return {chain_type: dict(stats) for chain_type, stats in self._hedge_stats.items()}
+    
     def reset_model(self, model_id: str):
         """Reset health status for a model."""
         if model_id in self._model_health:
@@ -305,6 +616,7 @@ class FallbackChainService:
     def reset_all(self):
         """Reset all model health statuses."""
         self._model_health.clear()
+        self._hedge_stats.clear()
         logger.info("[FALLBACK] Reset all model health statuses")
 
 
@@ -0,0 +1,100 @@
+"""
+Incremental Indexing - reuse stored embeddings for chunk texts that didn't change.
+
+Re-chunking a CV (re-uploads, scripts/reindex_cvs.py after a metadata
+extraction change) mostly produces chunk texts that are byte-identical to
+what is already stored; only their metadata differs. Chunks are matched to
+stored ones by a hash of their content:
+
+- same text   -> the stored embedding is reused; the chunk is upserted with its
+                 new metadata (no embedding call)
+- new/changed -> embedded (each distinct text once)
+- gone        -> stored chunks of the CV not produced again are deleted
+
+Vector stores expose get_embeddings_by_hash(hashes, cv_ids) and
+delete_chunks(cv_id, keep_indexes); without them every chunk is embedded.
+"""
+
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """Hash of a chunk's text (the only input its embedding depends on)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IndexingResult:
+    """Outcome of indexing one batch of chunks."""
+    chunks: int
+    embedded: int  # Embeddings computed
+    reused: int  # Embeddings skipped (stored embedding of an identical text)
+    removed: int  # Stale stored chunks deleted
+    latency_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chunks": self.chunks,
+            "embedded": self.embedded,
+            "embeddings_skipped": self.reused,
+            "removed": self.removed,
+            "latency_ms": round(self.latency_ms, 1),
+        }
+
+
+async def index_chunks(
+    chunks: List[Dict[str, Any]],
+    vector_store: Any,
+    embedder: Any,
+    reuse_embeddings: bool = True
+) -> IndexingResult:
+    """Upsert chunks, embedding only texts with no stored embedding."""
+    start = time.perf_counter()
+    if not chunks:
+        return IndexingResult(chunks=0, embedded=0, reused=0, removed=0)
+
+    cv_ids = list(dict.fromkeys(c["cv_id"] for c in chunks))
+    hashes = [content_hash(c.get("content", "")) for c in chunks]
+
+    stored: Dict[str, List[float]] = {}
+    if reuse_embeddings and hasattr(vector_store, "get_embeddings_by_hash"):
+        stored = await vector_store.get_embeddings_by_hash(set(hashes), cv_ids)
+
+    # Embed each distinct new text once
+    missing = list(dict.fromkeys(h for h in hashes if h not in stored))
+    new_hashes = set(missing)
+    if missing:
+        texts = {h: c.get("content", "") for h, c in zip(hashes, chunks, strict=True)}
+        result = await embedder.embed_texts([texts[h] for h in missing])
+        stored.update(zip(missing, result.embeddings, strict=True))
+    embeddings = [stored[h] for h in hashes]
+
+    # Chunks left over from a previous, longer chunking of the same CVs
+    removed = 0
+    if hasattr(vector_store, "delete_chunks"):
+        kept: Dict[str, set] = {}
+        for chunk in chunks:
+            kept.setdefault(chunk["cv_id"], set()).add(chunk["chunk_index"])
+        for cv_id, indexes in kept.items():
+            removed += await vector_store.delete_chunks(cv_id, indexes)
+
+    await vector_store.add_documents(chunks, embeddings)
+
+    result = IndexingResult(
+        chunks=len(chunks),
+        embedded=len(missing),
+        reused=len(chunks) - sum(1 for h in hashes if h in new_hashes),
+        removed=removed,
+        latency_ms=(time.perf_counter() - start) * 1000
+    )
+    logger.info(
+        f"[INDEXING] {result.chunks} chunks of {len(cv_ids)} CV(s): embedded={result.embedded} "
+        f"skipped={result.reused} removed={result.removed} ({result.latency_ms:.0f}ms)"
+    )
+    return result
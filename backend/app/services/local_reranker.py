@@ -0,0 +1,310 @@
+"""
+Local Reranking - in-process rerank backends with a shared score cache.
+
+The v7 cross-encoder reranker calls the HuggingFace Inference API and its
+fallback makes an LLM call scoring every chunk in one prompt; both are
+network-bound and rescored the same (query, chunk) pairs on every turn.
+
+Backends (settings.reranking_backend):
+- "remote"  - current behaviour (HF cross-encoder, LLM fallback), no local model
+- "lexical" - BM25 over the retrieved chunks blended with their vector
+              similarity; pure CPU, no model, sub-millisecond per chunk
+- "onnx"    - a cross-encoder exported to ONNX (model.onnx + tokenizer.json in
+              settings.local_reranker_model_dir), scored on CPU in batches
+
+Pairwise scores (ONNX and the HF cross-encoder) are kept in an LRU keyed by
+(model, query hash, chunk key), so follow-up turns over the same CVs only
+score chunks they haven't seen. Lexical scores depend on the whole retrieved
+set (IDF) and are cheap to recompute, so they are not cached.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.bm25_service import BM25Service
+from app.services.reranking_service import _get_attr
+from app.services.reranking_service_v2 import CrossEncoderRerankResult
+from app.utils.tracing import traced_to_thread
+
+logger = logging.getLogger(__name__)
+
+# Lexical backend: weight of the BM25 score vs. the retrieval similarity
+LEXICAL_WEIGHT = 0.5
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Cross-encoder input length (tokens) for query + chunk
+ONNX_MAX_LENGTH = 512
+
+
+def query_hash(query: str) -> str:
+    """Stable hash of a normalized query."""
+    return hashlib.sha1(" ".join(query.lower().split()).encode("utf-8")).hexdigest()[:16]
+
+
+def chunk_key(result: Any) -> str:
+    """Stable key of a retrieved chunk: its id if it has one, else its CV and content."""
+    chunk_id = _get_attr(result, "id")
+    if chunk_id:
+        return str(chunk_id)
+    content = _get_attr(result, "content", "") or ""
+    cv_id = _get_attr(result, "cv_id", "") or ""
+    return hashlib.sha1(f"{cv_id}\x00{content}".encode("utf-8")).hexdigest()[:16]
+
+
+class RerankScoreCache:
+    """Thread-safe LRU of (model, query hash, chunk key) -> relevance score."""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._scores: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_many(self, model: str, query: str, keys: Sequence[str]) -> Dict[str, float]:
+        """Cached scores for the keys that have one."""
+        q = query_hash(query)
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = (model, q, key)
+                score = self._scores.get(entry)
+                if score is None:
+                    self._misses += 1
+                    continue
+                self._scores.move_to_end(entry)
+                found[key] = score
+                self._hits += 1
+        return found
+
+    def put_many(self, model: str, query: str, scores: Dict[str, float]) -> None:
+        if self.max_entries <= 0:
+            return
+        q = query_hash(query)
+        with self._lock:
+            for key, score in scores.items():
+                self._scores[(model, q, key)] = score
+                self._scores.move_to_end((model, q, key))
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scores.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._scores),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class LexicalSemanticBackend:
+    """BM25 over the retrieved chunks blended with their vector similarity."""
+
+    name = "lexical"
+    model_name = "bm25+similarity"
+    pairwise = False  # Scores depend on the whole set (IDF)
+
+    def __init__(self, lexical_weight: float = LEXICAL_WEIGHT):
+        self.lexical_weight = lexical_weight
+        self._tokenize = BM25Service()._tokenize
+
+    def bm25(self, query: str, documents: List[str]) -> np.ndarray:
+        """BM25 of each document for the query over this set, scaled to 0-1 by the best one."""
+        query_terms = set(self._tokenize(query))
+        docs = [Counter(self._tokenize(doc)) for doc in documents]
+        if not docs:
+            return np.zeros(0)
+
+        lengths = np.array([sum(doc.values()) for doc in docs], dtype=float)
+        avg_length = lengths.mean() or 1.0
+        bm25 = np.zeros(len(docs))
+        for term in query_terms:
+            tf = np.array([doc.get(term, 0) for doc in docs], dtype=float)
+            df = int((tf > 0).sum())
+            if not df:
+                continue
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            bm25 += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length))
+        return bm25 / bm25.max() if bm25.max() > 0 else bm25
+
+    def score(self, query: str, documents: List[str], similarities: List[float]) -> List[float]:
+        if not documents:
+            return []
+        lexical = self.bm25(query, documents)
+        semantic = np.clip(np.array(similarities, dtype=float), 0.0, 1.0)
+        return (self.lexical_weight * lexical + (1 - self.lexical_weight) * semantic).tolist()
+
+
+class OnnxCrossEncoderBackend:
+    """Cross-encoder exported to ONNX, run on CPU with onnxruntime."""
+
+    name = "onnx"
+    pairwise = True
+
+    def __init__(self, model_dir: str, max_length: int = ONNX_MAX_LENGTH):
+        # Optional dependencies: only needed for this backend
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        path = Path(model_dir)
+        if not (path / "model.onnx").exists() or not (path / "tokenizer.json").exists():
+            raise FileNotFoundError(f"Expected model.onnx and tokenizer.json in {model_dir}")
+
+        self.model_name = path.name
+        self.tokenizer = Tokenizer.from_file(str(path / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.session = onnxruntime.InferenceSession(str(path / "model.onnx"), providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def score(self, query: str, documents: List[str], similarities: List[float]) -> List[float]:
+        encodings = self.tokenizer.encode_batch([(query, doc) for doc in documents])
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        logits = np.asarray(self.session.run(None, feeds)[0], dtype=float)
+        if logits.ndim == 2:
+            logits = logits[:, -1]  # Single relevance logit (or the "relevant" class)
+        return (1.0 / (1.0 + np.exp(-logits))).tolist()
+
+
+class LocalRerankingService:
+    """Reranks retrieved chunks in-process with a local backend, batched and cached."""
+
+    def __init__(
+        self,
+        backend: Any,
+        cache: Optional[RerankScoreCache] = None,
+        batch_size: int = 32
+    ):
+        self.backend = backend
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+
+    async def rerank(
+        self,
+        query: str,
+        results: List[Any],
+        top_k: Optional[int] = None
+    ) -> CrossEncoderRerankResult:
+        """Rerank results by local relevance score (same result type as the v7 reranker)."""
+        start = time.perf_counter()
+        method = f"local_{self.backend.name}"
+        if not results:
+            return CrossEncoderRerankResult(
+                original_results=results, reranked_results=results, scores={},
+                latency_ms=0, model_used=self.backend.model_name, method=method
+            )
+
+        documents = [_get_attr(r, "content", "") or "" for r in results]
+        similarities = [float(_get_attr(r, "similarity", 0.5) or 0.0) for r in results]
+        keys = [chunk_key(r) for r in results]
+
+        cached: Dict[str, float] = {}
+        batches = 0
+        if self.backend.pairwise:
+            if self.cache is not None:
+                cached = self.cache.get_many(self.backend.model_name, query, keys)
+            missing = [i for i, key in enumerate(keys) if key not in cached]
+            fresh: Dict[str, float] = {}
+            for offset in range(0, len(missing), self.batch_size):
+                batch = missing[offset:offset + self.batch_size]
+                scores = await traced_to_thread(
+                    self.backend.score, query, [documents[i] for i in batch], [similarities[i] for i in batch]
+                )
+                fresh.update({keys[i]: s for i, s in zip(batch, scores, strict=True)})
+                batches += 1
+            if fresh and self.cache is not None:
+                self.cache.put_many(self.backend.model_name, query, fresh)
+            by_key = {**cached, **fresh}
+            scores = [by_key[key] for key in keys]
+        else:
+            scores = self.backend.score(query, documents, similarities)
+            batches = 1
+
+        order = sorted(range(len(results)), key=lambda i: scores[i], reverse=True)
+        reranked = [results[i] for i in order]
+        result_scores = [scores[i] for i in order]
+        if top_k is not None:
+            reranked = reranked[:top_k]
+            result_scores = result_scores[:top_k]
+
+        score_dict = {}
+        for i in order:
+            cv_id = _get_attr(results[i], "cv_id")
+            if cv_id and cv_id not in score_dict:
+                score_dict[cv_id] = scores[i]
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"[RERANK local] {method} reranked {len(results)} docs in {latency_ms:.1f}ms "
+            f"(cached={len(cached)}, batches={batches})"
+        )
+        return CrossEncoderRerankResult(
+            original_results=results,
+            reranked_results=reranked,
+            scores=score_dict,
+            latency_ms=latency_ms,
+            model_used=self.backend.model_name,
+            method=method,
+            metadata={"documents_reranked": len(results), "cache_hits": len(cached), "batches": batches},
+            result_scores=result_scores
+        )
+
+
+def create_local_backend(name: str, model_dir: str = "") -> Any:
+    """Backend for settings.reranking_backend; an unusable ONNX model falls back to lexical."""
+    if name == "onnx":
+        try:
+            return OnnxCrossEncoderBackend(model_dir)
+        except (ImportError, OSError, RuntimeError) as e:
+            logger.warning(f"[RERANK local] ONNX cross-encoder unavailable ({e}), using lexical backend")
+    elif name != "lexical":
+        logger.warning(f"[RERANK local] Unknown reranking backend '{name}', using lexical backend")
+    return LexicalSemanticBackend()
+
+
+# Singleton instances
+_score_cache: Optional[RerankScoreCache] = None
+_local_reranking_service: Optional[LocalRerankingService] = None
+
+
+def get_rerank_score_cache() -> RerankScoreCache:
+    """Get singleton (model, query, chunk) score cache."""
+    global _score_cache
+    if _score_cache is None:
+        _score_cache = RerankScoreCache(max_entries=settings.rerank_score_cache_size)
+    return _score_cache
+
+
+def get_local_reranking_service() -> Optional[LocalRerankingService]:
+    """Local reranker for settings.reranking_backend (None = use the remote rerankers)."""
+    global _local_reranking_service
+    if settings.reranking_backend == "remote":
+        return None
+    if _local_reranking_service is None:
+        _local_reranking_service = LocalRerankingService(
+            backend=create_local_backend(settings.reranking_backend, settings.local_reranker_model_dir),
+            cache=get_rerank_score_cache(),
+            batch_size=settings.local_reranker_batch_size
+        )
+    return _local_reranking_service
@@ -2,15 +2,18 @@
 Multi-Query Generation Service for RAG v5.
 
 Generates multiple semantic variations of a query to improve retrieval coverage.
+Both LLM calls are hedged through the fallback chain service: a backup model is
+started when the configured model is slower than its p95, and failures move on
+to the next model of the "multi_query" chain.
 """
 import json
 import logging
 from dataclasses import dataclass
 from typing import List, Optional
 
-import httpx
-
 from app.config import settings, timeouts
+from app.services.fallback_chain_service import get_fallback_service
+from app.utils.upstream_limiter import upstream_async_client
 
 logger = logging.getLogger(__name__)
 
@@ -197,12 +200,13 @@ class MultiQueryService:
         self.api_key = api_key or settings.openrouter_api_key or ""
         logger.info(f"MultiQueryService initialized with model: {self.model}")
     
-    async def generate(self, query: str) -> MultiQueryResult:
+    async def generate(self, query: str, hyde: Optional[bool] = None) -> MultiQueryResult:
         """
         Generate query variations, entities, and optionally HyDE document.
         
         Args:
             query: Original user query
+            hyde: Generate the HyDE document (None = service default)
             
         Returns:
             MultiQueryResult with variations, entities, and hyde_document
@@ -216,12 +220,12 @@ class MultiQueryService:
         
         try:
             # Generate variations and entities
-            variations, entities = await self._generate_variations(query)
+            variations, entities = await self._hedged(lambda model: self._generate_variations(query, model))
             
             # Generate HyDE document if enabled
             hyde_doc = None
-            if self.hyde_enabled:
-                hyde_doc = await self._generate_hyde(query)
+            if self.hyde_enabled if hyde is None else hyde:
+                hyde_doc = await self._hedged(lambda model: self._generate_hyde(query, model))
             
             return MultiQueryResult(
                 original_query=query,
@@ -237,12 +241,24 @@ class MultiQueryService:
                 variations=[query]
             )
     
-    async def _generate_variations(self, query: str) -> tuple[List[str], dict]:
+    async def _hedged(self, operation):
+        """Run a per-model call through the hedged "multi_query" fallback chain."""
+        outcome = await get_fallback_service().execute_hedged(
+            "multi_query", operation, primary_model=self.model, timeout=timeouts.HTTP_MEDIUM
+        )
+        if not outcome.success:
+            message = outcome.errors[-1]["message"] if outcome.errors else "no model available"
+            raise RuntimeError(f"all models failed: {message}")
+        if outcome.model_used != self.model:
+            logger.info(f"Multi-query answered by fallback model {outcome.model_used}")
+        return outcome.result
+    
+    async def _generate_variations(self, query: str, model: Optional[str] = None) -> tuple[List[str], dict]:
         """Generate query variations and extract entities."""
         prompt = MULTI_QUERY_PROMPT.format(query=query)
         from app.providers.base import get_openrouter_url
         
-        async with httpx.AsyncClient(timeout=timeouts.HTTP_MEDIUM) as client:
+        async with upstream_async_client(timeout=timeouts.HTTP_MEDIUM) as client:
             response = await client.post(
                 get_openrouter_url("chat/completions"),
                 headers={
@@ -250,7 +266,7 @@ class MultiQueryService:
                     "Content-Type": "application/json"
                 },
                 json={
-                    "model": self.model,
+                    "model": model or self.model,
                     "messages": [{"role": "user", "content": prompt}],
                     "temperature": 0.3,
                     "max_tokens": 500
@@ -280,12 +296,12 @@ class MultiQueryService:
         logger.info(f"Generated {len(variations)} query variations")
         return variations, entities
     
-    async def _generate_hyde(self, query: str) -> str:
+    async def _generate_hyde(self, query: str, model: Optional[str] = None) -> str:
         """Generate hypothetical document for HyDE."""
         prompt = HYDE_PROMPT.format(query=query)
         from app.providers.base import get_openrouter_url
         
-        async with httpx.AsyncClient(timeout=timeouts.HTTP_SHORT) as client:
+        async with upstream_async_client(timeout=timeouts.HTTP_SHORT) as client:
             response = await client.post(
                 get_openrouter_url("chat/completions"),
                 headers={
@@ -293,7 +309,7 @@ class MultiQueryService:
                     "Content-Type": "application/json"
                 },
                 json={
-                    "model": self.model,
+                    "model": model or self.model,
                     "messages": [{"role": "user", "content": prompt}],
                     "temperature": 0.5,
                     "max_tokens": 200
@@ -16,6 +16,9 @@ from collections import defaultdict
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+from app.services.candidate_profile_service import get_profile_store
+from app.services.skill_taxonomy import get_skill_matcher
+
 from .schema_inference import ColumnDefinition, ColumnType, TableSchema
 
 logger = logging.getLogger(__name__)
@@ -136,6 +139,13 @@ class SmartDataExtractor:
                     if isinstance(existing, str):
                         candidates[cv_id]["metadata_merged"][key] = f"{existing}, {value}"
         
+        # Ingestion profiles fill in the fields the retrieved chunks lack
+        # (chunk metadata still wins, as it did when merging)
+        for cv_id, profile in get_profile_store().get_many(candidates).items():
+            merged = candidates[cv_id]["metadata_merged"]
+            for key, value in profile.as_metadata().items():
+                merged.setdefault(key, value)
+        
         # Extract values for each candidate
         rows = []
         for cv_id, data in candidates.items():
@@ -412,73 +422,9 @@ class SmartDataExtractor:
         if not content:
             return None
         
-        # Enhanced tech skills patterns with more comprehensive coverage
-        patterns = [
-            # Programming Languages & Frameworks
-            r'\b(Python|Java(?:Script)?|TypeScript|Go|Rust|C\+\+|C#|\.NET|Ruby|PHP|Swift|Kotlin|Scala|Dart|R|MATLAB)\b',
-            r'\b(React|Angular|Vue|Next\.?js|Nuxt\.?js|Svelte|Ember|Backbone)\b',
-            r'\b(Node\.?js|Express|Django|Flask|Spring|Laravel|Rails|Symfony|FastAPI)\b',
-            
-            # Cloud & DevOps
-            r'\b(AWS|Azure|GCP|Google Cloud|Oracle Cloud|Alibaba Cloud)\b',
-            r'\b(Docker|Kubernetes|K8s|Terraform|Ansible|Puppet|Chef|Jenkins|GitLab CI|GitHub Actions)\b',
-            r'\b(DevOps|CI/CD|Git|Linux|Ubuntu|CentOS|Debian|Red Hat|Windows Server)\b',
-            
-            # Databases & Storage
-            r'\b(MongoDB|PostgreSQL|MySQL|SQLite|Oracle|SQL Server|Cassandra|Redis|Elasticsearch|DynamoDB)\b',
-            r'\b(Firebase|Supabase|CockroachDB|Neo4j|InfluxDB|TimescaleDB)\b',
-            
-            # AI/ML/Data Science
-            r'\b(TensorFlow|PyTorch|Keras|Scikit-learn|Pandas|NumPy|SciPy|Matplotlib|Seaborn|Plotly)\b',
-            r'\b(Machine Learning|AI|Deep Learning|Neural Networks|NLP|Computer Vision|Data Science)\b',
-            r'\b(Jupyter|Anaconda|Google Colab|MLflow|Kubeflow|Airflow|Spark|Hadoop)\b',
-            
-            # Backend & APIs
-            r'\b(REST|RESTful|GraphQL|SOAP|gRPC|API|Microservices|Serverless|Lambda|Functions)\b',
-            r'\b(Kafka|RabbitMQ|Apache Kafka|ActiveMQ|SQS|SNS|Pub/Sub|Event Streaming)\b',
-            
-            # Frontend & Design
-            r'\b(HTML5|CSS3|SASS|SCSS|LESS|Tailwind|Bootstrap|Material|Foundation)\b',
-            r'\b(Figma|Sketch|Adobe XD|Photoshop|Illustrator|InDesign|After Effects)\b',
-            r'\b(UX|UI|User Experience|User Interface|Design Systems|Wireframing|Prototyping)\b',
-            
-            # Data & Analytics
-            r'\b(Excel|Tableau|Power BI|Looker|Google Data Studio|Domo|Qlik|Sisense)\b',
-            r'\b(Data Analysis|Business Intelligence|Analytics|Data Visualization|Dashboard|KPI)\b',
-            
-            # Marketing & Digital
-            r'\b(Marketing|SEO|SEM|PPC|Google Ads|Facebook Ads|LinkedIn Ads|Content Marketing)\b',
-            r'\b(Social Media|Instagram|Twitter|Facebook|LinkedIn|TikTok|YouTube|Branding)\b',
-            r'\b(Google Analytics|Adobe Analytics|Mixpanel|Amplitude|Segment|Hotjar)\b',
-            
-            # Business & Finance
-            r'\b(Finance|Accounting|Banking|Investment|Trading|Risk Management|Compliance)\b',
-            r'\b(QuickBooks|Xero|SAP|Oracle Financials|Salesforce|HubSpot|Pipedrive)\b',
-            
-            # Project Management
-            r'\b(Project Management|PMP|PRINCE2|Agile|Scrum|Kanban|Lean|Six Sigma)\b',
-            r'\b(Jira|Trello|Asana|Monday\.com|ClickUp|Notion|Confluence|Slack|Teams)\b',
-            r'\b(Scrum Master|Product Owner|Product Manager|Program Manager|Portfolio Manager)\b',
-            
-            # Testing & Quality
-            r'\b(Unit Testing|Integration Testing|E2E Testing|Selenium|Cypress|Jest|Mocha|Chai)\b',
-            r'\b(TDD|BDD|Code Coverage|SonarQube|Quality Assurance|QA|Manual Testing)\b',
-            
-            # Security
-            r'\b(Cybersecurity|Information Security|Penetration Testing|Vulnerability Assessment)\b',
-            r'\b(OWASP|SSL/TLS|Encryption|Authentication|Authorization|OAuth|JWT|SAML)\b',
-            
-            # General Tech Terms
-            r'\b(Software Development|Web Development|Mobile Development|Full Stack|Frontend|Backend)\b',
-            r'\b(Cloud Computing|Edge Computing|IoT|Blockchain|Web3|Cryptocurrency|NFT)\b'
-        ]
-        
-        found = set()
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                if match:
-                    found.add(match.strip())
+        # One pass over the shared taxonomy (tech, marketing, business, PM,
+        # testing, security) instead of ~30 alternation regexes per chunk
+        found = set(get_skill_matcher().find_terms(content))
         
         if found:
             return ", ".join(sorted(found))
@@ -12,10 +12,13 @@ This is the FIRST step in the adaptive pipeline - understanding intent.
 
 import logging
 import re
+from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, List, Optional, Set
 
+from app.utils.keyword_matcher import KeywordMatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -265,10 +268,15 @@ class QueryAnalyzer:
         """Detect which attributes the user is asking about."""
         detected = []
         
+        # Single pass over the query for every alias of every attribute
+        mentioned: Dict[str, Set[str]] = defaultdict(set)
+        for match in _ALIAS_MATCHER.find_all(query):
+            mentioned[match.term].add(match.alias)
+        
         for attr_name, config in self.ATTRIBUTE_KNOWLEDGE.items():
-            # Check if any alias is mentioned in query
+            # First alias (in declaration order) mentioned in the query
             for alias in config["aliases"]:
-                if alias.lower() in query:
+                if alias in mentioned.get(attr_name, ()):
                     detected.append(DetectedAttribute(
                         name=attr_name,
                         original_term=alias,
@@ -443,3 +451,15 @@ class QueryAnalyzer:
             confidence += 0.1 * min(len(attributes), 3)
         
         return min(confidence, 1.0)
+
+
+def _build_alias_matcher() -> KeywordMatcher:
+    # Substring semantics to match the original `alias in query` checks
+    matcher = KeywordMatcher(word_boundaries=False)
+    for attr_name, config in QueryAnalyzer.ATTRIBUTE_KNOWLEDGE.items():
+        matcher.add(attr_name, config["aliases"])
+    return matcher.compile()
+
+
+# Compiled once at import; term = attribute name, alias = matched alias
+_ALIAS_MATCHER = _build_alias_matcher()
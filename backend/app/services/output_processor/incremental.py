@@ -0,0 +1,171 @@
+"""
+Incremental Output Parser - Structured sections while tokens stream.
+
+Consumes the LLM token stream and reports each section as soon as it is
+complete, so the UI can render structure before generation finishes:
+
+- {"section": "thinking", "content": ...}        :::thinking block closed
+- {"section": "direct_answer", "content": ...}   first answer paragraph done
+- {"section": "table_header", "headers": [...]}  first table, header line
+- {"section": "table_row", "index": n, "cells": [...], "cv_id": ...}
+- {"section": "conclusion", "content": ...}      :::conclusion block closed
+
+Sections are extracted with the same modules OutputOrchestrator uses. The
+markdown tokenizer state built along the way is handed to parse_markdown()
+(register_stream), so the final orchestrator pass reuses the parse instead
+of re-tokenizing the answer; its result remains authoritative and replaces
+the partial sections on the client.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from .markdown_ast import MARKER, MarkdownTokenizer, register_stream
+from .modules import ConclusionModule, DirectAnswerModule, ThinkingModule
+
+logger = logging.getLogger(__name__)
+
+_SEPARATOR_RE = re.compile(r'^\|?\s*:?-{2,}')
+_CV_ID_RE = re.compile(r'cv_[a-z0-9_-]+', re.IGNORECASE)
+
+
+def _cells(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip('|').split('|')]
+
+
+class IncrementalOutputParser:
+    """Feed tokens in order; each call returns the sections completed by them."""
+
+    def __init__(
+        self,
+        thinking_module: Optional[ThinkingModule] = None,
+        direct_answer_module: Optional[DirectAnswerModule] = None,
+        conclusion_module: Optional[ConclusionModule] = None
+    ):
+        self.thinking_module = thinking_module or ThinkingModule()
+        self.direct_answer_module = direct_answer_module or DirectAnswerModule()
+        self.conclusion_module = conclusion_module or ConclusionModule()
+
+        self.tokenizer = MarkdownTokenizer()
+        self.emitted: Dict[str, Any] = {}
+        self._held = ""                     # Trailing text not yet given to the tokenizer
+        self._lines_seen = 0
+        self._markers_seen = 0
+        self._openers: Dict[str, int] = {}  # Directive name -> index of its opening marker
+        self._table_state = "before"        # before | header | rows | done
+        self._table_rows = 0
+
+    def feed(self, token: str) -> List[Dict[str, Any]]:
+        if not token:
+            return []
+        self._held += token
+
+        # Hold back the last non-blank line (and trailing whitespace) so the
+        # tokenizer only sees text that is a prefix of the final, stripped answer
+        end = len(self._held.rstrip())
+        cut = self._held.rfind("\n", 0, end) + 1
+        if cut == 0:
+            return []
+        self.tokenizer.feed(self._held[:cut])
+        self._held = self._held[cut:]
+        return self._scan()
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """End of stream: register the parse for reuse and flush the last sections."""
+        register_stream(self.tokenizer.fork())
+        self.tokenizer.feed(self._held + "\n")
+        self._held = ""
+        events = self._scan()
+        logger.debug(f"[INCREMENTAL] Streamed sections: {sorted(self.emitted)}")
+        return events
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = []
+        text = None
+
+        markers = self.tokenizer.markers
+        if len(markers) > self._markers_seen:
+            text = self.tokenizer.consumed_text
+            for i in range(self._markers_seen, len(markers)):
+                start = markers[i] + len(MARKER)
+                for name in ("thinking", "conclusion"):
+                    if name not in self._openers and text[start:start + len(name)].lower() == name:
+                        self._openers[name] = i
+            self._markers_seen = len(markers)
+
+            thinking = self._closed("thinking", text, self.thinking_module)
+            if thinking:
+                events.append(thinking)
+
+        lines = self.tokenizer.lines
+        for line in lines[self._lines_seen:]:
+            event = self._table_line(line)
+            if event:
+                events.append(event)
+        self._lines_seen = len(lines)
+
+        if "direct_answer" not in self.emitted and self._answer_started():
+            text = text or self.tokenizer.consumed_text
+            content = self.direct_answer_module.extract(text)
+            self.emitted["direct_answer"] = content
+            events.append({"section": "direct_answer", "content": content})
+
+        if "conclusion" in self._openers:
+            conclusion = self._closed("conclusion", text or self.tokenizer.consumed_text, self.conclusion_module)
+            if conclusion:
+                events.append(conclusion)
+
+        return events
+
+    def _closed(self, name: str, text: str, module) -> Optional[Dict[str, Any]]:
+        """Section event once the :::name block has its closing marker."""
+        opener = self._openers.get(name)
+        if name in self.emitted or opener is None or len(self.tokenizer.markers) <= opener + 1:
+            return None
+        content = module.extract(text)
+        self.emitted[name] = content
+        return {"section": name, "content": content} if content else None
+
+    def _answer_started(self) -> bool:
+        """A prose block completed outside (after) the thinking block."""
+        thinking = self._openers.get("thinking")
+        if thinking is not None and "thinking" not in self.emitted:
+            return False
+        after = self.tokenizer.markers[thinking + 1] if thinking is not None else -1
+        return any(
+            block.kind in ("paragraph", "list") and block.start > after
+            for block in self.tokenizer.blocks
+        )
+
+    def _table_line(self, line: str) -> Optional[Dict[str, Any]]:
+        """Header and rows of the first pipe table, one line at a time."""
+        stripped = line.strip()
+        if self._table_state == "done":
+            return None
+        if not stripped.startswith('|'):
+            if self._table_state != "before" and stripped:
+                self._table_state = "done"
+            return None
+
+        if self._table_state == "before":
+            self._table_state = "header"
+            headers = _cells(stripped)
+            self.emitted["table_header"] = headers
+            return {"section": "table_header", "headers": headers}
+
+        if _SEPARATOR_RE.match(stripped):
+            return None
+
+        self._table_state = "rows"
+        cells = _cells(stripped)
+        cv_id = _CV_ID_RE.search(stripped)
+        event = {
+            "section": "table_row",
+            "index": self._table_rows,
+            "cells": cells,
+            "cv_id": cv_id.group(0) if cv_id else None
+        }
+        self._table_rows += 1
+        self.emitted["table_rows"] = self._table_rows
+        return event
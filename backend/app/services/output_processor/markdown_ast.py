@@ -0,0 +1,339 @@
+"""
+Markdown AST - Single-pass tokenizer shared by the output modules.
+
+Every LLM answer is parsed once into a flat list of blocks (:::name directives,
+headings, tables, code fences, lists, paragraphs). parse_markdown() is cached by
+text, so the modules of a structure that all receive the same llm_output query
+the same parsed document instead of re-scanning the raw text with their own
+regexes.
+
+The tokenizer is incremental: a streamed answer is tokenized while tokens
+arrive, and the final pass resumes from that parse (register_stream) instead
+of starting over.
+
+Directive lookups keep the semantics of the regexes they replace:
+- ":::name ... :::"  content runs to the first ":::" after the name
+- ":::name ..."      (unclosed) content runs to the end of the text
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional
+
+MARKER = ":::"
+
+_LIST_ITEM = re.compile(r'^\s*(?:[-*+•]|\d+[.)])\s+')
+_HEADING = re.compile(r'^(#{1,6})\s*(.*?)\s*#*\s*$')
+
+
+@dataclass
+class Block:
+    """A top-level markdown block."""
+    kind: str                   # directive | heading | table | code | list | paragraph
+    text: str
+    start: int                  # Char offsets into the parsed text
+    end: int
+    name: str = ""              # Directive name (lowercase) or heading title
+    level: int = 0              # Heading level
+
+
+@dataclass
+class Directive:
+    """A :::name block."""
+    name: str
+    content: str                # Up to the closing ":::" (or the end when unclosed)
+    tail: str                   # Everything after ":::name"
+    closed: bool
+
+
+def _find_markers(text: str) -> List[int]:
+    """Offsets of every ':::' occurrence (non-overlapping, left to right)."""
+    markers = []
+    pos = text.find(MARKER)
+    while pos != -1:
+        markers.append(pos)
+        pos = text.find(MARKER, pos + len(MARKER))
+    return markers
+
+
+def _opens(text: str, pos: int, name: str) -> bool:
+    """True when the marker at `pos` opens a `name` directive (case-insensitive)."""
+    start = pos + len(MARKER)
+    return text[start:start + len(name)].lower() == name
+
+
+def _remove_directive(text: str, name: str) -> str:
+    """Drop every closed `name` directive, markers included."""
+    markers = _find_markers(text)
+    if not markers:
+        return text
+
+    parts = []
+    last = 0
+    i = 0
+    while i < len(markers):
+        pos = markers[i]
+        if pos >= last and _opens(text, pos, name) and i + 1 < len(markers):
+            parts.append(text[last:pos])
+            last = markers[i + 1] + len(MARKER)
+            i += 2
+            continue
+        i += 1
+
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+@dataclass
+class MarkdownDocument:
+    """Parsed answer. Build with parse_markdown(); treat as read-only."""
+    text: str
+    lines: List[str]
+    blocks: List[Block]
+    markers: List[int]
+    _cache: Dict[tuple, object] = field(default_factory=dict, repr=False)
+
+    def blocks_of(self, kind: str) -> List[Block]:
+        return [b for b in self.blocks if b.kind == kind]
+
+    @property
+    def headings(self) -> List[Block]:
+        return self.blocks_of("heading")
+
+    @property
+    def paragraphs(self) -> List[str]:
+        """Raw '\\n\\n'-separated chunks (the split the cleanup passes work on)."""
+        key = ("paragraphs",)
+        if key not in self._cache:
+            self._cache[key] = self.text.split("\n\n")
+        return self._cache[key]
+
+    def directive(self, name: str) -> Optional[Directive]:
+        """First :::name block, or None when the text has no such opener."""
+        name = name.lower()
+        key = ("directive", name)
+        if key in self._cache:
+            return self._cache[key]
+
+        found = None
+        for i, pos in enumerate(self.markers):
+            if not _opens(self.text, pos, name):
+                continue
+            body_start = pos + len(MARKER) + len(name)
+            tail = self.text[body_start:]
+            if i + 1 < len(self.markers):
+                content = self.text[body_start:self.markers[i + 1]]
+                found = Directive(name=name, content=content.strip(), tail=tail.strip(), closed=True)
+            else:
+                found = Directive(name=name, content=tail.strip(), tail=tail.strip(), closed=False)
+            break
+
+        self._cache[key] = found
+        return found
+
+    def without_directives(self, *names: str) -> str:
+        """Text with the closed directives removed, one name after the other."""
+        key = ("without",) + tuple(n.lower() for n in names)
+        if key not in self._cache:
+            text = self.text
+            for name in names:
+                text = _remove_directive(text, name.lower())
+            self._cache[key] = text
+        return self._cache[key]
+
+    def table_lines(self) -> List[str]:
+        """
+        Lines of the first pipe table: from the first line containing '|',
+        skipping blank lines, up to the first non-blank line without '|'.
+        """
+        key = ("table_lines",)
+        if key not in self._cache:
+            table_lines = []
+            in_table = False
+            for line in self.lines:
+                stripped = line.strip()
+                if '|' in stripped:
+                    in_table = True
+                    table_lines.append(line)
+                elif in_table and stripped == '':
+                    continue
+                elif in_table:
+                    break
+            self._cache[key] = table_lines
+        return self._cache[key]
+
+
+class MarkdownTokenizer:
+    """
+    Line-at-a-time tokenizer behind parse_markdown().
+
+    Text can be fed in arbitrary pieces (e.g. streamed LLM tokens); blocks are
+    produced as their lines complete, and document() snapshots the parse of
+    everything fed so far without consuming it.
+    """
+
+    def __init__(self):
+        self.blocks: List[Block] = []
+        self.markers: List[int] = []
+        self.lines: List[str] = []
+        self._consumed: List[str] = []      # Complete lines, newline included
+        self._offset = 0                    # Chars of complete lines consumed
+        self._pending = ""                  # Last, still incomplete line
+        self._current: Optional[Block] = None
+        self._current_lines: List[str] = []
+        self._in_fence = False
+
+    @property
+    def consumed_text(self) -> str:
+        """Text of the complete lines fed so far."""
+        if len(self._consumed) > 1:
+            self._consumed = ["".join(self._consumed)]
+        return self._consumed[0] if self._consumed else ""
+
+    @property
+    def text(self) -> str:
+        return self.consumed_text + self._pending
+
+    def feed(self, chunk: str) -> List[Block]:
+        """Add text; returns the blocks completed by it."""
+        if not chunk:
+            return []
+        self._pending += chunk
+        if "\n" not in chunk:
+            return []
+
+        *complete, self._pending = self._pending.split("\n")
+        done = len(self.blocks)
+        for line in complete:
+            self._line(line)
+            self._consumed.append(line + "\n")
+        return self.blocks[done:]
+
+    def fork(self) -> "MarkdownTokenizer":
+        """Independent copy at the last complete line (pending text dropped)."""
+        clone = MarkdownTokenizer.__new__(MarkdownTokenizer)
+        clone.blocks = list(self.blocks)
+        clone.markers = list(self.markers)
+        clone.lines = list(self.lines)
+        clone._consumed = [self.consumed_text] if self._offset else []
+        clone._offset = self._offset
+        clone._pending = ""
+        clone._current = replace(self._current) if self._current else None
+        clone._current_lines = list(self._current_lines)
+        clone._in_fence = self._in_fence
+        return clone
+
+    def document(self) -> "MarkdownDocument":
+        """Parse of everything fed so far, the pending line included."""
+        final = self.fork()
+        final._line(self._pending)
+        final._close()
+        return MarkdownDocument(
+            text=self.text,
+            lines=final.lines,
+            blocks=final.blocks,
+            markers=final.markers,
+        )
+
+    def _close(self):
+        if self._current is not None:
+            self._current.text = "\n".join(self._current_lines)
+            self.blocks.append(self._current)
+            self._current = None
+            self._current_lines = []
+
+    def _extend(self, line: str, end: int):
+        self._current.end = end
+        self._current_lines.append(line)
+
+    def _open(self, block: Block, line: str):
+        self._close()
+        self._current = block
+        self._current_lines = [line]
+
+    def _line(self, line: str):
+        """Tokenize one line; consecutive lines of the same kind are merged."""
+        start, end = self._offset, self._offset + len(line)
+        self._offset = end + 1
+        self.lines.append(line)
+
+        # ':::' cannot span lines, so per-line search finds the same markers
+        pos = line.find(MARKER)
+        while pos != -1:
+            self.markers.append(start + pos)
+            pos = line.find(MARKER, pos + len(MARKER))
+
+        stripped = line.strip()
+
+        if self._in_fence:
+            self._extend(line, end)
+            if stripped.startswith("```"):
+                self._in_fence = False
+                self._close()
+            return
+
+        if stripped.startswith("```"):
+            self._open(Block("code", "", start, end, name=stripped[3:].strip().lower()), line)
+            self._in_fence = True
+            return
+
+        if not stripped:
+            self._close()
+            return
+
+        if stripped.startswith(MARKER):
+            self._close()
+            name = stripped[len(MARKER):].strip(": ").split(" ")[0].lower()
+            self.blocks.append(Block("directive", line, start, end, name=name))
+            return
+
+        heading = _HEADING.match(stripped) if stripped.startswith("#") else None
+        if heading:
+            self._close()
+            self.blocks.append(Block("heading", line, start, end, name=heading.group(2), level=len(heading.group(1))))
+            return
+
+        current = self._current
+        if stripped.startswith("|"):
+            kind = "table"
+        elif _LIST_ITEM.match(line):
+            kind = "list"
+        elif current is not None and current.kind == "list" and line[:1].isspace():
+            kind = "list"               # Continuation of a list item
+        else:
+            kind = "paragraph"
+
+        if current is not None and current.kind == kind:
+            self._extend(line, end)
+        else:
+            self._open(Block(kind, "", start, end), line)
+
+
+# Recently streamed answers; parse_markdown() resumes from them instead of
+# re-tokenizing text that was already parsed while tokens arrived
+_streams: Deque[MarkdownTokenizer] = deque(maxlen=8)
+
+
+def register_stream(tokenizer: MarkdownTokenizer) -> None:
+    """Let parse_markdown() reuse a streamed parse for text that extends it."""
+    _streams.append(tokenizer)
+
+
+@lru_cache(maxsize=64)
+def parse_markdown(text: str) -> MarkdownDocument:
+    """Parse `text` once; repeated calls with the same text share the document."""
+    text = text or ""
+    for streamed in list(_streams):
+        prefix = streamed.consumed_text
+        if prefix and text.startswith(prefix):
+            tokenizer = streamed.fork()
+            break
+    else:
+        tokenizer, prefix = MarkdownTokenizer(), ""
+
+    tokenizer.feed(text[len(prefix):])
+    return tokenizer.document()
@@ -0,0 +1,130 @@
+"""
+Module Graph - Dependency-ordered execution of a structure's modules.
+
+Structures declare their modules as nodes with the names of the nodes they
+depend on. Independent modules (e.g. skill matrix, synergy and overview once
+the team is known) run concurrently on a shared thread pool when the input
+is large enough to be worth it; small inputs run inline in dependency order.
+Per-module durations are recorded either way and reported in the
+"output_processing" pipeline step.
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_module_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by every structure."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.output_module_workers),
+            thread_name_prefix="output-module"
+        )
+    return _executor
+
+
+def should_parallelize(chunks: Sequence[Any]) -> bool:
+    """Concurrency only pays off on heavy responses."""
+    return settings.output_module_workers > 1 and len(chunks) >= settings.output_parallel_min_chunks
+
+
+@dataclass
+class ModuleNode:
+    """A module call; `fn` receives the results of the nodes run so far."""
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    deps: tuple = ()
+
+
+@dataclass
+class ModuleGraphRun:
+    """Results and timings of one graph execution."""
+    results: Dict[str, Any]
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+    parallel: bool = False
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+
+class ModuleGraph:
+    """
+    Declares the modules of a structure and the order constraints between them.
+
+    Example:
+        graph = ModuleGraph("team_build")
+        graph.add("team", lambda r: build_team(chunks))
+        graph.add("matrix", lambda r: matrix_module.build(r["team"]), deps=("team",))
+        run = graph.run(parallel=should_parallelize(chunks))
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._nodes: Dict[str, ModuleNode] = {}
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any], deps: Sequence[str] = ()) -> "ModuleGraph":
+        for dep in deps:
+            if dep not in self._nodes:
+                raise ValueError(f"Module '{name}' depends on unknown module '{dep}'")
+        self._nodes[name] = ModuleNode(name=name, fn=fn, deps=tuple(deps))
+        return self
+
+    def run(self, parallel: bool = False) -> ModuleGraphRun:
+        """Execute every node; exceptions from a module propagate to the caller."""
+        start = time.perf_counter()
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+
+        if parallel and len(self._nodes) > 1:
+            self._run_parallel(results, timings)
+        else:
+            # Nodes can only depend on earlier nodes, so insertion order is topological
+            parallel = False
+            for node in self._nodes.values():
+                results[node.name], timings[node.name] = self._call(node, results)
+
+        run = ModuleGraphRun(
+            results=results,
+            timings_ms=timings,
+            total_ms=(time.perf_counter() - start) * 1000,
+            parallel=parallel
+        )
+        logger.debug(
+            f"[MODULE_GRAPH] {self.name}: {len(self._nodes)} modules in {run.total_ms:.1f}ms "
+            f"({'parallel' if parallel else 'sequential'})"
+        )
+        return run
+
+    def _run_parallel(self, results: Dict[str, Any], timings: Dict[str, float]) -> None:
+        executor = get_module_executor()
+        pending: List[ModuleNode] = list(self._nodes.values())
+        running: Dict[Future, str] = {}
+
+        while pending or running:
+            ready = [n for n in pending if all(d in results for d in n.deps)]
+            for node in ready:
+                pending.remove(node)
+                # Each module sees a snapshot holding at least its dependencies
+                running[executor.submit(self._call, node, dict(results))] = node.name
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name], timings[name] = future.result()
+
+    @staticmethod
+    def _call(node: ModuleNode, results: Dict[str, Any]) -> tuple:
+        start = time.perf_counter()
+        value = node.fn(results)
+        return value, (time.perf_counter() - start) * 1000
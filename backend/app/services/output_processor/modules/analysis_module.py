@@ -9,6 +9,8 @@ import logging
 import re
 from typing import Optional
 
+from ..markdown_ast import parse_markdown
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,9 +58,7 @@ class AnalysisModule:
                 return analysis_content
         
         # FALLBACK: Remove special blocks and extract remaining content
-        cleaned = llm_output
-        cleaned = re.sub(r':::thinking[\s\S]*?:::', '', cleaned, flags=re.IGNORECASE)
-        cleaned = re.sub(r':::conclusion[\s\S]*?:::', '', cleaned, flags=re.IGNORECASE)
+        cleaned = parse_markdown(llm_output).without_directives("thinking", "conclusion")
         
         # Remove direct answer
         if direct_answer and direct_answer in cleaned:
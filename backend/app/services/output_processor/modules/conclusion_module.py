@@ -9,6 +9,8 @@ import logging
 import re
 from typing import Optional
 
+from ..markdown_ast import parse_markdown
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,10 +34,14 @@ class ConclusionModule:
         if not llm_output:
             return None
         
+        block = parse_markdown(llm_output).directive("conclusion")
+        if block is None:
+            logger.debug("[CONCLUSION] Not found")
+            return None
+        
         # Pattern 1: :::conclusion ... :::
-        match = re.search(r':::conclusion\s*([\s\S]*?)\s*:::', llm_output, re.IGNORECASE)
-        if match:
-            content = match.group(1).strip()
+        if block.closed:
+            content = block.content
             if content:
                 # Clean prompt contamination from conclusion
                 content = self._clean_contamination(content)
@@ -44,15 +50,13 @@ class ConclusionModule:
                     return content
         
         # Pattern 2: :::conclusion ... (no closing, take rest of text)
-        match = re.search(r':::conclusion\s*([\s\S]*)', llm_output, re.IGNORECASE)
-        if match:
-            content = match.group(1).strip()
+        content = block.tail
+        if content:
+            # Clean prompt contamination from conclusion
+            content = self._clean_contamination(content)
             if content:
-                # Clean prompt contamination from conclusion
-                content = self._clean_contamination(content)
-                if content:
-                    logger.debug(f"[CONCLUSION] Extracted (no closing): {len(content)} chars")
-                    return content
+                logger.debug(f"[CONCLUSION] Extracted (no closing): {len(content)} chars")
+                return content
         
         logger.debug("[CONCLUSION] Not found")
         return None
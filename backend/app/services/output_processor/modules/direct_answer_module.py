@@ -8,6 +8,8 @@ DO NOT MODIFY without explicit user request.
 import logging
 import re
 
+from ..markdown_ast import parse_markdown
+
 logger = logging.getLogger(__name__)
 
 
@@ -55,11 +57,10 @@ class DirectAnswerModule:
                     logger.info(f"[DIRECT_ANSWER] Extracted from 'Direct Answer to:' section: {len(result)} chars")
                     return self._clean_transition_phrases(result)
         
-        # Remove thinking block first
-        cleaned = re.sub(r':::thinking[\s\S]*?:::', '', llm_output, flags=re.IGNORECASE)
+        doc = parse_markdown(llm_output)
         
-        # Remove conclusion block
-        cleaned = re.sub(r':::conclusion[\s\S]*?:::', '', cleaned, flags=re.IGNORECASE)
+        # Remove thinking block first, then the conclusion block
+        cleaned = doc.without_directives("thinking", "conclusion")
         
         # Remove tables (markdown format)
         cleaned = re.sub(r'\|[^\n]*\|[\s\S]*?\|[^\n]*\|', '', cleaned)
@@ -226,9 +227,9 @@ class DirectAnswerModule:
             return fallback
         
         # Generate a generic response based on conclusion if available
-        conclusion_match = re.search(r':::conclusion\s*([\s\S]*?):::', llm_output, re.IGNORECASE)
-        if conclusion_match:
-            conclusion_text = conclusion_match.group(1).strip()
+        conclusion_block = doc.directive("conclusion")
+        if conclusion_block and conclusion_block.closed:
+            conclusion_text = conclusion_block.content
             first_sentence = re.split(r'[.!?]', conclusion_text)[0]
             if first_sentence and len(first_sentence) > 10:
                 logger.info("[DIRECT_ANSWER] Using conclusion as fallback")
@@ -12,6 +12,8 @@ import logging
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+from app.services.candidate_profile_service import CandidateProfile, get_profile_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -96,12 +98,16 @@ class RedFlagsModule:
         
         # Group chunks by candidate
         candidate_chunks = self._group_by_candidate(chunks)
+        profile_store = get_profile_store()
         
         for candidate, cand_chunks in candidate_chunks.items():
             candidate_flags = []
             
+            # Profile computed at ingestion covers the whole CV, not just retrieved chunks
+            profile = profile_store.for_candidate(cand_chunks)
+            
             # Get summary chunk metadata (most complete)
-            summary_meta = self._get_summary_metadata(cand_chunks)
+            summary_meta = profile.as_metadata() if profile else self._get_summary_metadata(cand_chunks)
             
             # Check for job hopping and short tenure
             job_hopping_flags = self._check_job_hopping(candidate, summary_meta)
@@ -110,13 +116,13 @@ class RedFlagsModule:
                 candidate_flags.append(flag.flag_type)
             
             # Check for employment gaps
-            gap_flags = self._check_employment_gaps(candidate, summary_meta, cand_chunks)
+            gap_flags = self._check_employment_gaps(candidate, summary_meta, cand_chunks, profile)
             for gap_flag in gap_flags:
                 flags.append(gap_flag)
                 candidate_flags.append(gap_flag.flag_type)
             
             # Check for short tenures
-            short_tenure_flags = self._check_short_tenures(candidate, cand_chunks)
+            short_tenure_flags = self._check_short_tenures(candidate, cand_chunks, profile)
             for flag in short_tenure_flags:
                 flags.append(flag)
                 candidate_flags.append(flag.flag_type)
@@ -253,11 +259,24 @@ class RedFlagsModule:
         self,
         candidate: str,
         metadata: Dict[str, Any],
-        chunks: List[Dict[str, Any]]
+        chunks: List[Dict[str, Any]],
+        profile: Optional[CandidateProfile] = None
     ) -> List[RedFlag]:
         """Check for employment gaps."""
         flags = []
         
+        # Gaps between dated positions, computed at ingestion
+        if profile and profile.employment_gaps:
+            gaps = [f"{end}-{start}" for end, start in profile.employment_gaps]
+            flags.append(RedFlag(
+                flag_type="employment_gap",
+                severity="medium" if len(gaps) > 1 else "low",
+                description=f"Employment gap(s) > {self.GAP_THRESHOLD_YEARS:.0f} year: {', '.join(gaps)}",
+                candidate_name=candidate,
+                details={"gaps": [list(g) for g in profile.employment_gaps], "source": "profile"}
+            ))
+            return flags
+        
         # Look for gap indicators in content
         for chunk in chunks:
             content = chunk.get("content", "").lower()
@@ -273,27 +292,27 @@ class RedFlagsModule:
                 ))
                 break
         
-        # Check metadata for gaps
-        # Note: employment_gaps from enriched metadata would be a list of (start, end) tuples
-        # stored as string in ChromaDB
-        
         return flags
     
     def _check_short_tenures(
         self,
         candidate: str,
-        chunks: List[Dict[str, Any]]
+        chunks: List[Dict[str, Any]],
+        profile: Optional[CandidateProfile] = None
     ) -> List[RedFlag]:
         """Check for very short job tenures."""
         flags = []
         short_jobs = []
         
-        for chunk in chunks:
-            meta = chunk.get("metadata", {})
-            duration = meta.get("duration_years", 0)
-            job_title = meta.get("job_title", "")
-            company = meta.get("company", "")
-            
+        if profile:
+            positions = [(p.duration_years, p.title, p.company) for p in profile.positions]
+        else:
+            positions = [
+                (meta.get("duration_years", 0), meta.get("job_title", ""), meta.get("company", ""))
+                for meta in (chunk.get("metadata", {}) for chunk in chunks)
+            ]
+        
+        for duration, job_title, company in positions:
             if duration and duration < self.SHORT_TENURE_YEARS and job_title:
                 short_jobs.append(f"{job_title} at {company} ({duration:.1f}y)")
         
@@ -18,6 +18,8 @@ import re
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+from app.services.candidate_profile_service import get_profile_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -150,8 +152,10 @@ class RiskTableModule:
                 return self._extract_from_llm_output(llm_output, candidate_name, cv_id)
             return data
         
-        # Find chunk with enriched metadata
-        enriched_meta = self._find_enriched_metadata(chunks)
+        # Profile computed at ingestion first, else the best chunk metadata
+        profile_store = get_profile_store()
+        profile = (profile_store.get(cv_id) if cv_id else None) or profile_store.for_candidate(chunks)
+        enriched_meta = profile.as_metadata() if profile else self._find_enriched_metadata(chunks)
         
         if not enriched_meta:
             logger.warning(f"[RISK_ASSESSMENT] No enriched metadata found for {candidate_name}")
@@ -15,6 +15,9 @@ import re
 from typing import Dict, List, Optional
 
 from app.models.structured_output import TableData, TableRow
+from app.services.skill_taxonomy import get_skill_matcher
+
+from ..markdown_ast import parse_markdown
 
 logger = logging.getLogger(__name__)
 
@@ -87,20 +90,7 @@ class TableModule:
         Risk Assessment tables are handled separately by the frontend.
         """
         # Find table region
-        lines = text.split('\n')
-        table_lines = []
-        in_table = False
-        
-        for line in lines:
-            stripped = line.strip()
-            if '|' in stripped:
-                if not in_table:
-                    in_table = True
-                table_lines.append(line)
-            elif in_table and stripped == '':
-                continue
-            elif in_table:
-                break
+        table_lines = parse_markdown(text).table_lines()
         
         if len(table_lines) < 2:
             logger.debug(f"[TABLE] Not enough table lines: {len(table_lines)}")
@@ -613,29 +603,7 @@ class TableModule:
         if not content:
             return []
         
-        skill_patterns = [
-            r'\b(Python|Java|JavaScript|TypeScript|C\+\+|C#|Ruby|Go|Rust|PHP)\b',
-            r'\b(React|Angular|Vue|Node\.js|Django|Flask|Spring|Express)\b',
-            r'\b(AWS|Azure|GCP|Docker|Kubernetes|Terraform|Jenkins)\b',
-            r'\b(SQL|MongoDB|PostgreSQL|MySQL|Redis|Elasticsearch)\b',
-            r'\b(Machine Learning|AI|Data Science|Deep Learning)\b',
-        ]
-        
-        skills = []
-        for pattern in skill_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            skills.extend(matches)
-        
-        # Remove duplicates
-        seen = set()
-        unique = []
-        for skill in skills:
-            lower = skill.lower()
-            if lower not in seen:
-                seen.add(lower)
-                unique.append(skill)
-        
-        return unique[:5]
+        return get_skill_matcher().find_terms(content)[:5]
     
     def _extract_tables_from_code_blocks(self, text: str) -> str:
         """
@@ -9,6 +9,8 @@ import logging
 import re
 from typing import Optional
 
+from ..markdown_ast import parse_markdown
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,10 +34,14 @@ class ThinkingModule:
         if not llm_output:
             return None
         
+        block = parse_markdown(llm_output).directive("thinking")
+        if block is None:
+            logger.debug("[THINKING] Not found")
+            return None
+        
         # Pattern 1: :::thinking ... :::
-        match = re.search(r':::thinking\s*([\s\S]*?)\s*:::', llm_output, re.IGNORECASE)
-        if match:
-            content = match.group(1).strip()
+        if block.closed:
+            content = block.content
             if content:
                 # Strip markdown since thinking dropdown doesn't render it
                 content = self._strip_markdown(content)
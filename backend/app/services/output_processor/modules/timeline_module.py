@@ -10,6 +10,8 @@ import re
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+from app.services.candidate_profile_service import get_profile_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -163,20 +165,31 @@ class TimelineModule:
         current_role = None
         companies = set()
         
-        for chunk in chunks:
-            meta = chunk.get("metadata", {})
-            
-            if not cv_id:
-                cv_id = meta.get("cv_id", "")
-            
-            # Extract position data from enriched metadata
-            start_year = meta.get("start_year")
-            end_year = meta.get("end_year")
-            job_title = meta.get("job_title", "")
-            company = meta.get("company", "")
-            is_current = meta.get("is_current", False)
-            duration = meta.get("duration_years", 0)
-            
+        # Every position of the CV from its ingestion profile; otherwise only
+        # the experience chunks that were retrieved
+        profile = get_profile_store().for_candidate(chunks)
+        if profile and profile.positions:
+            cv_id = profile.cv_id
+            positions = [
+                (p.start_year, p.end_year, p.title, p.company, p.is_current, p.duration_years)
+                for p in profile.positions
+            ]
+        else:
+            positions = []
+            for chunk in chunks:
+                meta = chunk.get("metadata", {})
+                if not cv_id:
+                    cv_id = meta.get("cv_id", "")
+                positions.append((
+                    meta.get("start_year"),
+                    meta.get("end_year"),
+                    meta.get("job_title", ""),
+                    meta.get("company", ""),
+                    meta.get("is_current", False),
+                    meta.get("duration_years", 0)
+                ))
+        
+        for start_year, end_year, job_title, company, is_current, duration in positions:
             if start_year and job_title:
                 entry = TimelineEntry(
                     year_start=int(start_year),
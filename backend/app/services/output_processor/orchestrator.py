@@ -18,6 +18,8 @@ from app.utils.debug_logger import log_event
 
 # Import SMART ADAPTIVE system (new generation - dynamic structures)
 from .adaptive import AdaptiveStructureBuilder
+from .incremental import IncrementalOutputParser
+from .markdown_ast import parse_markdown
 
 # Import modules for legacy/fallback processing
 from .modules import (
@@ -47,6 +49,41 @@ from .structures import (
 
 logger = logging.getLogger(__name__)
 
+# Cleanup patterns, compiled once instead of on every answer
+_CODE_WRAPPER_RE = re.compile(r'^```(?:code|markdown|text|)?\s*\n([\s\S]*?)\n```\s*$', re.IGNORECASE)
+_LEADING_FENCE_RE = re.compile(r'^```(?:code|markdown|text|)?\s*\n', re.IGNORECASE)
+_TRAILING_FENCE_RE = re.compile(r'\n```\s*$')
+_CODE_LINE_RE = re.compile(r'^code\s*$', re.MULTILINE)
+_CODE_COPY_RE = re.compile(r'code\s*Copy\s*code', re.IGNORECASE)
+_COPY_CODE_RE = re.compile(r'\bCopy\s+code\b', re.IGNORECASE)
+
+_BOLD_LINK_RE = re.compile(r'\*\*\[([^\]]+)\]\(([^)]+)\)\*\*')
+_BARE_CV_LINK_RE = re.compile(r'\[([^\]]+)\]\((cv_[a-z0-9_-]+)\)', re.IGNORECASE)
+_CV_LINK_RE = re.compile(r'\[([^\]]+)\]\((cv:cv_[a-z0-9_-]+)\)', re.IGNORECASE)
+
+_SPACE_AFTER_BOLD_RE = re.compile(r'\*\*\s+')
+_SPACE_BEFORE_BOLD_RE = re.compile(r'\s+\*\*')
+_BROKEN_CV_LINK_RE = re.compile(r'\]\(cv:\s+(cv_[a-f0-9_-]+)\)', re.IGNORECASE)
+_CV_LINK_SPACING_RE = re.compile(r'\]\(\s*cv:\s*', re.IGNORECASE)
+_DUP_CV_REF_RE = re.compile(r'(cv_[a-z0-9_-]+)\s*\[\1\]\(\1\)', re.IGNORECASE)
+_DUP_CV_LINK_RE = re.compile(r'(cv_[a-z0-9_-]+)\s*\[\1\]\(cv:\1\)', re.IGNORECASE)
+_TRIPLE_CV_REF_RE = re.compile(r'\*\*([^*]+)\*\*\s*(cv_[a-z0-9_-]+)\s*\[\2\]\(\2\)', re.IGNORECASE)
+_TRIPLE_CV_LINK_RE = re.compile(r'\*\*([^*]+)\*\*\s*(cv_[a-z0-9_-]+)\s*\[\2\]\(cv:\2\)', re.IGNORECASE)
+_EXTRA_NEWLINES_RE = re.compile(r'\n{3,}')
+
+_PIPE_RE = re.compile(r'\s*\|\s*')
+_PIPE_CELLS_RE = re.compile(r'\|[^|]*\|[^|]*\|?')
+
+# Paragraphs that are never deduplicated
+_KEEP_PARAGRAPH_KEYWORDS = (
+    'red flags', '### red flags', 'risk assessment', '### risk assessment',
+    '⚠️ risk assessment', 'red flags analysis', 'job hopping', 'employment gaps'
+)
+
+# Duplicate detection compares the first DEDUP_PREFIX chars of normalized paragraphs
+DEDUP_PREFIX = 50
+DEDUP_MIN_SEEN = 30
+
 
 class OutputOrchestrator:
     """
@@ -268,6 +305,20 @@ class OutputOrchestrator:
             logger.info(f"[ORCHESTRATOR] Using legacy standard response for query_type={query_type}")
             return self._process_standard_response(cleaned_llm_output, chunks, query, query_type)
     
+    def stream_parser(self) -> IncrementalOutputParser:
+        """
+        Incremental mode: parser for a token stream that reports thinking,
+        direct answer, table rows and conclusion as each completes.
+        
+        process() still runs on the full answer afterwards; it reuses the
+        streamed markdown parse and its output supersedes the partial sections.
+        """
+        return IncrementalOutputParser(
+            thinking_module=self.thinking_module,
+            direct_answer_module=self.direct_answer_module,
+            conclusion_module=self.conclusion_module
+        )
+    
     def _build_structured_output(
         self, 
         structure_data: Dict[str, Any], 
@@ -299,6 +350,7 @@ class OutputOrchestrator:
         # Add structure-specific data
         structured.structure_type = structure_data.get("structure_type")
         structured.risk_assessment = structure_data.get("risk_table")
+        structured.module_timings = structure_data.get("module_timings")
         
         # For single candidate, add all profile components
         if structure_data.get("structure_type") == "single_candidate":
@@ -582,8 +634,6 @@ class OutputOrchestrator:
         
         This handles cases where LLM wraps EVERYTHING in a code block.
         """
-        import re
-        
         if not text:
             return text
         
@@ -591,24 +641,20 @@ class OutputOrchestrator:
         
         # CRITICAL: Detect if entire output is wrapped in a code block
         # Pattern: ```code\n...content...\n``` or ```\n...content...\n```
-        code_block_wrapper = re.match(
-            r'^```(?:code|markdown|text|)?\s*\n([\s\S]*?)\n```\s*$',
-            text.strip(),
-            flags=re.IGNORECASE
-        )
+        code_block_wrapper = _CODE_WRAPPER_RE.match(text.strip())
         
         if code_block_wrapper:
             text = code_block_wrapper.group(1)
             logger.info("[ORCHESTRATOR] Unwrapped content from code block wrapper")
         
         # Also handle partial code blocks at the start
-        text = re.sub(r'^```(?:code|markdown|text|)?\s*\n', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\n```\s*$', '', text)
+        text = _LEADING_FENCE_RE.sub('', text)
+        text = _TRAILING_FENCE_RE.sub('', text)
         
         # Remove "code Copy code" artifacts
-        text = re.sub(r'^code\s*$', '', text, flags=re.MULTILINE)
-        text = re.sub(r'code\s*Copy\s*code', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\bCopy\s+code\b', '', text, flags=re.IGNORECASE)
+        text = _CODE_LINE_RE.sub('', text)
+        text = _CODE_COPY_RE.sub('', text)
+        text = _COPY_CODE_RE.sub('', text)
         
         if len(text) != original_len:
             logger.info(f"[ORCHESTRATOR] Pre-cleaned: {original_len} -> {len(text)} chars")
@@ -634,29 +680,15 @@ class OutputOrchestrator:
         
         # Paso 0: Eliminar negrita externa que el LLM añade alrededor de links
         # **[Nombre](cv_xxx)** -> [Nombre](cv_xxx)
-        text = re.sub(
-            r'\*\*\[([^\]]+)\]\(([^)]+)\)\*\*',
-            r'[\1](\2)',
-            text
-        )
+        text = _BOLD_LINK_RE.sub(r'[\1](\2)', text)
         
         # Paso 1: Normalizar links sin prefijo cv:
         # [Nombre](cv_xxx) -> [Nombre](cv:cv_xxx)
-        text = re.sub(
-            r'\[([^\]]+)\]\((cv_[a-z0-9_-]+)\)',
-            r'[\1](cv:\2)',
-            text,
-            flags=re.IGNORECASE
-        )
+        text = _BARE_CV_LINK_RE.sub(r'[\1](cv:\2)', text)
         
         # Paso 2: Convertir al formato final con icono + negrita
         # [Nombre](cv:cv_xxx) -> [📄](cv:cv_xxx) **Nombre**
-        text = re.sub(
-            r'\[([^\]]+)\]\((cv:cv_[a-z0-9_-]+)\)',
-            r'[📄](\2) **\1**',
-            text,
-            flags=re.IGNORECASE
-        )
+        text = _CV_LINK_RE.sub(r'[📄](\2) **\1**', text)
         
         # Paso 3: Detectar nombres de candidatos en texto plano y convertirlos
         # Solo si tenemos el mapa de candidatos de la tabla
@@ -676,65 +708,38 @@ class OutputOrchestrator:
         
         This catches any formatting issues that slipped through modules.
         """
-        import re
-        
         if not text:
             return text
         
         original = text
         
         # 1. Fix bold formatting globally: ** Name** -> **Name**
-        text = re.sub(r'\*\*\s+', '**', text)  # Remove space after **
-        text = re.sub(r'\s+\*\*', '**', text)  # Remove space before **
+        text = _SPACE_AFTER_BOLD_RE.sub('**', text)  # Remove space after **
+        text = _SPACE_BEFORE_BOLD_RE.sub('**', text)  # Remove space before **
         
         # 1.5 FIX: Clean up broken markdown links caused by LLM line breaks
         # Pattern: [Name](cv: cv_xxx) or [Name](cv:\ncv_xxx) -> [Name](cv:cv_xxx)
         # The whitespace/newline after "cv:" breaks the link
-        text = re.sub(r'\]\(cv:\s+(cv_[a-f0-9_-]+)\)', r'](cv:\1)', text, flags=re.IGNORECASE)
-        text = re.sub(r'\]\(\s*cv:\s*', r'](cv:', text, flags=re.IGNORECASE)
+        text = _BROKEN_CV_LINK_RE.sub(r'](cv:\1)', text)
+        text = _CV_LINK_SPACING_RE.sub(r'](cv:', text)
         
         # 2. CRITICAL: Ensure ALL cv_id links have cv: prefix for frontend detection
         # Convert [Name](cv_xxx) -> [Name](cv:cv_xxx)
-        text = re.sub(
-            r'\[([^\]]+)\]\((cv_[a-z0-9_-]+)\)',
-            r'[\1](cv:\2)',
-            text,
-            flags=re.IGNORECASE
-        )
+        text = _BARE_CV_LINK_RE.sub(r'[\1](cv:\2)', text)
         
         # 3. Fix duplicated cv_id references: cv_xxx [cv_xxx](cv_xxx) -> [cv_xxx](cv:cv_xxx)
-        text = re.sub(
-            r'(cv_[a-z0-9_-]+)\s*\[\1\]\(\1\)',
-            r'[\1](cv:\1)',
-            text,
-            flags=re.IGNORECASE
-        )
-        text = re.sub(
-            r'(cv_[a-z0-9_-]+)\s*\[\1\]\(cv:\1\)',
-            r'[\1](cv:\1)',
-            text,
-            flags=re.IGNORECASE
-        )
+        text = _DUP_CV_REF_RE.sub(r'[\1](cv:\1)', text)
+        text = _DUP_CV_LINK_RE.sub(r'[\1](cv:\1)', text)
         
         # 4. Fix triple cv_id: Name cv_xxx [cv_xxx](cv_xxx) -> **Name** cv_xxx
-        text = re.sub(
-            r'\*\*([^*]+)\*\*\s*(cv_[a-z0-9_-]+)\s*\[\2\]\(\2\)',
-            r'**\1** \2',
-            text,
-            flags=re.IGNORECASE
-        )
-        text = re.sub(
-            r'\*\*([^*]+)\*\*\s*(cv_[a-z0-9_-]+)\s*\[\2\]\(cv:\2\)',
-            r'**\1** \2',
-            text,
-            flags=re.IGNORECASE
-        )
+        text = _TRIPLE_CV_REF_RE.sub(r'**\1** \2', text)
+        text = _TRIPLE_CV_LINK_RE.sub(r'**\1** \2', text)
         
         # 5. Remove any remaining "code" artifacts at line start
-        text = re.sub(r'^code\s*$', '', text, flags=re.MULTILINE)
+        text = _CODE_LINE_RE.sub('', text)
         
         # 6. Clean up excessive whitespace
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        text = _EXTRA_NEWLINES_RE.sub('\n\n', text)
         
         if text != original:
             logger.info("[ORCHESTRATOR] Post-cleaned formatting issues")
@@ -747,51 +752,60 @@ class OutputOrchestrator:
         
         This catches cases where the same content appears multiple times
         due to LLM generating duplicates that weren't caught earlier.
-        """
-        import re
         
+        A paragraph is a duplicate when its normalized form equals an earlier
+        one, or when one of the two starts with the other's first
+        DEDUP_PREFIX chars. Seen paragraphs are indexed by that prefix (and the
+        few shorter ones by their full text), so each paragraph is checked in
+        constant time instead of against every earlier paragraph.
+        """
         if not text or len(text) < 100:
             return text
         
-        paragraphs = text.split('\n\n')
         unique_paragraphs = []
         seen_normalized = set()
+        seen_prefixes = set()       # normalized[:DEDUP_PREFIX] of seen entries >= DEDUP_PREFIX chars
+        seen_short = set()          # Seen entries of DEDUP_MIN_SEEN+1 .. DEDUP_PREFIX-1 chars
         
-        for para in paragraphs:
+        for para in parse_markdown(text).paragraphs:
             para_stripped = para.strip()
             if not para_stripped:
                 continue
             
-            # Normalize: lowercase, remove extra spaces, remove pipes
-            normalized = ' '.join(para_stripped.lower().split())
-            normalized = re.sub(r'\s*\|\s*', ' ', normalized)
-            normalized = re.sub(r'\|[^|]*\|[^|]*\|?', '', normalized)
-            normalized = ' '.join(normalized.split())[:150]  # First 150 chars for comparison
-            
             # Skip if this is a table line (starts with |)
             if para_stripped.startswith('|'):
                 unique_paragraphs.append(para)
                 continue
             
             # NEVER remove Red Flags or Risk Assessment sections - they're important analysis
-            if any(keyword in para_stripped.lower() for keyword in [
-                'red flags', '### red flags', 'risk assessment', '### risk assessment',
-                '⚠️ risk assessment', 'red flags analysis', 'job hopping', 'employment gaps'
-            ]):
+            lowered = para_stripped.lower()
+            if any(keyword in lowered for keyword in _KEEP_PARAGRAPH_KEYWORDS):
                 unique_paragraphs.append(para)
                 continue
             
+            # Normalize: lowercase, remove extra spaces, remove pipes
+            normalized = ' '.join(lowered.split())
+            if '|' in normalized:
+                normalized = _PIPE_RE.sub(' ', normalized)
+                normalized = _PIPE_CELLS_RE.sub('', normalized)
+                normalized = ' '.join(normalized.split())
+            normalized = normalized[:150]  # First 150 chars for comparison
+            
             # Check for duplicate
             is_dup = normalized in seen_normalized
-            if not is_dup and len(normalized) > 50:
+            if not is_dup and len(normalized) > DEDUP_PREFIX:
                 # Also check prefix match
-                is_dup = any(
-                    (normalized.startswith(s[:50]) or s.startswith(normalized[:50]))
-                    for s in seen_normalized if len(s) > 30
+                is_dup = normalized[:DEDUP_PREFIX] in seen_prefixes or any(
+                    normalized[:length] in seen_short
+                    for length in range(DEDUP_MIN_SEEN + 1, DEDUP_PREFIX)
                 )
             
             if not is_dup:
                 seen_normalized.add(normalized)
+                if len(normalized) >= DEDUP_PREFIX:
+                    seen_prefixes.add(normalized[:DEDUP_PREFIX])
+                elif len(normalized) > DEDUP_MIN_SEEN:
+                    seen_short.add(normalized)
                 unique_paragraphs.append(para)
             else:
                 logger.debug(f"[ORCHESTRATOR] Removed duplicate paragraph: {para_stripped[:60]}...")
@@ -18,6 +18,7 @@ This structure is used when user asks for job matching:
 import logging
 from typing import Any, Dict, List, Optional
 
+from ..module_graph import ModuleGraph, should_parallelize
 from ..modules import AnalysisModule, ConclusionModule, GapAnalysisModule, ThinkingModule
 from ..modules.match_score_module import MatchScoreModule
 from ..modules.requirements_module import RequirementsModule
@@ -62,38 +63,45 @@ class JobMatchStructure:
         """
         logger.info("[JOB_MATCH_STRUCTURE] Assembling job match analysis")
         
+        graph = ModuleGraph("job_match")
+        
         # Extract thinking from LLM output
-        thinking = self.thinking_module.extract(llm_output)
+        graph.add("thinking", lambda r: self.thinking_module.extract(llm_output))
         
         # Extract requirements from JD - DON'T use raw query as JD
         # If no explicit JD, extract implicit requirements from query context
-        requirements_data = None
         if job_description:
-            requirements_data = self.requirements_module.extract(
+            graph.add("requirements", lambda r: self.requirements_module.extract(
                 job_description=job_description,
                 llm_output=llm_output
-            )
+            ))
         else:
             # Generate smart requirements from query context
-            requirements_data = self._extract_requirements_from_query(query, llm_output, chunks)
+            graph.add("requirements", lambda r: self._extract_requirements_from_query(query, llm_output, chunks))
         
         # Calculate match scores
-        requirements_list = requirements_data.to_dict()["requirements"] if requirements_data else []
-        match_data = self.match_score_module.calculate(
-            requirements=requirements_list,
+        graph.add("match_scores", lambda r: self.match_score_module.calculate(
+            requirements=r["requirements"].to_dict()["requirements"] if r["requirements"] else [],
             chunks=chunks,
             llm_output=llm_output
-        )
+        ), deps=("requirements",))
         
         # Gap analysis
-        gap_data = self.gap_analysis_module.extract(
+        graph.add("gap_analysis", lambda r: self.gap_analysis_module.extract(
             llm_output=llm_output,
             chunks=chunks,
             query=query
-        )
+        ))
         
         # Extract conclusion
-        conclusion = self.conclusion_module.extract(llm_output)
+        graph.add("conclusion", lambda r: self.conclusion_module.extract(llm_output))
+        
+        run = graph.run(parallel=should_parallelize(chunks))
+        thinking = run["thinking"]
+        requirements_data = run["requirements"]
+        match_data = run["match_scores"]
+        gap_data = run["gap_analysis"]
+        conclusion = run["conclusion"]
         
         # PHASE 1.5 FIX: Validate conclusion aligns with best match
         # If conclusion mentions different candidate than best_match, fix it
@@ -177,7 +185,8 @@ class JobMatchStructure:
             "best_match": best_match,
             "total_candidates": len(match_data.matches) if match_data else 0,
             "conclusion": conclusion,
-            "raw_content": llm_output
+            "raw_content": llm_output,
+            "module_timings": run.timings_ms
         }
     
     def _extract_requirements_from_query(
@@ -16,8 +16,10 @@ This structure is used when user asks for ranking:
 """
 
 import logging
+import time
 from typing import Any, Dict, List
 
+from ..module_graph import ModuleGraph, should_parallelize
 from ..modules import AnalysisModule, ConclusionModule, ThinkingModule
 from ..modules.ranking_criteria_module import RankingCriteriaModule
 from ..modules.ranking_table_module import RankedCandidate, RankingTableModule
@@ -63,29 +65,38 @@ class RankingStructure:
         """
         logger.info(f"[RANKING_STRUCTURE] Assembling ranking for: {query[:50]}...")
         
+        graph = ModuleGraph("ranking")
+        
         # Extract thinking from LLM output
-        thinking = self.thinking_module.extract(llm_output)
+        graph.add("thinking", lambda r: self.thinking_module.extract(llm_output))
         
         # Extract ranking criteria
-        criteria_data = self.ranking_criteria_module.extract(
+        graph.add("criteria", lambda r: self.ranking_criteria_module.extract(
             query=query,
             llm_output=llm_output,
             job_context=job_context
-        )
+        ))
         
         # Generate ranking table
+        graph.add("ranking_table", lambda r: self.ranking_table_module.extract(
+            chunks=chunks,
+            criteria=r["criteria"].to_dict()["criteria"] if r["criteria"] else [],
+            llm_output=llm_output
+        ), deps=("criteria",))
+        
+        # Extract conclusion from LLM (validated against the ranking below)
+        graph.add("conclusion", lambda r: self.conclusion_module.extract(llm_output))
+        
+        run = graph.run(parallel=should_parallelize(chunks))
+        thinking = run["thinking"]
+        criteria_data = run["criteria"]
+        ranking_data = run["ranking_table"]
         criteria_list = criteria_data.to_dict()["criteria"] if criteria_data else []
         
         # Check if this is an experience-focused query
         query_lower = query.lower()
         is_experience_query = any(kw in query_lower for kw in ['most experience', 'most total experience', 'highest experience', 'most years'])
         
-        ranking_data = self.ranking_table_module.extract(
-            chunks=chunks,
-            criteria=criteria_list,
-            llm_output=llm_output
-        )
-        
         # PHASE 7.3 FIX: Validate ranking for "most experience" queries
         # If query asks for "most experience", ensure ranking is sorted by experience
         ranked_list = ranking_data.to_dict()["ranked"] if ranking_data else []
@@ -111,11 +122,14 @@ class RankingStructure:
                     )
                     for i, r in enumerate(ranked_list)
                 ]
+        start = time.perf_counter()
         top_pick_data = self.top_pick_module.extract(
             ranked_candidates=ranked_list,
             llm_output=llm_output,
             criteria=criteria_list
         )
+        module_timings = dict(run.timings_ms)
+        module_timings["top_pick"] = (time.perf_counter() - start) * 1000
         
         # FIX: Validate top_pick candidate against chunks
         if top_pick_data:
@@ -142,8 +156,7 @@ class RankingStructure:
                 top_pick_data.overall_score = 50  # Minimum floor
                 logger.warning("[RANKING_STRUCTURE] Applied score floor: 50%")
         
-        # Extract conclusion from LLM
-        conclusion = self.conclusion_module.extract(llm_output)
+        conclusion = run["conclusion"]
         
         # PHASE 1.1 FIX: Validate conclusion aligns with ranking
         # If LLM conclusion mentions different #1 candidate than our ranking, fix it
@@ -224,7 +237,8 @@ class RankingStructure:
             "total_ranked": len(ranked_list),
             "conclusion": conclusion,
             "raw_content": llm_output,
-            "show_experience_instead_of_score": is_experience_query  # Flag for frontend display
+            "show_experience_instead_of_score": is_experience_query,  # Flag for frontend display
+            "module_timings": module_timings
         }
     
     def _generate_consistent_analysis(self, ranking_data, top_pick_data, criteria_list):
@@ -23,6 +23,7 @@ import logging
 import re
 from typing import Any, Dict, List
 
+from ..module_graph import ModuleGraph, should_parallelize
 from ..modules import AnalysisModule, ConclusionModule, ThinkingModule
 from ..modules.skill_matrix_module import SkillMatrixModule
 from ..modules.team_composition_module import TeamAssignment, TeamCompositionData
@@ -60,35 +61,66 @@ class TeamBuildStructure:
         """Assemble all components of Team Build Structure V2."""
         logger.info("[TEAM_BUILD_STRUCTURE_V2] Assembling enhanced team composition")
         
+        graph = ModuleGraph("team_build")
+        
         # Extract thinking
-        thinking = self.thinking_module.extract(llm_output)
+        graph.add("thinking", lambda r: self.thinking_module.extract(llm_output))
         
         # Build team from chunks
-        team_members = self._build_team_from_chunks(chunks, query)
-        
-        logger.info(f"[TEAM_BUILD_STRUCTURE_V2] Built team with {len(team_members)} members")
+        graph.add("team", lambda r: self._build_team_from_chunks(chunks, query))
         
         # Generate all module outputs
         # 1. Team Overview - Executive summary
-        overview_data = self.overview_module.generate(team_members, query)
+        graph.add("overview", lambda r: self.overview_module.generate(r["team"], query), deps=("team",))
         
         # 2. Member Cards - Individual profiles  
-        cards_data = self.member_cards_module.create_cards(team_members)
+        graph.add("member_cards", lambda r: self.member_cards_module.create_cards(r["team"]), deps=("team",))
         
         # 3. Team Synergy - How they complement each other
-        synergy_data = self.synergy_module.analyze(team_members, chunks)
+        graph.add("synergy", lambda r: self.synergy_module.analyze(r["team"], chunks), deps=("team",))
         
         # 4. Skill Matrix - Visual skill coverage
-        matrix_data = self.skill_matrix_module.build(team_members)
+        graph.add("skill_matrix", lambda r: self.skill_matrix_module.build(r["team"]), deps=("team",))
         
         # 5. Risk Analysis
-        risk_data = self._analyze_team_risks(team_members, synergy_data)
+        graph.add(
+            "team_risks",
+            lambda r: self._analyze_team_risks(r["team"], r["synergy"]),
+            deps=("team", "synergy")
+        )
         
         # 6. Direct Answer - Clear summary
-        direct_answer = self._generate_direct_answer(team_members, overview_data, query)
+        graph.add(
+            "direct_answer",
+            lambda r: self._generate_direct_answer(r["team"], r["overview"], query),
+            deps=("team", "overview")
+        )
         
         # 7. Conclusion
-        conclusion = self._generate_conclusion(team_members, overview_data, synergy_data)
+        graph.add(
+            "conclusion",
+            lambda r: self._generate_conclusion(r["team"], r["overview"], r["synergy"]),
+            deps=("team", "overview", "synergy")
+        )
+        
+        graph.add(
+            "analysis",
+            lambda r: self._generate_analysis(r["team"], r["synergy"]),
+            deps=("team", "synergy")
+        )
+        
+        run = graph.run(parallel=should_parallelize(chunks))
+        thinking = run["thinking"]
+        team_members = run["team"]
+        overview_data = run["overview"]
+        cards_data = run["member_cards"]
+        synergy_data = run["synergy"]
+        matrix_data = run["skill_matrix"]
+        risk_data = run["team_risks"]
+        direct_answer = run["direct_answer"]
+        conclusion = run["conclusion"]
+        
+        logger.info(f"[TEAM_BUILD_STRUCTURE_V2] Built team with {len(team_members)} members")
         
         # Build formatted outputs for display
         formatted_overview = self.overview_module.format(overview_data)
@@ -124,8 +156,9 @@ class TeamBuildStructure:
             },
             "total_assigned": len(team_members),
             "conclusion": conclusion,
-            "analysis": self._generate_analysis(team_members, synergy_data),
-            "raw_content": llm_output
+            "analysis": run["analysis"],
+            "raw_content": llm_output,
+            "module_timings": run.timings_ms
         }
     
     def _build_team_from_chunks(
@@ -7,6 +7,7 @@ from typing import List, Optional, Tuple
 
 import pdfplumber
 
+from app.services.skill_taxonomy import get_skill_matcher
 from app.utils.exceptions import PDFExtractionError
 
 logger = logging.getLogger(__name__)
@@ -292,27 +293,8 @@ class PDFService:
         return None
     
     def extract_skills(self, text: str) -> List[str]:
-        """Extract skills from CV text."""
-        skills = []
-        
-        # Common tech skills to look for
-        common_skills = [
-            "Python", "JavaScript", "TypeScript", "Java", "C++", "C#", "Go", "Rust",
-            "React", "Angular", "Vue", "Node.js", "Django", "FastAPI", "Flask",
-            "SQL", "PostgreSQL", "MySQL", "MongoDB", "Redis", "Elasticsearch",
-            "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform",
-            "Git", "Linux", "REST", "GraphQL", "CI/CD",
-            "TensorFlow", "PyTorch", "Keras", "scikit-learn", "Pandas", "NumPy",
-            "Machine Learning", "Deep Learning", "NLP", "Computer Vision",
-            "Agile", "Scrum", "JIRA", "Confluence",
-        ]
-        
-        text_lower = text.lower()
-        for skill in common_skills:
-            if skill.lower() in text_lower:
-                skills.append(skill)
-        
-        return skills
+        """Extract skills from CV text (single pass over the shared skill taxonomy)."""
+        return get_skill_matcher().find_terms(text)
     
     # =========================================================================
     # ENRICHED METADATA EXTRACTION
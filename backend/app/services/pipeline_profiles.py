@@ -0,0 +1,137 @@
+"""
+Pipeline Profiles - per-query-type stage selection for RAG v5.
+
+RAGConfigV5 flags turn stages on or off for every query, so a simple
+"what is Ana's email" lookup paid for multi-query, HyDE, LLM reranking and
+reflection just like a ranking across 50 CVs. A profile declares which of
+the optional stages run for a query type; it is selected right after query
+understanding and can only skip stages, never enable one the config has
+turned off.
+
+Query types map to profiles in QUERY_TYPE_PROFILES; deployments can remap
+them with PIPELINE_PROFILE_OVERRIDES ("single_candidate=full,summary=lookup").
+scripts/replay_pipeline_profiles.py replays logged queries under each profile
+to check the latency/cost savings against confidence.
+"""
+
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Profile stage -> RAGConfigV5 flag that must also be on for the stage to run
+STAGE_CONFIG_FLAGS = {
+    "multi_query": "multi_query_enabled",
+    "hyde": "hyde_enabled",
+    "reranking": "reranking_enabled",
+    "reasoning": "reasoning_enabled",
+    "reflection": "reflection_enabled",
+    "claim_verification": "claim_verification_enabled",
+    "refinement": "iterative_refinement_enabled",
+}
+
+
+@dataclass(frozen=True)
+class PipelineProfile:
+    """Optional RAG v5 stages to run for a class of queries."""
+    name: str
+    description: str = ""
+    multi_query: bool = True
+    hyde: bool = True
+    reranking: bool = True
+    reasoning: bool = True
+    reflection: bool = True
+    claim_verification: bool = True
+    refinement: bool = True
+
+    def runs(self, stage: str, config: Any = None) -> bool:
+        """Whether `stage` runs: kept by this profile and enabled in `config` (if given)."""
+        if not getattr(self, stage):
+            return False
+        return config is None or bool(getattr(config, STAGE_CONFIG_FLAGS[stage]))
+
+    def skipped_stages(self, config: Any = None) -> List[str]:
+        return [stage for stage in STAGE_CONFIG_FLAGS if not self.runs(stage, config)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+PIPELINE_PROFILES: Dict[str, PipelineProfile] = {
+    profile.name: profile
+    for profile in (
+        PipelineProfile(
+            name="full",
+            description="Every stage enabled in the config",
+        ),
+        PipelineProfile(
+            name="lookup",
+            description="Facts about one named candidate: retrieval is already targeted",
+            multi_query=False,
+            hyde=False,
+            reranking=False,
+            reflection=False,
+        ),
+        PipelineProfile(
+            name="ranking",
+            description="Ordering many candidates: rerank matters, reflection rarely changes the order",
+            hyde=False,
+            reflection=False,
+        ),
+        PipelineProfile(
+            name="overview",
+            description="Session-wide summaries: every CV is in context, so no recall expansion or rerank",
+            multi_query=False,
+            hyde=False,
+            reranking=False,
+            reflection=False,
+            refinement=False,
+        ),
+    )
+}
+
+# query_type (QueryUnderstandingService) -> profile name; unlisted types use "full"
+QUERY_TYPE_PROFILES: Dict[str, str] = {
+    "single_candidate": "lookup",
+    "ranking": "ranking",
+    "job_match": "ranking",
+    "team_build": "ranking",
+    "summary": "overview",
+}
+
+
+def parse_profile_overrides(value: str) -> Dict[str, str]:
+    """Parse "query_type=profile,..." into a mapping, ignoring unknown profiles."""
+    overrides = {}
+    for item in (value or "").split(","):
+        query_type, sep, profile = item.partition("=")
+        query_type, profile = query_type.strip(), profile.strip()
+        if not sep or not query_type:
+            continue
+        if profile not in PIPELINE_PROFILES:
+            logger.warning(f"[PIPELINE_PROFILE] Unknown profile '{profile}' for query type '{query_type}', ignoring")
+            continue
+        overrides[query_type] = profile
+    return overrides
+
+
+def select_profile(query_type: Optional[str], forced: Optional[str] = None) -> PipelineProfile:
+    """
+    Profile for a query type.
+
+    Args:
+        query_type: Type from query understanding (None = unknown)
+        forced: Profile name to use regardless of the query type (replay harness)
+    """
+    if forced:
+        if forced not in PIPELINE_PROFILES:
+            raise ValueError(f"Unknown pipeline profile: {forced}")
+        return PIPELINE_PROFILES[forced]
+    if not settings.pipeline_profiles_enabled or not query_type:
+        return PIPELINE_PROFILES["full"]
+
+    mapping = {**QUERY_TYPE_PROFILES, **parse_profile_overrides(settings.pipeline_profile_overrides)}
+    return PIPELINE_PROFILES[mapping.get(query_type, "full")]
@@ -5,20 +5,36 @@ Uses a fast model to understand, reformulate, and structure the user's query
 before sending it to the main generation model.
 
 Features:
-- Retry with exponential backoff for rate limits (429)
+- Local tier: a deterministic classifier answers clear-cut queries without
+  any LLM call; only queries below settings.query_understanding_local_threshold
+  confidence escalate
+- Hedged calls: a backup model races a primary slower than its p95, and
+  rate limits (429) move to the next model instead of backing off
 - Model fallback chain (only FREE models)
 - Heuristic fallback as last resort (never fails)
+
+Each result records its tier ("local", "llm" or "heuristic") and the local
+classifier's confidence in metadata; per-tier counts and latency are kept by
+get_understanding_tier_stats().
 """
-import asyncio
 import json
 import logging
+import re
+import threading
+import time
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
-
-import httpx
+from typing import Any, Dict, List, Optional
 
 from app.config import settings, timeouts
+from app.prompts.templates import (
+    classify_query_for_structure,
+    detect_off_topic,
+    extract_candidate_name_from_query,
+)
 from app.providers.cloud.llm import calculate_openrouter_cost
+from app.services.context_resolver import has_reference_pattern, resolve_query_with_context
+from app.services.fallback_chain_service import get_fallback_service
+from app.utils.upstream_limiter import upstream_async_client
 
 logger = logging.getLogger(__name__)
 
@@ -36,14 +52,19 @@ FREE_MODEL_FALLBACK_CHAIN = [
     "mistralai/mistral-7b-instruct:free",
 ]
 
-# Retry configuration
-MAX_RETRIES_PER_MODEL = 3
-RETRY_BASE_DELAY_SECONDS = 1.5  # 1.5s, 3s, 4.5s
-
 # Safety: Only allow :free models in fallback
 ONLY_FREE_MODELS_IN_FALLBACK = True
 
 
+@dataclass
+class LocalClassification:
+    """Result of the local (no-LLM) query classifier."""
+    query_type: str
+    confidence: float
+    signals: List[str] = field(default_factory=list)
+    resolved_query: Optional[str] = None  # Query with context references replaced by names
+
+
 @dataclass
 class QueryUnderstanding:
     """Result of query understanding analysis."""
@@ -300,6 +321,226 @@ Query: "tell me about all the candidates"
 Now analyze the user's query and respond with JSON only:"""
 
 
+# =============================================================================
+# LOCAL TIER: deterministic classification
+# =============================================================================
+
+# Structure types without a query_understanding counterpart
+LOCAL_TYPE_ALIASES = {"verification": "search"}
+
+# Pronouns that point at earlier turns but has_reference_pattern doesn't cover
+_BARE_REFERENCE_RE = re.compile(r"\b(them|they|those|these|him|her|he|she|ellos|ellas)\b")
+
+
+def heuristic_query_type(query: str) -> str:
+    """Keyword-based query type (the heuristic fallback's classification)."""
+    query_lower = query.lower()
+    
+    # Detect query type from keywords - PRIORITY ORDER MATTERS
+    # Check specific types first before generic ones
+    
+    # 1. RED FLAGS / RISK ASSESSMENT (highest priority for risk queries)
+    if any(kw in query_lower for kw in ['risk', 'red flag', 'job hopping', 'stability', 'gap', 'concern', 'warning', 'riesgo', 'bandera roja']):
+        return 'red_flags'
+    
+    # 2. SINGLE CANDIDATE / FULL PROFILE
+    if any(kw in query_lower for kw in ['full profile', 'everything about', 'all about', 'todo sobre', 'perfil completo', 'dame todo', 'tell me about', 'analyze']):
+        return 'single_candidate'
+    
+    # 3. COMPARISON
+    if any(kw in query_lower for kw in ['compare', 'versus', 'vs', 'vs.', 'difference', 'comparar', 'comparación']):
+        return 'comparison'
+    
+    # 4. TEAM BUILD (MUST come BEFORE ranking - 'top 3 for team' should be team_build not ranking)
+    if any(kw in query_lower for kw in [
+        'build a team', 'build team', 'create a team', 'create team',
+        'form a team', 'form team', 'team with', 'team from', 'team of',
+        'formar equipo', 'crear equipo', 'equipo con', 'equipo de'
+    ]):
+        return 'team_build'
+    
+    # 5. RANKING (now checks that it's not a team_build query)
+    if any(kw in query_lower for kw in ['rank', 'best', 'top', 'order', 'sort', 'mejor', 'ordenar']) and 'compare' not in query_lower and 'team' not in query_lower:
+        return 'ranking'
+    
+    # 6. JOB MATCH
+    if any(kw in query_lower for kw in ['match', 'fit for', 'suitable for', 'qualified for', 'encaja', 'apto para']):
+        return 'job_match'
+    
+    # 7. TALENT POOL / SUMMARY (Priority before search)
+    if any(kw in query_lower for kw in [
+        'summary', 'overview', 'resumen', 'vista general',
+        'talent pool', 'talents', 'todos los', 'all candidates',
+        'how many candidates', 'cuantos candidatos', 'cuántos candidatos',
+        'tell me about all', 'what candidates', 'que candidatos',
+        'show me all', 'todos los candidatos'
+    ]):
+        return 'summary'
+    
+    # 8. ADAPTIVE - Skill/technology searches (BEFORE generic search)
+    if any(pattern in query_lower for pattern in [
+        'candidates with', 'who have', 'who knows', 'who has experience',
+        'find candidates', 'show me candidates', 'list candidates',
+        'candidates who', 'people with', 'talent with',
+        'what technologies', 'what skills', 'what experience',
+        'show me backend', 'show me frontend', 'show me engineers',
+        'candidates with skills', 'candidates with experience',
+        'cloud computing', 'machine learning', 'data science',
+        'developers with', 'engineers with', 'programmers with'
+    ]):
+        return 'adaptive'
+    
+    # 9. SEARCH (generic CV search)
+    if any(kw in query_lower for kw in ['who', 'which', 'find', 'search', 'has', 'know', 'quien', 'buscar']):
+        return 'search'
+    
+    # 10. GENERAL (non-CV)
+    return 'general'
+
+
+def classify_query_locally(query: str, conversation_history: List[Dict[str, str]] = None) -> LocalClassification:
+    """
+    Classify a query without an LLM and estimate how sure that classification is.
+    
+    The routing classifier (classify_query_for_structure) gives the type; the
+    confidence rises when the keyword heuristic agrees and drops for anything
+    the LLM handles better: references to earlier turns that can't be resolved
+    from history, profile requests without a name, off-topic or very long/short
+    queries.
+    """
+    q = query.strip()
+    words = len(q.split())
+    signals = []
+    
+    structure = classify_query_for_structure(q)
+    query_type = LOCAL_TYPE_ALIASES.get(structure, structure)
+    heuristic_type = heuristic_query_type(q)
+    # Generic "who/which/find" searches route to adaptive
+    keyword_type = "adaptive" if heuristic_type == "search" else heuristic_type
+    
+    if structure != "adaptive":
+        confidence = 0.8
+        signals.append(f"pattern:{structure}")
+    elif heuristic_type == "adaptive":
+        confidence = 0.8
+        signals.append("skill_search")
+    elif heuristic_type == "search":
+        confidence = 0.6
+        signals.append("generic_search")
+    else:
+        confidence = 0.5
+        signals.append("no_pattern")
+    
+    if keyword_type == query_type:
+        confidence += 0.1
+        signals.append("keywords_agree")
+    elif keyword_type not in ("adaptive", "general"):
+        confidence -= 0.2
+        signals.append(f"keywords_disagree:{keyword_type}")
+    
+    resolved_query = None
+    has_reference, _ = has_reference_pattern(q)
+    if has_reference or _BARE_REFERENCE_RE.search(q.lower()):
+        resolved_name = None
+        if has_reference and conversation_history:
+            resolved, resolved_name, _ = resolve_query_with_context(q, conversation_history)
+        if resolved_name:
+            resolved_query = resolved
+            confidence -= 0.05
+            signals.append("reference_resolved")
+        else:
+            confidence -= 0.4
+            signals.append("reference_unresolved")
+    
+    if query_type == "single_candidate" and not extract_candidate_name_from_query(resolved_query or q):
+        confidence -= 0.2
+        signals.append("no_candidate_name")
+    
+    if detect_off_topic(q)[0]:
+        confidence -= 0.4
+        signals.append("off_topic")
+    
+    if words > 30:
+        confidence -= 0.15
+        signals.append("long_query")
+    elif words < 3:
+        confidence -= 0.1
+        signals.append("very_short")
+    
+    return LocalClassification(
+        query_type=query_type,
+        confidence=round(min(max(confidence, 0.0), 0.99), 2),
+        signals=signals,
+        resolved_query=resolved_query
+    )
+
+
+# =============================================================================
+# TIER STATISTICS
+# =============================================================================
+
+class UnderstandingTierStats:
+    """Per-tier usage and latency of query understanding."""
+    
+    TIERS = ("local", "llm", "heuristic")
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self) -> None:
+        self._counts = dict.fromkeys(self.TIERS, 0)
+        self._total_ms = dict.fromkeys(self.TIERS, 0.0)
+        self._max_ms = dict.fromkeys(self.TIERS, 0.0)
+        # Escalated queries by local confidence bucket: [count, LLM agreed with local type]
+        self._agreement: Dict[str, List[int]] = {}
+    
+    def record(self, tier: str, latency_ms: float, local: Optional[LocalClassification] = None,
+               final_type: Optional[str] = None) -> None:
+        with self._lock:
+            self._counts[tier] += 1
+            self._total_ms[tier] += latency_ms
+            self._max_ms[tier] = max(self._max_ms[tier], latency_ms)
+            if tier == "llm" and local is not None:
+                bucket = f"{int(local.confidence * 10) / 10:.1f}"
+                counts = self._agreement.setdefault(bucket, [0, 0])
+                counts[0] += 1
+                counts[1] += int(local.query_type == final_type)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                "local_threshold": settings.query_understanding_local_threshold,
+                "total": total,
+                "tiers": {
+                    tier: {
+                        "count": self._counts[tier],
+                        "share": round(self._counts[tier] / total, 3) if total else 0,
+                        "avg_latency_ms": round(self._total_ms[tier] / self._counts[tier], 1) if self._counts[tier] else 0,
+                        "max_latency_ms": round(self._max_ms[tier], 1),
+                    }
+                    for tier in self.TIERS
+                },
+                # How often the LLM agreed with the local type, by local confidence
+                "escalated_agreement": {
+                    bucket: {"count": n, "agreement": round(agreed / n, 3)}
+                    for bucket, (n, agreed) in sorted(self._agreement.items())
+                },
+            }
+
+
+_tier_stats: Optional[UnderstandingTierStats] = None
+
+
+def get_understanding_tier_stats() -> UnderstandingTierStats:
+    """Get singleton query understanding tier stats."""
+    global _tier_stats
+    if _tier_stats is None:
+        _tier_stats = UnderstandingTierStats()
+    return _tier_stats
+
+
 class QueryUnderstandingService:
     """
     Service for understanding and reformulating user queries.
@@ -307,17 +548,24 @@ class QueryUnderstandingService:
     Uses a fast, cheap model for quick query analysis before
     the main RAG generation step.
     
+    TIERS:
+    - Local: deterministic classifier, used when its confidence reaches
+      local_threshold (no LLM call)
+    
     RESILIENCE FEATURES:
-    - Level 1: Retry with exponential backoff (same model)
+    - Level 1: Hedge a slow primary with a backup model (first answer wins)
     - Level 2: Fallback to alternative FREE models
     - Level 3: Heuristic fallback (NEVER fails)
     """
     
-    def __init__(self, model: str, api_key: Optional[str] = None):
+    def __init__(self, model: str, api_key: Optional[str] = None, local_threshold: Optional[float] = None):
         if not model:
             raise ValueError("model parameter is required and cannot be empty")
         self.model = model
         self.api_key = api_key or settings.openrouter_api_key or ""
+        self.local_threshold = (
+            settings.query_understanding_local_threshold if local_threshold is None else local_threshold
+        )
         logger.info(f"QueryUnderstandingService initialized with model: {self.model}")
         logger.info(f"  API key available: {bool(self.api_key)}")
         logger.info(f"  Fallback models: {len(FREE_MODEL_FALLBACK_CHAIN)} free models available")
@@ -341,7 +589,7 @@ class QueryUnderstandingService:
     
     async def understand(self, query: str, conversation_history: List[Dict[str, str]] = None, progress_callback=None) -> QueryUnderstanding:
         """
-        Analyze and understand the user's query with 3-level fallback.
+        Analyze and understand the user's query, escalating to the LLM only when needed.
         
         This method NEVER raises exceptions - it always returns a result.
         
@@ -352,6 +600,58 @@ class QueryUnderstandingService:
         Returns:
             QueryUnderstanding with parsed intent and reformulated prompt
         """
+        start = time.perf_counter()
+        try:
+            local = classify_query_locally(query, conversation_history)
+        except Exception as e:
+            logger.warning(f"[QUERY_UNDERSTANDING] Local classifier failed: {e}")
+            local = LocalClassification(query_type="adaptive", confidence=0.0, signals=["error"])
+        
+        if local.confidence >= self.local_threshold:
+            result = self._create_local_understanding(query, local, conversation_history)
+            tier = "local"
+        else:
+            result = await self._understand_with_llm(query, conversation_history, progress_callback)
+            tier = "heuristic" if result.metadata.get("fallback") else "llm"
+        
+        latency_ms = (time.perf_counter() - start) * 1000
+        result.metadata.update({
+            "tier": tier,
+            "local_query_type": local.query_type,
+            "local_confidence": local.confidence,
+            "local_signals": local.signals,
+            "understanding_ms": round(latency_ms, 1),
+        })
+        get_understanding_tier_stats().record(tier, latency_ms, local, result.query_type)
+        logger.info(
+            f"[QUERY_UNDERSTANDING] tier={tier} type={result.query_type} "
+            f"local={local.query_type}@{local.confidence} ({latency_ms:.0f}ms)"
+        )
+        return result
+    
+    def _create_local_understanding(
+        self,
+        query: str,
+        local: LocalClassification,
+        conversation_history: List[Dict[str, str]] = None
+    ) -> QueryUnderstanding:
+        """QueryUnderstanding for a query the local classifier is confident about."""
+        expanded_query = self._generate_expanded_understanding(
+            local.resolved_query or query, local.query_type, [], conversation_history
+        )
+        return QueryUnderstanding(
+            original_query=query,
+            understood_query=expanded_query,
+            query_type=local.query_type,
+            requirements=[],
+            is_cv_related=True,
+            confidence=local.confidence,
+            reformulated_prompt=local.resolved_query or query,
+            metadata={"openrouter_cost": 0.0}
+        )
+    
+    async def _understand_with_llm(self, query: str, conversation_history: List[Dict[str, str]] = None, progress_callback=None) -> QueryUnderstanding:
+        """LLM understanding with 3-level fallback (hedged primary, fallback models, heuristics)."""
         async def report_progress(status: str, details: str = ""):
             """Helper to report progress if callback is provided."""
             if progress_callback:
@@ -366,70 +666,35 @@ class QueryUnderstandingService:
             return self._create_heuristic_fallback(query, "No API key")
         
         models_to_try = self._get_models_to_try()
-        last_error = None
-        total_models = len(models_to_try)
         
-        # Try each model with retries
-        for model_idx, model in enumerate(models_to_try):
-            is_fallback = model_idx > 0
+        async def on_event(event: str, model: str):
             model_short = model.split('/')[-1].split(':')[0]  # Extract short name
-            
-            if is_fallback:
-                await report_progress("trying_fallback", f"Trying fallback {model_idx}/{total_models-1}: {model_short}")
-            
-            for attempt in range(MAX_RETRIES_PER_MODEL):
-                try:
-                    result = await self._call_llm(query, model, conversation_history)
-                    
-                    # Success!
-                    if is_fallback:
-                        logger.warning(f"[QUERY_UNDERSTANDING] Succeeded with fallback model: {model}")
-                        result.metadata["used_fallback_model"] = model
-                    
-                    return result
-                    
-                except httpx.HTTPStatusError as e:
-                    last_error = e
-                    
-                    if e.response.status_code == 429:
-                        # Rate limited - retry with backoff
-                        wait_time = RETRY_BASE_DELAY_SECONDS * (attempt + 1)
-                        logger.warning(
-                            f"[QUERY_UNDERSTANDING] Rate limited (429) on {model}, "
-                            f"attempt {attempt + 1}/{MAX_RETRIES_PER_MODEL}, waiting {wait_time}s..."
-                        )
-                        await report_progress(
-                            "retrying", 
-                            f"Rate limited, retry {attempt + 1}/{MAX_RETRIES_PER_MODEL} in {wait_time:.0f}s"
-                        )
-                        await asyncio.sleep(wait_time)
-                    else:
-                        # Other HTTP error - skip to next model
-                        logger.warning(
-                            f"[QUERY_UNDERSTANDING] HTTP {e.response.status_code} on {model}, "
-                            f"trying next model..."
-                        )
-                        break
-                        
-                except httpx.TimeoutException as e:
-                    last_error = e
-                    logger.warning(f"[QUERY_UNDERSTANDING] Timeout on {model}, trying next model...")
-                    await report_progress("timeout", f"Timeout on {model_short}")
-                    break
-                    
-                except json.JSONDecodeError as e:
-                    last_error = e
-                    logger.warning(f"[QUERY_UNDERSTANDING] Invalid JSON from {model}, trying next model...")
-                    break
-                    
-                except Exception as e:
-                    last_error = e
-                    logger.warning(f"[QUERY_UNDERSTANDING] Error on {model}: {type(e).__name__}: {e}")
-                    break
+            if event == "hedge":
+                await report_progress("hedging", f"Primary model slow, also trying {model_short}")
+            else:
+                await report_progress("trying_fallback", f"Trying fallback: {model_short}")
+        
+        # Slow primary -> backup races it; 429/timeout/bad JSON -> next model right away
+        outcome = await get_fallback_service().execute_hedged(
+            "understanding",
+            lambda model: self._call_llm(query, model, conversation_history),
+            models=models_to_try,
+            max_attempts=len(models_to_try),
+            timeout=timeouts.HTTP_MEDIUM,
+            on_event=on_event
+        )
+        if outcome.success:
+            result = outcome.result
+            if outcome.model_used != self.model:
+                logger.warning(f"[QUERY_UNDERSTANDING] Succeeded with fallback model: {outcome.model_used}")
+                result.metadata["used_fallback_model"] = outcome.model_used
+            result.metadata["hedged"] = outcome.hedged
+            return result
         
         # ALL models failed - use heuristic fallback (Level 3)
+        last_error = outcome.errors[-1]["message"] if outcome.errors else None
         logger.error(
-            f"[QUERY_UNDERSTANDING] All {len(models_to_try)} models failed. "
+            f"[QUERY_UNDERSTANDING] All {outcome.attempts} models failed. "
             f"Using heuristic fallback. Last error: {last_error}"
         )
         await report_progress("fallback", "Using heuristic analysis")
@@ -461,7 +726,7 @@ class QueryUnderstandingService:
             conversation_context=conversation_context
         )
         
-        async with httpx.AsyncClient(timeout=timeouts.HTTP_MEDIUM) as client:
+        async with upstream_async_client(timeout=timeouts.HTTP_MEDIUM) as client:
             response = await client.post(
                 get_openrouter_url("chat/completions"),
                 headers={
@@ -818,68 +1083,7 @@ class QueryUnderstandingService:
         This is the LAST RESORT - ensures the pipeline NEVER fails.
         """
         query_lower = query.lower()
-        
-        # Detect query type from keywords - PRIORITY ORDER MATTERS
-        # Check specific types first before generic ones
-        
-        # 1. RED FLAGS / RISK ASSESSMENT (highest priority for risk queries)
-        if any(kw in query_lower for kw in ['risk', 'red flag', 'job hopping', 'stability', 'gap', 'concern', 'warning', 'riesgo', 'bandera roja']):
-            query_type = 'red_flags'
-        
-        # 2. SINGLE CANDIDATE / FULL PROFILE
-        elif any(kw in query_lower for kw in ['full profile', 'everything about', 'all about', 'todo sobre', 'perfil completo', 'dame todo', 'tell me about', 'analyze']):
-            query_type = 'single_candidate'
-        
-        # 3. COMPARISON
-        elif any(kw in query_lower for kw in ['compare', 'versus', 'vs', 'vs.', 'difference', 'comparar', 'comparación']):
-            query_type = 'comparison'
-        
-        # 4. TEAM BUILD (MUST come BEFORE ranking - 'top 3 for team' should be team_build not ranking)
-        elif any(kw in query_lower for kw in [
-            'build a team', 'build team', 'create a team', 'create team',
-            'form a team', 'form team', 'team with', 'team from', 'team of',
-            'formar equipo', 'crear equipo', 'equipo con', 'equipo de'
-        ]):
-            query_type = 'team_build'
-        
-        # 5. RANKING (now checks that it's not a team_build query)
-        elif any(kw in query_lower for kw in ['rank', 'best', 'top', 'order', 'sort', 'mejor', 'ordenar']) and 'compare' not in query_lower and 'team' not in query_lower:
-            query_type = 'ranking'
-        
-        # 6. JOB MATCH
-        elif any(kw in query_lower for kw in ['match', 'fit for', 'suitable for', 'qualified for', 'encaja', 'apto para']):
-            query_type = 'job_match'
-        
-        # 7. TALENT POOL / SUMMARY (Priority before search)
-        elif any(kw in query_lower for kw in [
-            'summary', 'overview', 'resumen', 'vista general',
-            'talent pool', 'talents', 'todos los', 'all candidates',
-            'how many candidates', 'cuantos candidatos', 'cuántos candidatos',
-            'tell me about all', 'what candidates', 'que candidatos',
-            'show me all', 'todos los candidatos'
-        ]):
-            query_type = 'summary'
-        
-        # 8. ADAPTIVE - Skill/technology searches (BEFORE generic search)
-        elif any(pattern in query_lower for pattern in [
-            'candidates with', 'who have', 'who knows', 'who has experience',
-            'find candidates', 'show me candidates', 'list candidates',
-            'candidates who', 'people with', 'talent with',
-            'what technologies', 'what skills', 'what experience',
-            'show me backend', 'show me frontend', 'show me engineers',
-            'candidates with skills', 'candidates with experience',
-            'cloud computing', 'machine learning', 'data science',
-            'developers with', 'engineers with', 'programmers with'
-        ]):
-            query_type = 'adaptive'
-        
-        # 9. SEARCH (generic CV search)
-        elif any(kw in query_lower for kw in ['who', 'which', 'find', 'search', 'has', 'know', 'quien', 'buscar']):
-            query_type = 'search'
-        
-        # 10. GENERAL (non-CV)
-        else:
-            query_type = 'general'
+        query_type = heuristic_query_type(query)
         
         # Detect if CV-related
         cv_keywords = [
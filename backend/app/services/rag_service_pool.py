@@ -0,0 +1,219 @@
+"""
+RAG Service Pool - Reuse initialized RAGServiceV5 instances across requests.
+
+Chat endpoints used to build a RAGServiceV5 per request and run
+lazy_initialize_providers() on it: every turn started with empty embedding and
+response LRU caches, fresh circuit breakers, and new instances of every
+pipeline service. The pool keeps initialized services keyed by
+
+    (mode, model configuration, API-key fingerprint)
+
+so consecutive turns with the same configuration share caches and breaker
+state. The API key is only kept as a SHA-256 fingerprint in the key.
+
+The pool is bounded (settings.rag_service_pool_size, least recently used is
+evicted first) and services idle longer than settings.rag_service_idle_ttl_seconds
+are dropped on the next access. Concurrent misses on the same key build one
+service. Pooled services serve concurrent requests, so per-request state lives
+in PipelineContextV5, never on the service or its helpers.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import Mode, settings
+from app.services.rag_service_v5 import RAGServiceV5
+
+logger = logging.getLogger(__name__)
+
+
+def api_key_fingerprint(api_key: Optional[str]) -> str:
+    """Short stable fingerprint of an API key ("default" for the server key)."""
+    if not api_key:
+        return "default"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class PoolKey:
+    """Identity of a pooled service."""
+    mode: str
+    understanding_model: Optional[str] = None
+    reranking_model: Optional[str] = None
+    reranking_enabled: bool = True
+    generation_model: Optional[str] = None
+    verification_model: Optional[str] = None
+    verification_enabled: bool = True
+    api_key_fingerprint: str = "default"
+
+
+@dataclass
+class PooledService:
+    """A pooled service and its usage."""
+    service: RAGServiceV5
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    requests: int = 0
+
+
+class RAGServicePool:
+    """Bounded LRU pool of initialized RAGServiceV5 instances with idle eviction."""
+
+    def __init__(self, max_size: int = 8, idle_ttl_seconds: float = 900):
+        self.max_size = max_size
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._services: "OrderedDict[PoolKey, PooledService]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._creating: Dict[PoolKey, threading.Lock] = {}  # Per-key creation locks
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(
+        self,
+        mode: Mode | str,
+        understanding_model: Optional[str] = None,
+        reranking_model: Optional[str] = None,
+        reranking_enabled: Optional[bool] = True,
+        generation_model: Optional[str] = None,
+        verification_model: Optional[str] = None,
+        verification_enabled: Optional[bool] = True,
+        api_key: Optional[str] = None
+    ) -> RAGServiceV5:
+        """Pooled service for this configuration, created and initialized on a miss."""
+        mode = Mode(mode.lower()) if isinstance(mode, str) else mode
+        key = PoolKey(
+            mode=mode.value,
+            understanding_model=understanding_model,
+            reranking_model=reranking_model,
+            reranking_enabled=bool(reranking_enabled),
+            generation_model=generation_model,
+            verification_model=verification_model,
+            verification_enabled=bool(verification_enabled),
+            api_key_fingerprint=api_key_fingerprint(api_key),
+        )
+
+        with self._lock:
+            self._evict_idle()
+            service = self._checkout(key)
+            if service is not None:
+                return service
+            creating = self._creating.setdefault(key, threading.Lock())
+
+        # Built outside the pool lock; concurrent misses on the same key wait
+        # for the first one and reuse its service instead of building another
+        with creating:
+            with self._lock:
+                service = self._checkout(key)
+                if service is not None:
+                    return service
+                self._misses += 1
+            try:
+                service = self._create(key, api_key)
+                with self._lock:
+                    self._services[key] = PooledService(service=service, requests=1)
+                    self._services.move_to_end(key)
+                    while len(self._services) > self.max_size:
+                        evicted, _ = self._services.popitem(last=False)
+                        self._evictions += 1
+                        logger.info(f"[RAG_POOL] Evicted LRU service mode={evicted.mode} generation={evicted.generation_model}")
+            finally:
+                with self._lock:
+                    self._creating.pop(key, None)
+        logger.info(f"[RAG_POOL] Created service mode={key.mode} generation={key.generation_model} (pool size={len(self._services)})")
+        return service
+
+    def _checkout(self, key: PoolKey) -> Optional[RAGServiceV5]:
+        """Pooled service for `key` marked as used (caller holds the lock)."""
+        entry = self._services.get(key)
+        if entry is None:
+            return None
+        self._services.move_to_end(key)
+        entry.last_used = time.monotonic()
+        entry.requests += 1
+        self._hits += 1
+        return entry.service
+
+    def _create(self, key: PoolKey, api_key: Optional[str]) -> RAGServiceV5:
+        service = RAGServiceV5.from_factory(Mode(key.mode))
+        service.config.understanding_model = key.understanding_model
+        service.config.reranking_model = key.reranking_model
+        service.config.reranking_enabled = key.reranking_enabled
+        service.config.generation_model = key.generation_model
+        service.config.verification_model = key.verification_model
+        service.config.claim_verification_enabled = key.verification_enabled
+        service.lazy_initialize_providers(api_key=api_key)
+        return service
+
+    def _evict_idle(self) -> None:
+        if self.idle_ttl_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        for key in [k for k, entry in self._services.items() if entry.last_used < cutoff]:
+            del self._services[key]
+            self._evictions += 1
+            logger.info(f"[RAG_POOL] Evicted idle service mode={key.mode} generation={key.generation_model}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._services.clear()
+
+    def __len__(self) -> int:
+        return len(self._services)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool usage plus cache hit rates and breaker states of every pooled service."""
+        with self._lock:
+            self._evict_idle()
+            entries: Tuple[Tuple[PoolKey, PooledService], ...] = tuple(self._services.items())
+            total = self._hits + self._misses
+            stats = {
+                "size": len(entries),
+                "max_size": self.max_size,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / total, 3) if total else 0,
+            }
+
+        now = time.monotonic()
+        services = []
+        for key, entry in entries:
+            service = entry.service
+            services.append({
+                "mode": key.mode,
+                "understanding_model": key.understanding_model,
+                "generation_model": key.generation_model,
+                "reranking_model": key.reranking_model,
+                "verification_model": key.verification_model,
+                "api_key": key.api_key_fingerprint,
+                "requests": entry.requests,
+                "age_seconds": round(now - entry.created_at, 1),
+                "idle_seconds": round(now - entry.last_used, 1),
+                **({"embedding_cache": service._embedding_cache.stats()} if service._embedding_cache else {}),
+                **({"response_cache": service._response_cache.stats()} if service._response_cache else {}),
+                "circuit_breakers": {name: cb.state.value for name, cb in service._circuit_breakers.items()},
+            })
+        stats["services"] = services
+        return stats
+
+
+# Singleton instance
+_rag_service_pool: Optional[RAGServicePool] = None
+
+
+def get_rag_service_pool() -> RAGServicePool:
+    """Get singleton RAG service pool."""
+    global _rag_service_pool
+    if _rag_service_pool is None:
+        _rag_service_pool = RAGServicePool(
+            max_size=settings.rag_service_pool_size,
+            idle_ttl_seconds=settings.rag_service_idle_ttl_seconds
+        )
+    return _rag_service_pool
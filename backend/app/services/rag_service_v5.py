@@ -16,6 +16,7 @@ Version: 5.0.0
 import asyncio
 import hashlib
 import logging
+import re
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -35,8 +36,17 @@ import httpx
 from app.config import settings
 
 # V8 Services Integration
+from app.services.candidate_profile_service import get_profile_store
+from app.services.candidate_scoring_service import get_scoring_service
+from app.services.fallback_chain_service import get_fallback_service
 from app.services.hybrid_search_service import get_hybrid_search_service
+from app.services.incremental_indexing import IndexingResult, index_chunks
+from app.services.local_reranker import get_local_reranking_service
+from app.services.pipeline_profiles import PIPELINE_PROFILES, PipelineProfile, select_profile
+from app.services.rerank_cascade import get_rerank_cascade
+from app.services.screening_rules_service import get_screening_service
 from app.services.semantic_cache_service import get_semantic_cache
+from app.services.session_corpus_cache import get_session_corpus_cache
 
 # V7 Services Integration
 from app.services.v7_integration import V7Services, get_v7_services
@@ -49,6 +59,7 @@ from app.utils.debug_logger import (
     log_template_selection,
 )
 from app.utils.error_handling import degradation
+from app.utils.tracing import get_tracer, traced, traced_to_thread
 
 if TYPE_CHECKING:
     pass
@@ -62,6 +73,41 @@ logger = logging.getLogger(__name__)
 T = TypeVar("T")
 R = TypeVar("R")
 
+# Context budget for the refinement prompt (previously a 10k-char slice)
+REFINEMENT_CONTEXT_TOKENS = 2500
+
+# Questions that only ask which candidates have an attribute ("who speaks French?");
+# with metadata filters detected they are answered from the metadata index
+METADATA_LOOKUP_RE = re.compile(
+    r"^\s*(?:who|which|list|show|find|any|how many|qui[eé]n(?:es)?|cu[aá]l(?:es)?|cu[aá]ntos)\b",
+    re.IGNORECASE
+)
+
+# Negation cues; a filter preceded by one in its clause is negated ("who has no MBA?")
+NEGATION_RE = re.compile(
+    r"\b(?:not|no|without|lacks?|lacking|never|none|nobody|"
+    r"(?:does|do|is|are|has|have|can|did)n'?t|cannot|sin|ni)\b"
+)
+# Cues that make a negation ambiguous ("not French or German", "except ...")
+NEGATION_SCOPE_RE = re.compile(r"\b(?:or|nor|neither|either|except|excluding|other\s+than|apart\s+from|o)\b")
+CLAUSE_BREAK_RE = re.compile(r"[,;:.?!]|\b(?:and|but|while|whereas|y|pero)\b")
+# "[comparison] N[-M][+] years [of experience]"
+EXPERIENCE_RE = re.compile(
+    r"(?:\b(?P<cmp>at\s+least|no\s+less\s+than|not\s+less\s+than|minimum(?:\s+of)?|min\.?|al\s+menos|"
+    r"over|more\s+than|above|greater\s+than|m[aá]s\s+de|"
+    r"less\s+than|fewer\s+than|under|below|menos\s+de|"
+    r"at\s+most|up\s+to|no\s+more\s+than|not\s+more\s+than|maximum(?:\s+of)?|max\.?|hasta|"
+    r"between|entre)\s+)?"
+    r"(?P<low>\d+(?:\.\d+)?)(?:\s*(?:-|to|and|a|y)\s*(?P<high>\d+(?:\.\d+)?))?\s*(?P<plus>\+)?\s*"
+    r"(?:years?|yrs?|años?)\b(?P<exp>\s*(?:of\s+|de\s+)?(?:experience|experiencia))?"
+)
+EXPERIENCE_BOUNDS = {
+    "min_experience": ("at least", "no less than", "not less than", "minimum", "minimum of", "min", "min.", "al menos"),
+    "above_experience": ("over", "more than", "above", "greater than", "más de", "mas de"),
+    "below_experience": ("less than", "fewer than", "under", "below", "menos de"),
+    "max_experience": ("at most", "up to", "no more than", "not more than", "maximum", "maximum of", "max", "max.", "hasta"),
+}
+
 
 class Mode(Enum):
     """Operating mode for the RAG service."""
@@ -161,6 +207,9 @@ class RAGConfigV5:
     streaming_enabled: bool = False
     parallel_steps_enabled: bool = True
     
+    # Per-query-type stage profile (None = chosen from the query type)
+    pipeline_profile: str | None = None
+    
     # Retrieval settings
     default_k: int = 15  # Increased for multi-query fusion
     default_threshold: float = 0.25  # Slightly lower for broader recall
@@ -201,6 +250,7 @@ class PipelineMetrics:
     stages: list[StageMetrics] = field(default_factory=list)
     cache_hit: bool = False
     retry_count: int = 0
+    trace_id: str | None = None  # /api/v8/traces/{trace_id}
     
     def add_stage(self, stage: StageMetrics) -> None:
         self.stages.append(stage)
@@ -213,6 +263,7 @@ class PipelineMetrics:
             "total_ms": round(self.total_ms, 2),
             "cache_hit": self.cache_hit,
             "retry_count": self.retry_count,
+            **({"trace_id": self.trace_id} if self.trace_id else {}),
             "stages": {
                 s.stage.name.lower(): {
                     "duration_ms": round(s.duration_ms, 2),
@@ -310,6 +361,8 @@ class RAGResponseV5:
     mode: str = "local"
     cached: bool = False
     request_id: str | None = None
+    generation_model: str | None = None  # Model that actually generated the answer
+    used_fallback_model: bool = False  # generation_model differs from the selected model
     timestamp: datetime = field(default_factory=datetime.utcnow)
     version: str = "5.0.0"
     
@@ -324,6 +377,8 @@ class RAGResponseV5:
             "mode": self.mode,
             "cached": self.cached,
             "request_id": self.request_id,
+            "generation_model": self.generation_model,
+            "used_fallback_model": self.used_fallback_model,
             "timestamp": self.timestamp.isoformat(),
             "version": self.version,
             "reasoning_trace": self.reasoning_trace[:500] if self.reasoning_trace else None,
@@ -575,6 +630,7 @@ class PipelineContextV5:
     
     # Stage results
     query_understanding: QueryUnderstandingV5 | None = None
+    profile: PipelineProfile = field(default_factory=lambda: PIPELINE_PROFILES["full"])
     guardrail_passed: bool = True
     guardrail_message: str | None = None
     
@@ -587,6 +643,12 @@ class PipelineContextV5:
     resolved_candidate_name: str | None = None
     resolved_cv_id: str | None = None
     
+    # FASE 3: Metadata filters detected in the question; when the local metadata
+    # index answers them completely, retrieval returns these CVs without vector search
+    metadata_filters: dict[str, Any] = field(default_factory=dict)
+    metadata_filters_resolved: bool = False
+    metadata_lookup_cv_ids: list[str] | None = None
+    
     # V5: Multi-query embeddings
     query_embeddings: dict[str, list[float]] = field(default_factory=dict)
     hyde_embedding: list[float] | None = None
@@ -600,6 +662,9 @@ class PipelineContextV5:
     
     generated_response: str | None = None
     generation_tokens: dict[str, int] = field(default_factory=dict)
+    context_packing: dict[str, Any] = field(default_factory=dict)  # Stats of the generation prompt's context
+    generation_model: str | None = None
+    used_fallback_model: bool = False
     
     verification_result: VerificationResultV5 | None = None
     
@@ -614,6 +679,11 @@ class PipelineContextV5:
     embedding_cached: bool = False
     response_cached: bool = False
     
+    # Session working set (session_corpus_cache.py): warm at query start, or loading
+    session_corpus: Any = None
+    session_corpus_load: asyncio.Task | None = None
+    corpus_warm: bool | None = None
+    
     @property
     def effective_chunks(self) -> list[dict[str, Any]]:
         if self.reranked_chunks is not None:
@@ -770,7 +840,8 @@ class RAGServiceV5:
         logger.info("[LAZY_INIT] Starting lazy_initialize_providers")
         logger.info(f"[LAZY_INIT] Config models: understanding={self.config.understanding_model}, generation={self.config.generation_model}, reranking={self.config.reranking_model}, verification={self.config.verification_model}")
         
-        from app.prompts.templates import PromptBuilder
+        from app.prompts.context_packer import get_context_token_budget
+        from app.prompts.templates import PromptBuilder, PromptConfig
         from app.providers.factory import ProviderFactory
         from app.services.claim_verifier_service import ClaimVerifierService
         from app.services.eval_service import EvalService
@@ -826,8 +897,10 @@ class RAGServiceV5:
             guardrail = GuardrailService()
             hallucination = HallucinationService()
             eval_service = EvalService()
-            prompt_builder = PromptBuilder()
-            logger.info("[LAZY_INIT] Other services created")
+            prompt_builder = PromptBuilder(PromptConfig(
+                context_token_budget=get_context_token_budget(self.config.generation_model)
+            ))
+            logger.info(f"[LAZY_INIT] Other services created (context budget={prompt_builder.config.context_token_budget} tokens)")
             
             # Initialize V7 Services (HuggingFace-based enhancements)
             try:
@@ -887,24 +960,27 @@ class RAGServiceV5:
             total_cvs_in_session=total_cvs_in_session
         )
         
-        try:
-            response = await asyncio.wait_for(
-                self._execute_pipeline(ctx),
-                timeout=self.config.total_timeout
-            )
-            return response
-            
-        except asyncio.TimeoutError:
-            logger.error(f"Pipeline timeout after {self.config.total_timeout}s")
-            return self._build_error_response(ctx, "Request timed out")
-        except GuardrailError as e:
-            return self._build_guardrail_response(ctx, e.rejection_reason)
-        except RAGError as e:
-            logger.error(f"Pipeline error at {e.stage}: {e}")
-            return self._build_error_response(ctx, str(e))
-        except Exception as e:
-            logger.exception(f"Unexpected error: {e}")
-            return self._build_error_response(ctx, "An unexpected error occurred")
+        with get_tracer().trace("rag.query", trace_id=ctx.request_id, mode=self.config.mode.value,
+                                cv_count=len(cv_ids or []), question_chars=len(question)):
+            ctx.metrics.trace_id = ctx.request_id
+            try:
+                response = await asyncio.wait_for(
+                    self._execute_pipeline(ctx),
+                    timeout=self.config.total_timeout
+                )
+                return response
+            
+            except asyncio.TimeoutError:
+                logger.error(f"Pipeline timeout after {self.config.total_timeout}s")
+                return self._build_error_response(ctx, "Request timed out")
+            except GuardrailError as e:
+                return self._build_guardrail_response(ctx, e.rejection_reason)
+            except RAGError as e:
+                logger.error(f"Pipeline error at {e.stage}: {e}")
+                return self._build_error_response(ctx, str(e))
+            except Exception as e:
+                logger.exception(f"Unexpected error: {e}")
+                return self._build_error_response(ctx, "An unexpected error occurred")
     
     async def query_stream(
         self,
@@ -950,53 +1026,56 @@ class RAGServiceV5:
             total_cvs_in_session=total_cvs_in_session
         )
         
-        # =================================================================
-        # V8 SEMANTIC CACHE: Check for cached response
-        # =================================================================
-        semantic_cache = get_semantic_cache()
-        cache_hit = None
-        query_embedding_for_cache = None
+        with get_tracer().trace("rag.query_stream", trace_id=ctx.request_id, mode=self.config.mode.value,
+                                cv_count=len(cv_ids or []), question_chars=len(question)):
+            ctx.metrics.trace_id = ctx.request_id
+            # =================================================================
+            # V8 SEMANTIC CACHE: Check for cached response
+            # =================================================================
+            semantic_cache = get_semantic_cache()
+            cache_hit = None
+            query_embedding_for_cache = None
         
-        try:
-            # Get embedding for cache lookup
-            if self._embedder and session_id:
-                query_embedding_for_cache = await self._embedder.embed(question)
-                cache_hit = semantic_cache.lookup(question, query_embedding_for_cache, session_id)
+            try:
+                # Get embedding for cache lookup
+                if self._embedder and session_id:
+                    query_embedding_for_cache = await self._embedder.embed(question)
+                    cache_hit = semantic_cache.lookup(question, query_embedding_for_cache, session_id)
                 
-                if cache_hit.found and cache_hit.entry:
-                    logger.info(f"[SEMANTIC_CACHE] Cache HIT! similarity={cache_hit.similarity:.3f}")
-                    log_semantic_cache("hit", question, cache_hit.similarity, hit=True)
-                    # Return cached response
-                    yield {"event": "step", "data": {"step": "cache_hit", "status": "completed", "details": f"Cache hit (similarity: {cache_hit.similarity:.2%})"}}
-                    yield {"event": "complete", "data": cache_hit.entry.response}
-                    return
-                else:
-                    log_semantic_cache("miss", question, cache_hit.similarity if cache_hit else 0, hit=False)
-        except Exception as e:
-            logger.warning(f"[SEMANTIC_CACHE] Cache lookup failed: {e}")
+                    if cache_hit.found and cache_hit.entry:
+                        logger.info(f"[SEMANTIC_CACHE] Cache HIT! similarity={cache_hit.similarity:.3f}")
+                        log_semantic_cache("hit", question, cache_hit.similarity, hit=True)
+                        # Return cached response
+                        yield {"event": "step", "data": {"step": "cache_hit", "status": "completed", "details": f"Cache hit (similarity: {cache_hit.similarity:.2%})"}}
+                        yield {"event": "complete", "data": cache_hit.entry.response}
+                        return
+                    else:
+                        log_semantic_cache("miss", question, cache_hit.similarity if cache_hit else 0, hit=False)
+            except Exception as e:
+                logger.warning(f"[SEMANTIC_CACHE] Cache lookup failed: {e}")
         
-        try:
-            # Execute pipeline with events
-            final_response = None
-            async for event in self._execute_pipeline_stream(ctx):
-                yield event
-                # Capture final response for caching
-                if event.get("event") == "complete":
-                    final_response = event.get("data")
-            
-            # Store response in cache
-            if final_response and query_embedding_for_cache and session_id:
-                try:
-                    semantic_cache.store(question, query_embedding_for_cache, final_response, session_id)
-                except Exception as e:
-                    logger.warning(f"[SEMANTIC_CACHE] Failed to store response: {e}")
+            try:
+                # Execute pipeline with events
+                final_response = None
+                async for event in self._execute_pipeline_stream(ctx):
+                    yield event
+                    # Capture final response for caching
+                    if event.get("event") == "complete":
+                        final_response = event.get("data")
+            
+                # Store response in cache
+                if final_response and query_embedding_for_cache and session_id:
+                    try:
+                        semantic_cache.store(question, query_embedding_for_cache, final_response, session_id)
+                    except Exception as e:
+                        logger.warning(f"[SEMANTIC_CACHE] Failed to store response: {e}")
                 
-        except asyncio.TimeoutError:
-            logger.error(f"Pipeline timeout after {self.config.total_timeout}s")
-            yield {"event": "error", "data": {"message": "Request timed out"}}
-        except Exception as e:
-            logger.exception(f"Stream error: {e}")
-            yield {"event": "error", "data": {"message": str(e)}}
+            except asyncio.TimeoutError:
+                logger.error(f"Pipeline timeout after {self.config.total_timeout}s")
+                yield {"event": "error", "data": {"message": "Request timed out"}}
+            except Exception as e:
+                logger.exception(f"Stream error: {e}")
+                yield {"event": "error", "data": {"message": str(e)}}
     
     async def _execute_pipeline_stream(self, ctx: PipelineContextV5):
         """Execute pipeline with streaming progress events."""
@@ -1016,6 +1095,16 @@ class RAGServiceV5:
                 ctx.resolved_candidate_name = resolved_name
                 ctx.resolved_cv_id = resolved_cv_id
         
+        self._start_session_corpus(ctx)
+        
+        # V8 SCREENING: excluded candidates never reach retrieval or the LLM
+        excluded = await self._apply_screening_prefilter(ctx)
+        if excluded:
+            yield {"event": "step", "data": {"step": "screening", "status": "completed", "details": f"{excluded} CVs excluded by screening rules"}}
+            if not ctx.cv_ids:
+                yield {"event": "complete", "data": self._build_no_results_response(ctx).to_dict()}
+                return
+        
         # CRITICAL DEBUG: Check if _query_understanding is initialized
         logger.info(f"[PIPELINE_STREAM] Starting pipeline, _query_understanding={self._query_understanding is not None}")
         if self._query_understanding is None:
@@ -1057,6 +1146,7 @@ class RAGServiceV5:
         
         # Ensure task completed (get any exception)
         await understanding_task
+        self._select_pipeline_profile(ctx)
         
         duration = (time.perf_counter() - start) * 1000
         
@@ -1072,11 +1162,12 @@ class RAGServiceV5:
                 "confidence": qu.confidence if hasattr(qu, 'confidence') else None,
                 "used_fallback": qu.metadata.get("fallback", False) if hasattr(qu, 'metadata') else False,
                 "fallback_model": qu.metadata.get("used_fallback_model") if hasattr(qu, 'metadata') else None,
+                "pipeline_profile": ctx.profile.name,
             }
         yield {"event": "step", "data": {"step": "query_understanding", "status": "completed", "duration_ms": duration, "content": understanding_content}}
         
         # Stage 2: Multi-Query (if enabled)
-        if self.config.multi_query_enabled:
+        if ctx.profile.runs("multi_query", self.config):
             yield {"event": "step", "data": {"step": "multi_query", "status": "running"}}
             start = time.perf_counter()
             await self._step_multi_query(ctx)
@@ -1144,7 +1235,7 @@ class RAGServiceV5:
         }}
         
         # Stage 6: Reranking
-        if self.config.reranking_enabled:
+        if ctx.profile.runs("reranking", self.config):
             yield {"event": "step", "data": {"step": "reranking", "status": "running"}}
             start = time.perf_counter()
             await self._step_reranking(ctx)
@@ -1181,7 +1272,7 @@ class RAGServiceV5:
             }}
         
         # Stage 7: Reasoning
-        if self.config.reasoning_enabled:
+        if ctx.profile.runs("reasoning", self.config):
             yield {"event": "step", "data": {"step": "reasoning", "status": "running", "details": "Analyzing candidates"}}
             start = time.perf_counter()
             await self._step_reasoning(ctx)
@@ -1194,9 +1285,9 @@ class RAGServiceV5:
         
         # Use streaming generation to emit tokens in real-time
         async for gen_event in self._step_generation_stream(ctx):
-            if gen_event["event"] == "token":
-                # Emit each token as it arrives
-                yield {"event": "token", "data": gen_event["data"]}
+            if gen_event["event"] in ("token", "structured_partial"):
+                # Emit each token (and each completed section) as it arrives
+                yield gen_event
             elif gen_event["event"] == "generation_complete":
                 # Generation finished
                 duration = gen_event["data"].get("duration_ms", (time.perf_counter() - start) * 1000)
@@ -1210,7 +1301,7 @@ class RAGServiceV5:
         }}
         
         # Stage 9: Verification
-        if self.config.claim_verification_enabled:
+        if ctx.profile.runs("claim_verification", self.config):
             yield {"event": "step", "data": {"step": "verification", "status": "running"}}
             start = time.perf_counter()
             await self._step_claim_verification(ctx)
@@ -1218,7 +1309,7 @@ class RAGServiceV5:
             yield {"event": "step", "data": {"step": "verification", "status": "completed", "duration_ms": duration}}
         
         # Stage 10: Refinement
-        if self.config.iterative_refinement_enabled:
+        if ctx.profile.runs("refinement", self.config):
             yield {"event": "step", "data": {"step": "refinement", "status": "running"}}
             start = time.perf_counter()
             await self._step_refinement(ctx)
@@ -1228,20 +1319,77 @@ class RAGServiceV5:
         # Finalize
         ctx.metrics.total_ms = ctx.elapsed_ms
         ctx.metrics.cache_hit = ctx.embedding_cached or ctx.response_cached
-        self._log_query(ctx)
+        if ctx.corpus_warm is not None:
+            get_session_corpus_cache().record_query(ctx.corpus_warm, ctx.metrics.total_ms)
         
         response = self._build_success_response(ctx)
         yield {"event": "complete", "data": response.to_dict()}
     
+    def _start_session_corpus(self, ctx: PipelineContextV5) -> None:
+        """Use the session's warm working set, or start loading it (overlaps query understanding)."""
+        if not settings.session_corpus_cache_enabled or not ctx.session_id or not ctx.cv_ids:
+            return
+        cache = get_session_corpus_cache()
+        corpus = cache.get(ctx.session_id)
+        if corpus is not None and corpus.covers(ctx.cv_ids):
+            ctx.session_corpus = corpus
+            ctx.corpus_warm = True
+            return
+        ctx.corpus_warm = False
+        ctx.session_corpus_load = asyncio.create_task(
+            cache.load(ctx.session_id, list(ctx.cv_ids), self._vector_store)
+        )
+    
+    async def _session_corpus(self, ctx: PipelineContextV5) -> Any:
+        """The session working set once loaded (None = search the vector store)."""
+        if ctx.session_corpus is None and ctx.session_corpus_load is not None:
+            ctx.session_corpus = await ctx.session_corpus_load
+            ctx.session_corpus_load = None
+        return ctx.session_corpus
+    
+    async def _apply_screening_prefilter(self, ctx: PipelineContextV5) -> int:
+        """
+        Narrow ctx.cv_ids to the CVs passing the session's screening rule set.
+        
+        Returns the number of excluded CVs (0 when no rule set is assigned).
+        """
+        if not ctx.session_id or not ctx.cv_ids:
+            return 0
+        screening = get_screening_service()
+        if not screening.get_session_rule_set_id(ctx.session_id):
+            return 0
+        
+        try:
+            scoring = get_scoring_service()
+            await scoring.ensure_features(ctx.cv_ids, self._vector_store)
+            table = scoring.get_feature_table(ctx.session_id, ctx.cv_ids)
+            kept = screening.filter_cv_ids(ctx.session_id, ctx.cv_ids, table)
+        except Exception as e:
+            logger.warning(f"[SCREENING] Pre-filter failed, searching all CVs: {e}")
+            return 0
+        
+        excluded = len(ctx.cv_ids) - len(kept)
+        if excluded:
+            logger.info(f"[SCREENING] Pre-filter kept {len(kept)}/{len(ctx.cv_ids)} CVs")
+            ctx.cv_ids = kept
+            ctx.total_cvs_in_session = len(kept)
+        return excluded
+    
     async def _execute_pipeline(self, ctx: PipelineContextV5) -> RAGResponseV5:
         """Execute the full RAG v5 pipeline."""
         
         logger.info(f"[PIPELINE] Starting pipeline for session={ctx.session_id}")
+        self._start_session_corpus(ctx)
+        
+        # V8 SCREENING: excluded candidates never reach retrieval or the LLM
+        if await self._apply_screening_prefilter(ctx) and not ctx.cv_ids:
+            return self._build_no_results_response(ctx)
         
         # Stage 1: Query Understanding
         logger.info("[PIPELINE] Stage 1: Query Understanding")
         await self._step_query_understanding(ctx)
         logger.info(f"[PIPELINE] Query Understanding complete: type={ctx.query_understanding.query_type if ctx.query_understanding else 'None'}")
+        self._select_pipeline_profile(ctx)
         
         # Apply adaptive retrieval strategy after understanding query type
         if ctx.total_cvs_in_session and ctx.query_understanding:
@@ -1251,7 +1399,7 @@ class RAGServiceV5:
             logger.info(f"[PIPELINE] Adaptive strategy: {strategy_reason}")
         
         # Stage 2: Multi-Query Generation (V5)
-        if self.config.multi_query_enabled:
+        if ctx.profile.runs("multi_query", self.config):
             logger.info("[PIPELINE] Stage 2: Multi-Query")
             await self._step_multi_query(ctx)
         
@@ -1277,12 +1425,12 @@ class RAGServiceV5:
         logger.info(f"[PIPELINE] Retrieved {len(ctx.retrieval_result.chunks)} chunks")
         
         # Stage 6: Reranking
-        if self.config.reranking_enabled:
+        if ctx.profile.runs("reranking", self.config):
             logger.info("[PIPELINE] Stage 6: Reranking")
             await self._step_reranking(ctx)
         
         # Stage 7: Reasoning (V5)
-        if self.config.reasoning_enabled:
+        if ctx.profile.runs("reasoning", self.config):
             logger.info("[PIPELINE] Stage 7: Reasoning")
             await self._step_reasoning(ctx)
         
@@ -1292,20 +1440,20 @@ class RAGServiceV5:
         logger.info(f"[PIPELINE] Generation complete: answer length={len(ctx.generated_response or '')}")
         
         # Stage 9: Claim Verification (V5)
-        if self.config.claim_verification_enabled:
+        if ctx.profile.runs("claim_verification", self.config):
             logger.info("[PIPELINE] Stage 9: Claim Verification")
             await self._step_claim_verification(ctx)
         
         # Stage 10: Iterative Refinement (V5)
-        if self.config.iterative_refinement_enabled:
+        if ctx.profile.runs("refinement", self.config):
             logger.info("[PIPELINE] Stage 10: Refinement")
             await self._step_refinement(ctx)
         
         # Finalize
         ctx.metrics.total_ms = ctx.elapsed_ms
         ctx.metrics.cache_hit = ctx.embedding_cached or ctx.response_cached
-        
-        self._log_query(ctx)
+        if ctx.corpus_warm is not None:
+            get_session_corpus_cache().record_query(ctx.corpus_warm, ctx.metrics.total_ms)
         
         logger.info("[PIPELINE] Building success response")
         return self._build_success_response(ctx)
@@ -1384,16 +1532,39 @@ class RAGServiceV5:
         
         Analyzes queries like:
         - "Who speaks French?" → {"speaks_french": True}
+        - "Candidates without an MBA" → {"has_mba": False}
         - "AWS certified candidates" → {"has_aws_cert": True}
-        - "MBA holders" → {"has_mba": True}
         - "5+ years experience" → {"min_experience": 5}
+        - "less than 5 years" → {"below_experience": 5}
+        
+        A negation that can't be tied to exactly one filter ("French but not
+        German", "not French or German") makes the whole question ambiguous:
+        no filters are returned, so nothing is narrowed.
         
         Returns:
             Dict of metadata filters to apply during retrieval
         """
-        import re
         filters = {}
-        q = question.lower()
+        q = re.sub(r"\s+", " ", question.lower().replace("’", "'"))
+        used_negations = set()
+        
+        def negation_before(pos: int):
+            """Span of the negation cue in the clause (last 4 words) before pos."""
+            clause_start = max((m.end() for m in CLAUSE_BREAK_RE.finditer(q, 0, pos)), default=0)
+            words = list(re.finditer(r"\S+", q[clause_start:pos]))[-4:]
+            window_start = clause_start + words[0].start() if words else pos
+            cues = list(NEGATION_RE.finditer(q, window_start, pos))
+            return cues[-1].span() if cues else None
+        
+        def add_flag(flag: str, patterns: list, kind: str) -> None:
+            match = next((m for m in (re.search(p, q) for p in patterns) if m), None)
+            if not match:
+                return
+            negation = negation_before(match.start())
+            if negation:
+                used_negations.add(negation)
+            filters[flag] = negation is None
+            logger.info(f"[FASE3] Detected {kind} filter: {flag}={filters[flag]}")
         
         # Language filters
         language_patterns = {
@@ -1403,11 +1574,8 @@ class RAGServiceV5:
             "speaks_chinese": [r"speaks?\s+chinese", r"chinese\s+speak", r"speaks?\s+mandarin"],
             "speaks_english": [r"speaks?\s+english", r"english\s+speak"],
         }
-        
         for flag, patterns in language_patterns.items():
-            if any(re.search(p, q) for p in patterns):
-                filters[flag] = True
-                logger.info(f"[FASE3] Detected language filter: {flag}")
+            add_flag(flag, patterns, "language")
         
         # Certification filters
         cert_patterns = {
@@ -1418,28 +1586,82 @@ class RAGServiceV5:
             "has_cbap": [r"\bcbap\b", r"business\s+analysis\s+professional"],
             "has_scrum": [r"scrum\s+master", r"\bcsm\b", r"\bpsm\b"],
         }
-        
         for flag, patterns in cert_patterns.items():
-            if any(re.search(p, q) for p in patterns):
-                filters[flag] = True
-                logger.info(f"[FASE3] Detected certification filter: {flag}")
+            add_flag(flag, patterns, "certification")
         
         # Education filters
-        if re.search(r"\bmba\b|master\s+of\s+business", q):
-            filters["has_mba"] = True
-            logger.info("[FASE3] Detected education filter: has_mba")
+        add_flag("has_mba", [r"\bmba\b|master\s+of\s+business"], "education")
+        add_flag("has_phd", [r"\bph\.?d\b|doctorate|doctorado"], "education")
+        
+        # Experience filters (comparison-aware; a negated range is not filtered)
+        for match in EXPERIENCE_RE.finditer(q):
+            cmp = re.sub(r"\s+", " ", match.group("cmp") or "")
+            low, high = float(match.group("low")), match.group("high")
+            if cmp and NEGATION_RE.match(cmp):
+                used_negations.add((match.start("cmp"), match.start("cmp") + len(cmp.split()[0])))
+            bounds = {}
+            if high is not None:
+                bounds = {"min_experience": low, "max_experience": float(high)}
+            elif match.group("plus"):
+                bounds = {"min_experience": low}
+            elif cmp:
+                bounds = {key: low for key, cues in EXPERIENCE_BOUNDS.items() if cmp in cues}
+            elif match.group("exp"):
+                bounds = {"min_experience": low}
+            if not bounds:
+                continue
+            if negation_before(match.start()):
+                logger.info("[FASE3] Negated experience range, not filtering")
+                return {}
+            filters.update({k: int(v) if v.is_integer() else v for k, v in bounds.items()})
+            logger.info(f"[FASE3] Detected experience filter: {bounds}")
+        
+        # Every negation must belong to exactly one filter, else don't trust any
+        negations = [m.span() for m in NEGATION_RE.finditer(q)]
+        if negations and filters:
+            unattributed = [span for span in negations if span not in used_negations]
+            if unattributed or NEGATION_SCOPE_RE.search(q):
+                logger.info(f"[FASE3] Ambiguous negation in {question!r}, not filtering")
+                return {}
+        
+        return filters
+    
+    def _resolve_metadata_filters(self, ctx: PipelineContextV5) -> None:
+        """
+        Detect FASE 3 filters once and apply them through the local metadata index.
+        
+        Narrows ctx.cv_ids to the matching CVs before any vector is scored. A pure
+        attribute lookup ("who speaks French?") over fully indexed CVs is answered
+        from the index alone: ctx.metadata_lookup_cv_ids is set and the embedding
+        and vector search steps are skipped. ctx.total_cvs_in_session keeps the
+        session size; questions whose negations can't be parsed reliably yield
+        no filters and are not narrowed.
+        """
+        if ctx.metadata_filters_resolved:
+            return
+        ctx.metadata_filters_resolved = True
         
-        if re.search(r"\bph\.?d\b|doctorate|doctorado", q):
-            filters["has_phd"] = True
-            logger.info("[FASE3] Detected education filter: has_phd")
+        ctx.metadata_filters = self._detect_metadata_filters(ctx.question)
+        if not ctx.metadata_filters:
+            return
+        logger.info(f"[RETRIEVAL] FASE3 Metadata filters detected: {ctx.metadata_filters}")
         
-        # Experience filters
-        exp_match = re.search(r"(\d+)\+?\s*(?:years?|años?)\s*(?:of\s+)?(?:experience|experiencia)", q)
-        if exp_match:
-            filters["min_experience"] = int(exp_match.group(1))
-            logger.info(f"[FASE3] Detected experience filter: min {filters['min_experience']} years")
+        if ctx.target_candidate_name or not hasattr(self._vector_store, "filter_cv_ids"):
+            return
+        matched = self._vector_store.filter_cv_ids(ctx.metadata_filters, ctx.cv_ids)
+        if matched is None:
+            return
+        if not matched:
+            # Flags come from heuristics at ingestion; let the LLM judge the full set
+            logger.info("[METADATA_INDEX] No CV matches the filters, searching all CVs")
+            return
         
-        return filters
+        before = len(ctx.cv_ids) if ctx.cv_ids else None
+        ctx.cv_ids = matched
+        logger.info(f"[METADATA_INDEX] Filters kept {len(matched)}/{before or 'all'} CVs")
+        
+        if METADATA_LOOKUP_RE.match(ctx.question) and self._vector_store.is_metadata_indexed(matched):
+            ctx.metadata_lookup_cv_ids = matched
     
     async def _get_chunks_by_candidate_name(
         self, 
@@ -1477,7 +1699,24 @@ class RAGServiceV5:
         except Exception as e:
             logger.error(f"Error getting chunks by candidate name: {e}")
             return []
-    
+
+    def _select_pipeline_profile(self, ctx: PipelineContextV5) -> None:
+        """Pick the stage profile for the understood query type and record it."""
+        query_type = ctx.query_understanding.query_type if ctx.query_understanding else None
+        try:
+            ctx.profile = select_profile(query_type, forced=self.config.pipeline_profile)
+        except ValueError as e:
+            logger.warning(f"[PIPELINE_PROFILE] {e}, using full profile")
+            ctx.profile = PIPELINE_PROFILES["full"]
+
+        skipped = ctx.profile.skipped_stages(self.config)
+        logger.info(f"[PIPELINE_PROFILE] type={query_type} profile={ctx.profile.name} skipped={skipped}")
+        qu_stage = ctx.metrics.get_stage(PipelineStage.QUERY_UNDERSTANDING)
+        if qu_stage:
+            qu_stage.metadata["pipeline_profile"] = ctx.profile.name
+            qu_stage.metadata["skipped_stages"] = skipped
+
+    @traced("query_understanding")
     async def _step_query_understanding(self, ctx: PipelineContextV5) -> None:
         """Step 1: Understand the query."""
         start = time.perf_counter()
@@ -1517,7 +1756,10 @@ class RAGServiceV5:
                     "prompt_tokens": prompt_tokens,
                     "completion_tokens": completion_tokens,
                     "total_tokens": prompt_tokens + completion_tokens,
-                    "openrouter_cost": openrouter_cost
+                    "openrouter_cost": openrouter_cost,
+                    "tier": result.metadata.get("tier") if result.metadata else None,
+                    "local_confidence": result.metadata.get("local_confidence") if result.metadata else None,
+                    "local_query_type": result.metadata.get("local_query_type") if result.metadata else None
                 }
             ))
         except Exception as e:
@@ -1529,6 +1771,7 @@ class RAGServiceV5:
                 error=str(e)
             ))
     
+    @traced("query_understanding")
     async def _step_query_understanding_with_callback(
         self, 
         ctx: PipelineContextV5, 
@@ -1573,7 +1816,10 @@ class RAGServiceV5:
                     "completion_tokens": completion_tokens,
                     "total_tokens": prompt_tokens + completion_tokens,
                     "openrouter_cost": openrouter_cost,
-                    "used_fallback": result.metadata.get("fallback", False) if result.metadata else False
+                    "used_fallback": result.metadata.get("fallback", False) if result.metadata else False,
+                    "tier": result.metadata.get("tier") if result.metadata else None,
+                    "local_confidence": result.metadata.get("local_confidence") if result.metadata else None,
+                    "local_query_type": result.metadata.get("local_query_type") if result.metadata else None
                 }
             ))
         except Exception as e:
@@ -1585,6 +1831,7 @@ class RAGServiceV5:
                 error=str(e)
             ))
     
+    @traced("multi_query")
     async def _step_multi_query(self, ctx: PipelineContextV5) -> None:
         """Step 2: Generate query variations and HyDE with graceful degradation."""
         if not degradation.is_enabled('multi_query'):
@@ -1593,7 +1840,7 @@ class RAGServiceV5:
         
         start = time.perf_counter()
         try:
-            result = await self._multi_query.generate(ctx.question)
+            result = await self._multi_query.generate(ctx.question, hyde=ctx.profile.runs("hyde", self.config))
             
             if ctx.query_understanding:
                 ctx.query_understanding.query_variations = result.variations
@@ -1628,6 +1875,7 @@ class RAGServiceV5:
                 error=str(e)
             ))
     
+    @traced("guardrail")
     async def _step_guardrail(self, ctx: PipelineContextV5) -> bool:
         """Step 3: Check guardrails (v7: uses zero-shot classification if available)."""
         start = time.perf_counter()
@@ -1691,8 +1939,14 @@ class RAGServiceV5:
             ))
             return True  # Allow on error
     
+    @traced("multi_embedding")
     async def _step_multi_embedding(self, ctx: PipelineContextV5) -> None:
         """Step 4: Generate embeddings for all query variations."""
+        self._resolve_metadata_filters(ctx)
+        if ctx.metadata_lookup_cv_ids is not None:
+            logger.info("[METADATA_INDEX] Metadata lookup, skipping query embeddings")
+            return
+        
         start = time.perf_counter()
         try:
             queries_to_embed = [ctx.question]
@@ -1725,7 +1979,7 @@ class RAGServiceV5:
             # Generate HyDE embedding if available
             if (ctx.query_understanding and 
                 ctx.query_understanding.hyde_document and 
-                self.config.hyde_enabled):
+                ctx.profile.runs("hyde", self.config)):
                 
                 hyde_result = await self._embedder.embed_query(
                     ctx.query_understanding.hyde_document
@@ -1748,6 +2002,7 @@ class RAGServiceV5:
             ))
             raise RetrievalError(f"Embedding failed: {e}", cause=e)
     
+    @traced("fusion_retrieval")
     async def _step_fusion_retrieval(self, ctx: PipelineContextV5) -> None:
         """Step 5: Search with all embeddings and fuse results using RRF."""
         from app.services.multi_query_service import RRF_K, reciprocal_rank_fusion_with_scores
@@ -1758,11 +2013,30 @@ class RAGServiceV5:
             # FASE 3: METADATA-BASED RETRIEVAL STRATEGY
             # Detect queries that should filter by metadata (languages, certs, etc.)
             # =================================================================
-            metadata_filters = self._detect_metadata_filters(ctx.question)
-            if metadata_filters:
-                logger.info(f"[RETRIEVAL] FASE3 Metadata filters detected: {metadata_filters}")
-                # Store filters for later use in retrieval
-                ctx.metadata_filters = metadata_filters
+            self._resolve_metadata_filters(ctx)
+            
+            if ctx.metadata_lookup_cv_ids is not None:
+                lookup_chunks = self._vector_store.get_summary_chunks(ctx.metadata_lookup_cv_ids)
+                ctx.retrieval_result = RetrievalResultV5(
+                    chunks=lookup_chunks,
+                    cv_ids=list(ctx.metadata_lookup_cv_ids),
+                    strategy="metadata_index",
+                    scores=[c["score"] for c in lookup_chunks],
+                    query_sources={}
+                )
+                log_retrieval(lookup_chunks, strategy="metadata_index")
+                ctx.metrics.add_stage(StageMetrics(
+                    stage=PipelineStage.SEARCH,
+                    duration_ms=(time.perf_counter() - start) * 1000,
+                    success=True,
+                    metadata={
+                        "num_chunks": len(lookup_chunks),
+                        "num_cvs": len(ctx.metadata_lookup_cv_ids),
+                        "strategy": "metadata_index",
+                        "metadata_filters": ctx.metadata_filters
+                    }
+                ))
+                return
             
             # =================================================================
             # TARGETED RETRIEVAL: If single candidate detected, get their chunks directly
@@ -1811,7 +2085,8 @@ class RAGServiceV5:
             all_chunks: dict[str, dict] = {}  # chunk_id -> chunk data
             query_sources: dict[str, list[str]] = {}  # chunk_id -> queries that found it
             
-            # Search with each embedding
+            # Search with each embedding (in the session working set when loaded)
+            corpus = await self._session_corpus(ctx)
             embeddings_to_search = list(ctx.query_embeddings.items())
             
             # Add HyDE embedding if available
@@ -1827,16 +2102,25 @@ class RAGServiceV5:
                 
                 logger.info(f"[RETRIEVAL] Query '{query_name}': using k={effective_k} (ctx.k={ctx.k}, multi_query_k={self.config.multi_query_k})")
                 
-                results = await asyncio.wait_for(
-                    self._vector_store.search(
+                if corpus is not None and corpus.dimensions == len(embedding):
+                    results = corpus.search(
                         embedding=embedding,
                         k=effective_k,
                         threshold=ctx.threshold,
                         cv_ids=ctx.cv_ids,
                         diversify_by_cv=True
-                    ),
-                    timeout=self.config.search_timeout
-                )
+                    )
+                else:
+                    results = await asyncio.wait_for(
+                        self._vector_store.search(
+                            embedding=embedding,
+                            k=effective_k,
+                            threshold=ctx.threshold,
+                            cv_ids=ctx.cv_ids,
+                            diversify_by_cv=True
+                        ),
+                        timeout=self.config.search_timeout
+                    )
                 
                 # Build ranked list for this query (for RRF)
                 query_results: list[tuple[str, float]] = []
@@ -1899,7 +2183,23 @@ class RAGServiceV5:
             # =================================================================
             try:
                 hybrid_service = get_hybrid_search_service()
-                if hybrid_service._bm25_service.is_available and ctx.session_id:
+                if corpus is not None and corpus.bm25 is not None:
+                    # Session-wide BM25 index: lexical hits vector search missed join the fusion
+                    bm25_results = corpus.bm25_search(ctx.question, k=ctx.k * 2, cv_ids=ctx.cv_ids)
+                    for r in bm25_results:
+                        if r.chunk_id not in all_chunks:
+                            full_metadata = dict(r.metadata)
+                            full_metadata.setdefault("candidate_name", "Unknown")
+                            full_metadata.setdefault("section_type", "general")
+                            all_chunks[r.chunk_id] = {"content": r.content, "metadata": full_metadata, "original_score": 0.0}
+                            query_sources[r.chunk_id] = []
+                        query_sources[r.chunk_id].append("bm25")
+                    if bm25_results:
+                        results_per_query.append([(r.chunk_id, r.score) for r in bm25_results])
+                        logger.info(f"[HYBRID] Added {len(bm25_results)} session BM25 results to RRF fusion")
+                        vector_count = sum(len(r) for r in results_per_query[:-1])
+                        log_hybrid_search(len(bm25_results), vector_count, len(all_chunks))
+                elif hybrid_service._bm25_service.is_available and ctx.session_id:
                     # Build BM25 index if not exists
                     bm25_chunks = [
                         {"id": cid, "content": cdata["content"], "metadata": cdata["metadata"]}
@@ -1933,13 +2233,21 @@ class RAGServiceV5:
                 if ctx.target_candidate_name:
                     # Boost chunks from the target candidate (2.5x multiplier)
                     candidate_name_boost = {}
-                    target_name_normalized = ctx.target_candidate_name.lower().strip()
-                    for chunk_id, chunk_data in all_chunks.items():
-                        chunk_name = chunk_data["metadata"].get("candidate_name", "").lower().strip()
-                        # Exact or fuzzy match
-                        if target_name_normalized in chunk_name or chunk_name in target_name_normalized:
-                            candidate_name_boost[chunk_id] = 2.5
-                            logger.info(f"[RRF_BOOST] Boosting chunk {chunk_id[:16]}... for candidate '{chunk_name}'")
+                    if hasattr(self._vector_store, "find_candidate_cv_ids"):
+                        # Name index lookup once, then a set check per chunk
+                        target_cvs = set(self._vector_store.find_candidate_cv_ids(ctx.target_candidate_name, ctx.cv_ids))
+                        for chunk_id, chunk_data in all_chunks.items():
+                            if chunk_data["metadata"].get("cv_id") in target_cvs:
+                                candidate_name_boost[chunk_id] = 2.5
+                        logger.info(f"[RRF_BOOST] Boosting {len(candidate_name_boost)} chunks from {len(target_cvs)} CV(s) for '{ctx.target_candidate_name}'")
+                    else:
+                        target_name_normalized = ctx.target_candidate_name.lower().strip()
+                        for chunk_id, chunk_data in all_chunks.items():
+                            chunk_name = chunk_data["metadata"].get("candidate_name", "").lower().strip()
+                            # Exact or fuzzy match
+                            if target_name_normalized in chunk_name or chunk_name in target_name_normalized:
+                                candidate_name_boost[chunk_id] = 2.5
+                                logger.info(f"[RRF_BOOST] Boosting chunk {chunk_id[:16]}... for candidate '{chunk_name}'")
                 
                 fused_results = reciprocal_rank_fusion_with_scores(
                     results_per_query, 
@@ -1998,6 +2306,7 @@ class RAGServiceV5:
             ))
             raise RetrievalError(f"Retrieval failed: {e}", cause=e)
     
+    @traced("reranking")
     async def _step_reranking(self, ctx: PipelineContextV5) -> None:
         """Step 6: Rerank chunks (v7: uses cross-encoder if available - 100x faster)."""
         start = time.perf_counter()
@@ -2024,49 +2333,28 @@ class RAGServiceV5:
                 else ctx.question
             )
             
-            # V7: Use cross-encoder reranking if available (100x faster than LLM)
-            reranking_method = "llm"
-            openrouter_cost = 0.0
-            prompt_tokens = 0
-            completion_tokens = 0
-            
-            if self._v7_services and self._v7_services.reranker:
-                try:
-                    result = await self._v7_services.rerank(
-                        query=effective_question,
-                        results=chunks,
-                        top_k=None
-                    )
-                    ctx.reranked_chunks = result.reranked_results
-                    reranking_method = result.method
-                    logger.info(f"[RERANKING v7] method={result.method}, docs={len(chunks)}, latency={result.latency_ms:.1f}ms")
-                except Exception as e:
-                    logger.warning(f"[RERANKING v7] Cross-encoder failed, falling back to LLM: {e}")
-                    # Fall back to LLM reranking
-                    result = await self._reranking.rerank(
-                        query=effective_question,
-                        results=chunks,
-                        top_k=None
-                    )
-                    ctx.reranked_chunks = result.reranked_results
-                    if result.metadata:
-                        openrouter_cost = result.metadata.get('openrouter_cost', 0.0)
-                        prompt_tokens = result.metadata.get('prompt_tokens', 0)
-                        completion_tokens = result.metadata.get('completion_tokens', 0)
-            else:
-                # Legacy: LLM-based reranking
-                result = await self._reranking.rerank(
-                    query=effective_question,
-                    results=chunks,
-                    top_k=None
+            # Cascade: only chunks the cheap first stage can't place go to the reranker
+            cascade = get_rerank_cascade()
+            if cascade is not None:
+                requirements = ctx.query_understanding.requirements if ctx.query_understanding else []
+                outcome = await cascade.rerank(
+                    effective_question, chunks, self._rerank_expensive,
+                    terms=[str(r) for r in requirements or []]
                 )
+                ctx.reranked_chunks = outcome.reranked
+                reranking_method = outcome.method
+                batch_metadata = outcome.batch_metadata
+                cascade_metadata = outcome.to_metadata()
+            else:
+                result, reranking_method = await self._rerank_expensive(effective_question, chunks)
                 ctx.reranked_chunks = result.reranked_results
-                
-                # Extract OpenRouter cost and tokens from reranking metadata
-                if result.metadata:
-                    openrouter_cost = result.metadata.get('openrouter_cost', 0.0)
-                    prompt_tokens = result.metadata.get('prompt_tokens', 0)
-                    completion_tokens = result.metadata.get('completion_tokens', 0)
+                batch_metadata = [result.metadata or {}]
+                cascade_metadata = {"chunks_reranked": len(chunks)}
+            
+            # OpenRouter cost and tokens of the LLM reranking calls (if any)
+            openrouter_cost = sum(m.get('openrouter_cost', 0.0) for m in batch_metadata)
+            prompt_tokens = sum(m.get('prompt_tokens', 0) for m in batch_metadata)
+            completion_tokens = sum(m.get('completion_tokens', 0) for m in batch_metadata)
             
             ctx.metrics.add_stage(StageMetrics(
                 stage=PipelineStage.RERANKING,
@@ -2077,7 +2365,8 @@ class RAGServiceV5:
                     "prompt_tokens": prompt_tokens,
                     "completion_tokens": completion_tokens,
                     "total_tokens": prompt_tokens + completion_tokens,
-                    "openrouter_cost": openrouter_cost
+                    "openrouter_cost": openrouter_cost,
+                    **cascade_metadata
                 }
             ))
         except Exception as e:
@@ -2091,10 +2380,36 @@ class RAGServiceV5:
             ))
             # Don't fail - continue with original results
     
+    async def _rerank_expensive(self, query: str, chunks: List[Any]) -> tuple[Any, str]:
+        """Rerank chunks with the best available reranker: local backend, v7 cross-encoder, then LLM."""
+        # Local backend (settings.reranking_backend): in-process, cached scores
+        local_reranker = get_local_reranking_service()
+        if local_reranker is not None:
+            try:
+                result = await local_reranker.rerank(query=query, results=chunks)
+                logger.info(f"[RERANKING] method={result.method}, docs={len(chunks)}, latency={result.latency_ms:.1f}ms")
+                return result, result.method
+            except Exception as e:
+                logger.warning(f"[RERANKING] Local reranker failed, using remote reranking: {e}")
+        
+        # V7: Use cross-encoder reranking if available (100x faster than LLM)
+        if self._v7_services and self._v7_services.reranker:
+            try:
+                result = await self._v7_services.rerank(query=query, results=chunks, top_k=None)
+                logger.info(f"[RERANKING v7] method={result.method}, docs={len(chunks)}, latency={result.latency_ms:.1f}ms")
+                return result, result.method
+            except Exception as e:
+                logger.warning(f"[RERANKING v7] Cross-encoder failed, falling back to LLM: {e}")
+        
+        # Legacy: LLM-based reranking
+        result = await self._reranking.rerank(query=query, results=chunks, top_k=None)
+        return result, "llm"
+    
+    @traced("reasoning")
     async def _step_reasoning(self, ctx: PipelineContextV5) -> None:
         """Step 7: Apply structured reasoning with graceful degradation."""
-        if not self.config.reasoning_enabled:
-            logger.info("Reasoning disabled in config, skipping")
+        if not ctx.profile.runs("reasoning", self.config):
+            logger.info(f"Reasoning disabled (config or profile '{ctx.profile.name}'), skipping")
             return
         
         # Check degradation but still record stage metric
@@ -2121,13 +2436,17 @@ class RAGServiceV5:
         
         start = time.perf_counter()
         try:
-            context_str = self._format_context(ctx.effective_chunks)
+            context_str = self._format_context(
+                ctx.effective_chunks,
+                token_budget=getattr(self._reasoning, "context_token_budget", None)
+            )
             
             result = await asyncio.wait_for(
                 self._reasoning.reason(
                     question=ctx.question,
                     context=context_str,
-                    total_cvs=ctx.total_cvs_in_session or 0
+                    total_cvs=ctx.total_cvs_in_session or 0,
+                    reflect=ctx.profile.runs("reflection", self.config)
                 ),
                 timeout=self.config.reasoning_timeout
             )
@@ -2189,6 +2508,72 @@ class RAGServiceV5:
                 error=str(e)
             ))
     
+    def _generation_models(self) -> List[str]:
+        """
+        Models allowed to generate the answer (empty for non-OpenRouter LLMs).
+        
+        Only the selected model unless settings.llm_generation_fallback_enabled,
+        which adds the generation fallback chain as hedge/failover candidates.
+        """
+        primary = getattr(self._llm, "model", None)
+        if not isinstance(primary, str) or not primary:
+            return []
+        if not settings.llm_generation_fallback_enabled:
+            return [primary]
+        return get_fallback_service().get_chain("generation", primary)
+    
+    def _record_generation_model(self, ctx: PipelineContextV5, model: str | None) -> dict:
+        """Remember which model answered; stage metadata reporting it and any fallback."""
+        selected = getattr(self._llm, "model", None)
+        ctx.generation_model = model
+        ctx.used_fallback_model = bool(model and selected and model != selected)
+        if ctx.used_fallback_model:
+            logger.warning(f"[GENERATION] Answered by fallback model {model} instead of {selected}")
+        return {"model_used": model, "model_selected": selected, "used_fallback_model": ctx.used_fallback_model}
+    
+    def _generation_llm(self, model: str) -> Any:
+        """LLM provider for the configured generation model or one of its fallbacks."""
+        if model == getattr(self._llm, "model", None):
+            return self._llm
+        from app.providers.factory import ProviderFactory
+        return ProviderFactory.get_llm_provider(self.config.mode, model, getattr(self._llm, "api_key", None))
+    
+    async def _generate_hedged(self, prompt: str, system_prompt: str) -> tuple[Any, str, bool]:
+        """Generate with hedging across the generation chain; returns (result, model, hedged)."""
+        models = self._generation_models()
+        if not models:
+            result = await asyncio.wait_for(
+                self._llm.generate(prompt, system_prompt=system_prompt),
+                timeout=self.config.llm_timeout
+            )
+            return result, getattr(self._llm, "model", None), False
+        outcome = await get_fallback_service().execute_hedged(
+            "generation",
+            lambda model: self._generation_llm(model).generate(prompt, system_prompt=system_prompt),
+            models=models,
+            timeout=self.config.llm_timeout
+        )
+        if not outcome.success:
+            message = outcome.errors[-1]["message"] if outcome.errors else "no model available"
+            raise RuntimeError(f"All generation models failed: {message}")
+        return outcome.result, outcome.model_used, outcome.hedged
+    
+    async def _generate_stream_hedged(self, prompt: str, system_prompt: str):
+        """Stream with hedging on time to first token; yields (model, chunk)."""
+        models = self._generation_models()
+        if not models:
+            async for chunk in self._llm.generate_stream(prompt, system_prompt=system_prompt):
+                yield getattr(self._llm, "model", None), chunk
+            return
+        async for model, chunk in get_fallback_service().execute_hedged_stream(
+            "generation",
+            lambda model: self._generation_llm(model).generate_stream(prompt, system_prompt=system_prompt),
+            models=models,
+            first_chunk_timeout=self.config.llm_timeout
+        ):
+            yield model, chunk
+    
+    @traced("generation")
     async def _step_generation(self, ctx: PipelineContextV5) -> None:
         """Step 8: Generate response."""
         start = time.perf_counter()
@@ -2277,7 +2662,8 @@ class RAGServiceV5:
                     candidate_name=single_candidate_detection.candidate_name,
                     cv_id=single_candidate_detection.cv_id or "",
                     chunks=chunks,
-                    conversation_history=ctx.conversation_history
+                    conversation_history=ctx.conversation_history,
+                    packing=ctx.context_packing
                 )
             else:
                 # MULTI-CANDIDATE PATH - Standard comparison/search template
@@ -2296,7 +2682,8 @@ class RAGServiceV5:
                     question=effective_question,
                     chunks=chunks,
                     total_cvs=ctx.total_cvs_in_session,
-                    conversation_history=ctx.conversation_history
+                    conversation_history=ctx.conversation_history,
+                    packing=ctx.context_packing
                 )
             
             # Add requirements
@@ -2306,12 +2693,11 @@ class RAGServiceV5:
                 )
                 prompt = prompt.replace("Respond now:", requirements_text + "\n\nRespond now:")
             
+            context_packing = dict(ctx.context_packing)
+            
             from app.prompts.templates import SYSTEM_PROMPT
             
-            result = await asyncio.wait_for(
-                self._llm.generate(prompt, system_prompt=SYSTEM_PROMPT),
-                timeout=self.config.llm_timeout
-            )
+            result, generation_model, hedged = await self._generate_hedged(prompt, SYSTEM_PROMPT)
             
             # Record success with circuit breaker
             if "llm" in self._circuit_breakers:
@@ -2340,7 +2726,10 @@ class RAGServiceV5:
                     "prompt_tokens": prompt_tokens,
                     "completion_tokens": completion_tokens,
                     "total_tokens": prompt_tokens + completion_tokens,
-                    "openrouter_cost": openrouter_cost
+                    "openrouter_cost": openrouter_cost,
+                    "context_packing": context_packing,
+                    **self._record_generation_model(ctx, generation_model),
+                    "hedged": hedged
                 }
             ))
         except Exception as e:
@@ -2356,6 +2745,7 @@ class RAGServiceV5:
             ))
             raise GenerationError(f"Generation failed: {e}", cause=e)
     
+    @traced("claim_verification")
     async def _step_claim_verification(self, ctx: PipelineContextV5) -> None:
         """Step 9: Verify claims in response (v7: adds NLI verification for better accuracy)."""
         start = time.perf_counter()
@@ -2444,11 +2834,13 @@ class RAGServiceV5:
                 error=str(e)
             ))
     
+    @traced("generation")
     async def _step_generation_stream(self, ctx: PipelineContextV5):
         """Step 8: Generate response with token streaming.
         
         Yields events:
             - {"event": "token", "data": {"token": "..."}}
+            - {"event": "structured_partial", "data": {"section": ...}} as sections complete
             - {"event": "generation_complete", "data": {...}} when done
         """
         start = time.perf_counter()
@@ -2516,14 +2908,16 @@ class RAGServiceV5:
                     candidate_name=single_candidate_detection.candidate_name,
                     cv_id=single_candidate_detection.cv_id or "",
                     chunks=chunks,
-                    conversation_history=ctx.conversation_history
+                    conversation_history=ctx.conversation_history,
+                    packing=ctx.context_packing
                 )
             else:
                 prompt = self._prompt_builder.build_query_prompt(
                     question=effective_question,
                     chunks=chunks,
                     total_cvs=ctx.total_cvs_in_session,
-                    conversation_history=ctx.conversation_history
+                    conversation_history=ctx.conversation_history,
+                    packing=ctx.context_packing
                 )
             
             if ctx.query_understanding and ctx.query_understanding.requirements:
@@ -2532,9 +2926,12 @@ class RAGServiceV5:
                 )
                 prompt = prompt.replace("Respond now:", requirements_text + "\n\nRespond now:")
             
+            context_packing = dict(ctx.context_packing)
+            
             from app.prompts.templates import SYSTEM_PROMPT
             
             # Check if LLM supports streaming
+            generation_model = getattr(self._llm, "model", None)
             if hasattr(self._llm, 'generate_stream'):
                 logger.info(f"[GENERATION_STREAM] Using streaming generation with LLM: {type(self._llm).__name__}")
                 full_response = ""
@@ -2542,10 +2939,20 @@ class RAGServiceV5:
                 completion_tokens = 0
                 openrouter_cost = 0.0
                 
+                # Incremental orchestrator mode: structured sections as they complete
+                stream_parser = None
+                if settings.stream_structured_partials:
+                    from app.services.output_processor.orchestrator import get_orchestrator
+                    stream_parser = get_orchestrator().stream_parser()
+                
                 logger.info("[GENERATION_STREAM] Starting LLM call...")
-                async for chunk in self._llm.generate_stream(prompt, system_prompt=SYSTEM_PROMPT):
+                async for model, chunk in self._generate_stream_hedged(prompt, SYSTEM_PROMPT):
+                    generation_model = model
                     if chunk.get("token"):
                         yield {"event": "token", "data": {"token": chunk["token"]}}
+                        if stream_parser:
+                            for partial in stream_parser.feed(chunk["token"]):
+                                yield {"event": "structured_partial", "data": partial}
                     elif chunk.get("done"):
                         full_response = chunk["text"]
                         usage = chunk.get("usage", {})
@@ -2553,6 +2960,10 @@ class RAGServiceV5:
                         completion_tokens = usage.get("completion_tokens", 0)
                         openrouter_cost = chunk.get("openrouter_cost", 0.0)
                 
+                if stream_parser:
+                    for partial in stream_parser.finish():
+                        yield {"event": "structured_partial", "data": partial}
+                
                 ctx.generated_response = full_response
                 ctx.generation_tokens = {
                     "prompt": prompt_tokens,
@@ -2562,10 +2973,7 @@ class RAGServiceV5:
                 # Fallback to non-streaming
                 logger.info(f"[GENERATION_STREAM] Using non-streaming generation with LLM: {type(self._llm).__name__}")
                 logger.info("[GENERATION_STREAM] Starting LLM call (non-streaming)...")
-                result = await asyncio.wait_for(
-                    self._llm.generate(prompt, system_prompt=SYSTEM_PROMPT),
-                    timeout=self.config.llm_timeout
-                )
+                result, generation_model, _ = await self._generate_hedged(prompt, SYSTEM_PROMPT)
                 ctx.generated_response = result.text
                 ctx.generation_tokens = {
                     "prompt": result.prompt_tokens,
@@ -2590,7 +2998,9 @@ class RAGServiceV5:
                     "completion_tokens": completion_tokens,
                     "total_tokens": prompt_tokens + completion_tokens,
                     "openrouter_cost": openrouter_cost,
-                    "streaming": hasattr(self._llm, 'generate_stream')
+                    "streaming": hasattr(self._llm, 'generate_stream'),
+                    "context_packing": context_packing,
+                    **self._record_generation_model(ctx, generation_model)
                 }
             ))
             
@@ -2614,6 +3024,7 @@ class RAGServiceV5:
             ))
             raise GenerationError(f"Generation failed: {e}", cause=e)
     
+    @traced("refinement")
     async def _step_refinement(self, ctx: PipelineContextV5) -> None:
         """Step 10: Refine response if verification failed."""
         if not ctx.verification_result or not ctx.verification_result.needs_regeneration:
@@ -2643,7 +3054,7 @@ If you cannot verify a claim, do not include it.
 Original question: {ctx.question}
 
 Context:
-{self._format_context(ctx.effective_chunks)[:10000]}
+{self._format_context(ctx.effective_chunks, token_budget=REFINEMENT_CONTEXT_TOKENS)}
 
 Provide a corrected response:"""
             
@@ -2675,37 +3086,60 @@ Provide a corrected response:"""
     # HELPER METHODS
     # =========================================================================
     
-    def _format_context(self, chunks: list[dict[str, Any]]) -> str:
-        """Format chunks into context string with CV IDs for reference linking."""
-        parts = []
-        for i, chunk in enumerate(chunks):
-            content = chunk.get("content", "")
-            metadata = chunk.get("metadata", {})
-            cv_id = metadata.get("cv_id", f"cv_{i}")
-            filename = metadata.get("filename", "Unknown")
-            candidate = metadata.get("candidate_name", "")
-            role = metadata.get("role", "")
-            section = metadata.get("section_type", "")
-            
-            # Parse candidate name from filename if not in metadata
-            if not candidate and filename:
-                candidate = self._extract_name_from_filename(filename)
-            
-            # Format header with candidate name prominently
-            header = f"=== CANDIDATE: {candidate} ==="
-            header += f"\nCV_ID: {cv_id}"
-            if role:
-                header += f" | Role: {role}"
-            header += f" | File: {filename}"
-            if section:
-                header += f" | Section: {section}"
-            
-            # Clear instruction for LLM
-            reference_hint = f"➡️ Reference this candidate as: **[{candidate}](cv:{cv_id})**"
-            
-            parts.append(f"{header}\n{reference_hint}\n\n{content}")
+    def _format_context(
+        self,
+        chunks: list[dict[str, Any]],
+        token_budget: int | None = None
+    ) -> str:
+        """
+        Format chunks into context string with CV IDs for reference linking.
         
-        return "\n\n" + "="*50 + "\n\n".join(parts)
+        When a token budget is given, chunks are packed (deduplicated, ranked,
+        per-candidate quotas) so the context fits without blind truncation.
+        """
+        from app.prompts.context_packer import pack_chunks
+        from app.utils.text_utils import estimate_tokens
+        
+        prefix = "\n\n" + "=" * 50
+        packed = pack_chunks(
+            chunks,
+            token_budget=token_budget - estimate_tokens(prefix) if token_budget is not None else None,
+            render=lambda chunk, _: self._render_context_chunk(chunk),
+            separator="\n\n"
+        )
+        if token_budget is not None:
+            logger.info(f"[CONTEXT_PACKER] {packed.stats()}")
+        
+        parts = [self._render_context_chunk(p.chunk) for p in packed.chunks]
+        return prefix + "\n\n".join(parts)
+    
+    def _render_context_chunk(self, chunk: dict[str, Any]) -> str:
+        """Render a single chunk with candidate header and reference hint."""
+        content = chunk.get("content", "")
+        metadata = chunk.get("metadata", {})
+        cv_id = metadata.get("cv_id", "cv_unknown")
+        filename = metadata.get("filename", "Unknown")
+        candidate = metadata.get("candidate_name", "")
+        role = metadata.get("role", "")
+        section = metadata.get("section_type", "")
+        
+        # Parse candidate name from filename if not in metadata
+        if not candidate and filename:
+            candidate = self._extract_name_from_filename(filename)
+        
+        # Format header with candidate name prominently
+        header = f"=== CANDIDATE: {candidate} ==="
+        header += f"\nCV_ID: {cv_id}"
+        if role:
+            header += f" | Role: {role}"
+        header += f" | File: {filename}"
+        if section:
+            header += f" | Section: {section}"
+        
+        # Clear instruction for LLM
+        reference_hint = f"➡️ Reference this candidate as: **[{candidate}](cv:{cv_id})**"
+        
+        return f"{header}\n{reference_hint}\n\n{content}"
     
     def _extract_name_from_filename(self, filename: str) -> str:
         """Extract candidate name from filename format: ID_Name_Parts_Role.pdf"""
@@ -2841,6 +3275,7 @@ Provide a corrected response:"""
         # Pass conversation_history for context-aware processing
         # Pass resolved_cv_id for context-resolved candidates (#1 candidate, top candidate, etc.)
         resolved_cv_id = ctx.resolved_cv_id if hasattr(ctx, 'resolved_cv_id') else None
+        processing_start = time.perf_counter()
         structured_output, formatted_answer = orchestrator.process(
             raw_llm_output=ctx.generated_response or "",
             chunks=ctx.effective_chunks,
@@ -2850,6 +3285,7 @@ Provide a corrected response:"""
             cv_id=resolved_cv_id,
             conversation_history=ctx.conversation_history
         )
+        processing_ms = (time.perf_counter() - processing_start) * 1000
         
         # NOTE: Risk Assessment is now generated by LLM template (templates.py)
         # and parsed by frontend (singleCandidateParser.js)
@@ -2868,23 +3304,10 @@ Provide a corrected response:"""
         )
         
         # Build pipeline steps from metrics for UI
-        pipeline_steps = self._build_pipeline_steps(ctx)
+        pipeline_steps = self._build_pipeline_steps(ctx, structured_output, processing_ms)
         
-        # V7: RAGAS Evaluation (async, non-blocking - logs to eval_logs/)
-        if self._v7_services and self._v7_services.evaluator:
-            try:
-                context_texts = [c.get("content", "") for c in ctx.effective_chunks]
-                # Fire and forget - don't block response
-                asyncio.create_task(self._run_ragas_evaluation(
-                    query=ctx.question,
-                    response=formatted_answer,
-                    context_chunks=context_texts,
-                    session_id=ctx.session_id,
-                    query_type=query_type
-                ))
-                logger.info("[RAGAS v7] Evaluation task started (async)")
-            except Exception as e:
-                logger.warning(f"[RAGAS v7] Failed to start evaluation: {e}")
+        # Query log + sampled RAGAS evaluation run in the background worker
+        self._submit_evaluation(ctx, formatted_answer, confidence, query_type)
         
         return RAGResponseV5(
             answer=formatted_answer,
@@ -2900,37 +3323,17 @@ Provide a corrected response:"""
             pipeline_steps=pipeline_steps,
             mode=self.config.mode.value,
             cached=ctx.response_cached,
-            request_id=ctx.request_id
+            request_id=ctx.request_id,
+            generation_model=ctx.generation_model,
+            used_fallback_model=ctx.used_fallback_model
         )
     
-    async def _run_ragas_evaluation(
+    def _build_pipeline_steps(
         self,
-        query: str,
-        response: str,
-        context_chunks: List[str],
-        session_id: Optional[str],
-        query_type: Optional[str]
-    ) -> None:
-        """Run RAGAS evaluation asynchronously (non-blocking)."""
-        try:
-            if self._v7_services and self._v7_services.evaluator:
-                metrics = await self._v7_services.evaluate(
-                    query=query,
-                    response=response,
-                    context_chunks=context_chunks,
-                    session_id=session_id,
-                    query_type=query_type
-                )
-                logger.info(
-                    f"[RAGAS v7] Evaluation complete: "
-                    f"faithfulness={metrics.faithfulness:.2%}, "
-                    f"answer_rel={metrics.answer_relevancy:.2%}, "
-                    f"overall={metrics.overall_score:.2%}"
-                )
-        except Exception as e:
-            logger.warning(f"[RAGAS v7] Evaluation failed: {e}")
-    
-    def _build_pipeline_steps(self, ctx: PipelineContextV5) -> list[PipelineStep]:
+        ctx: PipelineContextV5,
+        structured_output: Any = None,
+        processing_ms: float = 0
+    ) -> list[PipelineStep]:
         """Build pipeline steps from metrics for UI display."""
         logger.info("[BUILD_STEPS] Starting to build pipeline steps")
         steps = []
@@ -2949,6 +3352,15 @@ Provide a corrected response:"""
             ))
             logger.info("[BUILD_STEPS] Added query_understanding step")
             
+            # Step 1b: Pipeline profile chosen for the query type
+            skipped = ctx.profile.skipped_stages(self.config)
+            steps.append(PipelineStep(
+                name="pipeline_profile",
+                status="completed",
+                details=f"Profile: {ctx.profile.name}"
+                + (f" (skipped {', '.join(skipped)})" if skipped else "")
+            ))
+            
             # Step 2: Retrieval
             ret_stage = ctx.metrics.get_stage(PipelineStage.SEARCH)
             ret_details = f"Found {len(ctx.effective_chunks)} relevant chunks"
@@ -2980,6 +3392,18 @@ Provide a corrected response:"""
             ))
             logger.info("[BUILD_STEPS] Added generation step")
             
+            # Step 5: Output processing (structure assembly, per-module timings)
+            module_timings = getattr(structured_output, "module_timings", None) or {}
+            if structured_output is not None:
+                slowest = sorted(module_timings.items(), key=lambda item: item[1], reverse=True)
+                steps.append(PipelineStep(
+                    name="output_processing",
+                    status="completed",
+                    duration_ms=processing_ms,
+                    details=", ".join(f"{name} {ms:.1f}ms" for name, ms in slowest)
+                    or f"Structure: {structured_output.structure_type or 'standard'}"
+                ))
+            
             logger.info(f"[BUILD_STEPS] Successfully built {len(steps)} steps")
             return steps
         except Exception as e:
@@ -3312,26 +3736,49 @@ Provide a corrected response:"""
             request_id=ctx.request_id
         )
     
-    def _log_query(self, ctx: PipelineContextV5) -> None:
-        """Log query for evaluation."""
-        if not self._eval_service:
+    def _submit_evaluation(
+        self,
+        ctx: PipelineContextV5,
+        answer: str,
+        confidence: float,
+        query_type: Optional[str]
+    ) -> None:
+        """Queue query logging and (sampled) RAGAS evaluation for the background worker."""
+        evaluate = self._v7_services.evaluate if self._v7_services and self._v7_services.evaluator else None
+        if not self._eval_service and not evaluate:
             return
         
         try:
-            self._eval_service.log_query(
+            from app.services.eval_service import EvalService
+            from app.services.eval_worker import EvalJob, get_eval_worker
+            
+            verification = ctx.verification_result
+            record = EvalService.build_record(
                 query=ctx.question,
-                response=ctx.generated_response or "",
+                response=answer or "",
                 sources=[
                     {"cv_id": c.get("metadata", {}).get("cv_id")}
                     for c in ctx.effective_chunks
                 ],
                 metrics=ctx.metrics.to_dict(),
+                hallucination_check={
+                    "is_valid": verification.is_grounded if verification else True,
+                    "confidence_score": confidence,
+                    "warnings": verification.warnings if verification else [],
+                },
                 guardrail_passed=ctx.guardrail_passed,
                 session_id=ctx.session_id,
                 mode=self.config.mode.value
             )
+            get_eval_worker().submit(EvalJob(
+                record=record,
+                eval_service=self._eval_service,
+                evaluate=evaluate,
+                context_chunks=[c.get("content", "") for c in ctx.effective_chunks],
+                query_type=query_type
+            ))
         except Exception as e:
-            logger.warning(f"Failed to log query: {e}")
+            logger.warning(f"[EVAL] Failed to queue evaluation: {e}")
     
     async def get_stats(self) -> dict[str, Any]:
         """Get service statistics."""
@@ -3371,31 +3818,34 @@ Provide a corrected response:"""
         """Access to vector store for backward compatibility."""
         return self._vector_store
     
-    async def index_documents(self, chunks: List[Dict[str, Any]]) -> None:
+    async def index_documents(
+        self,
+        chunks: List[Dict[str, Any]],
+        reuse_embeddings: bool = True
+    ) -> IndexingResult:
         """
         Index documents into the vector store.
         
-        This method provides backward compatibility with older code.
+        This method provides backward compatibility with older code. Chunk
+        texts already stored (re-chunked or re-uploaded CVs) reuse their
+        embeddings; only new or changed texts are embedded.
         
         Args:
             chunks: List of chunk dictionaries with 'content' and 'metadata'
+            reuse_embeddings: False re-embeds every chunk (e.g. after an embedding model change)
         """
         if not self._providers_initialized:
             raise RAGError("Providers not initialized")
         
-        # Extract texts for embedding
-        texts = [chunk.get("content", "") for chunk in chunks]
-        
-        if not texts:
-            return
+        result = await index_chunks(chunks, self._vector_store, self._embedder, reuse_embeddings)
+        if not chunks:
+            return result
         
-        # Generate embeddings
-        result = await self._embedder.embed_texts(texts)
+        # Per-candidate profiles, read by cv_id by output modules and prompt builders
+        await traced_to_thread(get_profile_store().index_cv_chunks, chunks)
         
-        # Add to vector store
-        await self._vector_store.add_documents(chunks, result.embeddings)
-        
-        logger.info(f"Indexed {len(chunks)} chunks")
+        logger.info(f"Indexed {len(chunks)} chunks ({result.reused} embeddings skipped)")
+        return result
 
 
 # =============================================================================
@@ -8,14 +8,18 @@ import logging
 from dataclasses import dataclass, field
 from typing import List, Optional
 
-import httpx
-
 from app.config import settings, timeouts
 from app.providers.cloud.llm import calculate_openrouter_cost
 from app.utils.text_utils import smart_truncate
+from app.utils.upstream_limiter import upstream_async_client
 
 logger = logging.getLogger(__name__)
 
+# Context budgets (tokens). Callers pack context to these budgets upfront
+# (see app.prompts.context_packer); truncation here is only a safety net.
+REASONING_CONTEXT_TOKENS = 6000
+REFLECTION_CONTEXT_TOKENS = 2500
+
 
 @dataclass
 class ReasoningStep:
@@ -345,17 +349,22 @@ class ReasoningService:
         self.model = model
         self.reflection_enabled = reflection_enabled
         self.api_key = api_key or settings.openrouter_api_key or ""
+        self.context_token_budget = REASONING_CONTEXT_TOKENS
         logger.info(f"ReasoningService initialized with model: {self.model}")
     
     async def reason(
         self,
         question: str,
         context: str,
-        total_cvs: int = 0
+        total_cvs: int = 0,
+        reflect: Optional[bool] = None
     ) -> ReasoningResult:
         """
         Apply structured reasoning to question with context.
         
+        Args:
+            reflect: Run the reflection pass (None = service default)
+        
         Returns:
             LLMResult with reasoning trace and final answer including OpenRouter metadata
         """
@@ -375,7 +384,9 @@ class ReasoningService:
             
             # Step 2: Reflection (if enabled)
             final_answer = draft_answer
-            if self.reflection_enabled and draft_answer:
+            if reflect is None:
+                reflect = self.reflection_enabled
+            if reflect and draft_answer:
                 final_answer = await self._reflect_and_refine(
                     question, draft_answer, context
                 )
@@ -407,7 +418,7 @@ class ReasoningService:
         """Execute self-ask reasoning process."""
         truncated_context = smart_truncate(
             context,
-            max_chars=25000,
+            max_chars=self.context_token_budget * 4,
             preserve="both"
         )
         prompt = SELF_ASK_PROMPT.format(
@@ -417,7 +428,7 @@ class ReasoningService:
         )
         from app.providers.base import get_openrouter_url
         
-        async with httpx.AsyncClient(timeout=timeouts.HTTP_LONG) as client:
+        async with upstream_async_client(timeout=timeouts.HTTP_LONG) as client:
             response = await client.post(
                 get_openrouter_url("chat/completions"),
                 headers={
@@ -499,7 +510,7 @@ class ReasoningService:
         """Reflect on draft and refine if needed."""
         truncated_context = smart_truncate(
             context,
-            max_chars=10000,
+            max_chars=REFLECTION_CONTEXT_TOKENS * 4,
             preserve="end"
         )
         prompt = REFLECTION_PROMPT.format(
@@ -509,7 +520,7 @@ class ReasoningService:
         )
         from app.providers.base import get_openrouter_url
         
-        async with httpx.AsyncClient(timeout=timeouts.HTTP_LONG) as client:
+        async with upstream_async_client(timeout=timeouts.HTTP_LONG) as client:
             response = await client.post(
                 get_openrouter_url("chat/completions"),
                 headers={
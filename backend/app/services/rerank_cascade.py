@@ -0,0 +1,181 @@
+"""
+Rerank Cascade - send only the uncertain chunks to the expensive reranker.
+
+Retrieval can return up to ctx.k chunks (50 for rankings) and all of them
+used to go to the reranker, where the LLM path squeezed each into 300 chars
+of one prompt. The cascade scores every chunk with a cheap first stage:
+
+- fused retrieval rank (RRF order from fusion retrieval)
+- BM25 of the chunk text for the query, over the retrieved set
+- metadata match: query terms found in skills, roles, certifications, ...
+
+Chunks scoring at or above `accept` are clearly relevant and stay on top;
+chunks below `reject` are clearly not and go to the bottom. Only the middle
+band (capped at `max_ambiguous`) goes to the expensive reranker, split into
+mini-batches scored in parallel and merged by score. Nothing is dropped.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.local_reranker import LexicalSemanticBackend
+from app.services.reranking_service import _get_attr
+
+logger = logging.getLogger(__name__)
+
+# First-stage weights: retrieval rank, BM25, metadata match
+RANK_WEIGHT = 0.4
+BM25_WEIGHT = 0.4
+METADATA_WEIGHT = 0.2
+METADATA_FIELDS = (
+    "candidate_name", "skills", "certifications", "current_role", "job_title",
+    "role", "seniority_level", "languages", "location", "education_level",
+)
+
+# Expensive stage: (query, batch) -> (rerank result, method)
+ExpensiveReranker = Callable[[str, List[Any]], Awaitable[Tuple[Any, str]]]
+
+
+@dataclass
+class CascadeResult:
+    """Outcome of one cascaded rerank."""
+    reranked: List[Any]
+    accepted: int
+    rejected: int
+    sent: int  # Chunks scored by the expensive reranker
+    batches: int
+    method: str
+    batch_metadata: List[Dict[str, Any]] = field(default_factory=list)  # Expensive results' metadata (usage/cost)
+    latency_ms: float = 0.0
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {
+            "cascade_accepted": self.accepted,
+            "cascade_rejected": self.rejected,
+            "chunks_reranked": self.sent,
+            "cascade_batches": self.batches,
+        }
+
+
+class RerankCascade:
+    """Cheap first-stage scoring with the expensive reranker on the ambiguous band."""
+
+    def __init__(
+        self,
+        accept: float = 0.8,
+        reject: float = 0.25,
+        min_chunks: int = 10,
+        max_ambiguous: int = 30,
+        batch_size: int = 10
+    ):
+        self.accept = accept
+        self.reject = reject
+        self.min_chunks = min_chunks
+        self.max_ambiguous = max_ambiguous
+        self.batch_size = max(1, batch_size)
+        self._lexical = LexicalSemanticBackend()
+
+    def first_stage_scores(self, query: str, chunks: List[Any], terms: Optional[List[str]] = None) -> List[float]:
+        """0-1 relevance of each chunk from retrieval rank, BM25 and metadata match."""
+        n = len(chunks)
+        if not n:
+            return []
+        rank = 1.0 - np.arange(n) / max(1, n - 1)  # Chunks arrive in fused RRF order
+
+        bm25 = self._lexical.bm25(query, [_get_attr(c, "content", "") or "" for c in chunks])
+
+        query_terms = set(self._lexical._tokenize(" ".join([query, *(terms or [])])))
+        metadata = np.zeros(n)
+        if query_terms:
+            for i, chunk in enumerate(chunks):
+                meta = _get_attr(chunk, "metadata", {}) or {}
+                text = " ".join(str(meta.get(name, "")) for name in METADATA_FIELDS if meta.get(name))
+                metadata[i] = len(query_terms & set(self._lexical._tokenize(text))) / len(query_terms)
+            if metadata.max() > 0:
+                metadata = metadata / metadata.max()
+
+        return (RANK_WEIGHT * rank + BM25_WEIGHT * bm25 + METADATA_WEIGHT * metadata).tolist()
+
+    def split(self, scores: List[float]) -> Tuple[List[int], List[int], List[int]]:
+        """Indices of (accepted, ambiguous, rejected) chunks, each by descending first-stage score."""
+        order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        if len(scores) <= self.min_chunks:
+            return [], order, []
+        accepted = [i for i in order if scores[i] >= self.accept]
+        ambiguous = [i for i in order if self.reject <= scores[i] < self.accept]
+        rejected = [i for i in order if scores[i] < self.reject]
+        # Past the cap, the weakest ambiguous chunks are treated as rejected
+        rejected = ambiguous[self.max_ambiguous:] + rejected
+        return accepted, ambiguous[:self.max_ambiguous], rejected
+
+    async def rerank(
+        self,
+        query: str,
+        chunks: List[Any],
+        expensive: ExpensiveReranker,
+        terms: Optional[List[str]] = None
+    ) -> CascadeResult:
+        """Rerank chunks, calling `expensive` only on the ambiguous band (in parallel batches)."""
+        start = time.perf_counter()
+        scores = self.first_stage_scores(query, chunks, terms)
+        accepted, ambiguous, rejected = self.split(scores)
+
+        batches = [ambiguous[i:i + self.batch_size] for i in range(0, len(ambiguous), self.batch_size)]
+        outcomes = await asyncio.gather(*(expensive(query, [chunks[i] for i in batch]) for batch in batches))
+
+        # Merge batches by expensive-stage score; a batch without scores keeps its
+        # order and first-stage scores (e.g. reranker fell back to original order)
+        merged: List[Tuple[float, Any]] = []
+        methods = []
+        for batch, (result, method) in zip(batches, outcomes, strict=True):
+            methods.append(method)
+            result_scores = getattr(result, "result_scores", None) or []
+            if len(result_scores) == len(result.reranked_results):
+                merged.extend(zip(result_scores, result.reranked_results, strict=True))
+            else:
+                merged.extend((scores[i], chunks[i]) for i in batch)
+        merged.sort(key=lambda item: item[0], reverse=True)
+
+        reranked = [chunks[i] for i in accepted] + [chunk for _, chunk in merged] + [chunks[i] for i in rejected]
+        result = CascadeResult(
+            reranked=reranked,
+            accepted=len(accepted),
+            rejected=len(rejected),
+            sent=len(ambiguous),
+            batches=len(batches),
+            method=methods[0] if methods else "first_stage",
+            batch_metadata=[getattr(r, "metadata", None) or {} for r, _ in outcomes],
+            latency_ms=(time.perf_counter() - start) * 1000
+        )
+        logger.info(
+            f"[RERANK_CASCADE] {len(chunks)} chunks: accepted={result.accepted} "
+            f"reranked={result.sent} in {result.batches} batches rejected={result.rejected} "
+            f"({result.latency_ms:.1f}ms, {result.method})"
+        )
+        return result
+
+
+# Singleton instance
+_rerank_cascade: Optional[RerankCascade] = None
+
+
+def get_rerank_cascade() -> Optional[RerankCascade]:
+    """Cascade configured from settings (None = rerank every chunk)."""
+    global _rerank_cascade
+    if not settings.rerank_cascade_enabled:
+        return None
+    if _rerank_cascade is None:
+        _rerank_cascade = RerankCascade(
+            accept=settings.rerank_cascade_accept,
+            reject=settings.rerank_cascade_reject,
+            min_chunks=settings.rerank_cascade_min_chunks,
+            max_ambiguous=settings.rerank_cascade_max_ambiguous,
+            batch_size=settings.rerank_cascade_batch_size
+        )
+    return _rerank_cascade
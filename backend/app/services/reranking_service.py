@@ -9,11 +9,11 @@ import logging
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.config import settings, timeouts
 from app.providers.base import SearchResult
 from app.providers.cloud.llm import calculate_openrouter_cost
+from app.services.fallback_chain_service import get_fallback_service
+from app.utils.upstream_limiter import upstream_async_client
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +21,7 @@ logger = logging.getLogger(__name__)
 DEFAULT_RELEVANCE_SCORE = 5.0  # Neutral score when parsing fails
 LLM_SCORE_WEIGHT = 0.7  # Weight for LLM relevance score in combined scoring
 SIMILARITY_WEIGHT = 0.3  # Weight for original similarity score
+PROMPT_CHUNK_CHARS = 9000  # Chunk text per scoring prompt, split across the chunks (300-1200 each)
 
 
 def _get_attr(obj, key, default=None):
@@ -48,6 +49,7 @@ class RerankResult:
     model_used: str
     enabled: bool = True
     metadata: Dict[str, Any] = field(default_factory=dict)  # OpenRouter usage metadata
+    result_scores: List[float] = field(default_factory=list)  # Score of each reranked result (same order)
 
 
 RERANKING_PROMPT = """You are a relevance scoring assistant for a CV screening system.
@@ -142,27 +144,21 @@ class RerankingService:
         
         try:
             # Format chunks for scoring
-            chunks_text = self._format_chunks(results)
+            chunks_text = self._format_chunks(results, max_chars=min(1200, max(300, PROMPT_CHUNK_CHARS // len(results))))
             prompt = RERANKING_PROMPT.format(query=query, chunks=chunks_text)
             
-            # Use context manager to ensure client is closed after request
-            from app.providers.base import get_openrouter_url
-            async with httpx.AsyncClient(timeout=timeouts.HTTP_MEDIUM) as client:
-                response = await client.post(
-                    get_openrouter_url("chat/completions"),
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.0,
-                        "max_tokens": 200
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
+            # Hedged: a backup reranking model races a primary slower than its p95
+            outcome = await get_fallback_service().execute_hedged(
+                "reranking",
+                lambda model: self._call_model(prompt, model),
+                primary_model=self.model,
+                timeout=timeouts.HTTP_MEDIUM
+            )
+            if not outcome.success:
+                message = outcome.errors[-1]["message"] if outcome.errors else "no model available"
+                raise RuntimeError(f"all reranking models failed: {message}")
+            model_used = outcome.model_used
+            data = outcome.result
             
             content = data["choices"][0]["message"]["content"].strip()
             
@@ -177,7 +173,7 @@ class RerankingService:
                 metadata["total_tokens"] = prompt_tokens + completion_tokens
                 # Calculate cost from tokens and model pricing
                 metadata["openrouter_cost"] = calculate_openrouter_cost(
-                    self.model, prompt_tokens, completion_tokens
+                    model_used, prompt_tokens, completion_tokens
                 )
                 logger.info(f"[RERANKING] OpenRouter usage: {metadata['total_tokens']} tokens, ${metadata['openrouter_cost']:.6f}")
             
@@ -202,8 +198,10 @@ class RerankingService:
             
             # Extract reranked results (all of them, optionally limited by top_k)
             reranked = [r[0] for r in scored_results]
+            result_scores = [r[1] for r in scored_results]
             if top_k is not None:
                 reranked = reranked[:top_k]
+                result_scores = result_scores[:top_k]
             
             latency = (time.perf_counter() - start_time) * 1000
             
@@ -214,9 +212,10 @@ class RerankingService:
                 reranked_results=reranked,
                 scores=score_dict,
                 latency_ms=latency,
-                model_used=self.model,
+                model_used=model_used,
                 enabled=True,
-                metadata=metadata
+                metadata={**metadata, "hedged": outcome.hedged},
+                result_scores=result_scores
             )
             
         except Exception as e:
@@ -232,6 +231,26 @@ class RerankingService:
                 enabled=True
             )
     
+    async def _call_model(self, prompt: str, model: str) -> Dict[str, Any]:
+        """Single scoring call to one model (raises on HTTP errors)."""
+        from app.providers.base import get_openrouter_url
+        async with upstream_async_client(timeout=timeouts.HTTP_MEDIUM) as client:
+            response = await client.post(
+                get_openrouter_url("chat/completions"),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.0,
+                    "max_tokens": 200
+                }
+            )
+            response.raise_for_status()
+            return response.json()
+    
     def _format_chunks(self, results: List[SearchResult], max_chars: int = 300) -> str:
         """Format chunks for the scoring prompt."""
         lines = []
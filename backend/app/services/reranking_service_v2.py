@@ -34,6 +34,7 @@ class CrossEncoderRerankResult:
     method: str  # "cross_encoder" | "llm_fallback" | "disabled"
     enabled: bool = True
     metadata: Dict[str, Any] = field(default_factory=dict)
+    result_scores: List[float] = field(default_factory=list)  # Score of each reranked result (same order)
 
 
 class CrossEncoderRerankingService:
@@ -130,7 +131,8 @@ class CrossEncoderRerankingService:
                     model_used=llm_result.model_used,
                     method="llm_fallback",
                     enabled=True,
-                    metadata=llm_result.metadata
+                    metadata=llm_result.metadata,
+                    result_scores=llm_result.result_scores
                 )
             except Exception as e:
                 logger.error(f"LLM fallback reranking also failed: {e}")
@@ -155,37 +157,50 @@ class CrossEncoderRerankingService:
         top_k: Optional[int],
         start_time: float
     ) -> CrossEncoderRerankResult:
-        """Perform reranking using cross-encoder model."""
+        """Perform reranking using cross-encoder model (only uncached chunks are sent)."""
+        from app.services.local_reranker import chunk_key, get_rerank_score_cache
+        
+        cache = get_rerank_score_cache()
+        keys = [chunk_key(result) for result in results]
+        cached = cache.get_many(self.model, query, keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
         
         # Extract document contents
         documents = []
-        for result in results:
-            content = _get_attr(result, 'content', '')
+        for i in missing:
+            content = _get_attr(results[i], 'content', '')
             # Truncate to reasonable length for cross-encoder
             if len(content) > 512:
                 content = content[:512] + "..."
             documents.append(content)
         
         # Call HuggingFace cross-encoder
-        ranked = await self.hf_client.rerank(query, documents)
+        fresh = {}
+        if documents:
+            ranked = await self.hf_client.rerank(query, documents)
+            fresh = {keys[missing[item["index"]]]: item["score"] for item in ranked if item["index"] < len(missing)}
+            cache.put_many(self.model, query, fresh)
+        scores = {**cached, **fresh}
         
-        # Build reranked results
+        # Build reranked results (chunks without a score keep their place at the end)
+        order = sorted(range(len(results)), key=lambda i: scores.get(keys[i], float("-inf")), reverse=True)
         reranked_results = []
         score_dict = {}
         
-        for item in ranked:
-            idx = item["index"]
-            if idx < len(results):
-                result = results[idx]
-                reranked_results.append(result)
-                
-                cv_id = _get_attr(result, 'cv_id')
-                if cv_id:
-                    score_dict[cv_id] = item["score"]
+        for idx in order:
+            result = results[idx]
+            reranked_results.append(result)
+            
+            cv_id = _get_attr(result, 'cv_id')
+            if cv_id and keys[idx] in scores:
+                score_dict[cv_id] = scores[keys[idx]]
+        
+        result_scores = [scores.get(keys[idx], 0.0) for idx in order]
         
         # Apply top_k limit if specified
         if top_k is not None:
             reranked_results = reranked_results[:top_k]
+            result_scores = result_scores[:top_k]
         
         latency_ms = (time.perf_counter() - start_time) * 1000
         
@@ -204,8 +219,10 @@ class CrossEncoderRerankingService:
             enabled=True,
             metadata={
                 "documents_reranked": len(results),
+                "cache_hits": len(cached),
                 "top_k_applied": top_k is not None
-            }
+            },
+            result_scores=result_scores
         )
     
     def to_legacy_result(self, result: CrossEncoderRerankResult) -> RerankResult:
@@ -217,7 +234,8 @@ class CrossEncoderRerankingService:
             latency_ms=result.latency_ms,
             model_used=result.model_used,
             enabled=result.enabled,
-            metadata=result.metadata
+            metadata=result.metadata,
+            result_scores=result.result_scores
         )
 
 
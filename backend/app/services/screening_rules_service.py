@@ -10,7 +10,11 @@ import re
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.candidate_feature_table import CandidateFeatureTable
 
 logger = logging.getLogger(__name__)
 
@@ -139,11 +143,226 @@ class RuleSet:
         }
 
 
+# ============================================================================
+# COMPILED RULE SETS
+# ============================================================================
+# Rules are compiled once into predicates over a CandidateFeatureTable, so a
+# whole session is screened in one pass. Semantics mirror _apply_operator.
+
+Predicate = Callable[[CandidateFeatureTable], np.ndarray]
+
+_LIST_FIELDS = {RuleField.SKILLS, RuleField.LANGUAGES, RuleField.CERTIFICATIONS}
+_TEXT_FIELDS = {
+    RuleField.EDUCATION, RuleField.EDUCATION_LEVEL, RuleField.CURRENT_ROLE,
+    RuleField.LOCATION, RuleField.FILENAME,
+}
+
+
+def _rule_list(value: Any) -> List[str]:
+    return [str(v).lower() for v in value] if isinstance(value, list) else [str(value).lower()]
+
+
+def _constant(matched: bool) -> Predicate:
+    return lambda table: np.full(len(table), matched, dtype=bool)
+
+
+def _compile_list_rule(rule: ScreeningRule) -> Predicate:
+    name = rule.field.value
+    op = rule.operator
+    if op in (RuleOperator.EXISTS, RuleOperator.NOT_EXISTS):
+        # A list value is never None/"" in the per-candidate path
+        return _constant(op == RuleOperator.EXISTS)
+    if op in (RuleOperator.CONTAINS, RuleOperator.NOT_CONTAINS):
+        needle = str(rule.value).lower()
+        negate = op == RuleOperator.NOT_CONTAINS
+        return lambda table: table.lists[name].any(lambda v: needle in v) ^ negate
+    if op in (RuleOperator.IN_LIST, RuleOperator.NOT_IN_LIST):
+        wanted = set(_rule_list(rule.value))
+        negate = op == RuleOperator.NOT_IN_LIST
+        return lambda table: table.lists[name].any(lambda v: v in wanted) ^ negate
+    return _constant(False)
+
+
+def _compile_text_rule(rule: ScreeningRule) -> Predicate:
+    op = rule.operator
+    needle = str(rule.value).lower()
+
+    if rule.field == RuleField.FULL_TEXT:
+        def column(table):
+            return [text.lower() for text in table.full_text]
+    else:
+        name = rule.field.value
+
+        def column(table):
+            return table.text[name]
+
+    if op == RuleOperator.EXISTS:
+        return lambda table: np.array([v != "" for v in column(table)], dtype=bool)
+    if op == RuleOperator.NOT_EXISTS:
+        return lambda table: np.array([v == "" for v in column(table)], dtype=bool)
+    if op == RuleOperator.REGEX:
+        try:
+            pattern = re.compile(str(rule.value), re.IGNORECASE)
+        except re.error:
+            logger.warning(f"[SCREENING] Invalid regex in rule '{rule.name}': {rule.value}")
+            return _constant(False)
+        return lambda table: np.array([bool(pattern.search(v)) for v in column(table)], dtype=bool)
+
+    if rule.field == RuleField.FULL_TEXT:
+        tests = {
+            RuleOperator.CONTAINS: lambda v: needle in v,
+            RuleOperator.NOT_CONTAINS: lambda v: needle not in v,
+            RuleOperator.EQUALS: lambda v: v == needle,
+            RuleOperator.NOT_EQUALS: lambda v: v != needle,
+        }
+        test = tests.get(op)
+        if test is None:
+            return _constant(False)
+        return lambda table: np.array([test(v) for v in column(table)], dtype=bool)
+
+    if op == RuleOperator.CONTAINS:
+        return lambda table: table.text_contains(name, needle)
+    if op == RuleOperator.NOT_CONTAINS:
+        return lambda table: ~table.text_contains(name, needle)
+    if op == RuleOperator.EQUALS:
+        return lambda table: table.text[name] == needle
+    if op == RuleOperator.NOT_EQUALS:
+        return lambda table: table.text[name] != needle
+    return _constant(False)
+
+
+def _compile_numeric_rule(rule: ScreeningRule) -> Predicate:
+    op = rule.operator
+    if op in (RuleOperator.EXISTS, RuleOperator.NOT_EXISTS):
+        return _constant(op == RuleOperator.EXISTS)
+    try:
+        threshold = float(rule.value)
+    except (TypeError, ValueError):
+        return _constant(False)
+    compare = {
+        RuleOperator.EQUALS: np.equal,
+        RuleOperator.NOT_EQUALS: np.not_equal,
+        RuleOperator.GREATER_THAN: np.greater,
+        RuleOperator.LESS_THAN: np.less,
+        RuleOperator.GREATER_OR_EQUAL: np.greater_equal,
+        RuleOperator.LESS_OR_EQUAL: np.less_equal,
+    }.get(op)
+    if compare is None:
+        return _constant(False)
+    return lambda table: compare(table.experience_years, threshold)
+
+
+def compile_rule(rule: ScreeningRule) -> Predicate:
+    """Compile a rule into a vectorized predicate over a feature table."""
+    if rule.field in _LIST_FIELDS:
+        return _compile_list_rule(rule)
+    if rule.field in _TEXT_FIELDS or rule.field == RuleField.FULL_TEXT:
+        return _compile_text_rule(rule)
+    if rule.field == RuleField.EXPERIENCE_YEARS:
+        return _compile_numeric_rule(rule)
+    return _constant(False)
+
+
+@dataclass
+class BatchScreeningResult:
+    """Screening outcome for every candidate of a feature table."""
+    cv_ids: List[str]
+    names: List[str]
+    passed: np.ndarray
+    score_modifier: np.ndarray
+    flags: List[List[str]]
+    exclusion_reason: List[Optional[str]]
+
+    def passed_cv_ids(self) -> List[str]:
+        return [cv_id for cv_id, ok in zip(self.cv_ids, self.passed, strict=True) if ok]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "candidate_id": self.cv_ids[i],
+                "candidate_name": self.names[i],
+                "passed": bool(self.passed[i]),
+                "score_modifier": float(self.score_modifier[i]),
+                "flags": self.flags[i],
+                "exclusion_reason": self.exclusion_reason[i],
+            }
+            for i in range(len(self.cv_ids))
+        ]
+
+
+@dataclass
+class CompiledRuleSet:
+    """A rule set's enabled rules in priority order with their predicates."""
+    rule_set_id: str
+    rules: List[ScreeningRule]
+    predicates: List[Predicate]
+    require_all: bool
+
+    @classmethod
+    def compile(cls, rule_set: RuleSet) -> "CompiledRuleSet":
+        # Stable priority order, as _compute_result sorts per candidate
+        rules = sorted(
+            (r for r in rule_set.rules if r.enabled),
+            key=lambda r: r.priority,
+            reverse=True
+        )
+        return cls(
+            rule_set_id=rule_set.id,
+            rules=rules,
+            predicates=[compile_rule(r) for r in rules],
+            require_all=rule_set.require_all
+        )
+
+    def evaluate(self, table: CandidateFeatureTable) -> BatchScreeningResult:
+        """Screen every candidate of the table in one pass per rule."""
+        n = len(table)
+        passed = np.ones(n, dtype=bool)
+        modifier = np.zeros(n)
+        flags: List[List[str]] = [[] for _ in range(n)]
+        reasons = np.full(n, None, dtype=object)
+        include_hits = []
+
+        for rule, predicate in zip(self.rules, self.predicates, strict=True):
+            matched = predicate(table)
+            if rule.action == RuleAction.EXCLUDE:
+                passed &= ~matched
+                reasons[matched] = f"Excluded by rule: {rule.name}"
+            elif rule.action == RuleAction.INCLUDE:
+                include_hits.append(matched)
+            elif rule.action == RuleAction.FLAG:
+                for i in np.flatnonzero(matched):
+                    flags[i].append(rule.name)
+            elif rule.action == RuleAction.BOOST:
+                modifier += matched * rule.score_modifier
+            elif rule.action == RuleAction.PENALIZE:
+                modifier -= matched * rule.score_modifier
+
+        if include_hits:
+            hits = np.vstack(include_hits)
+            if self.require_all:
+                failed = ~hits.all(axis=0)
+                reasons[failed] = "Did not match all required criteria"
+            else:
+                failed = ~hits.any(axis=0)
+                reasons[failed] = "Did not match any required criteria"
+            passed &= ~failed
+
+        return BatchScreeningResult(
+            cv_ids=list(table.cv_ids),
+            names=list(table.names),
+            passed=passed,
+            score_modifier=modifier,
+            flags=flags,
+            exclusion_reason=list(reasons)
+        )
+
+
 class ScreeningRulesService:
     """Service for managing and evaluating screening rules."""
     
     def __init__(self):
         self._rule_sets: Dict[str, RuleSet] = {}
+        self._compiled: Dict[str, CompiledRuleSet] = {}  # rule_set_id -> compiled
         self._session_rules: Dict[str, str] = {}  # session_id -> rule_set_id
     
     def create_rule_set(
@@ -170,6 +389,7 @@ class ScreeningRulesService:
         )
         
         self._rule_sets[rule_set_id] = rule_set
+        self._compiled[rule_set_id] = CompiledRuleSet.compile(rule_set)
         logger.info(f"[SCREENING] Created rule set '{name}' with {len(parsed_rules)} rules")
         
         return rule_set
@@ -183,6 +403,7 @@ class ScreeningRulesService:
         rule["id"] = rule.get("id", f"rule_{len(rule_set.rules)}")
         parsed_rule = ScreeningRule.from_dict(rule)
         rule_set.rules.append(parsed_rule)
+        self._compiled[rule_set_id] = CompiledRuleSet.compile(rule_set)
         
         logger.info(f"[SCREENING] Added rule '{parsed_rule.name}' to set {rule_set_id}")
         return parsed_rule
@@ -434,6 +655,47 @@ class ScreeningRulesService:
             exclusion_reason=exclusion_reason
         )
     
+    def get_session_rule_set_id(self, session_id: str) -> Optional[str]:
+        """Rule set assigned to a session, if any."""
+        return self._session_rules.get(session_id)
+    
+    def sessions_using(self, rule_set_id: str) -> List[str]:
+        """Sessions the rule set is assigned to."""
+        return [sid for sid, rid in self._session_rules.items() if rid == rule_set_id]
+    
+    def screen_table(
+        self,
+        table: CandidateFeatureTable,
+        rule_set_id: Optional[str] = None,
+        session_id: Optional[str] = None
+    ) -> Optional[BatchScreeningResult]:
+        """Screen every candidate of a feature table with a compiled rule set.
+        
+        Returns None when no rule set applies (everyone passes).
+        """
+        if not rule_set_id and session_id:
+            rule_set_id = self._session_rules.get(session_id)
+        compiled = self._compiled.get(rule_set_id) if rule_set_id else None
+        if compiled is None or not compiled.rules:
+            return None
+        return compiled.evaluate(table)
+    
+    def filter_cv_ids(
+        self,
+        session_id: str,
+        cv_ids: List[str],
+        table: CandidateFeatureTable
+    ) -> List[str]:
+        """Session CV ids that pass the session's rule set, in input order.
+        
+        CVs without features in `table` are kept: they can't be judged.
+        """
+        result = self.screen_table(table, session_id=session_id)
+        if result is None:
+            return cv_ids
+        excluded = {cv_id for cv_id, ok in zip(result.cv_ids, result.passed, strict=True) if not ok}
+        return [cv_id for cv_id in cv_ids if cv_id not in excluded]
+    
     def get_rule_set(self, rule_set_id: str) -> Optional[RuleSet]:
         """Get a rule set by ID."""
         return self._rule_sets.get(rule_set_id)
@@ -446,6 +708,7 @@ class ScreeningRulesService:
         """Delete a rule set."""
         if rule_set_id in self._rule_sets:
             del self._rule_sets[rule_set_id]
+            self._compiled.pop(rule_set_id, None)
             return True
         return False
 
@@ -0,0 +1,292 @@
+"""
+Session Corpus Cache - per-session working sets kept warm between chat turns.
+
+Every turn used to scan the whole global vector store, filtering each chunk
+by the session's cv_ids. A session's working set is loaded once, when the
+session is opened or first queried:
+
+- its cv_ids
+- the chunk rows of those CVs
+- their embeddings as one L2-normalized matrix (search = one matrix product)
+- a BM25 index over the whole session, not just the chunks vector search found
+- the candidate profiles of its CVs
+
+Upload, re-index and delete events invalidate the affected sessions (see the
+vector stores and session managers), so a warm session's chat turns take its
+CV list from the working set instead of reading the session store. Working sets are evicted least recently used once their
+estimated size exceeds settings.session_corpus_cache_mb.
+Query latency is recorded separately for warm and cold turns.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.providers.base import SearchResult
+from app.services.bm25_service import BM25Index, BM25Result, get_bm25_service
+from app.services.candidate_profile_service import CandidateProfile, get_profile_store
+from app.utils.tracing import traced_to_thread
+
+logger = logging.getLogger(__name__)
+
+# Rough per-chunk overhead (row dict, metadata, BM25 postings) on top of its text
+ROW_OVERHEAD_BYTES = 1024
+LATENCY_WINDOW = 500
+
+
+@dataclass
+class SessionCorpus:
+    """A session's CVs, chunks, embedding matrix, BM25 index and profiles."""
+    session_id: str
+    cv_ids: List[str]
+    chunks: List[Dict[str, Any]]  # id, cv_id, filename, content, chunk_index, metadata
+    embeddings: np.ndarray  # (chunks, dimensions) float32, L2-normalized rows
+    bm25: Optional[BM25Index] = None
+    profiles: Dict[str, CandidateProfile] = field(default_factory=dict)
+    load_ms: float = 0.0
+    nbytes: int = 0
+
+    def __post_init__(self):
+        self._cv_id_set = set(self.cv_ids)
+        self._row_cv_ids = np.array([c["cv_id"] for c in self.chunks], dtype=object)
+        self._rows_by_id = {c["id"]: i for i, c in enumerate(self.chunks)}
+        if not self.nbytes:
+            self.nbytes = self.embeddings.nbytes + sum(
+                len(c.get("content", "")) + ROW_OVERHEAD_BYTES for c in self.chunks
+            )
+
+    @property
+    def dimensions(self) -> int:
+        return self.embeddings.shape[1] if self.embeddings.ndim == 2 else 0
+
+    def covers(self, cv_ids: Iterable[str]) -> bool:
+        """True when every CV is in this working set."""
+        return self._cv_id_set.issuperset(cv_ids)
+
+    def chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        row = self._rows_by_id.get(chunk_id)
+        return self.chunks[row] if row is not None else None
+
+    def search(
+        self,
+        embedding: List[float],
+        k: int = 10,
+        threshold: float = 0.3,
+        cv_ids: Optional[List[str]] = None,
+        diversify_by_cv: bool = True
+    ) -> List[SearchResult]:
+        """Same results as SimpleVectorStore.search, scored with one matrix product."""
+        if not self.chunks:
+            return []
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        similarities = self.embeddings @ (query / norm)
+
+        mask = similarities >= threshold
+        if cv_ids is not None and not self._cv_id_set.issubset(cv_ids):
+            mask &= np.isin(self._row_cv_ids, list(cv_ids))
+        rows = np.flatnonzero(mask)
+        rows = rows[np.argsort(-similarities[rows], kind="stable")]
+
+        results = []
+        seen_cvs = set()
+        for row in rows:
+            chunk = self.chunks[row]
+            if diversify_by_cv:
+                if chunk["cv_id"] in seen_cvs:
+                    continue
+                seen_cvs.add(chunk["cv_id"])
+            results.append(SearchResult(
+                id=chunk["id"],
+                cv_id=chunk["cv_id"],
+                filename=chunk["filename"],
+                content=chunk["content"],
+                similarity=float(similarities[row]),
+                metadata=chunk.get("metadata", {})
+            ))
+            if len(results) >= k:
+                break
+        return results
+
+    def bm25_search(self, query: str, k: int = 10, cv_ids: Optional[List[str]] = None) -> List[BM25Result]:
+        """BM25 over the whole session (optionally only the given CVs)."""
+        if self.bm25 is None:
+            return []
+        wanted = set(cv_ids) if cv_ids is not None else None
+        results = get_bm25_service().search_index(self.bm25, query, k=len(self.bm25.doc_ids))
+        # Only chunks sharing a term with the query
+        results = [r for r in results if r.score > 0 and (wanted is None or r.metadata.get("cv_id") in wanted)]
+        return results[:k]
+
+
+def build_session_corpus(
+    session_id: str,
+    cv_ids: List[str],
+    chunks: List[Dict[str, Any]],
+    embeddings: List[List[float]]
+) -> Optional[SessionCorpus]:
+    """Working set from stored chunks and embeddings (None if embeddings don't stack)."""
+    start = time.perf_counter()
+    vectors = [np.asarray(e, dtype=np.float32).reshape(-1) for e in embeddings]
+    if len({v.shape[0] for v in vectors}) > 1:
+        logger.warning(f"[SESSION_CORPUS] Mixed embedding dimensions in session {session_id}, not caching")
+        return None
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    if matrix.size:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+    bm25_chunks = [{**c, "metadata": {**c.get("metadata", {}), "cv_id": c["cv_id"], "filename": c["filename"]}} for c in chunks]
+    return SessionCorpus(
+        session_id=session_id,
+        cv_ids=list(cv_ids),
+        chunks=chunks,
+        embeddings=matrix,
+        bm25=get_bm25_service().create_index(bm25_chunks) if bm25_chunks else None,
+        profiles=get_profile_store().get_many(cv_ids),
+        load_ms=(time.perf_counter() - start) * 1000
+    )
+
+
+class SessionCorpusCache:
+    """LRU of session working sets bounded by an estimated memory budget."""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._corpora: "OrderedDict[str, SessionCorpus]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._version = 0  # Bumped by every invalidation; stale loads are not stored
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._evictions = 0
+        self._latency = {"warm": deque(maxlen=LATENCY_WINDOW), "cold": deque(maxlen=LATENCY_WINDOW)}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self._corpora.values())
+
+    def get(self, session_id: str) -> Optional[SessionCorpus]:
+        """Warm working set of the session, if loaded."""
+        with self._lock:
+            corpus = self._corpora.get(session_id)
+            if corpus is None:
+                self._misses += 1
+                return None
+            self._corpora.move_to_end(session_id)
+            self._hits += 1
+            return corpus
+
+    def session_cv_ids(self, session_id: str) -> Optional[List[str]]:
+        """CV ids of a warm session (None if not loaded); doesn't count as a lookup."""
+        with self._lock:
+            corpus = self._corpora.get(session_id)
+            return list(corpus.cv_ids) if corpus is not None else None
+
+    async def load(self, session_id: str, cv_ids: List[str], vector_store: Any) -> Optional[SessionCorpus]:
+        """Load (or join the in-flight load of) a session's working set from the vector store."""
+        if not hasattr(vector_store, "get_cv_chunks"):
+            return None
+        pending = self._loading.get(session_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[session_id] = future
+        version = self._version
+        corpus = None
+        try:
+            chunks, embeddings = await vector_store.get_cv_chunks(cv_ids)
+            corpus = await traced_to_thread(build_session_corpus, session_id, cv_ids, chunks, embeddings)
+            if corpus is not None:
+                self._store(corpus, version)
+                logger.info(
+                    f"[SESSION_CORPUS] Loaded session {session_id}: {len(cv_ids)} CVs, "
+                    f"{len(chunks)} chunks, {corpus.nbytes / 1e6:.1f}MB in {corpus.load_ms:.1f}ms"
+                )
+        except Exception as e:
+            logger.warning(f"[SESSION_CORPUS] Failed to load session {session_id}: {e}")
+        finally:
+            self._loading.pop(session_id, None)
+            future.set_result(corpus)
+        return corpus
+
+    def _store(self, corpus: SessionCorpus, version: int) -> None:
+        with self._lock:
+            self._loads += 1
+            if version != self._version:
+                return  # Invalidated while loading
+            if corpus.nbytes > self.max_bytes:
+                logger.info(f"[SESSION_CORPUS] Session {corpus.session_id} exceeds the cache budget, not cached")
+                return
+            self._corpora[corpus.session_id] = corpus
+            self._corpora.move_to_end(corpus.session_id)
+            while self.nbytes > self.max_bytes:
+                evicted, _ = self._corpora.popitem(last=False)
+                self._evictions += 1
+                logger.info(f"[SESSION_CORPUS] Evicted session {evicted}")
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a session's working set (its CVs changed or it was deleted)."""
+        with self._lock:
+            self._version += 1
+            self._corpora.pop(session_id, None)
+
+    def invalidate_cvs(self, cv_ids: Iterable[str]) -> None:
+        """Drop every working set containing one of these CVs (re-indexed or deleted)."""
+        cv_ids = set(cv_ids)
+        with self._lock:
+            self._version += 1
+            for session_id in [s for s, c in self._corpora.items() if not c._cv_id_set.isdisjoint(cv_ids)]:
+                del self._corpora[session_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._corpora.clear()
+
+    def record_query(self, warm: bool, latency_ms: float) -> None:
+        self._latency["warm" if warm else "cold"].append(latency_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats = {
+                "sessions": len(self._corpora),
+                "chunks": sum(len(c.chunks) for c in self._corpora.values()),
+                "mb": round(self.nbytes / 1e6, 2),
+                "max_mb": round(self.max_bytes / 1e6, 2),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "loads": self._loads,
+                "evictions": self._evictions,
+            }
+        for kind, samples in self._latency.items():
+            ordered = sorted(samples)
+            stats[f"{kind}_queries"] = len(ordered)
+            stats[f"{kind}_p50_ms"] = round(ordered[len(ordered) // 2], 1) if ordered else None
+            stats[f"{kind}_p95_ms"] = round(ordered[int(len(ordered) * 0.95)], 1) if ordered else None
+        return stats
+
+
+# Singleton instance
+_session_corpus_cache: Optional[SessionCorpusCache] = None
+
+
+def get_session_corpus_cache() -> SessionCorpusCache:
+    """Get singleton session working-set cache."""
+    global _session_corpus_cache
+    if _session_corpus_cache is None:
+        _session_corpus_cache = SessionCorpusCache(max_bytes=settings.session_corpus_cache_mb * 1024 * 1024)
+    return _session_corpus_cache
@@ -0,0 +1,248 @@
+"""
+Single-Flight Service - Coalesce identical in-flight chat queries.
+
+When the same question is sent twice while the first is still running
+(double-clicked UI, several recruiters in one session), the second request
+attaches to the first pipeline execution instead of repeating every
+embedding and LLM call.
+
+Key: (session corpus version, normalized question, relevant history hash,
+pipeline config). Streaming subscribers share the same event sequence; late
+joiners get the events emitted so far replayed, then follow live.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# KEYS
+# ============================================================================
+
+def normalize_question(question: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive form of a question."""
+    q = re.sub(r"\s+", " ", question.casefold()).strip()
+    return q.rstrip(" ?!.")
+
+
+def corpus_version(cv_ids: List[str]) -> str:
+    """Version of a session's corpus: changes whenever CVs are added or removed."""
+    return hashlib.sha1("\n".join(sorted(cv_ids)).encode()).hexdigest()[:16]
+
+
+# Most recent answered messages that identify "the same conversation state".
+# Kept below the routes' 10-message window so a request whose window already
+# includes a pending question still hashes like the one that saved it.
+RELEVANT_HISTORY_MESSAGES = 6
+
+
+def history_hash(history: Optional[List[Dict[str, Any]]]) -> str:
+    """
+    Hash of the history that can influence the answer.
+
+    Trailing user messages are ignored: they are questions still waiting for an
+    answer (including the current one, when the caller already saved it).
+    """
+    messages = list(history or [])
+    while messages and messages[-1].get("role") == "user":
+        messages.pop()
+    messages = messages[-RELEVANT_HISTORY_MESSAGES:]
+    payload = json.dumps(
+        [[m.get("role"), m.get("content")] for m in messages],
+        ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def make_flight_key(
+    kind: str,
+    session_id: str,
+    cv_ids: List[str],
+    question: str,
+    history: Optional[List[Dict[str, Any]]] = None,
+    config: Optional[Dict[str, Any]] = None
+) -> str:
+    """Coalescing key for a chat request.
+
+    `config` carries the request settings, including the caller's API-key
+    fingerprint so a run is only shared by requests billed to the same key.
+    """
+    config_part = json.dumps(config or {}, sort_keys=True, default=str)
+    return "|".join([
+        kind,
+        session_id,
+        corpus_version(cv_ids),
+        normalize_question(question),
+        history_hash(history),
+        hashlib.sha1(config_part.encode()).hexdigest()[:12],
+    ])
+
+
+# ============================================================================
+# FLIGHTS
+# ============================================================================
+
+@dataclass
+class StreamFlight:
+    """One in-flight streaming execution shared by every subscriber."""
+    key: str
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    done: bool = False
+    subscribers: int = 0
+    task: Optional[asyncio.Task] = None
+    _changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+        self._changed.set()
+
+    def finish(self) -> None:
+        self.done = True
+        self._changed.set()
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        """Replay events emitted so far, then follow live until the flight ends."""
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(self.events):
+                    yield self.events[index]
+                    index += 1
+                if self.done:
+                    return
+                self._changed.clear()
+                # Re-check after clear so an event published in between isn't missed
+                if index < len(self.events) or self.done:
+                    continue
+                await self._changed.wait()
+        finally:
+            # Also runs when the client disconnects (generator closed)
+            self.subscribers -= 1
+            if self.done and not self.subscribers:
+                self.events.clear()  # Nobody left to replay to
+
+
+class SingleFlightService:
+    """Registry of in-flight chat executions keyed by request identity."""
+
+    def __init__(self):
+        self._streams: Dict[str, StreamFlight] = {}
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._leaders = 0
+        self._coalesced_hits = 0
+
+    def is_in_flight(self, key: str) -> bool:
+        return key in self._streams or key in self._calls
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+
+    def attach_stream(self, key: str) -> Optional[StreamFlight]:
+        """Attach to the in-flight stream for `key`, if there is one."""
+        flight = self._streams.get(key)
+        if flight is not None:
+            self._coalesced_hits += 1
+            logger.info(f"[SINGLE_FLIGHT] Stream coalesced onto in-flight query ({flight.subscribers} subscribers)")
+        return flight
+
+    def join_stream(
+        self,
+        key: str,
+        producer: Callable[[], AsyncIterator[Dict[str, Any]]]
+    ) -> Tuple[StreamFlight, bool]:
+        """
+        Attach to the in-flight stream for `key`, or start one.
+
+        The producer runs as its own task, so it completes (and performs its
+        side effects exactly once) even if the client that started it leaves.
+
+        Returns:
+            (flight, is_leader)
+        """
+        flight = self.attach_stream(key)
+        if flight is not None:
+            return flight, False
+
+        flight = StreamFlight(key=key)
+        self._streams[key] = flight
+        self._leaders += 1
+        flight.task = asyncio.create_task(self._run_stream(flight, producer))
+        return flight, True
+
+    async def _run_stream(
+        self,
+        flight: StreamFlight,
+        producer: Callable[[], AsyncIterator[Dict[str, Any]]]
+    ) -> None:
+        try:
+            async for event in producer():
+                flight.publish(event)
+        except Exception as e:
+            logger.exception(f"[SINGLE_FLIGHT] Shared stream failed: {e}")
+            flight.publish({"event": "error", "data": {"message": str(e)}})
+        finally:
+            flight.finish()
+            self._streams.pop(flight.key, None)
+
+    # ------------------------------------------------------------------
+    # Request/response
+    # ------------------------------------------------------------------
+
+    async def run(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Await the in-flight call for `key`, or start it.
+
+        Returns:
+            (result, is_leader)
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self._coalesced_hits += 1
+            logger.info("[SINGLE_FLIGHT] Request coalesced onto in-flight query")
+            return await asyncio.shield(future), False
+
+        future = asyncio.ensure_future(func())
+        self._calls[key] = future
+        self._leaders += 1
+        future.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shield so a cancelled leader doesn't cancel the call for followers
+        return await asyncio.shield(future), True
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self._leaders + self._coalesced_hits
+        return {
+            "in_flight": len(self._streams) + len(self._calls),
+            "stream_subscribers": sum(f.subscribers for f in self._streams.values()),
+            "executions": self._leaders,
+            "coalesced_hits": self._coalesced_hits,
+            "coalesce_rate": round(self._coalesced_hits / total, 3) if total else 0.0,
+        }
+
+
+# Singleton instance
+_single_flight: Optional[SingleFlightService] = None
+
+
+def get_single_flight() -> SingleFlightService:
+    """Get singleton single-flight registry."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlightService()
+    return _single_flight
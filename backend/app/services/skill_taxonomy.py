@@ -0,0 +1,402 @@
+"""
+Shared skill taxonomy and compiled skill matcher.
+
+Single source of truth for skill/technology keywords used by ingestion
+(SmartChunkingService, PDFService), output processing (DataExtractor,
+QueryAnalyzer) and the suggestion engine. The taxonomy is compiled into an
+Aho–Corasick automaton once at import, so callers find every skill in a
+single pass over the text instead of one regex per term.
+
+Usage:
+    from app.services.skill_taxonomy import extract_skills
+    extract_skills("Built APIs with FastAPI, k8s and Postgres")
+    # -> ["FastAPI", "Kubernetes", "PostgreSQL"]
+"""
+
+from __future__ import annotations
+
+from app.utils.keyword_matcher import KeywordMatch, KeywordMatcher
+
+# =============================================================================
+# TAXONOMY
+# =============================================================================
+# category -> {canonical name: aliases}
+# Aliases listed in CASE_SENSITIVE_ALIASES only match with exact case
+# (avoids "go"/"r"/"chef" matching ordinary words).
+
+SKILL_TAXONOMY: dict[str, dict[str, tuple[str, ...]]] = {
+    "languages": {
+        "Python": (),
+        "JavaScript": ("JS",),
+        "TypeScript": ("TS",),
+        "Java": (),
+        "C++": ("cpp",),
+        "C#": ("csharp",),
+        "Go": ("Golang",),
+        "Rust": (),
+        "Ruby": (),
+        "PHP": (),
+        "Swift": (),
+        "Kotlin": (),
+        "Scala": (),
+        "Dart": (),
+        "R": (),
+        "MATLAB": (),
+        "SQL": (),
+        "NoSQL": (),
+        "HTML": ("HTML5",),
+        "CSS": ("CSS3",),
+    },
+    "frontend": {
+        "React": ("React.js", "ReactJS"),
+        "Angular": ("AngularJS",),
+        "Vue": ("Vue.js", "VueJS"),
+        "Svelte": (),
+        "Next.js": ("NextJS", "Next js"),
+        "Nuxt.js": ("Nuxt", "NuxtJS"),
+        "Ember": (),
+        "Backbone": (),
+        "Redux": (),
+        "jQuery": (),
+        "Webpack": (),
+        "Vite": (),
+        "SASS": ("SCSS",),
+        "LESS": (),
+        "Tailwind": ("TailwindCSS", "Tailwind CSS"),
+        "Bootstrap": (),
+        "Material UI": ("Material-UI", "MUI"),
+    },
+    "backend": {
+        "Node.js": ("NodeJS", "Node js"),
+        "Express": ("Express.js",),
+        "Django": (),
+        "Flask": (),
+        "FastAPI": (),
+        "Spring": ("Spring Boot",),
+        "Hibernate": (),
+        ".NET": ("dotnet", "ASP.NET"),
+        "Rails": ("Ruby on Rails",),
+        "Laravel": (),
+        "Symfony": (),
+        "REST": ("RESTful", "REST API", "REST APIs"),
+        "GraphQL": (),
+        "gRPC": (),
+        "SOAP": (),
+        "API": ("APIs",),
+        "Microservices": (),
+        "Serverless": (),
+        "Kafka": ("Apache Kafka",),
+        "RabbitMQ": (),
+        "ActiveMQ": (),
+        "SQS": (),
+        "SNS": (),
+        "Pub/Sub": (),
+        "Event Streaming": (),
+    },
+    "data": {
+        "PostgreSQL": ("Postgres",),
+        "MySQL": (),
+        "SQLite": (),
+        "SQL Server": ("MSSQL",),
+        "Oracle": (),
+        "MongoDB": ("Mongo",),
+        "Redis": (),
+        "Elasticsearch": ("Elastic Search",),
+        "Cassandra": (),
+        "DynamoDB": (),
+        "Firebase": (),
+        "Supabase": (),
+        "Neo4j": (),
+        "CockroachDB": (),
+        "InfluxDB": (),
+        "TimescaleDB": (),
+        "Pandas": (),
+        "NumPy": (),
+        "SciPy": (),
+        "Matplotlib": (),
+        "Seaborn": (),
+        "Plotly": (),
+        "Spark": ("Apache Spark", "PySpark"),
+        "Hadoop": (),
+        "Airflow": ("Apache Airflow",),
+        "dbt": (),
+        "Tableau": (),
+        "Power BI": ("PowerBI",),
+        "Looker": (),
+        "Google Data Studio": (),
+        "Domo": (),
+        "Qlik": (),
+        "Sisense": (),
+        "Excel": (),
+        "Analytics": (),
+        "Dashboard": ("Dashboards",),
+        "KPI": ("KPIs",),
+        "Data Modeling": (),
+        "Data Analysis": (),
+        "Data Visualization": (),
+        "Business Intelligence": (),
+    },
+    "devops": {
+        "Docker": (),
+        "Kubernetes": ("K8s",),
+        "AWS": ("Amazon Web Services",),
+        "Azure": ("Microsoft Azure",),
+        "GCP": ("Google Cloud", "Google Cloud Platform"),
+        "Terraform": (),
+        "Ansible": (),
+        "Puppet": (),
+        "Jenkins": (),
+        "GitHub Actions": (),
+        "GitLab CI": (),
+        "CI/CD": ("CICD",),
+        "DevOps": (),
+        "Git": (),
+        "Linux": (),
+        "Ubuntu": (),
+        "CentOS": (),
+        "Debian": (),
+        "Red Hat": (),
+        "Windows Server": (),
+        "Oracle Cloud": (),
+        "Alibaba Cloud": (),
+        "Chef": (),
+        "Nginx": (),
+        "Prometheus": (),
+        "Grafana": (),
+        "Lambda": ("AWS Lambda",),
+    },
+    "ai_ml": {
+        "Machine Learning": ("ML",),
+        "Deep Learning": (),
+        "Neural Networks": (),
+        "AI": ("Artificial Intelligence",),
+        "NLP": ("Natural Language Processing",),
+        "Computer Vision": (),
+        "LLM": ("LLMs", "Large Language Models"),
+        "TensorFlow": (),
+        "PyTorch": (),
+        "Keras": (),
+        "scikit-learn": ("sklearn", "Scikit learn"),
+        "Transformers": (),
+        "HuggingFace": ("Hugging Face",),
+        "LangChain": (),
+        "OpenAI": (),
+        "RAG": (),
+        "MLflow": (),
+        "Kubeflow": (),
+        "Jupyter": (),
+        "Anaconda": (),
+        "Google Colab": (),
+        "Data Science": (),
+    },
+    "mobile": {
+        "iOS": (),
+        "Android": (),
+        "React Native": (),
+        "Flutter": (),
+        "Xamarin": (),
+    },
+    "design": {
+        "Figma": (),
+        "Sketch": (),
+        "Adobe XD": (),
+        "Photoshop": (),
+        "Illustrator": (),
+        "InDesign": (),
+        "After Effects": (),
+        "Blender": (),
+        "Maya": (),
+        "Unity": (),
+        "Unreal": ("Unreal Engine",),
+        "UI": ("User Interface",),
+        "UX": ("User Experience",),
+        "Design Systems": (),
+        "Wireframing": (),
+        "Prototyping": (),
+    },
+    "testing": {
+        "Unit Testing": (),
+        "Integration Testing": (),
+        "Selenium": (),
+        "Cypress": (),
+        "Jest": (),
+        "TDD": (),
+        "BDD": (),
+        "QA": ("Quality Assurance",),
+        "E2E Testing": (),
+        "Manual Testing": (),
+        "Mocha": (),
+        "Chai": (),
+        "Code Coverage": (),
+        "SonarQube": (),
+    },
+    "security": {
+        "Cybersecurity": ("Cyber Security", "Information Security"),
+        "Penetration Testing": (),
+        "OWASP": (),
+        "OAuth": (),
+        "JWT": (),
+        "SAML": (),
+        "SSL/TLS": (),
+        "Vulnerability Assessment": (),
+        "Encryption": (),
+        "Authentication": (),
+        "Authorization": (),
+    },
+    "marketing": {
+        "Marketing": (),
+        "Content Marketing": (),
+        "SEO": (),
+        "SEM": (),
+        "PPC": (),
+        "Google Ads": (),
+        "Facebook Ads": (),
+        "LinkedIn Ads": (),
+        "Social Media": (),
+        "Branding": (),
+        "Google Analytics": (),
+        "Adobe Analytics": (),
+        "Mixpanel": (),
+        "Amplitude": (),
+        "Segment": (),
+        "Hotjar": (),
+        "Instagram": (),
+        "Twitter": (),
+        "Facebook": (),
+        "LinkedIn": (),
+        "TikTok": (),
+        "YouTube": (),
+    },
+    "business": {
+        "Finance": (),
+        "Accounting": (),
+        "Banking": (),
+        "Investment": (),
+        "Trading": (),
+        "Risk Management": (),
+        "Compliance": (),
+        "QuickBooks": (),
+        "Xero": (),
+        "SAP": (),
+        "Oracle Financials": (),
+        "Salesforce": (),
+        "HubSpot": (),
+        "Pipedrive": (),
+    },
+    "project_management": {
+        "Project Management": (),
+        "PMP": (),
+        "PRINCE2": (),
+        "Agile": (),
+        "Scrum": (),
+        "Kanban": (),
+        "Lean": (),
+        "Six Sigma": (),
+        "Jira": ("JIRA",),
+        "Trello": (),
+        "Asana": (),
+        "Monday.com": (),
+        "ClickUp": (),
+        "Notion": (),
+        "Confluence": (),
+        "Slack": (),
+        "Teams": ("Microsoft Teams",),
+        "Scrum Master": (),
+        "Product Owner": (),
+        "Product Manager": (),
+        "Program Manager": (),
+        "Portfolio Manager": (),
+    },
+    "general": {
+        "Software Development": (),
+        "Web Development": (),
+        "Mobile Development": (),
+        "Full Stack": ("Fullstack", "Full-stack"),
+        "Frontend": ("Front-end", "Front end"),
+        "Backend": ("Back-end", "Back end"),
+        "Cloud Computing": (),
+        "Edge Computing": (),
+        "IoT": (),
+        "Blockchain": (),
+        "Web3": (),
+        "Cryptocurrency": (),
+        "NFT": (),
+    },
+}
+
+CASE_SENSITIVE_ALIASES: set[str] = {
+    "Go", "R", "TS", "JS", "Lean", "Spring", "Swift", "Rust", "Dart", "Chef",
+    "Express", "Oracle", "Unity", "Maya", "Sketch", "Lambda", "Spark", "Flask",
+    "Excel", "Git", "LESS", "SOAP", "Jest", "Mongo", "Backbone", "Ember",
+    "Chai", "Segment", "Teams", "Notion", "Trading", "Domo", "Amplitude",
+}
+
+
+def build_skill_matcher(
+    extra_terms: dict[str, tuple[str, ...]] | None = None,
+    extra_category: str = "other"
+) -> KeywordMatcher:
+    """
+    Compile the taxonomy (plus optional caller-specific terms) into a matcher.
+
+    Most callers should use the shared `SKILL_MATCHER`; this is for callers that
+    need a few domain words on top (e.g. "3D" and "2D" in the suggestion engine).
+    """
+    matcher = KeywordMatcher()
+    taxonomy = dict(SKILL_TAXONOMY)
+    if extra_terms:
+        taxonomy[extra_category] = extra_terms
+    for category, skills in taxonomy.items():
+        for name, aliases in skills.items():
+            matcher.add(
+                name,
+                aliases,
+                category=category,
+                case_sensitive=CASE_SENSITIVE_ALIASES & {name, *aliases}
+            )
+    return matcher.compile()
+
+
+# Compiled once at import and shared by every caller
+SKILL_MATCHER: KeywordMatcher = build_skill_matcher()
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def get_skill_matcher() -> KeywordMatcher:
+    """Shared compiled skill matcher."""
+    return SKILL_MATCHER
+
+
+def extract_skills(text: str) -> list[str]:
+    """Canonical skill names found in `text`, in order of first appearance."""
+    return SKILL_MATCHER.find_terms(text)
+
+
+def find_skill_matches(text: str) -> list[KeywordMatch]:
+    """Non-overlapping skill matches with offsets and categories."""
+    return SKILL_MATCHER.find(text)
+
+
+def canonical_skill(text: str) -> str | None:
+    """Canonical name if `text` is exactly a known skill or alias."""
+    return SKILL_MATCHER.match_term(text)
+
+
+def skill_category(skill: str) -> str | None:
+    """Taxonomy category of a canonical skill name."""
+    return SKILL_MATCHER.category_of(skill)
+
+
+__all__ = [
+    "SKILL_TAXONOMY",
+    "SKILL_MATCHER",
+    "build_skill_matcher",
+    "get_skill_matcher",
+    "extract_skills",
+    "find_skill_matches",
+    "canonical_skill",
+    "skill_category",
+]
@@ -20,6 +20,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+from app.services.skill_taxonomy import get_skill_matcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -722,6 +724,37 @@ class SmartChunkingService:
         
         return skills[:30]
     
+    # Skill validation patterns, compiled once (PHASE 2.2)
+    _SPACED_LETTERS_RE = re.compile(r'^[A-Z](\s+[A-Z])+$')
+    _EDUCATION_RE = re.compile(
+        r'\b(master|bachelor|phd|doctorate|degree|university|college)\b'
+        r'|\b(mba|msc|bsc|ba|ma|bs|ms)\b'
+        r'|\b(graduated|graduation|diploma|certificate of)\b'
+        r'|^master of|^bachelor of|^doctor of'
+    )
+    _COMPANY_RE = re.compile(
+        r'\b(inc|llc|ltd|corp|gmbh|plc|company|group|holdings)\b'
+        r'|\b(fashion house|consulting|solutions|services|agency)\b'
+        r'|^\w+\s+(early|late|\d{4})'  # "Company Name (Early 2020)"
+    )
+    _JOB_TITLE_RE = re.compile(
+        r'\b(intern|trainee|assistant|coordinator|manager|director)\b'
+        r'|\b(analyst|specialist|consultant|engineer|developer)\b'
+        r'|^(senior|junior|lead|chief|head)\s+'
+        r'|&\s*analysis'  # "& Analysis Styling Intern"
+    )
+    _TECHNICAL_TITLE_EXCEPTIONS = frozenset({'data analyst', 'business analyst', 'systems analyst'})
+    _SKILL_SECTION_HEADERS = frozenset({
+        'skills', 'experience', 'education', 'summary', 'profile',
+        'languages', 'certifications', 'references', 'hobbies',
+        'interests', 'projects', 'contact', 'objective'
+    })
+    _NON_SKILL_STARTERS = (
+        'local ', 'the ', 'a ', 'an ', 'my ', 'our ', 'their ',
+        'responsible for', 'worked on', 'managed', 'developed',
+    )
+    _NUMERIC_ONLY_RE = re.compile(r'^[\d\s\-/\.]+$')
+    
     def _is_valid_skill(self, skill: str) -> bool:
         """
         PHASE 2.2 FIX: Validate that a string is actually a skill.
@@ -737,7 +770,7 @@ class SmartChunkingService:
             return False
         
         # 1. Reject spaced-letter strings (e.g., "E D U C A T I O N")
-        if re.match(r'^[A-Z](\s+[A-Z])+$', skill):
+        if self._SPACED_LETTERS_RE.match(skill):
             logger.debug(f"[SKILLS] Rejecting spaced-letters: '{skill}'")
             return False
         
@@ -748,66 +781,39 @@ class SmartChunkingService:
                 logger.debug(f"[SKILLS] Rejecting high-space ratio: '{skill}'")
                 return False
         
-        # 2. Reject education items
-        education_patterns = [
-            r'\b(master|bachelor|phd|doctorate|degree|university|college)\b',
-            r'\b(mba|msc|bsc|ba|ma|bs|ms)\b',
-            r'\b(graduated|graduation|diploma|certificate of)\b',
-            r'^master of', r'^bachelor of', r'^doctor of',
-        ]
+        # Fast path: exact taxonomy hit ("Python", "k8s", "CI/CD")
+        if get_skill_matcher().match_term(skill):
+            return True
+        
         skill_lower = skill.lower()
-        for pattern in education_patterns:
-            if re.search(pattern, skill_lower):
-                logger.debug(f"[SKILLS] Rejecting education item: '{skill}'")
-                return False
+        
+        # 2. Reject education items
+        if self._EDUCATION_RE.search(skill_lower):
+            logger.debug(f"[SKILLS] Rejecting education item: '{skill}'")
+            return False
         
         # 3. Reject company name patterns
-        company_patterns = [
-            r'\b(inc|llc|ltd|corp|gmbh|plc|company|group|holdings)\b',
-            r'\b(fashion house|consulting|solutions|services|agency)\b',
-            r'^\w+\s+(early|late|\d{4})',  # "Company Name (Early 2020)"
-        ]
-        for pattern in company_patterns:
-            if re.search(pattern, skill_lower):
-                logger.debug(f"[SKILLS] Rejecting company pattern: '{skill}'")
-                return False
+        if self._COMPANY_RE.search(skill_lower):
+            logger.debug(f"[SKILLS] Rejecting company pattern: '{skill}'")
+            return False
         
         # 4. Reject job title patterns
-        job_title_patterns = [
-            r'\b(intern|trainee|assistant|coordinator|manager|director)\b',
-            r'\b(analyst|specialist|consultant|engineer|developer)\b',
-            r'^(senior|junior|lead|chief|head)\s+',
-            r'&\s*analysis',  # "& Analysis Styling Intern"
-        ]
-        for pattern in job_title_patterns:
-            if re.search(pattern, skill_lower):
-                # Exception: keep if it's a technical skill with these words
-                technical_exceptions = ['data analyst', 'business analyst', 'systems analyst']
-                if skill_lower not in technical_exceptions:
-                    logger.debug(f"[SKILLS] Rejecting job title pattern: '{skill}'")
-                    return False
+        # Exception: keep if it's a technical skill with these words
+        if self._JOB_TITLE_RE.search(skill_lower) and skill_lower not in self._TECHNICAL_TITLE_EXCEPTIONS:
+            logger.debug(f"[SKILLS] Rejecting job title pattern: '{skill}'")
+            return False
         
         # 5. Reject section headers
-        section_headers = [
-            'skills', 'experience', 'education', 'summary', 'profile',
-            'languages', 'certifications', 'references', 'hobbies',
-            'interests', 'projects', 'contact', 'objective'
-        ]
-        if skill_lower.strip() in section_headers:
+        if skill_lower.strip() in self._SKILL_SECTION_HEADERS:
             return False
         
         # 6. Reject if starts with common non-skill words
-        non_skill_starters = [
-            'local ', 'the ', 'a ', 'an ', 'my ', 'our ', 'their ',
-            'responsible for', 'worked on', 'managed', 'developed',
-        ]
-        for starter in non_skill_starters:
-            if skill_lower.startswith(starter):
-                logger.debug(f"[SKILLS] Rejecting non-skill starter: '{skill}'")
-                return False
+        if skill_lower.startswith(self._NON_SKILL_STARTERS):
+            logger.debug(f"[SKILLS] Rejecting non-skill starter: '{skill}'")
+            return False
         
         # 7. Reject if it's just numbers or very short
-        if re.match(r'^[\d\s\-/\.]+$', skill):
+        if self._NUMERIC_ONLY_RE.match(skill):
             return False
         if len(skill.replace(' ', '')) < 2:
             return False
@@ -944,7 +950,8 @@ class SmartChunkingService:
         1. SmartChunkingService.chunk_cv() ← YOU ARE HERE
            ↓ Creates chunks with metadata dict
         2. rag_service_v5.py:index_documents()
-           ↓ Passes to vector store
+           ↓ Passes to vector store, builds the per-CV CandidateProfile
+             (candidate_profile_service.py) read by output modules by cv_id
         3. vector_store.add_documents()
            ↓ Stores in ChromaDB/local store
         4. vector_store.search()
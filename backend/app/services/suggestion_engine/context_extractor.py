@@ -8,20 +8,17 @@ import re
 from dataclasses import dataclass, field
 from typing import Dict, List, Set
 
+from app.services.skill_taxonomy import build_skill_matcher
+
 logger = logging.getLogger(__name__)
 
 
-# Technical skills taxonomy (simplified version)
-COMMON_SKILLS = {
-    "python", "javascript", "typescript", "java", "c++", "c#", "go", "rust", "ruby", "php",
-    "react", "vue", "angular", "svelte", "nextjs", "nodejs", "express", "django", "flask", "fastapi",
-    "postgresql", "mysql", "mongodb", "redis", "elasticsearch", "graphql", "rest", "api",
-    "docker", "kubernetes", "aws", "azure", "gcp", "terraform", "jenkins", "ci/cd",
-    "git", "linux", "agile", "scrum", "microservices", "machine learning", "ml", "ai",
-    "tensorflow", "pytorch", "pandas", "numpy", "sql", "nosql", "html", "css", "sass",
-    "spring", "hibernate", ".net", "unity", "unreal", "blender", "maya", "3d", "2d",
-    "figma", "sketch", "photoshop", "illustrator", "ui", "ux", "frontend", "backend", "fullstack",
-}
+# Shared skill taxonomy plus a few domain words users ask about
+SKILL_MATCHER = build_skill_matcher(
+    extra_terms={"3D": (), "2D": ()},
+    extra_category="domain",
+)
+COMMON_SKILLS = {term.lower() for term in SKILL_MATCHER.terms}
 
 
 @dataclass
@@ -196,17 +193,8 @@ class ContextExtractor:
         return candidates
     
     def _extract_skills(self, text: str) -> List[str]:
-        """Extract skill names from query text."""
-        text_lower = text.lower()
-        found = []
-        
-        for skill in self.all_skills:
-            # Word boundary check
-            pattern = rf'\b{re.escape(skill)}\b'
-            if re.search(pattern, text_lower):
-                found.append(skill)
-        
-        return found
+        """Extract canonical skill names from query text (single pass)."""
+        return SKILL_MATCHER.find_terms(text)
     
     def _extract_roles(self, text: str) -> List[str]:
         """Extract role mentions from query text."""
@@ -9,10 +9,9 @@ import logging
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.config import settings, timeouts
 from app.utils.text_utils import smart_truncate
+from app.utils.upstream_limiter import upstream_async_client
 
 logger = logging.getLogger(__name__)
 
@@ -165,7 +164,7 @@ class LLMVerificationService:
             
             # Use context manager to ensure client is closed after request
             from app.providers.base import get_openrouter_url
-            async with httpx.AsyncClient(timeout=timeouts.HTTP_MEDIUM) as client:
+            async with upstream_async_client(timeout=timeouts.HTTP_MEDIUM) as client:
                 api_response = await client.post(
                     get_openrouter_url("chat/completions"),
                     headers={
@@ -3,114 +3,281 @@ Debug Logger - Comprehensive logging for CV Screener debugging.
 
 Creates detailed logs for each chat session, from upload to response.
 Saves logs to backend/debug_logs/ folder with session IDs.
+
+Events are kept in a bounded ring buffer per session (LRU over sessions) and
+appended to session_<id>_<date>.jsonl by a background writer thread, so the
+request path never does file I/O. Level and sampling are controlled by the
+DEBUG_LOG_* settings; disabled events are dropped before their payload is
+serialized.
 """
 
+import atexit
 import json
 import logging
+import queue
+import random
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import settings
 
 # Create debug logs directory
 DEBUG_LOGS_DIR = Path(__file__).parent.parent.parent / "debug_logs"
 DEBUG_LOGS_DIR.mkdir(exist_ok=True)
 
+_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "OFF": 100}
+
+# Runtime controls (initialised from settings, adjustable via configure_debug_log)
+_min_level: int = _LEVELS.get(settings.debug_log_level.upper(), 20)
+_sample_rate: float = settings.debug_log_sample_rate
+_buffer_size: int = settings.debug_log_buffer_size
+_max_sessions: int = settings.debug_log_max_sessions
+
 # Current session log
 _current_session_id: Optional[str] = None
-_session_logs: Dict[str, List[Dict[str, Any]]] = {}
+_session_logs: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+_session_lock = threading.Lock()
+
+_logger = logging.getLogger("debug_logger")
+
+
+def configure_debug_log(
+    level: Optional[str] = None,
+    sample_rate: Optional[float] = None,
+    buffer_size: Optional[int] = None,
+    max_sessions: Optional[int] = None
+) -> None:
+    """Adjust debug log level, sampling and memory bounds at runtime."""
+    global _min_level, _sample_rate, _buffer_size, _max_sessions
+    if level is not None:
+        _min_level = _LEVELS.get(level.upper(), _min_level)
+    if sample_rate is not None:
+        _sample_rate = max(0.0, min(1.0, sample_rate))
+    if max_sessions is not None:
+        _max_sessions = max(1, max_sessions)
+    if buffer_size is not None and buffer_size != _buffer_size:
+        _buffer_size = max(1, buffer_size)
+        with _session_lock:
+            for sid, events in _session_logs.items():
+                _session_logs[sid] = deque(events, maxlen=_buffer_size)
+
+
+def is_enabled(level: str = "INFO") -> bool:
+    """Whether events at `level` are recorded (use to skip building payloads)."""
+    return _LEVELS.get(level, 20) >= _min_level
 
 
 def get_session_log_path(session_id: str) -> Path:
-    """Get path for session log file."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return DEBUG_LOGS_DIR / f"session_{session_id[:8]}_{timestamp}.json"
+    """Get path for session log file (one JSONL file per session per day)."""
+    date = datetime.now().strftime("%Y%m%d")
+    return DEBUG_LOGS_DIR / f"session_{session_id[:8]}_{date}.jsonl"
+
+
+# ============================================================================
+# BACKGROUND WRITER
+# ============================================================================
+
+class _LogWriter:
+    """Appends serialized events to per-session JSONL files off the request path."""
+
+    MAX_PENDING = 10_000
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=self.MAX_PENDING)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+        self.written = 0
+
+    def submit(self, path: Path, event: Dict[str, Any]) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((path, event))
+        except queue.Full:
+            # Never block a request on debug logging
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted event has been written."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put((None, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="debug-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is queued so each file is opened once per batch
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines: Dict[Path, List[str]] = {}
+            markers = []
+            for path, payload in batch:
+                if path is None:
+                    markers.append(payload)
+                    continue
+                lines.setdefault(path, []).append(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+
+            for path, chunk in lines.items():
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.writelines(chunk)
+                    self.written += len(chunk)
+                except Exception as e:
+                    _logger.error(f"[DEBUG_LOG] Failed to write {path}: {e}")
+
+            for marker in markers:
+                marker.set()
+
+
+_writer = _LogWriter()
+atexit.register(_writer.flush, 2.0)
+
+
+def flush_debug_logs(timeout: Optional[float] = None) -> bool:
+    """Block until pending events are on disk (tests, shutdown)."""
+    return _writer.flush(timeout)
+
+
+def get_debug_log_stats() -> Dict[str, Any]:
+    """Writer and buffer statistics."""
+    with _session_lock:
+        buffered = sum(len(events) for events in _session_logs.values())
+        sessions = len(_session_logs)
+    return {
+        "level": next((k for k, v in _LEVELS.items() if v == _min_level), _min_level),
+        "sample_rate": _sample_rate,
+        "sessions_in_memory": sessions,
+        "events_in_memory": buffered,
+        "events_written": _writer.written,
+        "events_dropped": _writer.dropped,
+    }
 
 
+# ============================================================================
+# CORE API
+# ============================================================================
+
 def set_current_session(session_id: str) -> None:
     """Set the current session for logging."""
     global _current_session_id
     _current_session_id = session_id
-    if session_id not in _session_logs:
-        _session_logs[session_id] = []
+    with _session_lock:
+        _get_buffer(session_id)
     log_event("SESSION_START", {"session_id": session_id})
 
 
+def _get_buffer(session_id: str) -> Deque[Dict[str, Any]]:
+    """Ring buffer for a session, evicting least-recently-used sessions. Caller holds the lock."""
+    events = _session_logs.get(session_id)
+    if events is None:
+        events = deque(maxlen=_buffer_size)
+        _session_logs[session_id] = events
+        while len(_session_logs) > _max_sessions:
+            _session_logs.popitem(last=False)
+    else:
+        _session_logs.move_to_end(session_id)
+    return events
+
+
 def log_event(event_type: str, data: Dict[str, Any], level: str = "INFO") -> None:
     """Log an event to the current session."""
-    global _current_session_id, _session_logs
+    level_no = _LEVELS.get(level, 20)
+    if level_no < _min_level:
+        return
+    # Sample routine events; warnings and errors are always kept
+    if level_no < _LEVELS["WARNING"] and _sample_rate < 1.0 and random.random() >= _sample_rate:
+        return
     
+    serialized = _serialize_data(data)
     event = {
         "timestamp": datetime.now().isoformat(),
         "event_type": event_type,
         "level": level,
-        "data": _serialize_data(data)
+        "data": serialized
     }
     
-    # Also log to console
-    logger = logging.getLogger("debug_logger")
-    log_msg = f"[DEBUG_LOG] [{event_type}] {json.dumps(data, default=str)[:500]}"
-    
-    if level == "ERROR":
-        logger.error(log_msg)
-    elif level == "WARNING":
-        logger.warning(log_msg)
-    else:
-        logger.info(log_msg)
+    # Also log to console (only build the message if it will be emitted)
+    py_level = logging.ERROR if level == "ERROR" else logging.WARNING if level == "WARNING" else logging.INFO
+    if _logger.isEnabledFor(py_level):
+        _logger.log(py_level, f"[DEBUG_LOG] [{event_type}] {json.dumps(serialized, default=str)[:500]}")
     
-    # Store in session logs
-    if _current_session_id:
-        if _current_session_id not in _session_logs:
-            _session_logs[_current_session_id] = []
-        _session_logs[_current_session_id].append(event)
+    # Store in session ring buffer and hand off to the background writer
+    sid = _current_session_id
+    if sid:
+        with _session_lock:
+            _get_buffer(sid).append(event)
+        _writer.submit(get_session_log_path(sid), event)
+
+
+def get_session_events(session_id: str = None) -> List[Dict[str, Any]]:
+    """Most recent in-memory events for a session (bounded by the ring buffer)."""
+    sid = session_id or _current_session_id
+    with _session_lock:
+        return list(_session_logs.get(sid, ())) if sid else []
 
 
 def _serialize_data(data: Any) -> Any:
     """Serialize data for JSON, handling special types."""
     if isinstance(data, dict):
         return {k: _serialize_data(v) for k, v in data.items()}
-    elif isinstance(data, list):
+    elif isinstance(data, (list, tuple)):
         return [_serialize_data(item) for item in data]
+    elif data is None or isinstance(data, (str, int, float, bool)):
+        return data
     elif hasattr(data, 'to_dict'):
         return data.to_dict()
     elif hasattr(data, '__dict__'):
         return {k: _serialize_data(v) for k, v in data.__dict__.items() if not k.startswith('_')}
     else:
-        try:
-            json.dumps(data)
-            return data
-        except (TypeError, ValueError):
-            return str(data)
+        return str(data)
 
 
 def save_session_log(session_id: str = None) -> Optional[str]:
-    """Save session log to file and return path."""
+    """
+    Return the session's log path.
+    
+    Events are already appended incrementally by the background writer, so
+    this no longer rewrites the session history.
+    """
     sid = session_id or _current_session_id
-    if not sid or sid not in _session_logs:
+    if not sid:
         return None
+    with _session_lock:
+        if sid not in _session_logs:
+            return None
     
     log_path = get_session_log_path(sid)
-    
-    log_data = {
-        "session_id": sid,
-        "generated_at": datetime.now().isoformat(),
-        "events": _session_logs[sid]
-    }
-    
-    with open(log_path, 'w', encoding='utf-8') as f:
-        json.dump(log_data, f, indent=2, ensure_ascii=False, default=str)
-    
-    logger = logging.getLogger("debug_logger")
-    logger.info(f"[DEBUG_LOG] Saved session log to: {log_path}")
-    
+    _logger.debug(f"[DEBUG_LOG] Session log: {log_path}")
     return str(log_path)
 
 
 def clear_session_log(session_id: str = None) -> None:
     """Clear session log from memory."""
     sid = session_id or _current_session_id
-    if sid and sid in _session_logs:
-        del _session_logs[sid]
+    with _session_lock:
+        if sid and sid in _session_logs:
+            del _session_logs[sid]
 
 
 # ============================================================================
@@ -129,6 +296,8 @@ def log_cv_upload(session_id: str, cv_id: str, filename: str, chunk_count: int)
 
 def log_chunks_created(cv_id: str, chunks: List[Dict[str, Any]]) -> None:
     """Log chunks created during upload with metadata details."""
+    if not is_enabled("INFO"):
+        return
     chunk_summaries = []
     for i, chunk in enumerate(chunks):
         meta = chunk.get("metadata", {})
@@ -175,6 +344,8 @@ def log_query_understanding(understanding: Any) -> None:
 
 def log_retrieval(chunks: List[Dict[str, Any]], strategy: str = "unknown") -> None:
     """Log retrieval results with metadata."""
+    if not is_enabled("INFO"):
+        return
     chunk_details = []
     for i, chunk in enumerate(chunks[:10]):  # First 10
         meta = chunk.get("metadata", {})
@@ -209,6 +380,8 @@ def log_template_selection(template_name: str, candidate_name: str = None, detec
 
 def log_enriched_metadata_extraction(chunks: List[Dict[str, Any]], red_flags_section: str, stability_section: str) -> None:
     """Log enriched metadata extraction for LLM prompt."""
+    if not is_enabled("INFO"):
+        return
     first_chunk_meta = chunks[0].get("metadata", {}) if chunks else {}
     
     log_event("ENRICHED_METADATA_EXTRACTION", {
@@ -279,6 +452,8 @@ def log_orchestrator_processing(
 
 def log_red_flags_module(flags: List[Any], high_risk: List[str], clean: List[str]) -> None:
     """Log RedFlagsModule results."""
+    if not is_enabled("INFO"):
+        return
     flag_details = []
     for flag in flags[:10]:  # First 10
         flag_details.append({
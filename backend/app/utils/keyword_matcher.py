@@ -0,0 +1,207 @@
+"""
+Multi-pattern keyword matching (Aho–Corasick).
+
+Compiles a vocabulary of terms and aliases once and finds every occurrence in
+a single pass over the text, instead of running one regex per term.
+
+- Matching is case-insensitive; aliases registered as case-sensitive (e.g.
+  "Go", "R") are additionally checked against the original text.
+- Word boundaries are enforced on each side of a match unless that edge of the
+  term is itself a symbol ("C++", ".NET", "CI/CD"). Pass
+  `word_boundaries=False` for plain substring semantics.
+- Aliases map to a canonical term ("k8s" -> "Kubernetes").
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    """A single occurrence of a vocabulary term in the text."""
+    term: str        # Canonical term
+    alias: str       # Alias as registered
+    start: int
+    end: int
+    category: str | None = None
+
+
+@dataclass(frozen=True)
+class _Pattern:
+    alias: str
+    term: str
+    category: str | None
+    case_sensitive: bool
+    check_left: bool
+    check_right: bool
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """Aho–Corasick automaton over a term vocabulary."""
+
+    def __init__(self, word_boundaries: bool = True) -> None:
+        self.word_boundaries = word_boundaries
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        self._own: list[list[int]] = [[]]  # Patterns ending at each node (no fail-link outputs)
+        self._patterns: list[_Pattern] = []
+        self._terms: dict[str, str | None] = {}
+        self._compiled = True
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def add(
+        self,
+        term: str,
+        aliases: Iterable[str] = (),
+        category: str | None = None,
+        case_sensitive: Iterable[str] = ()
+    ) -> KeywordMatcher:
+        """
+        Register a canonical term and its aliases.
+
+        Args:
+            term: Canonical name returned for every match
+            aliases: Alternative spellings (the term itself is always included)
+            category: Optional grouping (e.g. "backend", "devops")
+            case_sensitive: Aliases that must match with exact case
+        """
+        sensitive = set(case_sensitive)
+        self._terms.setdefault(term, category)
+        for alias in {term, *aliases}:
+            alias = alias.strip()
+            if not alias:
+                continue
+            self._insert(_Pattern(
+                alias=alias,
+                term=term,
+                category=category,
+                case_sensitive=alias in sensitive,
+                check_left=self.word_boundaries and _is_word_char(alias[0]),
+                check_right=self.word_boundaries and _is_word_char(alias[-1]),
+            ))
+        self._compiled = False
+        return self
+
+    def _insert(self, pattern: _Pattern) -> None:
+        node = 0
+        for ch in pattern.alias.lower():
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._own.append([])
+            node = nxt
+        self._own[node].append(len(self._patterns))
+        self._patterns.append(pattern)
+
+    def compile(self) -> KeywordMatcher:
+        """Build failure links. Called lazily on first search (and again after add())."""
+        self._out = [list(own) for own in self._own]
+        queue: deque[int] = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._compiled = True
+        return self
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    @property
+    def terms(self) -> list[str]:
+        return list(self._terms)
+
+    def category_of(self, term: str) -> str | None:
+        return self._terms.get(term)
+
+    def find_all(self, text: str) -> list[KeywordMatch]:
+        """Every boundary-respecting occurrence, including overlapping ones."""
+        if not self._compiled:
+            self.compile()
+        if not text:
+            return []
+
+        lowered = text.lower()
+        # Lowercasing can change length for a few Unicode characters; fall back to
+        # per-character lowering so offsets stay aligned with the original text.
+        if len(lowered) != len(text):
+            lowered = "".join(c.lower()[0] for c in text)
+
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+        n = len(text)
+        matches: list[KeywordMatch] = []
+        node = 0
+        for i, ch in enumerate(lowered):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            for pid in out[node]:
+                p = patterns[pid]
+                start = i - len(p.alias) + 1
+                end = i + 1
+                if p.check_left and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if p.check_right and end < n and _is_word_char(text[end]):
+                    continue
+                if p.case_sensitive and text[start:end] != p.alias:
+                    continue
+                matches.append(KeywordMatch(p.term, p.alias, start, end, p.category))
+        return matches
+
+    def find(self, text: str) -> list[KeywordMatch]:
+        """Leftmost-longest, non-overlapping matches ("React Native" beats "React")."""
+        selected: list[KeywordMatch] = []
+        last_end = -1
+        for m in sorted(self.find_all(text), key=lambda m: (m.start, -(m.end - m.start))):
+            if m.start >= last_end:
+                selected.append(m)
+                last_end = m.end
+        return selected
+
+    def find_terms(self, text: str) -> list[str]:
+        """Unique canonical terms in order of first appearance."""
+        seen: dict[str, None] = {}
+        for m in self.find(text):
+            seen.setdefault(m.term, None)
+        return list(seen)
+
+    def contains_any(self, text: str) -> bool:
+        return bool(self.find_all(text))
+
+    def match_term(self, text: str) -> str | None:
+        """Canonical term if the whole (stripped) text is a single vocabulary entry."""
+        stripped = text.strip()
+        for m in self.find_all(stripped):
+            if m.start == 0 and m.end == len(stripped):
+                return m.term
+        return None
+
+
+__all__ = ["KeywordMatch", "KeywordMatcher"]
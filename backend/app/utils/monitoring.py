@@ -1,11 +1,12 @@
 import json
 import logging
 import os
-from collections import deque
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from app.utils.upstream_limiter import TokenBucket
+
 
 @dataclass
 class UsageRecord:
@@ -191,7 +192,7 @@ class QueryLogger:
 
 
 class RateLimiter:
-    """Prevent excessive API calls."""
+    """Prevent excessive API calls (per-minute token buckets, O(1) per check)."""
     
     def __init__(
         self,
@@ -200,35 +201,15 @@ class RateLimiter:
     ):
         self.max_rpm = max_requests_per_minute
         self.max_tpm = max_tokens_per_minute
-        self.request_times: deque = deque()
-        self.token_usage: deque = deque()  # (timestamp, tokens)
+        self._requests = TokenBucket.per_minute(max_requests_per_minute)
+        self._tokens = TokenBucket.per_minute(max_tokens_per_minute)
     
     def check_limit(self, estimated_tokens: int = 1000) -> tuple[bool, float]:
         """Check if request is within limits. Returns (allowed, wait_seconds)."""
-        now = datetime.now()
-        minute_ago = now - timedelta(minutes=1)
-        
-        # Clean old entries
-        while self.request_times and self.request_times[0] < minute_ago:
-            self.request_times.popleft()
-        while self.token_usage and self.token_usage[0][0] < minute_ago:
-            self.token_usage.popleft()
-        
-        # Check request limit
-        if len(self.request_times) >= self.max_rpm:
-            wait = (self.request_times[0] - minute_ago).total_seconds()
-            return False, max(0, wait)
-        
-        # Check token limit
-        current_tokens = sum(t[1] for t in self.token_usage)
-        if current_tokens + estimated_tokens > self.max_tpm:
-            wait = (self.token_usage[0][0] - minute_ago).total_seconds()
-            return False, max(0, wait)
-        
-        return True, 0
+        wait = max(self._requests.wait_time(1), self._tokens.wait_time(estimated_tokens))
+        return wait <= 0, wait
     
     def record_request(self, tokens_used: int):
         """Record a request for rate limiting."""
-        now = datetime.now()
-        self.request_times.append(now)
-        self.token_usage.append((now, tokens_used))
+        self._requests.take(1)
+        self._tokens.take(tokens_used)
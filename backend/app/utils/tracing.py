@@ -0,0 +1,335 @@
+"""
+Pipeline tracing - nested latency spans for RAG requests.
+
+StageMetrics records one flat duration per stage. Tracing records what each
+stage spent its time on: spans nest under the context-local current span
+(a ContextVar, so it follows asyncio tasks and asyncio.to_thread offloads).
+Spans are added around:
+
+- requests of the upstream clients built by app.utils.upstream_limiter,
+  through TracedTransport (category "http")
+- offloads that call traced_to_thread() instead of asyncio.to_thread
+  (category "thread")
+
+Nothing is patched globally: other httpx clients and to_thread calls in the
+process are left alone.
+
+Retry/backoff waits are recorded with retry_sleep() (category "retry_wait"),
+queueing for an upstream's rate limit by app.utils.upstream_limiter
+(category "rate_limit_wait").
+
+Finished traces are kept in a ring buffer (settings.trace_buffer_size),
+served by /api/v8/traces and exportable as Chrome trace-event JSON
+(chrome://tracing, Perfetto, speedscope).
+
+Spans are only recorded inside a trace: outside one, span() is a no-op.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Categories whose time is reported separately in trace summaries
+BREAKDOWN_CATEGORIES = ("http", "thread", "retry_wait", "rate_limit_wait")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _lane() -> str:
+    """Where a span runs: the asyncio task, or the thread outside the event loop."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return f"task-{id(task)}"
+    return f"thread-{threading.get_ident()}"
+
+
+@dataclass
+class Span:
+    """A timed operation, possibly with nested child spans."""
+    name: str
+    category: str = "internal"
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    start: float = field(default_factory=time.perf_counter)
+    end: Optional[float] = None
+    error: Optional[str] = None
+    lane: str = field(default_factory=_lane)
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def walk(self) -> Iterator["Span"]:
+        yield self
+        for child in list(self.children):
+            yield from child.walk()
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "category": self.category,
+            "offset_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration_ms, 2),
+            **({"attrs": self.attrs} if self.attrs else {}),
+            **({"error": self.error} if self.error else {}),
+            **({"children": [c.to_dict(origin) for c in list(self.children)]} if self.children else {}),
+        }
+
+
+@dataclass
+class Trace:
+    """One traced request: a root span plus identifying info."""
+    trace_id: str
+    root: Span
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    @property
+    def name(self) -> str:
+        return self.root.name
+
+    def breakdown_ms(self) -> Dict[str, float]:
+        """Time per category, not double counting spans nested in the same category."""
+        totals = dict.fromkeys(BREAKDOWN_CATEGORIES, 0.0)
+
+        def visit(span: Span, covered: frozenset) -> None:
+            if span.category in totals and span.category not in covered:
+                totals[span.category] += span.duration_ms
+                covered = covered | {span.category}
+            for child in list(span.children):
+                visit(child, covered)
+
+        visit(self.root, frozenset())
+        return {category: round(ms, 2) for category, ms in totals.items()}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.root.duration_ms, 2),
+            "span_count": sum(1 for _ in self.root.walk()),
+            "breakdown_ms": self.breakdown_ms(),
+            **({"error": self.root.error} if self.root.error else {}),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.summary(), "attrs": self.root.attrs, "root": self.root.to_dict()}
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """Chrome trace-event format: one complete ("X") event per span."""
+        origin = self.root.start
+        lanes: Dict[str, int] = {}
+        events = []
+        for span in self.root.walk():
+            tid = lanes.setdefault(span.lane, len(lanes) + 1)
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - origin) * 1_000_000, 1),
+                "dur": round(span.duration_ms * 1000, 1),
+                "pid": 1,
+                "tid": tid,
+                "args": {**span.attrs, **({"error": span.error} if span.error else {})},
+            })
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": lane}}
+            for lane, tid in lanes.items()
+        )
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id, "name": self.name, "started_at": self.started_at},
+        }
+
+
+class Tracer:
+    """Creates traces and spans, and keeps the most recent finished traces."""
+
+    def __init__(self, max_traces: int = 50, enabled: bool = True):
+        self.enabled = enabled
+        self._traces: Deque[Trace] = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name: str, trace_id: Optional[str] = None, **attrs) -> Iterator[Optional[Trace]]:
+        """Start a trace whose root span becomes the current span."""
+        if not self.enabled:
+            yield None
+            return
+        trace = Trace(trace_id=trace_id or uuid.uuid4().hex[:16], root=Span(name, "request", attrs))
+        try:
+            with self._activate(trace.root):
+                yield trace
+        finally:
+            with self._lock:
+                self._traces.append(trace)
+            logger.debug(f"[TRACING] {trace.trace_id} {name}: {trace.root.duration_ms:.0f}ms")
+
+    @contextmanager
+    def span(self, name: str, category: str = "internal", **attrs) -> Iterator[Optional[Span]]:
+        """Child span of the current span (no-op outside a trace)."""
+        parent = _current_span.get()
+        if parent is None or not self.enabled:
+            yield None
+            return
+        span = Span(name, category, attrs)
+        parent.children.append(span)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[None]:
+        token = _current_span.set(span)
+        try:
+            yield
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            span.end = time.perf_counter()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Closed from another context (e.g. a generator finalized elsewhere)
+                pass
+
+    def recent(self, limit: int = 20) -> List[Trace]:
+        with self._lock:
+            return list(self._traces)[-limit:][::-1]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return next((t for t in self._traces if t.trace_id == trace_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            traces = list(self._traces)
+        return {
+            "enabled": self.enabled,
+            "traces_buffered": len(traces),
+            "max_traces": self._traces.maxlen,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def span(name: str, category: str = "internal", **attrs):
+    """Shortcut for get_tracer().span(...)."""
+    return get_tracer().span(name, category, **attrs)
+
+
+async def retry_sleep(seconds: float, **attrs) -> None:
+    """asyncio.sleep for a retry/backoff wait, recorded as a retry_wait span."""
+    with span("retry_wait", "retry_wait", seconds=round(seconds, 3), **attrs):
+        await asyncio.sleep(seconds)
+
+
+def traced(name: Optional[str] = None, category: str = "stage") -> Callable:
+    """Decorator: run a coroutine function or async generator function inside a span."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__.lstrip("_")
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def gen_wrapper(*args, **kwargs):
+                with span(span_name, category):
+                    async for item in func(*args, **kwargs):
+                        yield item
+            return gen_wrapper
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(span_name, category):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# =============================================================================
+# HTTP AND THREAD SPANS
+# =============================================================================
+
+def _http_span(request):
+    return span(
+        f"http {request.method} {request.url.host}", "http",
+        method=request.method, host=request.url.host, path=request.url.path
+    )
+
+
+class TracedTransport(httpx.AsyncBaseTransport):
+    """Async transport recording each request as an "http" span."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with _http_span(request) as s:
+            response = await self._transport.handle_async_request(request)
+            if s is not None:
+                s.attrs["status"] = response.status_code
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class TracedSyncTransport(httpx.BaseTransport):
+    """Synchronous counterpart of TracedTransport."""
+
+    def __init__(self, transport: Optional[httpx.BaseTransport] = None):
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with _http_span(request) as s:
+            response = self._transport.handle_request(request)
+            if s is not None:
+                s.attrs["status"] = response.status_code
+            return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+async def traced_to_thread(func: Callable, /, *args, **kwargs) -> Any:
+    """asyncio.to_thread recorded as a "thread" span."""
+    label = getattr(func, "__qualname__", None) or getattr(func, "__name__", repr(func))
+    with span(f"to_thread:{label}", "thread"):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer."""
+    global _tracer
+    if _tracer is None:
+        from app.config import settings
+        _tracer = Tracer(max_traces=settings.trace_buffer_size, enabled=settings.tracing_enabled)
+    return _tracer
@@ -0,0 +1,553 @@
+"""
+Upstream limiter - shared admission control for external model APIs.
+
+Services used to call OpenRouter and HuggingFace independently and retry 429s
+with their own sleep loops, so concurrent chats hit the provider together and
+then all backed off together. Clients built with upstream_async_client() /
+upstream_client() send their requests to a known upstream through one
+UpstreamLimiter per upstream once enable_upstream_limits() has run:
+
+- token buckets for requests per minute and (estimated) tokens per minute
+- a priority queue: interactive chat is admitted before ingestion, ingestion
+  before background evaluation. The priority is context-local (a ContextVar,
+  like tracing spans) and set with upstream_priority() / with_upstream_priority
+- queue deadlines: a call that isn't admitted in time fails with
+  RateLimitError instead of waiting indefinitely
+- a 429 pauses the model it came from (OpenRouter rate limits are mostly per
+  model) for its Retry-After: later calls to that model wait instead of each
+  caller sleeping and retrying on its own, while other models keep flowing
+
+The limiter is attached to those clients with httpx event hooks; other httpx
+clients in the process (test clients, third-party libraries) are not affected.
+Queue waits are recorded as "rate_limit_wait" trace spans.
+"""
+
+import asyncio
+import functools
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from app.utils.exceptions import RateLimitError
+from app.utils.tracing import TracedSyncTransport, TracedTransport, get_tracer, span
+
+logger = logging.getLogger(__name__)
+
+# Bucket capacity in seconds of budget: at most this much of a minute's
+# budget can be spent in one burst
+BURST_SECONDS = 10.0
+
+# Pause applied on a 429 without a usable Retry-After header, and the cap
+DEFAULT_429_PAUSE_SECONDS = 2.0
+MAX_429_PAUSE_SECONDS = 60.0
+
+HUGGINGFACE_HOSTS = ("router.huggingface.co", "api-inference.huggingface.co")
+
+
+class Priority(IntEnum):
+    """Admission order for upstream calls (lower goes first)."""
+    INTERACTIVE = 0
+    INGESTION = 1
+    EVALUATION = 2
+
+
+# Queue deadline per priority, as a multiple of the limiter's queue_timeout
+QUEUE_TIMEOUT_FACTORS = {
+    Priority.INTERACTIVE: 1,
+    Priority.INGESTION: 10,
+    Priority.EVALUATION: 10,
+}
+
+_priority: ContextVar[Priority] = ContextVar("upstream_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+@contextmanager
+def upstream_priority(priority: Priority):
+    """Run upstream calls made inside the block with the given priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def with_upstream_priority(priority: Priority) -> Callable:
+    """Decorator: run a coroutine function's upstream calls with the given priority."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with upstream_priority(priority):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TokenBucket:
+    """Continuously refilled token bucket (capacity <= 0 means unlimited)."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    @classmethod
+    def per_minute(cls, limit: float, burst_seconds: float = 60.0) -> "TokenBucket":
+        """Bucket for a per-minute limit holding `burst_seconds` worth of budget."""
+        if limit <= 0:
+            return cls(0, 0)
+        return cls(capacity=max(1.0, limit * burst_seconds / 60), refill_per_second=limit / 60)
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+            self.updated = now
+
+    def wait_time(self, amount: float = 1.0, now: Optional[float] = None) -> float:
+        """Seconds until `amount` can be taken (requests above capacity wait for a full bucket)."""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill(time.monotonic() if now is None else now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def take(self, amount: float = 1.0, now: Optional[float] = None) -> None:
+        """Spend tokens; the balance may go negative, which delays later callers."""
+        if self.capacity <= 0:
+            return
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    wake: Callable[[], None] = field(compare=False)
+
+
+class UpstreamLimiter:
+    """Priority-queued token-bucket limiter for one upstream API."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        queue_timeout: float = 30.0,
+        burst_seconds: float = BURST_SECONDS
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.queue_timeout = queue_timeout
+        self._requests = TokenBucket.per_minute(requests_per_minute, burst_seconds)
+        self._tokens = TokenBucket.per_minute(tokens_per_minute, burst_seconds)
+        self._paused_until: Dict[Optional[str], float] = {}  # model (None = whole upstream) -> monotonic time
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._throttled = 0
+        self._stats = {
+            p: {"admitted": 0, "rejected": 0, "wait_ms_total": 0.0, "max_wait_ms": 0.0}
+            for p in Priority
+        }
+
+    # -- queue --------------------------------------------------------------
+
+    def _enqueue(self, tokens: int, priority: Priority, wake: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(int(priority), next(self._seq), tokens, wake)
+        with self._lock:
+            heapq.heappush(self._queue, waiter)
+        return waiter
+
+    def _poll(self, waiter: _Waiter) -> Tuple[bool, Optional[float]]:
+        """Admit the waiter if it heads the queue and the budget allows.
+
+        Returns (admitted, seconds until the head can go, or None when the
+        waiter is not at the head and must wait to be woken).
+        """
+        with self._lock:
+            if self._queue[0] is not waiter:
+                return False, None
+            now = time.monotonic()
+            wait = max(
+                self._paused_until.get(None, 0.0) - now,
+                self._requests.wait_time(1, now),
+                self._tokens.wait_time(waiter.tokens, now)
+            )
+            if wait > 0:
+                return False, wait
+            heapq.heappop(self._queue)
+            self._requests.take(1, now)
+            self._tokens.take(waiter.tokens, now)
+            self._wake_head()
+            return True, 0.0
+
+    def _wake_head(self) -> None:
+        # Called with the lock held
+        if self._queue:
+            try:
+                self._queue[0].wake()
+            except RuntimeError:
+                pass  # Waiter's event loop is gone; it's removed when it errors out
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter not in self._queue:
+                return
+            was_head = self._queue[0] is waiter
+            self._queue.remove(waiter)
+            heapq.heapify(self._queue)
+            if was_head:
+                self._wake_head()
+
+    def _deadline(self, priority: Priority, timeout: Optional[float]) -> float:
+        if timeout is None:
+            timeout = self.queue_timeout * QUEUE_TIMEOUT_FACTORS[priority]
+        return time.monotonic() + timeout
+
+    def _admitted(self, priority: Priority, waited: float) -> float:
+        with self._lock:
+            stats = self._stats[priority]
+            stats["admitted"] += 1
+            stats["wait_ms_total"] += waited * 1000
+            stats["max_wait_ms"] = max(stats["max_wait_ms"], waited * 1000)
+        return waited
+
+    def _reject(self, waiter: Optional[_Waiter], priority: Priority, waited: float) -> RateLimitError:
+        if waiter is not None:
+            self._abandon(waiter)
+        with self._lock:
+            self._stats[priority]["rejected"] += 1
+            depth = len(self._queue)
+        logger.warning(f"[UPSTREAM] {self.name}: {priority.name.lower()} call not admitted after {waited:.1f}s (queue={depth})")
+        return RateLimitError(
+            f"{self.name} is busy: request not admitted within {waited:.1f}s",
+            details={"upstream": self.name, "priority": priority.name.lower(), "queue_depth": depth}
+        )
+
+    # -- admission ----------------------------------------------------------
+
+    def _pause_remaining(self, key: Optional[str]) -> float:
+        if key is None:
+            return 0.0
+        with self._lock:
+            return max(0.0, self._paused_until.get(key, 0.0) - time.monotonic())
+
+    async def acquire(
+        self,
+        tokens: int = 0,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+        key: Optional[str] = None
+    ) -> float:
+        """Wait for admission; returns the seconds spent waiting.
+
+        Args:
+            tokens: Estimated tokens of the call
+            priority: Queue priority (default: the context's upstream_priority)
+            timeout: Max wait (default: queue_timeout scaled by priority)
+            key: Model of the call; a model paused after a 429 waits out the
+                pause before queueing
+
+        Raises:
+            RateLimitError: if not admitted before the deadline
+        """
+        priority = current_priority() if priority is None else priority
+        start = time.monotonic()
+        deadline = self._deadline(priority, timeout)
+        wait_span = functools.partial(
+            span, f"rate_limit {self.name}", "rate_limit_wait", priority=priority.name.lower(), model=key
+        )
+        pause = self._pause_remaining(key)
+        if pause > 0:
+            if start + pause > deadline:
+                raise self._reject(None, priority, 0.0)
+            with wait_span(reason="429"):
+                await asyncio.sleep(pause)
+
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = self._enqueue(tokens, priority, lambda: loop.call_soon_threadsafe(event.set))
+        admitted, wait = self._poll(waiter)
+        if admitted:
+            return self._admitted(priority, time.monotonic() - start)
+
+        with wait_span(reason="queue"):
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject(waiter, priority, time.monotonic() - start)
+                    try:
+                        await asyncio.wait_for(event.wait(), remaining if wait is None else min(wait, remaining))
+                    except asyncio.TimeoutError:
+                        pass
+                    event.clear()
+                    admitted, wait = self._poll(waiter)
+                    if admitted:
+                        return self._admitted(priority, time.monotonic() - start)
+            except asyncio.CancelledError:
+                self._abandon(waiter)
+                raise
+
+    def acquire_sync(
+        self,
+        tokens: int = 0,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+        key: Optional[str] = None
+    ) -> float:
+        """Blocking acquire() for synchronous clients."""
+        priority = current_priority() if priority is None else priority
+        start = time.monotonic()
+        deadline = self._deadline(priority, timeout)
+        pause = self._pause_remaining(key)
+        if pause > 0:
+            if start + pause > deadline:
+                raise self._reject(None, priority, 0.0)
+            time.sleep(pause)
+        event = threading.Event()
+        waiter = self._enqueue(tokens, priority, event.set)
+        while True:
+            event.clear()
+            admitted, wait = self._poll(waiter)
+            if admitted:
+                return self._admitted(priority, time.monotonic() - start)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._reject(waiter, priority, time.monotonic() - start)
+            event.wait(remaining if wait is None else min(wait, remaining))
+
+    # -- feedback from responses --------------------------------------------
+
+    def throttle(self, retry_after: Optional[float] = None, key: Optional[str] = None) -> None:
+        """Pause a model (or the whole upstream when key is None) after a 429.
+
+        The pause lasts Retry-After seconds, or DEFAULT_429_PAUSE_SECONDS.
+        """
+        pause = min(retry_after if retry_after is not None else DEFAULT_429_PAUSE_SECONDS, MAX_429_PAUSE_SECONDS)
+        with self._lock:
+            self._paused_until[key] = max(self._paused_until.get(key, 0.0), time.monotonic() + pause)
+            self._throttled += 1
+        logger.warning(f"[UPSTREAM] {self.name}: 429 received, pausing {key or 'all models'} for {pause:.1f}s")
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real usage of a call is known."""
+        with self._lock:
+            self._tokens.take(actual_tokens - estimated_tokens)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "queue_depth": len(self._queue),
+                "paused": {
+                    key or "*": round(until - now, 2)
+                    for key, until in self._paused_until.items() if until > now
+                },
+                "throttled": self._throttled,
+                "priorities": {
+                    p.name.lower(): {
+                        "admitted": s["admitted"],
+                        "rejected": s["rejected"],
+                        "avg_wait_ms": round(s["wait_ms_total"] / s["admitted"], 1) if s["admitted"] else 0,
+                        "max_wait_ms": round(s["max_wait_ms"], 1),
+                    }
+                    for p, s in self._stats.items()
+                },
+            }
+
+
+# =============================================================================
+# REGISTRY AND HTTPX CLIENTS
+# =============================================================================
+
+_limiters: Dict[str, UpstreamLimiter] = {}
+_registry_lock = threading.Lock()
+_enabled = False
+
+
+def get_upstream_limiter(name: str) -> UpstreamLimiter:
+    """Shared limiter for an upstream ("openrouter" or "huggingface")."""
+    with _registry_lock:
+        if name not in _limiters:
+            from app.config import settings
+            if name == "openrouter":
+                rpm, tpm = settings.openrouter_rpm, settings.openrouter_tpm
+            elif name == "huggingface":
+                rpm, tpm = settings.huggingface_rpm, 0
+            else:
+                raise ValueError(f"Unknown upstream: {name}")
+            _limiters[name] = UpstreamLimiter(
+                name, rpm, tpm, queue_timeout=settings.upstream_queue_timeout_seconds
+            )
+        return _limiters[name]
+
+
+def get_upstream_limit_stats() -> Dict[str, Any]:
+    """Stats of every upstream limiter created so far."""
+    with _registry_lock:
+        limiters = dict(_limiters)
+    return {"enabled": _enabled, **{name: limiter.get_stats() for name, limiter in limiters.items()}}
+
+
+def upstream_for_host(host: Optional[str]) -> Optional[str]:
+    """Upstream name for a request host, or None for hosts that aren't limited."""
+    if not host:
+        return None
+    from app.config import settings
+    if host == urlparse(settings.openrouter_base_url).hostname:
+        return "openrouter"
+    if host in HUGGINGFACE_HOSTS:
+        return "huggingface"
+    return None
+
+
+def enable_upstream_limits(enabled: bool = True) -> None:
+    """Turn the shared limits on (or off) for clients built with upstream_client()."""
+    global _enabled
+    _enabled = enabled
+    logger.info(f"[UPSTREAM] Shared rate limits {'enabled' if enabled else 'disabled'} for OpenRouter and HuggingFace calls")
+
+
+def upstream_limits_active() -> bool:
+    """Whether outbound calls go through the shared limiters (and 429s pause them)."""
+    return _enabled
+
+
+def _estimate_tokens(request) -> int:
+    """Rough prompt size of a request (~4 bytes per token)."""
+    try:
+        return len(request.content) // 4
+    except Exception:
+        return 0  # Streaming request body
+
+
+def _request_json(request) -> Dict[str, Any]:
+    try:
+        return json.loads(request.content)
+    except Exception:
+        return {}
+
+
+def _request_model(request) -> Optional[str]:
+    """Model a request targets: the JSON "model" field (OpenRouter) or the URL path (HuggingFace)."""
+    if request.url.host in HUGGINGFACE_HOSTS:
+        return request.url.path
+    return _request_json(request).get("model")
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _limiter_for(request) -> Optional[UpstreamLimiter]:
+    if not _enabled:
+        return None
+    upstream = upstream_for_host(request.url.host)
+    return get_upstream_limiter(upstream) if upstream else None
+
+
+def _reports_usage(response) -> bool:
+    """Whether the body carries the call's token usage (a non-streamed chat completion)."""
+    return (
+        response.status_code == 200
+        and response.request.url.path.endswith("chat/completions")
+        and not _request_json(response.request).get("stream")
+    )
+
+
+def _observe(limiter: UpstreamLimiter, response) -> None:
+    request = response.request
+    if response.status_code == 429:
+        limiter.throttle(_retry_after(response), key=_request_model(request))
+    elif _reports_usage(response):
+        try:
+            total = response.json().get("usage", {}).get("total_tokens")
+        except Exception:
+            total = None
+        if total:
+            limiter.settle(_estimate_tokens(request), total)
+
+
+async def _admit_async(request) -> None:
+    limiter = _limiter_for(request)
+    if limiter is not None:
+        await limiter.acquire(_estimate_tokens(request), key=_request_model(request))
+
+
+async def _observe_async(response) -> None:
+    limiter = _limiter_for(response.request)
+    if limiter is not None:
+        if _reports_usage(response):
+            await response.aread()
+        _observe(limiter, response)
+
+
+def _admit(request) -> None:
+    limiter = _limiter_for(request)
+    if limiter is not None:
+        limiter.acquire_sync(_estimate_tokens(request), key=_request_model(request))
+
+
+def _observe_sync(response) -> None:
+    limiter = _limiter_for(response.request)
+    if limiter is not None:
+        if _reports_usage(response):
+            response.read()
+        _observe(limiter, response)
+
+
+def _with_hooks(kwargs: Dict[str, Any], admit: Callable, observe: Callable) -> Dict[str, Any]:
+    hooks = kwargs.get("event_hooks") or {}
+    kwargs["event_hooks"] = {
+        **hooks,
+        "request": [admit, *hooks.get("request", [])],
+        "response": [observe, *hooks.get("response", [])],
+    }
+    return kwargs
+
+
+def upstream_async_client(**kwargs) -> httpx.AsyncClient:
+    """httpx.AsyncClient whose calls to known upstreams go through their limiters.
+
+    The limiter is applied with event hooks, so only clients built here are
+    throttled; kwargs are passed to httpx.AsyncClient. While limits are
+    disabled the hooks do nothing. With tracing enabled, the transport records
+    each request as an "http" span.
+    """
+    if get_tracer().enabled:
+        kwargs["transport"] = TracedTransport(kwargs.get("transport"))
+    return httpx.AsyncClient(**_with_hooks(kwargs, _admit_async, _observe_async))
+
+
+def upstream_client(**kwargs) -> httpx.Client:
+    """Synchronous counterpart of upstream_async_client()."""
+    if get_tracer().enabled:
+        kwargs["transport"] = TracedSyncTransport(kwargs.get("transport"))
+    return httpx.Client(**_with_hooks(kwargs, _admit, _observe_sync))
@@ -0,0 +1,89 @@
+"""Tests for per-candidate profiles computed at ingestion."""
+import pytest
+
+from app.services import candidate_profile_service
+from app.services.candidate_profile_service import CandidateProfileStore, build_profile
+from app.services.output_processor.modules.red_flags_module import RedFlagsModule
+from app.services.output_processor.modules.timeline_module import TimelineModule
+from app.services.smart_chunking_service import SmartChunkingService
+
+CV_TEXT = """Maria Lopez
+Senior Backend Engineer
+
+EXPERIENCE
+Senior Backend Engineer at Acme Corp
+2019 - Present
+Built Python microservices on AWS.
+
+Backend Engineer at Hooli
+2017 - 2019
+Ran the payments API.
+
+Backend Developer at Globex
+2012 - 2015
+Maintained Java services.
+
+Junior Developer at Initech
+2010 - 2012
+Wrote SQL reports.
+
+SKILLS
+Python, AWS, Docker, SQL, Java
+
+LANGUAGES
+English (native), French
+"""
+
+
+@pytest.fixture
+def chunks():
+    return SmartChunkingService().chunk_cv(CV_TEXT, cv_id="cv_maria01", filename="Maria_Lopez_Backend.pdf")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = CandidateProfileStore(path=tmp_path / "candidate_profiles.json")
+    monkeypatch.setattr(candidate_profile_service, "_profile_store", store)
+    return store
+
+
+def test_profile_matches_summary_metadata(chunks):
+    profile = build_profile(chunks)
+    summary = chunks[0]["metadata"]
+
+    assert profile.cv_id == "cv_maria01"
+    assert profile.total_experience_years == summary["total_experience_years"]
+    assert profile.job_hopping_score == summary["job_hopping_score"]
+    assert profile.employment_gaps_count == summary["employment_gaps_count"]
+    assert len(profile.positions) == summary["position_count"]
+    assert [p.start_year for p in profile.positions] == sorted(p.start_year for p in profile.positions)
+    assert "French" in profile.languages and profile.flags["speaks_french"]
+    assert build_profile([c for c in chunks if not c["metadata"].get("is_summary")]) is None
+
+
+def test_store_persists_and_deletes(chunks, store, tmp_path):
+    store.index_cv_chunks(chunks)
+    reloaded = CandidateProfileStore(path=tmp_path / "candidate_profiles.json")
+    assert reloaded.get("cv_maria01") == store.get("cv_maria01")
+
+    store.delete("cv_maria01")
+    assert store.get("cv_maria01") is None
+    assert len(CandidateProfileStore(path=tmp_path / "candidate_profiles.json")) == 0
+
+
+def test_modules_read_profile_instead_of_retrieved_chunks(chunks, store):
+    store.index_cv_chunks(chunks)
+    # As retrieved: metadata carries cv_id, only the most recent position was returned
+    retrieved = [
+        {"content": c["content"], "metadata": {**c["metadata"], "cv_id": c["cv_id"]}}
+        for c in chunks
+        if c["metadata"]["section_type"] == "experience"
+    ][-1:]
+
+    timeline = TimelineModule().extract(retrieved).timelines[0]
+    assert len(timeline.entries) == len(store.get("cv_maria01").positions)
+
+    assert store.get("cv_maria01").employment_gaps == [(2015, 2017)]
+    flags = RedFlagsModule().extract(retrieved).flags
+    gap_flags = [f for f in flags if f.flag_type == "employment_gap"]
+    assert gap_flags and gap_flags[0].details["gaps"] == [[2015, 2017]]
@@ -0,0 +1,83 @@
+"""Tests for vectorized bulk session scoring."""
+import random
+
+import pytest
+
+from app.services.candidate_scoring_service import CandidateScoringService
+
+SKILLS = ["Python", "React", "AWS", "Docker", "Kubernetes", "SQL", "Java", "Go", "Figma", "Excel"]
+
+
+def _summary_chunk(i, rng):
+    return {
+        "cv_id": f"cv_{i:03d}",
+        "filename": f"candidate_{i}.pdf",
+        "chunk_index": 0,
+        "metadata": {
+            "is_summary": True,
+            "candidate_name": f"Candidate {i}",
+            "skills": ", ".join(rng.sample(SKILLS, rng.randint(0, 6))),
+            "total_experience_years": rng.choice([0, 1.5, 3, 5, 8, 12]),
+            "education_level": rng.choice(["", "Bachelor", "Master", "PhD"]),
+            "education_field": rng.choice(["", "Computer Science", "Design"]),
+            "education_institution": "",
+            "languages": ", ".join(rng.sample(["English", "Spanish", "French"], rng.randint(0, 3))),
+            "certifications": ", ".join(rng.sample(["AWS SAA", "PMP", "CKA"], rng.randint(0, 3))),
+            "location": rng.choice(["Madrid, Spain", "London", "Remote"]),
+        },
+    }
+
+
+@pytest.fixture
+def service():
+    rng = random.Random(3)
+    service = CandidateScoringService()
+    for i in range(40):
+        service.index_cv_chunks([_summary_chunk(i, rng)])
+    return service
+
+
+def test_vectorized_scores_match_single_candidate(service):
+    profile = service.create_profile(
+        name="Backend",
+        weights=[
+            {"criteria": c, "weight": 1}
+            for c in ["skills_match", "experience", "education", "certifications", "languages", "location", "relevance"]
+        ],
+        required_skills=["python", "docker"],
+        preferred_skills=["Kubernetes"],
+        min_experience=2,
+        ideal_experience=6,
+        required_education="master",
+        preferred_locations=["Madrid"],
+    )
+    cv_ids = [f"cv_{i:03d}" for i in range(40)]
+    table = service.get_feature_table("s1", cv_ids)
+    raw = service.score_table(table, profile)
+
+    for i in range(len(table)):
+        single = service.score_candidate(table.candidate_data(i), profile_id=profile.id)
+        for cs in single.criteria_scores:
+            assert raw[cs.criteria][i] == pytest.approx(cs.raw_score)
+
+
+def test_score_session_ranks_and_paginates(service):
+    cv_ids = [f"cv_{i:03d}" for i in range(40)] + ["cv_unknown"]
+    first = service.score_session("s1", cv_ids, page=1, page_size=15)
+    last = service.score_session("s1", cv_ids, page=3, page_size=15)
+
+    assert first["total"] == 40
+    assert first["missing"] == 1
+    assert len(first["results"]) == 15
+    assert len(last["results"]) == 10
+    assert [r["rank"] for r in last["results"]] == list(range(31, 41))
+
+    scores = [r["total_score"] for r in first["results"] + last["results"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_feature_table_rebuilt_when_corpus_changes(service):
+    cv_ids = [f"cv_{i:03d}" for i in range(10)]
+    table = service.get_feature_table("s1", cv_ids)
+    assert service.get_feature_table("s1", cv_ids) is table
+    assert len(service.get_feature_table("s1", cv_ids[:5])) == 5
@@ -0,0 +1,102 @@
+"""Tests for token-budgeted context packing."""
+from app.prompts.context_packer import deduplicate_chunks, pack_chunks
+from app.prompts.templates import format_context
+from app.utils.text_utils import estimate_tokens
+
+
+def _chunk(cv_id, name, content, score=0.5):
+    return {
+        "content": content,
+        "metadata": {"cv_id": cv_id, "candidate_name": name, "filename": f"{cv_id}.pdf"},
+        "score": score,
+    }
+
+
+EXPERIENCE = (
+    "Senior Software Engineer at TechCorp leading a team of eight engineers building "
+    "microservices in Python and Go, owning CI/CD pipelines and on-call rotation for "
+    "payments infrastructure serving millions of users every day"
+)
+
+
+class TestDeduplication:
+
+    def test_duplicate_cv_upload_is_dropped(self):
+        chunks = [
+            _chunk("cv_001", "John Smith", EXPERIENCE),
+            _chunk("cv_002", "John Smith", EXPERIENCE + " across Europe"),
+        ]
+        kept, dropped = deduplicate_chunks(chunks)
+        assert kept == [0]
+        assert dropped == 1
+
+    def test_same_name_different_content_is_kept(self):
+        chunks = [
+            _chunk("cv_001", "John Smith", EXPERIENCE),
+            _chunk("cv_002", "John Smith", "Head chef at a Michelin starred restaurant in Lyon, menu design and kitchen staff training"),
+        ]
+        kept, _ = deduplicate_chunks(chunks)
+        assert kept == [0, 1]
+
+    def test_different_names_are_never_merged(self):
+        chunks = [
+            _chunk("cv_001", "John Smith", EXPERIENCE),
+            _chunk("cv_002", "Jane Doe", EXPERIENCE),
+        ]
+        kept, _ = deduplicate_chunks(chunks)
+        assert kept == [0, 1]
+
+    def test_repeated_chunk_of_same_cv_is_dropped(self):
+        chunks = [_chunk("cv_001", "John Smith", EXPERIENCE)] * 3
+        kept, dropped = deduplicate_chunks(chunks)
+        assert kept == [0]
+        assert dropped == 2
+
+
+class TestPacking:
+
+    def test_no_budget_keeps_everything(self):
+        chunks = [_chunk(f"cv_{i}", f"Person {i}", EXPERIENCE + f" {i}") for i in range(5)]
+        packed = pack_chunks(chunks)
+        assert len(packed.chunks) == 5
+        assert packed.total_tokens == sum(packed.token_counts)
+
+    def test_budget_is_respected_and_every_candidate_represented(self):
+        chunks = []
+        for i in range(6):
+            for j in range(4):
+                chunks.append(_chunk(f"cv_{i}", f"Person {i}", f"{EXPERIENCE} section {j} of person {i}", score=0.9 - i * 0.1))
+        packed = pack_chunks(chunks, token_budget=400)
+        assert packed.total_tokens <= 400
+        assert packed.candidates_included == 6
+        assert {p.chunk["metadata"]["cv_id"] for p in packed.chunks} == {f"cv_{i}" for i in range(6)}
+        assert packed.over_budget_dropped > 0
+
+    def test_oversized_chunk_is_truncated_to_quota(self):
+        chunks = [_chunk("cv_001", "John Smith", EXPERIENCE * 20), _chunk("cv_002", "Jane Doe", EXPERIENCE)]
+        packed = pack_chunks(chunks, token_budget=300)
+        assert len(packed.chunks) == 2
+        assert packed.chunks[0].truncated
+        assert packed.total_tokens <= 300
+
+
+def test_format_context_reports_token_usage():
+    chunks = [_chunk(f"cv_{i}", f"Person {i}", EXPERIENCE + f" {i}") for i in range(3)]
+    ctx = format_context(chunks, token_budget=10_000)
+    assert ctx.num_chunks == 3
+    assert len(ctx.token_counts) == 3
+    assert ctx.total_tokens == sum(ctx.token_counts)
+    assert ctx.cv_ids == ["cv_0", "cv_1", "cv_2"]
+    assert "### CV #3: Person 2" in ctx.text
+
+
+def test_rendered_context_stays_within_budget():
+    # 12 candidates: headers reach "CV #12", separators count too
+    chunks = [
+        _chunk(f"cv_{i}", f"Person {i}", f"{EXPERIENCE * (1 + i % 3)} section {j}", score=1 - i / 20)
+        for i in range(12) for j in range(2)
+    ]
+    for budget in range(200, 3000, 7):
+        ctx = format_context(chunks, token_budget=budget)
+        assert estimate_tokens(ctx.text) <= budget
+        assert ctx.total_tokens == sum(ctx.token_counts) <= budget
@@ -0,0 +1,42 @@
+"""Tests for the bounded session debug log."""
+import json
+
+import pytest
+
+from app.utils import debug_logger
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(debug_logger, "DEBUG_LOGS_DIR", tmp_path)
+    yield tmp_path
+    debug_logger.configure_debug_log(level="INFO", sample_rate=1.0, buffer_size=200)
+    debug_logger.clear_session_log("sess_ring_buffer")
+    debug_logger.clear_session_log("sess_disabled")
+
+
+def test_ring_buffer_and_incremental_jsonl(log_dir):
+    debug_logger.configure_debug_log(buffer_size=3)
+    debug_logger.set_current_session("sess_ring_buffer")
+    for i in range(10):
+        debug_logger.log_event("STEP", {"i": i})
+
+    events = debug_logger.get_session_events("sess_ring_buffer")
+    assert [e["data"]["i"] for e in events] == [7, 8, 9]
+
+    assert debug_logger.flush_debug_logs(timeout=5)
+    path = debug_logger.save_session_log("sess_ring_buffer")
+    lines = [json.loads(line) for line in open(path, encoding="utf-8")]
+    assert len(lines) == 11  # SESSION_START + 10 steps, nothing rewritten
+
+
+def test_disabled_level_skips_serialization(log_dir, monkeypatch):
+    debug_logger.set_current_session("sess_disabled")
+    debug_logger.configure_debug_log(level="ERROR")
+
+    def fail(_):
+        raise AssertionError("payload serialized while disabled")
+
+    monkeypatch.setattr(debug_logger, "_serialize_data", fail)
+    debug_logger.log_event("STEP", {"i": 1})
+    debug_logger.log_retrieval([{"metadata": {}}])
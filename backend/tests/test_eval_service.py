@@ -0,0 +1,75 @@
+"""Tests for incremental evaluation analytics."""
+import json
+from datetime import datetime
+
+from app.services.eval_service import EvalService, LatencySketch
+
+
+def _log(service, confidence, total_ms, passed=True, session="s1"):
+    service.log_query(
+        query=f"query {confidence}",
+        response="answer",
+        sources=[],
+        metrics={"total_ms": total_ms, "llm_ms": total_ms / 2},
+        hallucination_check={"confidence_score": confidence, "warnings": []},
+        guardrail_passed=passed,
+        session_id=session,
+    )
+
+
+def test_daily_stats_are_incremental(tmp_path):
+    service = EvalService(log_dir=tmp_path)
+    _log(service, 0.9, 100)
+    _log(service, 0.3, 300, session="s2")
+    _log(service, 0.8, 200, passed=False)
+
+    stats = service.get_daily_stats()
+    assert stats.total_queries == 3
+    assert stats.guardrail_rejections == 1
+    assert stats.low_confidence_count == 1
+    assert stats.unique_sessions == 2
+    assert abs(stats.avg_latency_ms - 200) < 1e-9
+    assert abs(stats.p50_latency_ms - 200) / 200 < 0.02
+
+    # A fresh instance on the same directory reads the persisted counters
+    date = datetime.now().strftime('%Y%m%d')
+    assert (tmp_path / f"stats_{date}.json").exists()
+    assert EvalService(log_dir=tmp_path).get_daily_stats().total_queries == 3
+
+
+def test_detail_queries_use_secondary_index(tmp_path):
+    service = EvalService(log_dir=tmp_path)
+    _log(service, 0.95, 100)
+    _log(service, 0.2, 100)
+    _log(service, 0.9, 100, passed=False)
+
+    low = service.get_low_confidence_queries()
+    assert [q["confidence"] for q in low] == [0.2]
+    assert len(service.get_guardrail_rejections()) == 1
+
+    date = datetime.now().strftime('%Y%m%d')
+    index_lines = (tmp_path / f"index_{date}.jsonl").read_text().splitlines()
+    assert len(index_lines) == 2
+
+
+def test_legacy_log_is_rebuilt_once(tmp_path):
+    date = datetime.now().strftime('%Y%m%d')
+    entry = {
+        "timestamp": datetime.now().isoformat(), "session_id": "s1", "query": "q",
+        "response": "r", "sources": [], "metrics": {"total_ms": 50},
+        "hallucination_check": {}, "guardrail_passed": True, "confidence_score": 0.1,
+    }
+    (tmp_path / f"queries_{date}.jsonl").write_text(json.dumps(entry) + "\n")
+
+    service = EvalService(log_dir=tmp_path)
+    assert len(service.get_low_confidence_queries()) == 1
+    _log(service, 0.9, 150)
+    assert service.get_daily_stats().total_queries == 2
+
+
+def test_latency_sketch_percentiles():
+    sketch = LatencySketch()
+    for v in range(1, 1001):
+        sketch.add(float(v))
+    assert abs(sketch.quantile(0.99) - 990) / 990 < 0.02
+    assert abs(sketch.quantile(0.50) - 500) / 500 < 0.02
@@ -0,0 +1,91 @@
+"""Tests for the background query logging / RAGAS evaluation worker."""
+import asyncio
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.services.eval_service import EvalService
+from app.services.eval_worker import EvalJob, EvalWorker
+
+
+def _job(service, evaluate=None, query="python developers"):
+    record = EvalService.build_record(
+        query=query,
+        response="answer",
+        sources=[{"cv_id": "cv_1"}],
+        metrics={"total_ms": 120},
+        hallucination_check={"is_valid": True, "confidence_score": 0.8, "warnings": []},
+        guardrail_passed=True,
+        session_id="s1",
+    )
+    return EvalJob(record=record, eval_service=service, evaluate=evaluate, context_chunks=["chunk"])
+
+
+async def _slow_evaluate(**kwargs):
+    await asyncio.sleep(0.2)
+    return SimpleNamespace(
+        faithfulness=0.9, answer_relevancy=0.8, context_relevancy=0.7,
+        context_precision=0.6, overall_score=0.75
+    )
+
+
+def _logged(tmp_path):
+    date = datetime.now().strftime('%Y%m%d')
+    return [json.loads(line) for line in (tmp_path / f"queries_{date}.jsonl").read_text().splitlines()]
+
+
+def test_submit_is_non_blocking_and_logs_in_batches(tmp_path):
+    service = EvalService(log_dir=tmp_path)
+    worker = EvalWorker(sample_rate=1.0, batch_size=8, concurrency=4, flush_interval=0.05)
+
+    async def run():
+        started = time.perf_counter()
+        for i in range(5):
+            assert worker.submit(_job(service, _slow_evaluate, query=f"q{i}"))
+        submit_s = time.perf_counter() - started
+        await worker.drain(timeout=5)
+        return submit_s
+
+    assert asyncio.run(run()) < 0.05
+    entries = _logged(tmp_path)
+    assert [e["query"] for e in entries] == [f"q{i}" for i in range(5)]
+    assert all(e["ragas"]["overall_score"] == 0.75 for e in entries)
+    assert service.get_daily_stats().total_queries == 5
+
+    stats = worker.get_stats()
+    assert stats["batches"] == 1 and stats["logged"] == 5 and stats["evaluated"] == 5
+    assert stats["avg_eval_ms"] >= 200
+
+
+def test_unsampled_jobs_are_only_logged(tmp_path):
+    service = EvalService(log_dir=tmp_path)
+    worker = EvalWorker(sample_rate=0.0, flush_interval=0.01)
+    calls = []
+
+    async def evaluate(**kwargs):
+        calls.append(kwargs)
+
+    async def run():
+        worker.submit(_job(service, evaluate))
+        await worker.drain(timeout=5)
+
+    asyncio.run(run())
+    assert not calls
+    assert "ragas" not in _logged(tmp_path)[0]
+    assert worker.get_stats()["logged"] == 1
+
+
+def test_full_queue_drops_jobs(tmp_path):
+    service = EvalService(log_dir=tmp_path)
+    worker = EvalWorker(sample_rate=0.0, max_queue=2, flush_interval=0.01)
+
+    async def run():
+        # The worker task can't run until we yield, so the queue fills up
+        accepted = [worker.submit(_job(service)) for _ in range(3)]
+        await worker.drain(timeout=5)
+        return accepted
+
+    assert asyncio.run(run()) == [True, True, False]
+    stats = worker.get_stats()
+    assert stats["dropped"] == 1 and stats["logged"] == 2
@@ -0,0 +1,81 @@
+"""Tests for streaming session exports."""
+import pytest
+
+from app.services.export_service import ExportService
+
+
+def _messages(turns):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}"})
+        messages.append({
+            "role": "assistant",
+            "content": f"Answer {i}",
+            "structured_output": {
+                "direct_answer": f"**Direct** answer {i}",
+                "conclusion": f"Conclusion {i}",
+                "ranking_table": {"ranked": [
+                    {"rank": 1, "candidate_name": f"Ana {i}", "cv_id": "cv_1", "overall_score": 91, "skills": "Python, AWS"},
+                    {"rank": 2, "candidate_name": f"Luis {i}", "cv_id": "cv_2", "overall_score": 78},
+                ]},
+            },
+        })
+    return messages
+
+
+SESSION = {"id": "s1", "name": "Backend hiring", "cvs": [{"id": "cv_1", "filename": "cv_Ana_1.pdf"}]}
+
+
+def _pager(messages, calls):
+    def fetch_page(offset, limit):
+        calls.append((offset, limit))
+        return messages[offset:offset + limit]
+    return fetch_page
+
+
+def test_stream_csv_matches_in_memory_export():
+    service = ExportService()
+    messages = _messages(30)
+    calls = []
+    progress = service.start_export("s1", "csv", len(messages))
+
+    streamed = b"".join(service.stream_csv(
+        {**SESSION, "message_count": len(messages)},
+        service.iter_messages(_pager(messages, calls), progress=progress, page_size=7),
+        progress
+    ))
+    report = service.create_report_from_session(SESSION, messages)
+    expected = service.generate_csv(report)
+
+    def body(data):
+        # Drop the metadata header (count line differs) and the trailing count row
+        lines = data.decode("utf-8-sig").splitlines()
+        return [line for line in lines[6:] if not line.startswith("# Total Conversations")]
+
+    assert streamed.startswith(b"\xef\xbb\xbf")
+    assert body(streamed) == body(expected)
+    assert "# Total Conversations: 30" in streamed.decode("utf-8-sig")
+    assert len(calls) == 9  # 60 messages in pages of 7
+    assert progress.to_dict()["status"] == "done"
+    assert progress.processed_messages == 60
+    assert progress.turns == 30
+    assert progress.bytes_sent == len(streamed) - 3
+
+
+def test_stream_pdf_in_chunks():
+    service = ExportService()
+    if not service._pdf_available:
+        pytest.skip("fpdf2 not installed")
+    messages = _messages(5)
+    progress = service.start_export("s1", "pdf", len(messages))
+
+    chunks = list(service.stream_pdf(
+        {**SESSION, "message_count": len(messages)},
+        service.iter_messages(_pager(messages, []), progress=progress),
+        progress
+    ))
+    data = b"".join(chunks)
+    assert data.startswith(b"%PDF")
+    assert progress.status == "done"
+    assert progress.turns == 5
+    assert progress.bytes_sent == len(data)
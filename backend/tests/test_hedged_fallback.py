@@ -0,0 +1,168 @@
+"""Tests for hedged, latency-aware model fallback against a fake OpenRouter server."""
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.config import Mode, settings
+from app.providers.cloud.llm import OpenRouterLLMProvider
+from app.providers.factory import ProviderFactory
+from app.services import fallback_chain_service
+from app.services.fallback_chain_service import FailureReason, FallbackChainService
+from app.services.multi_query_service import MultiQueryService
+from app.services.rag_service_v5 import PipelineContextV5, RAGConfigV5, RAGServiceV5
+from app.services.reranking_service import RerankingService
+
+# model -> {"delay": seconds before answering / first token, "status": HTTP status, "content": text}
+BEHAVIOR = {}
+CALLS = []
+
+
+def _fake_openrouter() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body["model"]
+        behavior = BEHAVIOR.get(model, {})
+        CALLS.append(model)
+        await asyncio.sleep(behavior.get("delay", 0))
+        if behavior.get("status", 200) != 200:
+            return JSONResponse({"error": {"message": "rate limited"}}, status_code=behavior["status"])
+        content = behavior.get("content", f"answer from {model}")
+        usage = {"prompt_tokens": 10, "completion_tokens": 5}
+        if not body.get("stream"):
+            return {"choices": [{"message": {"content": content}}], "usage": usage}
+
+        async def events():
+            for word in content.split(" "):
+                yield f"data: {json.dumps({'choices': [{'delta': {'content': word + ' '}}]})}\n\n"
+                await asyncio.sleep(0.01)
+            yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+@pytest.fixture(scope="module")
+def fake_openrouter_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(_fake_openrouter(), host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def fallback(monkeypatch, fake_openrouter_url):
+    monkeypatch.setattr(settings, "openrouter_base_url", fake_openrouter_url)
+    monkeypatch.setattr(settings, "llm_hedge_min_delay_ms", 50)
+    monkeypatch.setattr(fallback_chain_service, "DEFAULT_HEDGE_DELAY_MS", {})
+    monkeypatch.setattr(ProviderFactory, "_instances", {})
+    service = FallbackChainService()
+    monkeypatch.setattr(fallback_chain_service, "_fallback_service", service)
+    BEHAVIOR.clear()
+    CALLS.clear()
+    return service
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled(fallback):
+    fallback._chains["reranking"] = ["backup/fast", "backup/other"]
+    BEHAVIOR["primary/slow"] = {"delay": 3, "content": "[1, 1]"}
+    BEHAVIOR["backup/fast"] = {"content": "[2, 9]"}
+
+    # Once the primary has a p95 (~100ms), the backup starts at that point, not after 3s
+    for _ in range(5):
+        fallback.get_model_health("primary/slow").record_latency(100, "reranking")
+
+    results = [{"cv_id": "a", "content": "A", "similarity": 0.5}, {"cv_id": "b", "content": "B", "similarity": 0.5}]
+    reranker = RerankingService(model="primary/slow", api_key="sk-test")
+    started = time.perf_counter()
+    result = asyncio.run(reranker.rerank("python", results))
+
+    assert time.perf_counter() - started < 2
+    assert result.model_used == "backup/fast" and result.metadata["hedged"]
+    assert [r["cv_id"] for r in result.reranked_results] == ["b", "a"]
+
+    status = fallback.get_status()
+    assert status["backup/fast"]["ewma_latency_ms"] is not None
+    assert len(fallback.get_model_health("primary/slow").latencies["reranking"]) == 6  # Cancelled call recorded
+    assert status["primary/slow"]["consecutive_failures"] == 0
+    assert fallback.get_hedge_stats()["reranking"] == {"calls": 1, "hedges": 1, "backup_wins": 1, "failovers": 0}
+
+
+def test_rate_limited_model_fails_fast_to_next(fallback):
+    fallback._chains["multi_query"] = ["backup/ok"]
+    BEHAVIOR["primary/limited"] = {"status": 429}
+    BEHAVIOR["backup/ok"] = {"content": json.dumps({"variations": ["python devs"], "entities": {"skills": ["python"]}})}
+
+    service = MultiQueryService(model="primary/limited", hyde_enabled=False, api_key="sk-test")
+    started = time.perf_counter()
+    result = asyncio.run(service.generate("python"))
+
+    assert time.perf_counter() - started < 1  # No backoff on the rate-limited model
+    assert result.variations == ["python", "python devs"]
+    assert CALLS == ["primary/limited", "backup/ok"]
+
+    limited = fallback.get_model_health("primary/limited")
+    assert limited.last_failure_reason == FailureReason.RATE_LIMIT and not limited.is_healthy
+    assert limited.ewma_error_rate > 0
+    # The cooling-down model is routed last on the next call
+    assert fallback.route(["primary/limited", "backup/ok"]) == ["backup/ok", "primary/limited"]
+
+
+def test_streamed_generation_races_on_first_token(fallback, monkeypatch):
+    monkeypatch.setattr(settings, "llm_generation_fallback_enabled", True)
+    fallback._chains["generation"] = ["backup/stream"]
+    BEHAVIOR["primary/stream"] = {"delay": 3, "content": "slow answer"}
+    BEHAVIOR["backup/stream"] = {"content": "fast streamed answer"}
+    for _ in range(5):
+        fallback.get_model_health("primary/stream").record_latency(100, "generation")
+
+    rag = RAGServiceV5(RAGConfigV5(mode=Mode.CLOUD, generation_model="primary/stream"))
+    rag._llm = OpenRouterLLMProvider("primary/stream", api_key="sk-test")
+
+    async def collect():
+        return [item async for item in rag._generate_stream_hedged("prompt", "system")]
+
+    started = time.perf_counter()
+    chunks = asyncio.run(collect())
+
+    assert time.perf_counter() - started < 2
+    assert {model for model, _ in chunks} == {"backup/stream"}
+    assert "".join(c["token"] for _, c in chunks if c.get("token")).strip() == "fast streamed answer"
+    assert chunks[-1][1]["done"]
+
+
+def test_generation_keeps_the_selected_model_unless_fallback_enabled(fallback):
+    fallback._chains["generation"] = ["backup/free"]
+    BEHAVIOR["selected/model"] = {"delay": 0.3, "content": "selected answer"}
+    for _ in range(5):
+        fallback.get_model_health("selected/model").record_latency(50, "generation")
+
+    rag = RAGServiceV5(RAGConfigV5(mode=Mode.CLOUD, generation_model="selected/model"))
+    rag._llm = OpenRouterLLMProvider("selected/model", api_key="sk-test")
+
+    result, model, hedged = asyncio.run(rag._generate_hedged("prompt", "system"))
+    assert (result.text, model, hedged) == ("selected answer", "selected/model", False)
+    assert CALLS == ["selected/model"]
+
+    # Opted in: a fallback answer is reported, not silently substituted
+    ctx = PipelineContextV5(question="q")
+    assert rag._record_generation_model(ctx, "backup/free")["used_fallback_model"]
+    assert ctx.generation_model == "backup/free" and ctx.used_fallback_model
@@ -0,0 +1,65 @@
+"""Tests for incremental (embedding-reusing) chunk indexing."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.providers.local import vector_store as local_vector_store
+from app.providers.local.vector_store import SimpleVectorStore
+from app.services.incremental_indexing import index_chunks
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    async def embed_texts(self, texts):
+        self.texts.extend(texts)
+        return SimpleNamespace(embeddings=[[float(len(t)), 1.0] for t in texts])
+
+
+def _chunks(cv_id, texts, role="Engineer"):
+    return [
+        {"id": f"{cv_id}_chunk_{i}", "cv_id": cv_id, "filename": f"{cv_id}.pdf", "content": text,
+         "chunk_index": i, "metadata": {"candidate_name": "Ana", "current_role": role}}
+        for i, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_vector_store.settings, "chroma_persist_dir", str(tmp_path))
+    return SimpleVectorStore()
+
+
+def test_reindex_with_new_metadata_embeds_nothing(store):
+    embedder = CountingEmbedder()
+    texts = ["Ana - summary", "Python, AWS", "Acme 2019-2024"]
+    first = asyncio.run(index_chunks(_chunks("cv_1", texts), store, embedder))
+    assert (first.embedded, first.reused) == (3, 0)
+
+    # Metadata extraction changed, texts identical: metadata updated in place
+    second = asyncio.run(index_chunks(_chunks("cv_1", texts, role="Lead Engineer"), store, embedder))
+    assert (second.embedded, second.reused, second.removed) == (0, 3, 0)
+    assert len(embedder.texts) == 3
+    assert store._docs_by_cv["cv_1"]["cv_1_chunk_0"]["metadata"]["current_role"] == "Lead Engineer"
+
+
+def test_only_changed_texts_are_embedded_and_stale_chunks_removed(store):
+    embedder = CountingEmbedder()
+    asyncio.run(index_chunks(_chunks("cv_1", ["summary", "skills", "experience", "extra"]), store, embedder))
+    embedder.texts.clear()
+
+    result = asyncio.run(index_chunks(_chunks("cv_1", ["summary", "skills v2", "experience"]), store, embedder))
+
+    assert embedder.texts == ["skills v2"]
+    assert (result.embedded, result.reused, result.removed) == (1, 2, 1)
+    assert sorted(store._docs_by_cv["cv_1"]) == ["cv_1_chunk_0", "cv_1_chunk_1", "cv_1_chunk_2"]
+    assert result.to_dict()["embeddings_skipped"] == 2
+
+    # A re-upload (new cv_id) of the same PDF reuses embeddings across CVs;
+    # reuse_embeddings=False re-embeds everything
+    reupload = asyncio.run(index_chunks(_chunks("cv_2", ["summary", "skills v2"]), store, embedder))
+    assert reupload.reused == 2
+    forced = asyncio.run(index_chunks(_chunks("cv_2", ["summary", "skills v2"]), store, embedder, reuse_embeddings=False))
+    assert forced.embedded == 2 and forced.reused == 0
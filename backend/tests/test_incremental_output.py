@@ -0,0 +1,82 @@
+"""Tests for structured sections parsed while tokens stream."""
+import random
+
+from app.services.output_processor import markdown_ast
+from app.services.output_processor.incremental import IncrementalOutputParser
+from app.services.output_processor.modules import ConclusionModule, DirectAnswerModule, ThinkingModule
+
+ANSWER = (
+    ":::thinking\nThe user wants backend engineers. I compared **Python** and AWS experience.\n:::\n\n"
+    "### Direct Answer to: \"Who fits backend?\"\n"
+    "**[Ana Ruiz](cv:cv_ana1)** is the strongest backend candidate with 8 years of Python.\n\n"
+    "| Candidate | Skills | Match Score |\n|---|---|---|\n"
+    "| **[Ana Ruiz](cv:cv_ana1)** | Python, AWS | 92% |\n"
+    "| **[Luis Gil](cv:cv_luis2)** | Java, SQL | 71% |\n\n"
+    ":::conclusion\nInterview **[Ana Ruiz](cv:cv_ana1)** first.\n:::\n"
+)
+
+
+def _tokens(text, seed):
+    rng = random.Random(seed)
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 6)
+        yield text[i:i + n]
+        i += n
+
+
+def test_sections_stream_in_order_and_match_full_pass():
+    for seed in range(5):
+        parser = IncrementalOutputParser()
+        events = []
+        for token in _tokens(ANSWER, seed):
+            events.extend(parser.feed(token))
+        events.extend(parser.finish())
+
+        sections = [e["section"] for e in events]
+        assert sections == ["thinking", "direct_answer", "table_header", "table_row", "table_row", "conclusion"]
+
+        by_section = {e["section"]: e for e in events}
+        assert by_section["thinking"]["content"] == ThinkingModule().extract(ANSWER)
+        # Streamed as soon as its first paragraph completes; the final pass may extend it
+        assert DirectAnswerModule().extract(ANSWER).startswith(by_section["direct_answer"]["content"])
+        assert "8 years of Python" in by_section["direct_answer"]["content"]
+        assert by_section["conclusion"]["content"] == ConclusionModule().extract(ANSWER)
+        rows = [e for e in events if e["section"] == "table_row"]
+        assert [r["cv_id"] for r in rows] == ["cv_ana1", "cv_luis2"]
+        assert rows[0]["cells"][1:] == ["Python, AWS", "92%"]
+
+
+def test_thinking_emitted_before_stream_ends():
+    parser = IncrementalOutputParser()
+    head = ANSWER.index("### Direct")
+    events = []
+    for token in _tokens(ANSWER[:head + 5], 1):
+        events.extend(parser.feed(token))
+    assert [e["section"] for e in events] == ["thinking"]
+
+
+def test_final_parse_resumes_from_stream():
+    parser = IncrementalOutputParser()
+    for token in _tokens(ANSWER, 2):
+        parser.feed(token)
+    parser.finish()
+
+    resumed = []
+    original_feed = markdown_ast.MarkdownTokenizer.feed
+
+    def tracking_feed(self, chunk):
+        resumed.append(len(chunk))
+        return original_feed(self, chunk)
+
+    markdown_ast.MarkdownTokenizer.feed = tracking_feed
+    try:
+        # The orchestrator parses the pre-cleaned (stripped) answer
+        doc = markdown_ast.parse_markdown(ANSWER.strip())
+    finally:
+        markdown_ast.MarkdownTokenizer.feed = original_feed
+
+    fresh = markdown_ast.MarkdownTokenizer()
+    fresh.feed(ANSWER.strip())
+    assert doc.blocks == fresh.document().blocks
+    assert resumed and resumed[0] < 10  # Only the held-back last line was tokenized
@@ -0,0 +1,47 @@
+"""Tests for the shared skill/keyword matcher."""
+from app.services.skill_taxonomy import canonical_skill, extract_skills
+from app.utils.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher:
+
+    def test_word_boundaries(self):
+        matcher = KeywordMatcher().add("Java").add("SQL")
+        assert matcher.find_terms("JavaScript and NoSQL") == []
+        assert matcher.find_terms("Java, SQL") == ["Java", "SQL"]
+
+    def test_symbol_edges(self):
+        matcher = KeywordMatcher().add("C++").add("C#").add(".NET").add("CI/CD")
+        assert matcher.find_terms("C++/C# on .NET with CI/CD") == ["C++", "C#", ".NET", "CI/CD"]
+
+    def test_leftmost_longest(self):
+        matcher = KeywordMatcher().add("React").add("React Native")
+        matches = matcher.find("React Native and React")
+        assert [m.alias for m in matches] == ["React Native", "React"]
+
+    def test_add_after_compile(self):
+        matcher = KeywordMatcher(word_boundaries=False).add("script").add("javascript")
+        assert len(matcher.find_all("javascript")) == 2
+        matcher.add("typescript")
+        assert len(matcher.find_all("javascript")) == 2  # Outputs not merged twice
+        assert matcher.find_terms("typescript") == ["typescript"]
+
+    def test_substring_mode(self):
+        matcher = KeywordMatcher(word_boundaries=False).add("skills", ["skill"])
+        assert matcher.contains_any("skillset")
+
+
+class TestSkillTaxonomy:
+
+    def test_aliases_map_to_canonical(self):
+        assert extract_skills("k8s, golang, Postgres and sklearn") == [
+            "Kubernetes", "Go", "PostgreSQL", "scikit-learn"
+        ]
+
+    def test_case_sensitive_aliases(self):
+        assert extract_skills("I go to the office and use Go daily") == ["Go"]
+        assert "R" not in extract_skills("r&d and research")
+
+    def test_canonical_skill(self):
+        assert canonical_skill(" Node.js ") == "Node.js"
+        assert canonical_skill("Senior Manager") is None
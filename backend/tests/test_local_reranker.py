@@ -0,0 +1,89 @@
+"""Tests for the local reranking backends and the (query, chunk) score cache."""
+import asyncio
+
+from app.services.local_reranker import (
+    LexicalSemanticBackend,
+    LocalRerankingService,
+    RerankScoreCache,
+    chunk_key,
+)
+from app.services.reranking_service_v2 import CrossEncoderRerankingService
+
+
+def _chunk(cv_id, content, score=0.5):
+    return {"content": content, "metadata": {"cv_id": cv_id}, "score": score}
+
+
+CHUNKS = [
+    _chunk("cv_1", "Marketing manager, brand campaigns and social media", 0.6),
+    _chunk("cv_2", "Senior Python developer: Django, FastAPI, Python data pipelines", 0.4),
+    _chunk("cv_3", "Java backend engineer with some Python scripting", 0.5),
+]
+
+
+def test_lexical_backend_blends_bm25_with_similarity():
+    service = LocalRerankingService(LexicalSemanticBackend())
+    result = asyncio.run(service.rerank("python developer", CHUNKS))
+
+    assert result.method == "local_lexical"
+    assert [c["metadata"]["cv_id"] for c in result.reranked_results] == ["cv_2", "cv_3", "cv_1"]
+    assert result.scores["cv_2"] > result.scores["cv_1"]
+
+
+class CountingBackend:
+    name = "fake"
+    model_name = "fake-cross-encoder"
+    pairwise = True
+
+    def __init__(self):
+        self.batches = []
+
+    def score(self, query, documents, similarities):
+        self.batches.append(len(documents))
+        return [float(doc.lower().count("python")) for doc in documents]
+
+
+def test_pairwise_scores_are_batched_and_cached_across_turns():
+    backend = CountingBackend()
+    service = LocalRerankingService(backend, cache=RerankScoreCache(), batch_size=2)
+
+    first = asyncio.run(service.rerank("Python developer", CHUNKS))
+    assert backend.batches == [2, 1]
+    assert first.reranked_results[0]["metadata"]["cv_id"] == "cv_2"
+
+    # Same query (normalized) next turn, one new chunk: only that chunk is scored
+    new_chunk = _chunk("cv_4", "Python Python Python trainer")
+    second = asyncio.run(service.rerank("  python   developer ", CHUNKS + [new_chunk]))
+    assert backend.batches == [2, 1, 1]
+    assert second.metadata["cache_hits"] == 3
+    assert second.reranked_results[0] is new_chunk
+    assert chunk_key(new_chunk) == chunk_key(dict(new_chunk))
+
+
+class FakeHFClient:
+    class config:
+        RERANKER_MODEL = "BAAI/bge-reranker-base"
+
+    is_available = True
+
+    def __init__(self):
+        self.calls = []
+
+    async def rerank(self, query, documents):
+        self.calls.append(list(documents))
+        scored = [{"document": d, "score": d.count("Python") / 3, "index": i} for i, d in enumerate(documents)]
+        return sorted(scored, key=lambda x: x["score"], reverse=True)
+
+
+def test_hf_cross_encoder_only_sends_uncached_chunks(monkeypatch):
+    from app.services import local_reranker
+    monkeypatch.setattr(local_reranker, "_score_cache", RerankScoreCache())
+    client = FakeHFClient()
+    service = CrossEncoderRerankingService(hf_client=client)
+
+    asyncio.run(service.rerank("python", CHUNKS))
+    result = asyncio.run(service.rerank("python", CHUNKS[:2] + [_chunk("cv_5", "Python")]))
+
+    assert [len(call) for call in client.calls] == [3, 1]
+    assert result.method == "cross_encoder" and result.metadata["cache_hits"] == 2
+    assert [c["metadata"]["cv_id"] for c in result.reranked_results] == ["cv_2", "cv_5", "cv_1"]
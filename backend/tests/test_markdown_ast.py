@@ -0,0 +1,88 @@
+"""Tests for the shared markdown parse and the linear duplicate-paragraph pass."""
+import random
+import re
+
+from app.services.output_processor.markdown_ast import parse_markdown
+from app.services.output_processor.orchestrator import OutputOrchestrator
+
+SAMPLES = [
+    ":::thinking\nReviewed 3 CVs.\n:::\n\nAna is best.\n\n:::conclusion\nHire Ana.\n:::",
+    ":::Thinking\nUnclosed reasoning\n\n**Answer** here",
+    ":::thinking\nfoo\n:::conclusion\nbar\n:::",
+    ":::conclusion a :::thinking b :::",
+    "No blocks at all | just | pipes",
+    ":::thinking:::\n:::conclusion\nrest of the text",
+    ":::thinking\n  \n:::\n:::thinking\nsecond\n:::",
+]
+
+
+def test_directives_match_regex_extraction():
+    for text in SAMPLES:
+        doc = parse_markdown(text)
+        for name in ("thinking", "conclusion"):
+            block = doc.directive(name)
+            closed = re.search(rf':::{name}\s*([\s\S]*?)\s*:::', text, re.IGNORECASE)
+            opened = re.search(rf':::{name}\s*([\s\S]*)', text, re.IGNORECASE)
+            assert (block is not None) == bool(opened)
+            if block:
+                assert block.closed == bool(closed)
+                assert block.tail == opened.group(1).strip()
+                if closed:
+                    assert block.content == closed.group(1).strip()
+
+        expected = re.sub(r':::thinking[\s\S]*?:::', '', text, flags=re.IGNORECASE)
+        expected = re.sub(r':::conclusion[\s\S]*?:::', '', expected, flags=re.IGNORECASE)
+        assert doc.without_directives("thinking", "conclusion") == expected
+
+
+def test_blocks_and_shared_parse():
+    text = "# Title\n\nIntro line\nsecond line\n\n- a\n- b\n\n| h1 | h2 |\n|---|---|\n| x | y |\n\n```\n| not a table |\n```"
+    doc = parse_markdown(text)
+    assert [b.kind for b in doc.blocks] == ["heading", "paragraph", "list", "table", "code"]
+    assert doc.headings[0].name == "Title"
+    assert doc.blocks[1].text == "Intro line\nsecond line"
+    assert parse_markdown(text) is doc
+
+
+def _legacy_dedup(text):
+    unique, seen = [], set()
+    for para in text.split('\n\n'):
+        stripped = para.strip()
+        if not stripped:
+            continue
+        normalized = ' '.join(stripped.lower().split())
+        normalized = re.sub(r'\s*\|\s*', ' ', normalized)
+        normalized = re.sub(r'\|[^|]*\|[^|]*\|?', '', normalized)
+        normalized = ' '.join(normalized.split())[:150]
+        if stripped.startswith('|') or 'red flags' in stripped.lower():
+            unique.append(para)
+            continue
+        is_dup = normalized in seen
+        if not is_dup and len(normalized) > 50:
+            is_dup = any(
+                normalized.startswith(s[:50]) or s.startswith(normalized[:50])
+                for s in seen if len(s) > 30
+            )
+        if not is_dup:
+            seen.add(normalized)
+            unique.append(para)
+    return '\n\n'.join(unique)
+
+
+def test_remove_duplicate_paragraphs_matches_pairwise_check():
+    rng = random.Random(3)
+    words = ["python", "aws", "senior", "engineer", "ana", "luis", "team", "lead", "| x |"]
+    orchestrator = OutputOrchestrator()
+    for _ in range(50):
+        paragraphs = []
+        for _ in range(rng.randint(5, 40)):
+            if paragraphs and rng.random() < 0.3:
+                # Repeat (or extend) an earlier paragraph
+                para = rng.choice(paragraphs) + rng.choice(["", " extra words here"])
+            else:
+                para = " ".join(rng.choice(words) for _ in range(rng.randint(3, 30)))
+            paragraphs.append(para)
+        text = "\n\n".join(paragraphs)
+        if len(text) < 100:
+            continue
+        assert orchestrator._remove_duplicate_paragraphs(text) == _legacy_dedup(text)
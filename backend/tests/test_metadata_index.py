@@ -0,0 +1,107 @@
+"""Tests for the local metadata filter index."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.providers.local import vector_store as local_vector_store
+from app.providers.local.metadata_index import MetadataIndex
+from app.providers.local.vector_store import SimpleVectorStore
+from app.services.rag_service_v5 import PipelineContextV5, RAGServiceV5
+
+
+def _meta(i):
+    return {
+        "is_summary": True,
+        "candidate_name": f"Candidate {i}",
+        "speaks_french": i % 3 == 0,
+        "has_mba": i % 2 == 0,
+        "total_experience_years": float(i),
+    }
+
+
+def test_query_matches_brute_force_after_removals():
+    index = MetadataIndex()
+    metas = {f"cv_{i}": _meta(i) for i in range(200)}
+    for cv_id, meta in metas.items():
+        index.add(cv_id, meta)
+    for i in range(0, 200, 3):
+        index.remove(f"cv_{i + 1}")
+        metas.pop(f"cv_{i + 1}", None)
+
+    filters = {"speaks_french": True, "has_mba": True, "min_experience": 30}
+    expected = {
+        cv_id for cv_id, m in metas.items()
+        if m["speaks_french"] and m["has_mba"] and m["total_experience_years"] >= 30
+    }
+    assert set(index.query(filters)) == expected
+    assert set(index.query(filters, cv_ids=["cv_30", "cv_36", "cv_31"])) == {"cv_30", "cv_36"}
+    assert set(index.query({"max_experience": 2})) == {c for c in metas if metas[c]["total_experience_years"] <= 2}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_vector_store.settings, "chroma_persist_dir", str(tmp_path))
+    store = SimpleVectorStore()
+    docs = []
+    for i in range(6):
+        docs.append({"id": f"cv_{i}_chunk_0", "cv_id": f"cv_{i}", "filename": f"{i}.pdf",
+                     "content": f"summary {i}", "chunk_index": 0, "metadata": _meta(i)})
+        docs.append({"id": f"cv_{i}_chunk_1", "cv_id": f"cv_{i}", "filename": f"{i}.pdf",
+                     "content": f"skills {i}", "chunk_index": 1, "metadata": {"section_type": "skills"}})
+    # A CV chunked without a summary chunk cannot be evaluated and is kept
+    docs.append({"id": "cv_legacy_chunk_0", "cv_id": "cv_legacy", "filename": "legacy.pdf",
+                 "content": "legacy", "chunk_index": 0, "metadata": {}})
+    asyncio.run(store.add_documents(docs, [[1.0, 0.0]] * len(docs)))
+    return store
+
+
+def test_vector_store_filters_and_reloads(store):
+    assert store.filter_cv_ids({"speaks_french": True}) == ["cv_0", "cv_3", "cv_legacy"]
+    assert store.filter_cv_ids({"speaks_french": True}, ["cv_1", "cv_3"]) == ["cv_3"]
+    assert store.filter_cv_ids({"unknown_flag": True}) is None
+
+    asyncio.run(store.delete_cv("cv_3"))
+    assert SimpleVectorStore().filter_cv_ids({"speaks_french": True}) == ["cv_0", "cv_legacy"]
+
+
+def test_lookup_question_skips_vector_search(store):
+    service = SimpleNamespace(
+        _vector_store=store,
+        _detect_metadata_filters=lambda q: RAGServiceV5._detect_metadata_filters(None, q)
+    )
+
+    lookup = PipelineContextV5(question="Who speaks French?", cv_ids=[f"cv_{i}" for i in range(6)])
+    RAGServiceV5._resolve_metadata_filters(service, lookup)
+    assert lookup.cv_ids == ["cv_0", "cv_3"]
+    assert lookup.metadata_lookup_cv_ids == ["cv_0", "cv_3"]
+    assert [c["metadata"]["cv_id"] for c in store.get_summary_chunks(lookup.metadata_lookup_cv_ids)] == ["cv_0", "cv_3"]
+
+    # Filters narrow the search but the question needs semantic retrieval
+    ranking = PipelineContextV5(question="Rank candidates that speak French for a data role")
+    RAGServiceV5._resolve_metadata_filters(service, ranking)
+    assert ranking.metadata_lookup_cv_ids is None
+    assert ranking.cv_ids == ["cv_0", "cv_3", "cv_legacy"]
+
+
+def test_negated_and_compared_filters(store):
+    service = SimpleNamespace(
+        _vector_store=store,
+        _detect_metadata_filters=lambda q: RAGServiceV5._detect_metadata_filters(None, q)
+    )
+    session = [f"cv_{i}" for i in range(6)]
+
+    negated = PipelineContextV5(question="Who does NOT speak French?", cv_ids=session, total_cvs_in_session=6)
+    RAGServiceV5._resolve_metadata_filters(service, negated)
+    assert negated.metadata_lookup_cv_ids == ["cv_1", "cv_2", "cv_4", "cv_5"]
+    assert negated.total_cvs_in_session == 6
+
+    junior = PipelineContextV5(question="Which candidates have less than 3 years?", cv_ids=session)
+    RAGServiceV5._resolve_metadata_filters(service, junior)
+    assert junior.metadata_filters == {"below_experience": 3}
+    assert junior.metadata_lookup_cv_ids == ["cv_0", "cv_1", "cv_2"]
+
+    # A negation not tied to one filter: neither narrowed nor answered from the index
+    ambiguous = PipelineContextV5(question="Who speaks French but not German?", cv_ids=session)
+    RAGServiceV5._resolve_metadata_filters(service, ambiguous)
+    assert ambiguous.cv_ids == session and ambiguous.metadata_lookup_cv_ids is None
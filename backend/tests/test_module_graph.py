@@ -0,0 +1,75 @@
+"""Tests for dependency-ordered (optionally concurrent) structure assembly."""
+import threading
+import time
+
+import pytest
+
+from app.services.output_processor.module_graph import ModuleGraph
+from app.services.output_processor.structures.team_build_structure import TeamBuildStructure
+
+
+def _graph(calls):
+    def node(name, value):
+        def fn(results):
+            calls.append((name, threading.current_thread().name))
+            time.sleep(0.02)
+            return value(results)
+        return fn
+
+    graph = ModuleGraph("test")
+    graph.add("team", node("team", lambda r: [1, 2, 3]))
+    graph.add("matrix", node("matrix", lambda r: sum(r["team"])), deps=("team",))
+    graph.add("synergy", node("synergy", lambda r: len(r["team"])), deps=("team",))
+    graph.add("risks", node("risks", lambda r: r["matrix"] * r["synergy"]), deps=("matrix", "synergy"))
+    return graph
+
+
+def test_parallel_run_matches_sequential_and_respects_dependencies():
+    sequential_calls, parallel_calls = [], []
+    sequential = _graph(sequential_calls).run(parallel=False)
+    parallel = _graph(parallel_calls).run(parallel=True)
+
+    assert sequential.results == parallel.results == {"team": [1, 2, 3], "matrix": 6, "synergy": 3, "risks": 18}
+    assert parallel.parallel and not sequential.parallel
+    assert set(parallel.timings_ms) == {"team", "matrix", "synergy", "risks"}
+    assert all(ms > 0 for ms in parallel.timings_ms.values())
+
+    order = [name for name, _ in parallel_calls]
+    assert order[0] == "team" and order[-1] == "risks"
+    assert all(thread.startswith("output-module") for _, thread in parallel_calls)
+    # matrix and synergy overlap, so the run is shorter than the sum of its modules
+    assert parallel.total_ms < sum(parallel.timings_ms.values())
+
+
+def test_unknown_dependency_rejected():
+    with pytest.raises(ValueError):
+        ModuleGraph("test").add("risks", lambda r: None, deps=("synergy",))
+
+
+def test_team_build_same_output_in_parallel(monkeypatch):
+    from app.services.output_processor import module_graph
+
+    chunks = [
+        {
+            "content": f"CV {i}",
+            "metadata": {
+                "cv_id": f"cv_{i % 40}",
+                "candidate_name": f"Candidate {i % 40}",
+                "skills": "Python, AWS, React" if i % 2 else "Java, SQL",
+                "total_experience_years": i % 17,
+                "seniority_level": "senior" if i % 3 else "mid",
+            },
+        }
+        for i in range(120)
+    ]
+    structure = TeamBuildStructure()
+
+    monkeypatch.setattr(module_graph.settings, "output_parallel_min_chunks", 10**6)
+    sequential = structure.assemble("", chunks, query="build a team of 4")
+    monkeypatch.setattr(module_graph.settings, "output_parallel_min_chunks", 100)
+    parallel = structure.assemble("", chunks, query="build a team of 4")
+
+    timings = parallel.pop("module_timings")
+    sequential.pop("module_timings")
+    assert parallel == sequential
+    assert {"team", "synergy", "skill_matrix", "team_risks"} <= set(timings)
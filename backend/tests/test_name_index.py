@@ -0,0 +1,62 @@
+"""Tests for candidate name lookups in the local vector store."""
+import asyncio
+
+import pytest
+
+from app.providers.local import vector_store as local_vector_store
+from app.providers.local.name_index import CandidateNameIndex, normalize_name
+from app.providers.local.vector_store import SimpleVectorStore
+
+
+@pytest.fixture
+def index():
+    index = CandidateNameIndex()
+    index.add("cv_maria", "María López")
+    index.add("cv_mario", "Mario Lopez Ruiz")
+    index.add("cv_john", "John Smith")
+    return index
+
+
+def test_normalize_name():
+    assert normalize_name("  María-José  LÓPEZ ") == "maria jose lopez"
+
+
+def test_lookup_steps(index):
+    assert index.lookup("maria lopez") == ["cv_maria"]                 # exact, accents folded
+    assert index.lookup("Lop") == ["cv_maria", "cv_mario"]             # token prefix
+    assert index.lookup("Mari Lo") == ["cv_maria", "cv_mario"]
+    assert index.lookup("Dr. John Smith Jr") == ["cv_john"]            # name within query
+    assert index.lookup("Jonh Smiht") == ["cv_john"]                   # fuzzy
+    assert index.lookup("Lopez", cv_ids=["cv_mario"]) == ["cv_mario"]
+    assert index.lookup("Zed") == []
+
+
+def test_remove_prunes_lookups(index):
+    index.remove("cv_mario")
+    assert index.lookup("Lop") == ["cv_maria"]
+    assert index.lookup("ruiz") == []
+    index.add("cv_mario", "Mario Lopez Ruiz")
+    assert index.lookup("ruiz") == ["cv_mario"]
+
+
+def test_store_targeted_retrieval(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_vector_store.settings, "chroma_persist_dir", str(tmp_path))
+    store = SimpleVectorStore()
+    docs = [
+        {"id": f"{cv_id}_chunk_{i}", "cv_id": cv_id, "filename": f"{cv_id}.pdf", "content": f"{name} {i}",
+         "chunk_index": i, "metadata": {"candidate_name": name, "section_type": section, "is_summary": i == 0}}
+        for cv_id, name in (("cv_a", "Ana Ruiz"), ("cv_b", "Luis Gil"))
+        for i, section in enumerate(("summary", "experience", "skills"))
+    ]
+    # Chunks without a candidate name never match (they used to match every query)
+    docs.append({"id": "cv_c_chunk_0", "cv_id": "cv_c", "filename": "c.pdf", "content": "?", "chunk_index": 0, "metadata": {}})
+    asyncio.run(store.add_documents(docs, [[1.0]] * len(docs)))
+
+    chunks = store.get_all_chunks_by_candidate("ana")
+    assert {c["metadata"]["cv_id"] for c in chunks} == {"cv_a"}
+    assert chunks[0]["metadata"]["is_summary"] and len(chunks) == 3
+    assert store.get_all_chunks_by_candidate("ana", cv_ids=["cv_b"]) == []
+
+    asyncio.run(store.delete_cv("cv_a"))
+    assert store.get_all_chunks_by_candidate("ana") == []
+    assert len(SimpleVectorStore().get_all_chunks_by_candidate("Luis Gil")) == 3
@@ -0,0 +1,114 @@
+"""Tests for per-query-type RAG pipeline profiles."""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.pipeline_profiles import PIPELINE_PROFILES, select_profile
+from app.services.rag_service_v5 import (
+    PipelineContextV5,
+    PipelineMetrics,
+    PipelineStage,
+    QueryUnderstandingV5,
+    RAGConfigV5,
+    RAGServiceV5,
+    RetrievalResultV5,
+    StageMetrics,
+)
+from app.services.reasoning_service import ReasoningService
+
+
+def test_select_profile_by_query_type_and_overrides(monkeypatch):
+    assert select_profile("single_candidate").name == "lookup"
+    assert select_profile("ranking").name == "ranking"
+    assert select_profile("comparison").name == "full"
+    assert select_profile(None).name == "full"
+
+    monkeypatch.setattr(settings, "pipeline_profile_overrides", "single_candidate=full, comparison=ranking,x=nope")
+    assert select_profile("single_candidate").name == "full"
+    assert select_profile("comparison").name == "ranking"
+
+    monkeypatch.setattr(settings, "pipeline_profiles_enabled", False)
+    assert select_profile("ranking").name == "full"
+    assert select_profile("ranking", forced="lookup").name == "lookup"
+    with pytest.raises(ValueError):
+        select_profile("ranking", forced="missing")
+
+    # Profiles only skip stages: a stage off in the config stays off
+    config = RAGConfigV5(multi_query_enabled=False)
+    assert not PIPELINE_PROFILES["full"].runs("multi_query", config)
+    assert PIPELINE_PROFILES["ranking"].skipped_stages(config) == ["multi_query", "hyde", "reflection"]
+
+
+def _run_pipeline(query_type, config=None):
+    service = RAGServiceV5(config or RAGConfigV5())
+    calls = []
+
+    async def understanding(ctx):
+        ctx.query_understanding = QueryUnderstandingV5(
+            original_query=ctx.question, understood_query=ctx.question,
+            query_type=query_type, is_cv_related=True
+        )
+        ctx.metrics.add_stage(StageMetrics(stage=PipelineStage.QUERY_UNDERSTANDING, duration_ms=1, success=True))
+
+    async def retrieval(ctx):
+        ctx.retrieval_result = RetrievalResultV5(
+            chunks=[{"content": "c", "metadata": {"cv_id": "cv_1"}}], cv_ids=["cv_1"], strategy="test", scores=[1.0]
+        )
+
+    def step(name, result=None):
+        async def run(ctx):
+            calls.append(name)
+            return result
+        return run
+
+    service._step_query_understanding = understanding
+    service._step_multi_query = step("multi_query")
+    service._step_guardrail = step("guardrail", True)
+    service._step_multi_embedding = step("embedding")
+    service._step_fusion_retrieval = retrieval
+    service._step_reranking = step("reranking")
+    service._step_reasoning = step("reasoning")
+    service._step_generation = step("generation")
+    service._step_claim_verification = step("verification")
+    service._step_refinement = step("refinement")
+    service._build_success_response = lambda ctx: (ctx, service._build_pipeline_steps(ctx))
+
+    ctx = PipelineContextV5(question="What is Ana's email?", metrics=PipelineMetrics(total_ms=0))
+    ctx, steps = asyncio.run(service._execute_pipeline(ctx))
+    return calls, ctx, steps
+
+
+def test_lookup_profile_skips_recall_and_rerank_stages():
+    calls, ctx, steps = _run_pipeline("single_candidate")
+
+    assert calls == ["guardrail", "embedding", "reasoning", "generation", "verification", "refinement"]
+    qu_stage = ctx.metrics.to_dict()["stages"]["query_understanding"]
+    assert qu_stage["pipeline_profile"] == "lookup"
+    assert qu_stage["skipped_stages"] == ["multi_query", "hyde", "reranking", "reflection"]
+    profile_step = next(s for s in steps if s.name == "pipeline_profile")
+    assert profile_step.details == "Profile: lookup (skipped multi_query, hyde, reranking, reflection)"
+
+    # A forced profile (replay harness) ignores the query type
+    calls, ctx, _ = _run_pipeline("single_candidate", RAGConfigV5(pipeline_profile="full"))
+    assert "multi_query" in calls and "reranking" in calls
+    assert ctx.profile.name == "full"
+
+
+def test_reasoning_reflection_can_be_skipped_per_call(monkeypatch):
+    service = ReasoningService(model="m", reflection_enabled=True, api_key="sk-test")
+    reflected = []
+
+    async def self_ask(question, context, total_cvs):
+        return "thinking", "draft"
+
+    async def reflect(question, draft, context):
+        reflected.append(draft)
+        return "refined"
+
+    monkeypatch.setattr(service, "_self_ask_reason", self_ask)
+    monkeypatch.setattr(service, "_reflect_and_refine", reflect)
+
+    assert asyncio.run(service.reason("q", "ctx", reflect=False)).final_answer == "draft"
+    assert asyncio.run(service.reason("q", "ctx")).final_answer == "refined"
+    assert reflected == ["draft"]
@@ -0,0 +1,71 @@
+"""Tests for tiered (local first, LLM when ambiguous) query understanding."""
+import asyncio
+
+import pytest
+
+from app.services import query_understanding_service
+from app.services.query_understanding_service import (
+    QueryUnderstandingService,
+    UnderstandingTierStats,
+    classify_query_locally,
+)
+
+HISTORY = [
+    {"role": "user", "content": "Rank candidates for a backend role"},
+    {"role": "assistant", "content": "| Rank | Candidate |\n|---|---|\n| 1 | **Maria Lopez** |\n| 2 | **John Smith** |"},
+]
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = UnderstandingTierStats()
+    monkeypatch.setattr(query_understanding_service, "_tier_stats", stats)
+    return stats
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = QueryUnderstandingService(model="test/model", api_key="sk-test", local_threshold=0.85)
+    calls = []
+
+    async def fake_call_llm(query, model, conversation_history=None):
+        calls.append(query)
+        return query_understanding_service.QueryUnderstanding(
+            original_query=query, understood_query=f"LLM: {query}", query_type="comparison",
+            requirements=["r"], is_cv_related=True, confidence=0.9
+        )
+
+    monkeypatch.setattr(service, "_call_llm", fake_call_llm)
+    service.llm_calls = calls
+    return service
+
+
+def test_local_confidence():
+    assert classify_query_locally("Rank candidates by Python experience").confidence >= 0.85
+    assert classify_query_locally("Who knows React?").query_type == "adaptive"
+    assert classify_query_locally("Tell me about Maria Lopez").confidence >= 0.85
+
+    # Unresolvable references, missing names and off-topic questions are ambiguous
+    assert classify_query_locally("Compare them").confidence < 0.85
+    assert classify_query_locally("Tell me about the top candidate").confidence < 0.85
+    assert "off_topic" in classify_query_locally("What's the weather like?").signals
+
+
+def test_clear_queries_skip_llm_and_ambiguous_escalate(service, stats):
+    local = asyncio.run(service.understand("Rank candidates by Python experience"))
+    assert (local.query_type, local.metadata["tier"]) == ("ranking", "local")
+    assert service.llm_calls == []
+
+    escalated = asyncio.run(service.understand("Compare them", HISTORY))
+    assert escalated.metadata["tier"] == "llm" and escalated.understood_query == "LLM: Compare them"
+    assert escalated.metadata["local_confidence"] < 0.85
+
+    tiers = stats.get_stats()["tiers"]
+    assert (tiers["local"]["count"], tiers["llm"]["count"], tiers["heuristic"]["count"]) == (1, 1, 0)
+    assert sum(b["count"] for b in stats.get_stats()["escalated_agreement"].values()) == 1
+
+
+def test_threshold_above_one_always_uses_llm(service, stats):
+    service.local_threshold = 1.01
+    result = asyncio.run(service.understand("Rank candidates by Python experience"))
+    assert result.metadata["tier"] == "llm" and len(service.llm_calls) == 1
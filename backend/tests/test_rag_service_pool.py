@@ -0,0 +1,91 @@
+"""Tests for the pool of initialized RAG services."""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.config import Mode
+from app.prompts.templates import PromptBuilder
+from app.services import rag_service_pool
+from app.services.rag_service_pool import RAGServicePool, api_key_fingerprint
+from app.services.rag_service_v5 import RAGConfigV5, RAGServiceV5
+
+
+class _Pool(RAGServicePool):
+    """Pool that skips provider initialization."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created = []
+
+    def _create(self, key, api_key):
+        self.created.append(key)
+        return RAGServiceV5(RAGConfigV5(mode=Mode(key.mode), generation_model=key.generation_model))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rag_service_pool.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_reuses_service_per_configuration(clock):
+    pool = _Pool(max_size=4)
+    first = pool.get(Mode.LOCAL, generation_model="gen-a", api_key="sk-1")
+    asyncio.run(first._embedding_cache.set("q", [0.1]))
+
+    again = pool.get("local", generation_model="gen-a", api_key="sk-1")
+    assert again is first
+    assert asyncio.run(again._embedding_cache.get("q")) == [0.1]
+
+    assert pool.get(Mode.LOCAL, generation_model="gen-a", api_key="sk-2") is not first
+    assert pool.get(Mode.LOCAL, generation_model="gen-b", api_key="sk-1") is not first
+    assert len(pool.created) == 3
+
+    stats = pool.get_stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 3, 3)
+    reused = next(s for s in stats["services"] if s["requests"] == 2)
+    assert reused["embedding_cache"]["hits"] == 1
+    assert reused["api_key"] == api_key_fingerprint("sk-1") and "sk-1" not in str(stats)
+
+
+def test_lru_and_idle_eviction(clock):
+    pool = _Pool(max_size=2, idle_ttl_seconds=60)
+    a = pool.get(Mode.LOCAL, generation_model="a")
+    pool.get(Mode.LOCAL, generation_model="b")
+    pool.get(Mode.LOCAL, generation_model="a")          # a is now most recent
+    pool.get(Mode.LOCAL, generation_model="c")          # evicts b
+    assert [k.generation_model for k in pool._services] == ["a", "c"]
+
+    clock[0] += 30
+    pool.get(Mode.LOCAL, generation_model="c")
+    clock[0] += 45                                      # a idle 75s, c idle 45s
+    assert pool.get_stats()["size"] == 1
+    assert pool.get(Mode.LOCAL, generation_model="a") is not a
+    assert pool.get_stats()["evictions"] == 2
+
+
+def test_concurrent_misses_build_one_service():
+    class SlowPool(_Pool):
+        def _create(self, key, api_key):
+            time.sleep(0.05)
+            return super()._create(key, api_key)
+
+    pool = SlowPool()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        services = list(executor.map(lambda _: pool.get(Mode.LOCAL, generation_model="gen-a"), range(4)))
+
+    assert len(pool.created) == 1 and all(s is services[0] for s in services)
+    assert (pool.get_stats()["misses"], pool.get_stats()["hits"]) == (1, 3)
+
+
+def test_shared_prompt_builder_keeps_packing_stats_per_request():
+    builder = PromptBuilder()
+    chunk = {"content": "Python engineer", "metadata": {"cv_id": "cv_1", "candidate_name": "Ana", "filename": "a.pdf"}}
+    other = {**chunk, "metadata": {**chunk["metadata"], "cv_id": "cv_2", "candidate_name": "Bo"}}
+    first, second = {}, {}
+    builder.build_query_prompt("q1", [chunk], packing=first)
+    builder.build_query_prompt("q2", [chunk, other], packing=second)
+    assert (first["packed_chunks"], second["packed_chunks"]) == (1, 2)
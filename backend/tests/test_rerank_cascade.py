@@ -0,0 +1,89 @@
+"""Tests for the two-stage rerank cascade."""
+import asyncio
+from types import SimpleNamespace
+
+from app.services.rerank_cascade import RerankCascade
+
+
+def _chunk(cv_id, content, **metadata):
+    return {"content": content, "metadata": {"cv_id": cv_id, **metadata}, "score": 0.5}
+
+
+def _chunks():
+    strong = [
+        _chunk(f"cv_{i}", "Senior Python engineer, Python and AWS backend services", skills="Python, AWS")
+        for i in range(3)
+    ]
+    middle = [_chunk(f"cv_{i}", f"Backend developer, some Python tooling {i}") for i in range(3, 15)]
+    weak = [_chunk(f"cv_{i}", "Pastry chef, bakery and catering") for i in range(15, 20)]
+    return strong + middle + weak
+
+
+class FakeReranker:
+    def __init__(self):
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, query, chunks):
+        self.batches.append([c["metadata"]["cv_id"] for c in chunks])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        # Reverse each batch: the highest cv number is the most relevant
+        ranked = sorted(chunks, key=lambda c: int(c["metadata"]["cv_id"][3:]), reverse=True)
+        result = SimpleNamespace(
+            reranked_results=ranked,
+            result_scores=[int(c["metadata"]["cv_id"][3:]) / 20 for c in ranked],
+            metadata={"prompt_tokens": 100, "openrouter_cost": 0.001},
+        )
+        return result, "fake"
+
+
+def test_only_the_ambiguous_band_is_reranked_in_parallel_batches():
+    chunks = _chunks()
+    reranker = FakeReranker()
+    cascade = RerankCascade(accept=0.7, reject=0.2, min_chunks=5, batch_size=4)
+
+    outcome = asyncio.run(cascade.rerank("python aws engineer", chunks, reranker))
+
+    sent = [cv for batch in reranker.batches for cv in batch]
+    assert outcome.sent == len(sent) < len(chunks)
+    assert outcome.batches == len(reranker.batches) and reranker.max_in_flight > 1
+    assert not {"cv_0", "cv_15", "cv_19"} & set(sent)
+    assert outcome.accepted + outcome.sent + outcome.rejected == len(chunks)
+
+    # Accepted on top, reranked band merged by score across batches, rejected last
+    ids = [c["metadata"]["cv_id"] for c in outcome.reranked]
+    band = ids[outcome.accepted:outcome.accepted + outcome.sent]
+    assert ids[0] == "cv_0" and ids[-1].startswith("cv_1") and int(ids[-1][3:]) >= 15
+    assert band == sorted(band, key=lambda cv: int(cv[3:]), reverse=True)
+    assert outcome.to_metadata()["chunks_reranked"] == outcome.sent
+    assert len(outcome.batch_metadata) == outcome.batches
+
+
+def test_small_sets_are_reranked_whole():
+    chunks = _chunks()[:6]
+    reranker = FakeReranker()
+    cascade = RerankCascade(min_chunks=10, batch_size=10)
+
+    outcome = asyncio.run(cascade.rerank("python", chunks, reranker))
+
+    assert outcome.sent == 6 and outcome.accepted == outcome.rejected == 0
+    assert [c["metadata"]["cv_id"] for c in outcome.reranked] == [f"cv_{i}" for i in range(5, -1, -1)]
+
+
+def test_batches_without_scores_keep_first_stage_order():
+    chunks = _chunks()[:6]
+
+    async def unscored(query, batch):
+        return SimpleNamespace(reranked_results=batch, result_scores=[], metadata={}), "disabled"
+
+    cascade = RerankCascade(min_chunks=10)
+    outcome = asyncio.run(cascade.rerank("python aws", chunks, unscored))
+
+    scores = cascade.first_stage_scores("python aws", chunks)
+    expected = sorted(range(6), key=lambda i: scores[i], reverse=True)
+    assert outcome.reranked == [chunks[i] for i in expected]
+    assert outcome.method == "disabled"
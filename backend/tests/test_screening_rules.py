@@ -0,0 +1,69 @@
+"""Tests for compiled (vectorized) screening rule sets."""
+import random
+
+from app.services.candidate_feature_table import CandidateFeatureTable
+from app.services.screening_rules_service import ScreeningRulesService
+
+RULES = [
+    {"name": "Python", "field": "skills", "operator": "contains", "value": "python", "action": "include"},
+    {"name": "Cloud", "field": "skills", "operator": "in_list", "value": ["aws", "gcp"], "action": "include"},
+    {"name": "Senior", "field": "experience_years", "operator": "greater_or_equal", "value": 5, "action": "include"},
+    {"name": "No juniors", "field": "experience_years", "operator": "less_than", "value": 1, "action": "exclude", "priority": 2},
+    {"name": "Remote", "field": "location", "operator": "contains", "value": "remote", "action": "flag"},
+    {"name": "Master", "field": "education", "operator": "regex", "value": r"master|phd", "action": "boost", "score_modifier": 0.2},
+    {"name": "No French", "field": "languages", "operator": "not_contains", "value": "french", "action": "penalize", "score_modifier": 0.1},
+    {"name": "Has role", "field": "current_role", "operator": "exists", "value": None, "action": "flag"},
+    {"name": "Kubernetes text", "field": "full_text", "operator": "contains", "value": "kubernetes", "action": "boost", "score_modifier": 0.05},
+]
+
+
+def _rows(n, seed=11):
+    rng = random.Random(seed)
+    return [
+        {
+            "cv_id": f"cv_{i}",
+            "candidate_name": f"Candidate {i}",
+            "filename": f"cv_{i}.pdf",
+            "skills": ", ".join(rng.sample(["Python", "AWS", "GCP", "Java", "React"], rng.randint(0, 3))),
+            "total_experience_years": rng.choice([0, 0.5, 2, 5, 9]),
+            "education_level": rng.choice(["", "Bachelor", "Master", "PhD"]),
+            "languages": ", ".join(rng.sample(["English", "French", "Spanish"], rng.randint(0, 2))),
+            "location": rng.choice(["Remote", "Madrid", ""]),
+            "current_role": rng.choice(["", "Backend Engineer"]),
+            "full_text": rng.choice(["Deployed on Kubernetes", "Built web apps"]),
+        }
+        for i in range(n)
+    ]
+
+
+def test_compiled_rule_set_matches_per_candidate_evaluation():
+    table = CandidateFeatureTable.from_metadata(_rows(60))
+    for require_all in (False, True):
+        service = ScreeningRulesService()
+        rule_set = service.create_rule_set("Backend", rules=[dict(r) for r in RULES], require_all=require_all)
+
+        batch = service.screen_table(table, rule_set_id=rule_set.id)
+        for i in range(len(table)):
+            single = service.evaluate_candidate(table.candidate_data(i), rule_set_id=rule_set.id)
+            assert bool(batch.passed[i]) == single.passed
+            assert batch.score_modifier[i] == single.score_modifier
+            assert batch.flags[i] == single.flags
+            assert batch.exclusion_reason[i] == single.exclusion_reason
+
+
+def test_add_rule_recompiles_and_filter_keeps_unknown_cvs():
+    table = CandidateFeatureTable.from_metadata(_rows(20))
+    service = ScreeningRulesService()
+    rule_set = service.create_rule_set("Open")
+    service.assign_to_session("s1", rule_set.id)
+    cv_ids = table.cv_ids + ["cv_new"]
+
+    assert service.filter_cv_ids("s1", cv_ids, table) == cv_ids
+
+    service.add_rule(rule_set.id, {
+        "name": "Senior", "field": "experience_years", "operator": "greater_or_equal",
+        "value": 5, "action": "include"
+    })
+    kept = service.filter_cv_ids("s1", cv_ids, table)
+    senior = {cv_id for cv_id, years in zip(table.cv_ids, table.experience_years, strict=True) if years >= 5}
+    assert kept == [cv_id for cv_id in cv_ids if cv_id in senior or cv_id == "cv_new"]
@@ -0,0 +1,104 @@
+"""Tests for the per-session working-set cache."""
+import asyncio
+import random
+
+import pytest
+
+from app.providers.local import vector_store as local_vector_store
+from app.providers.local.vector_store import SimpleVectorStore
+from app.services import session_corpus_cache
+from app.services.session_corpus_cache import SessionCorpusCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SessionCorpusCache()
+    monkeypatch.setattr(session_corpus_cache, "_session_corpus_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, cache):
+    monkeypatch.setattr(local_vector_store.settings, "chroma_persist_dir", str(tmp_path))
+    rng = random.Random(3)
+    store = SimpleVectorStore()
+    docs, embeddings = [], []
+    for cv in range(8):
+        for chunk in range(4):
+            docs.append({"id": f"cv_{cv}_chunk_{chunk}", "cv_id": f"cv_{cv}", "filename": f"{cv}.pdf",
+                         "content": f"candidate {cv} knows {'kubernetes' if cv == 5 else 'python'} {chunk}",
+                         "chunk_index": chunk, "metadata": {"candidate_name": f"Candidate {cv}"}})
+            embeddings.append([rng.uniform(-1, 1) for _ in range(16)])
+    asyncio.run(store.add_documents(docs, embeddings))
+    return store
+
+
+def test_search_matches_vector_store(store, cache):
+    session_cvs = [f"cv_{i}" for i in range(6)]
+    corpus = asyncio.run(cache.load("s1", session_cvs, store))
+    assert cache.session_cv_ids("s1") == session_cvs
+    assert len(corpus.chunks) == 24
+
+    query = [random.Random(9).uniform(-1, 1) for _ in range(16)]
+    for cv_ids, diversify in [(session_cvs, True), (session_cvs, False), (["cv_1", "cv_4"], False)]:
+        expected = asyncio.run(store.search(query, k=7, threshold=-1.0, cv_ids=cv_ids, diversify_by_cv=diversify))
+        got = corpus.search(query, k=7, threshold=-1.0, cv_ids=cv_ids, diversify_by_cv=diversify)
+        assert [r.id for r in got] == [r.id for r in expected]
+        assert [r.similarity for r in got] == pytest.approx([r.similarity for r in expected], abs=1e-5)
+
+    # The BM25 index covers the whole session, not only vector hits
+    assert {r.metadata["cv_id"] for r in corpus.bm25_search("kubernetes", k=5)} == {"cv_5"}
+    assert corpus.bm25_search("kubernetes", k=5, cv_ids=["cv_1"]) == []
+
+
+def test_upload_and_delete_invalidate_affected_sessions(store, cache):
+    asyncio.run(cache.load("s1", ["cv_0", "cv_1"], store))
+    asyncio.run(cache.load("s2", ["cv_2", "cv_3"], store))
+
+    asyncio.run(store.delete_cv("cv_1"))
+    assert cache.get("s1") is None and cache.get("s2") is not None
+
+    doc = {"id": "cv_2_chunk_9", "cv_id": "cv_2", "filename": "2.pdf", "content": "new", "chunk_index": 9}
+    asyncio.run(store.add_documents([doc], [[0.1] * 16]))
+    assert cache.get("s2") is None
+    assert len(asyncio.run(cache.load("s2", ["cv_2", "cv_3"], store)).chunks) == 9
+
+
+def test_lru_eviction_by_memory_budget_and_latency_stats(store, cache):
+    first = asyncio.run(cache.load("s1", ["cv_0", "cv_1"], store))
+    cache.max_bytes = first.nbytes * 2 + 512  # Room for two sessions
+    asyncio.run(cache.load("s2", ["cv_2", "cv_3"], store))
+    cache.get("s1")  # s1 is now the most recently used
+    asyncio.run(cache.load("s3", ["cv_4", "cv_5"], store))
+
+    assert cache.session_cv_ids("s2") is None
+    assert cache.session_cv_ids("s1") and cache.session_cv_ids("s3")
+
+    cache.record_query(False, 900.0)
+    cache.record_query(True, 300.0)
+    stats = cache.get_stats()
+    assert stats["sessions"] == 2 and stats["evictions"] == 1
+    assert stats["cold_p50_ms"] == 900.0 and stats["warm_p50_ms"] == 300.0
+
+
+def test_warm_turns_skip_the_session_store(store, cache):
+    from types import SimpleNamespace
+
+    from fastapi import HTTPException
+
+    from app.api.routes_sessions import session_cv_ids
+
+    reads = []
+    sessions = {"s1": ["cv_0", "cv_1"]}
+    mgr = SimpleNamespace(get_session_cv_ids=lambda sid: reads.append(sid) or sessions.get(sid))
+
+    assert session_cv_ids(mgr, "s1") == ["cv_0", "cv_1"] and reads == ["s1"]
+    asyncio.run(cache.load("s1", ["cv_0", "cv_1"], store))
+    assert session_cv_ids(mgr, "s1") == ["cv_0", "cv_1"] and reads == ["s1"]
+
+    # Deleting the session invalidates its working set, so the next turn 404s
+    del sessions["s1"]
+    cache.invalidate("s1")
+    with pytest.raises(HTTPException) as error:
+        session_cv_ids(mgr, "s1")
+    assert error.value.status_code == 404
@@ -0,0 +1,81 @@
+"""Tests for single-flight coalescing of identical chat queries."""
+import asyncio
+
+from app.services.single_flight_service import SingleFlightService, make_flight_key
+
+
+def test_key_ignores_formatting_and_pending_questions():
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    a = make_flight_key("chat", "s1", ["cv_2", "cv_1"], "Who knows Python?", history)
+    b = make_flight_key(
+        "chat", "s1", ["cv_1", "cv_2"], "  who knows  python ",
+        history + [{"role": "user", "content": "Who knows Python?"}]
+    )
+    assert a == b
+    assert a != make_flight_key("chat", "s1", ["cv_1"], "Who knows Python?", history)
+    # Another caller's key never joins a run billed to someone else
+    assert make_flight_key("chat", "s1", ["cv_1"], "q", config={"api_key": "aaa"}) != make_flight_key(
+        "chat", "s1", ["cv_1"], "q", config={"api_key": "bbb"}
+    )
+
+
+async def test_concurrent_calls_share_one_execution():
+    service = SingleFlightService()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    results = await asyncio.gather(*(service.run("k", work) for _ in range(3)))
+    assert calls == 1
+    assert [r for r, _ in results] == ["answer"] * 3
+    assert sum(leader for _, leader in results) == 1
+    assert service.get_stats()["coalesced_hits"] == 2
+
+
+async def test_stream_subscribers_share_events():
+    service = SingleFlightService()
+    runs = 0
+
+    async def producer():
+        nonlocal runs
+        runs += 1
+        for i in range(3):
+            await asyncio.sleep(0.005)
+            yield {"event": "step", "data": {"i": i}}
+
+    async def consume(flight):
+        return [e["data"]["i"] async for e in flight.subscribe()]
+
+    leader, is_leader = service.join_stream("k", producer)
+    await asyncio.sleep(0.007)  # Late joiner gets the first event replayed
+    follower = service.attach_stream("k")
+
+    assert is_leader and follower is leader
+    assert await asyncio.gather(consume(leader), consume(follower)) == [[0, 1, 2], [0, 1, 2]]
+    assert runs == 1
+    assert not service.is_in_flight("k")
+
+
+async def test_disconnected_subscriber_is_released():
+    service = SingleFlightService()
+    release = asyncio.Event()
+
+    async def producer():
+        yield {"event": "step", "data": {"i": 0}}
+        await release.wait()
+        yield {"event": "step", "data": {"i": 1}}
+
+    flight, _ = service.join_stream("k", producer)
+    stays, leaves = flight.subscribe(), flight.subscribe()
+    assert (await anext(stays))["data"]["i"] == 0
+    assert (await anext(leaves))["data"]["i"] == 0
+    await leaves.aclose()  # Client disconnected
+    assert flight.subscribers == 1 and service.get_stats()["stream_subscribers"] == 1
+
+    release.set()
+    assert [e["data"]["i"] async for e in stays] == [1]
+    assert flight.subscribers == 0 and flight.events == []
@@ -0,0 +1,80 @@
+"""Tests for pipeline latency tracing."""
+import asyncio
+
+import httpx
+
+from app.utils import tracing
+from app.utils.tracing import Tracer, retry_sleep, traced, traced_to_thread
+from app.utils.upstream_limiter import upstream_async_client
+
+
+def _use_tracer(monkeypatch, max_traces=50):
+    tracer = Tracer(max_traces=max_traces)
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    return tracer
+
+
+def test_spans_nest_across_tasks_threads_and_http(monkeypatch):
+    tracer = _use_tracer(monkeypatch)
+
+    def handler(request):
+        return httpx.Response(200, json={"ok": True})
+
+    @traced("retrieval")
+    async def step():
+        async with upstream_async_client(transport=httpx.MockTransport(handler)) as client:
+            await client.get("https://api.example.com/v1/search")
+        # Clients and offloads that didn't opt in record nothing
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as plain:
+            await plain.get("https://other.example.com/")
+        await asyncio.to_thread(sum, [1])
+        with tracing.span("score", "cpu"):
+            await traced_to_thread(sum, [1, 2, 3])
+        await retry_sleep(0.01, reason="429", attempt=1)
+
+    async def run():
+        with tracer.trace("rag.query", trace_id="t1"):
+            await asyncio.gather(step(), traced_to_thread(lambda: tracing.current_span().name))
+
+    asyncio.run(run())
+
+    trace = tracer.get("t1")
+    names = {child.name for child in trace.root.children}
+    assert "retrieval" in names and any(n.startswith("to_thread:") for n in names)
+
+    retrieval = next(c for c in trace.root.children if c.name == "retrieval")
+    http, score, wait = retrieval.children
+    assert (http.category, http.attrs["host"], http.attrs["status"]) == ("http", "api.example.com", 200)
+    assert score.children[0].category == "thread"
+    assert wait.category == "retry_wait" and wait.duration_ms >= 10
+
+    breakdown = trace.summary()["breakdown_ms"]
+    assert breakdown["retry_wait"] >= 10 and breakdown["http"] > 0
+
+
+def test_chrome_export_and_ring_buffer(monkeypatch):
+    tracer = _use_tracer(monkeypatch, max_traces=2)
+    for i in range(3):
+        try:
+            with tracer.trace("rag.query", trace_id=f"t{i}"):
+                with tracing.span("generation", "stage", model="m"):
+                    if i == 2:
+                        raise ValueError("boom")
+        except ValueError:
+            pass
+
+    assert [t.trace_id for t in tracer.recent()] == ["t2", "t1"]
+    assert tracer.get("t0") is None
+    assert tracer.get("t2").root.error == "ValueError: boom"
+
+    events = tracer.get("t1").to_chrome()["traceEvents"]
+    complete = [e for e in events if e["ph"] == "X"]
+    assert [e["name"] for e in complete] == ["rag.query", "generation"]
+    assert complete[1]["args"] == {"model": "m"} and complete[1]["ts"] >= 0
+
+
+def test_spans_outside_a_trace_are_noops(monkeypatch):
+    tracer = _use_tracer(monkeypatch)
+    with tracing.span("orphan") as span:
+        assert span is None
+    assert tracer.recent() == []
@@ -0,0 +1,86 @@
+"""Tests for the shared per-upstream rate limiter."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.utils import upstream_limiter
+from app.utils.exceptions import RateLimitError
+from app.utils.monitoring import RateLimiter
+from app.utils.upstream_limiter import Priority, UpstreamLimiter, upstream_async_client, upstream_priority
+
+
+def test_priority_order_and_deadlines():
+    # Bucket of one request refilled every 0.1s
+    limiter = UpstreamLimiter("test", requests_per_minute=600, burst_seconds=0.1)
+    admitted = []
+
+    async def call(name, priority, timeout=None):
+        with upstream_priority(priority):
+            await limiter.acquire(timeout=timeout)
+        admitted.append(name)
+
+    async def run():
+        await limiter.acquire()  # Empties the bucket
+        tasks = [asyncio.create_task(call("eval", Priority.EVALUATION))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("ingest", Priority.INGESTION)))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("chat", Priority.INTERACTIVE)))
+        await asyncio.gather(*tasks)
+
+        with pytest.raises(RateLimitError):
+            await limiter.acquire(timeout=0.01)
+
+    asyncio.run(run())
+
+    assert admitted == ["chat", "ingest", "eval"]
+    stats = limiter.get_stats()
+    assert stats["queue_depth"] == 0
+    assert stats["priorities"]["interactive"]["rejected"] == 1
+    assert stats["priorities"]["evaluation"]["max_wait_ms"] >= 200
+
+
+def test_429_pauses_the_rate_limited_model(monkeypatch):
+    monkeypatch.setattr(settings, "openrouter_base_url", "https://openrouter.example/api/v1")
+    monkeypatch.setattr(upstream_limiter, "_limiters", {})
+    monkeypatch.setattr(upstream_limiter, "_enabled", True)
+    responses = iter([
+        httpx.Response(429, headers={"retry-after": "0.3"}),
+        httpx.Response(429, headers={"retry-after": "5"}),
+        httpx.Response(200, json={"usage": {"total_tokens": 10}}),
+        httpx.Response(200, json={"usage": {"total_tokens": 10}}),
+    ])
+    url = "https://openrouter.example/api/v1/chat/completions"
+
+    async def timed(client, model):
+        started = time.perf_counter()
+        await client.post(url, json={"model": model})
+        return time.perf_counter() - started
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: next(responses))
+        async with upstream_async_client(transport=transport) as client:
+            await client.post(url, json={"model": "limited"})
+        # Clients not built by the limiter module are left alone
+        async with httpx.AsyncClient(transport=transport) as plain:
+            await plain.post(url, json={"model": "other"})
+        async with upstream_async_client(transport=transport) as client:
+            return await timed(client, "other"), await timed(client, "limited")
+
+    other, limited = asyncio.run(run())
+    assert other < 0.2 and limited >= 0.25
+    stats = upstream_limiter.get_upstream_limit_stats()["openrouter"]
+    assert stats["throttled"] == 1 and stats["priorities"]["interactive"]["admitted"] == 3
+
+
+def test_legacy_rate_limiter_budget():
+    limiter = RateLimiter(max_requests_per_minute=2, max_tokens_per_minute=1000)
+    assert limiter.check_limit(500) == (True, 0)
+    limiter.record_request(900)
+    allowed, wait = limiter.check_limit(500)
+    assert not allowed and wait > 0
+    limiter.record_request(0)
+    assert not limiter.check_limit(0)[0]  # Both requests of the minute used
@@ -522,6 +522,27 @@ function App() {
               });
             }
             
+            // Handle structured_partial events: sections parsed while tokens stream
+            if (data.section) {
+              setStreamingStateBySession(prev => {
+                const sessionState = prev[targetSessionId];
+                if (!sessionState) return prev;
+                const partial = { ...(sessionState.structuredPartial || {}) };
+                if (data.section === 'table_header') {
+                  partial.table = { headers: data.headers, rows: [] };
+                } else if (data.section === 'table_row') {
+                  const table = partial.table || { headers: [], rows: [] };
+                  partial.table = { ...table, rows: [...table.rows, data] };
+                } else {
+                  partial[data.section] = data.content;
+                }
+                return {
+                  ...prev,
+                  [targetSessionId]: { ...sessionState, structuredPartial: partial }
+                };
+              });
+            }
+            
             // Handle complete event
             if (data.response || data.answer) {
               finalResult = data;
@@ -339,6 +339,54 @@ export const RerankingResultsPanel = memo(({ results, method }) => {
 
 RerankingResultsPanel.displayName = 'RerankingResultsPanel';
 
+/**
+ * Sections parsed while the answer streams (structured_partial events)
+ */
+export const StructuredPartialPreview = memo(({ partial, language }) => {
+  const { direct_answer: directAnswer, table, conclusion } = partial;
+  const cleanCell = (cell) => cell.replace(/\*\*/g, '').replace(/\[([^\]]+)\]\([^)]*\)/g, '$1');
+  
+  if (!directAnswer && !table && !conclusion) return null;
+  
+  return (
+    <div className="mt-3 space-y-2">
+      {directAnswer && (
+        <p className="text-sm text-gray-800 dark:text-gray-200">{cleanCell(directAnswer)}</p>
+      )}
+      {table && table.rows.length > 0 && (
+        <div className="overflow-x-auto rounded-lg border border-gray-200 dark:border-gray-700">
+          <table className="min-w-full text-xs">
+            <thead className="bg-gray-100 dark:bg-gray-700">
+              <tr>
+                {table.headers.map((header, idx) => (
+                  <th key={idx} className="px-2 py-1 text-left font-medium text-gray-600 dark:text-gray-300">{cleanCell(header)}</th>
+                ))}
+              </tr>
+            </thead>
+            <tbody>
+              {table.rows.map((row) => (
+                <tr key={row.index} className="border-t border-gray-100 dark:border-gray-700">
+                  {row.cells.map((cell, idx) => (
+                    <td key={idx} className="px-2 py-1 text-gray-700 dark:text-gray-300">{cleanCell(cell)}</td>
+                  ))}
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      )}
+      {conclusion && (
+        <p className="text-xs text-gray-600 dark:text-gray-400">
+          <span className="font-medium">{language === 'es' ? 'Conclusión: ' : 'Conclusion: '}</span>
+          {cleanCell(conclusion)}
+        </p>
+      )}
+    </div>
+  );
+});
+
+StructuredPartialPreview.displayName = 'StructuredPartialPreview';
+
 /**
  * Query understanding display panel
  */
@@ -499,7 +547,7 @@ const StreamingMessage = ({
   
   if (!streamingState) return null;
   
-  const { currentStep, steps, queryUnderstanding, candidates, rerankingResults, rerankingMethod, partialAnswer, currentProgress, streamingAnswer, isStreaming } = streamingState;
+  const { currentStep, steps, queryUnderstanding, candidates, rerankingResults, rerankingMethod, partialAnswer, currentProgress, streamingAnswer, isStreaming, structuredPartial } = streamingState;
   
   // MINIMAL MODE: Only show TypingIndicator when preview is disabled
   if (!showPreview) {
@@ -561,6 +609,11 @@ const StreamingMessage = ({
           <RerankingResultsPanel results={rerankingResults} method={rerankingMethod} />
         )}
         
+        {/* Sections already parsed from the stream (replaced by the final answer) */}
+        {structuredPartial && (
+          <StructuredPartialPreview partial={structuredPartial} language={language} />
+        )}
+        
         {/* Partial Answer with Typewriter or Real-time Streaming - shown in code block for raw markdown */}
         {(partialAnswer || streamingAnswer) && (
           <div className="mt-3 rounded-xl border border-gray-200 dark:border-gray-700 overflow-hidden">
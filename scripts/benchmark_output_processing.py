@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""
+Benchmark OutputOrchestrator.process per structure type.
+
+Measures, per answer:
+1. Full processing time (pre-clean, structure modules, reference formatting,
+   duplicate removal, post-clean) for every query_type the orchestrator routes
+2. Duplicate-paragraph removal alone: indexed prefixes vs. comparing against
+   every earlier paragraph
+
+Uses synthetic answers in the prompt's output format by default; pass
+--recorded with a JSONL file of {"query_type": ..., "llm_output": ...} lines
+(e.g. exported from debug logs or eval runs) to benchmark real LLM outputs.
+
+Usage:
+    python scripts/benchmark_output_processing.py
+    python scripts/benchmark_output_processing.py --candidates 30 --repeat 20
+    python scripts/benchmark_output_processing.py --recorded answers.jsonl
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(backend_path))
+
+# Keep per-answer logging out of the timings
+logging.basicConfig(level=logging.ERROR)
+
+from app.services.output_processor.markdown_ast import parse_markdown
+from app.services.output_processor.orchestrator import OutputOrchestrator
+
+QUERY_TYPES = [
+    "search", "comparison", "ranking", "job_match", "team_build",
+    "verification", "summary", "red_flags", "single_candidate",
+]
+
+QUERIES = {
+    "search": "Who has experience with Python and AWS?",
+    "comparison": "Compare the backend candidates",
+    "ranking": "Rank the top candidates for a senior backend role",
+    "job_match": "Who matches this job: senior Python engineer with Kubernetes",
+    "team_build": "Build a team of 3 for a data platform",
+    "verification": "Does Candidate 0 have a master's degree?",
+    "summary": "Give me an overview of all candidates",
+    "red_flags": "Any red flags for Candidate 0?",
+    "single_candidate": "Tell me about Candidate 0",
+}
+
+SKILLS = ["Python", "AWS", "Kubernetes", "React", "Java", "SQL", "Terraform", "Go"]
+
+FILLER = (
+    "brings solid delivery experience across distributed systems, has mentored "
+    "engineers and owned production services end to end."
+)
+
+
+def synthetic_chunks(rng: random.Random, candidates: int) -> list[dict]:
+    chunks = []
+    for i in range(candidates):
+        skills = ", ".join(rng.sample(SKILLS, 4))
+        chunks.append({
+            "content": f"Candidate {i}. Skills: {skills}. {rng.randint(1, 15)} years of experience. {FILLER}",
+            "metadata": {
+                "cv_id": f"cv_{i:04d}",
+                "candidate_name": f"Candidate {i}",
+                "filename": f"cv_candidate_{i}.pdf",
+                "skills": skills,
+                "total_experience_years": rng.randint(1, 15),
+                "section_type": "summary",
+            },
+            "score": round(rng.uniform(0.4, 0.9), 3),
+        })
+    return chunks
+
+
+def synthetic_output(rng: random.Random, query_type: str, candidates: int) -> str:
+    """An answer in the :::thinking / table / :::conclusion format the prompts ask for."""
+    names = [(f"Candidate {i}", f"cv_{i:04d}") for i in range(candidates)]
+    rows = "\n".join(
+        f"| **[{name}](cv:{cv_id})** | {', '.join(rng.sample(SKILLS, 3))} | {rng.randint(1, 15)} years | {rng.randint(40, 98)}% |"
+        for name, cv_id in names
+    )
+    analysis = "\n\n".join(
+        f"**[{name}](cv:{cv_id})** {FILLER} Strong in {rng.choice(SKILLS)}."
+        for name, cv_id in names[:10]
+    )
+    # LLMs repeat themselves; keep some duplicated paragraphs for the cleanup pass
+    repeated = "\n\n".join(analysis.split("\n\n")[:3])
+    top, top_id = names[0]
+    return (
+        f":::thinking\nThe user asked a {query_type} question. I reviewed {candidates} CVs, "
+        f"compared skills and experience, and checked for gaps.\n:::\n\n"
+        f"### Direct Answer to: \"{QUERIES[query_type]}\"\n"
+        f"**[{top}](cv:{top_id})** is the strongest match based on skills and experience. "
+        f"Several other candidates are close behind.\n\n"
+        f"### Analysis\n{analysis}\n\n{repeated}\n\n"
+        f"| Candidate | Key Skills | Experience | Match Score |\n|---|---|---|---|\n{rows}\n\n"
+        f":::conclusion\n**[{top}](cv:{top_id})** is recommended. Next step: schedule a technical interview.\n:::"
+    )
+
+
+def load_recorded(path: Path) -> list[tuple[str, str]]:
+    answers = []
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            output = record.get("llm_output") or record.get("response") or record.get("answer")
+            if output:
+                answers.append((record.get("query_type", "search"), output))
+    return answers
+
+
+def legacy_remove_duplicate_paragraphs(text: str) -> str:
+    """Previous approach: prefix comparison against every earlier paragraph."""
+    unique, seen = [], set()
+    for para in text.split("\n\n"):
+        stripped = para.strip()
+        if not stripped:
+            continue
+        normalized = " ".join(stripped.lower().split())
+        normalized = re.sub(r"\s*\|\s*", " ", normalized)
+        normalized = re.sub(r"\|[^|]*\|[^|]*\|?", "", normalized)
+        normalized = " ".join(normalized.split())[:150]
+        if stripped.startswith("|"):
+            unique.append(para)
+            continue
+        is_dup = normalized in seen
+        if not is_dup and len(normalized) > 50:
+            is_dup = any(
+                normalized.startswith(s[:50]) or s.startswith(normalized[:50])
+                for s in seen if len(s) > 30
+            )
+        if not is_dup:
+            seen.add(normalized)
+            unique.append(para)
+    return "\n\n".join(unique)
+
+
+def timed(fn, items, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            # Measure cold parses: every real answer is new text
+            parse_markdown.cache_clear()
+            fn(item)
+    return (time.perf_counter() - start) * 1000 / max(len(items) * repeat, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=15, help="Candidates per synthetic answer")
+    parser.add_argument("--answers", type=int, default=5, help="Synthetic answers per structure type")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--recorded", type=Path, help="JSONL file of recorded LLM outputs")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    chunks = synthetic_chunks(rng, args.candidates)
+
+    by_type = defaultdict(list)
+    if args.recorded:
+        for query_type, output in load_recorded(args.recorded):
+            by_type[query_type].append(output)
+    else:
+        for query_type in QUERY_TYPES:
+            by_type[query_type] = [synthetic_output(rng, query_type, args.candidates) for _ in range(args.answers)]
+    if not by_type:
+        print("No answers to benchmark")
+        return
+
+    orchestrator = OutputOrchestrator()
+    formatted = []
+
+    def process(query_type: str):
+        def run(output: str):
+            _, answer = orchestrator.process(
+                raw_llm_output=output,
+                chunks=chunks,
+                query=QUERIES.get(query_type, ""),
+                query_type=query_type,
+                candidate_name="Candidate 0" if query_type in ("single_candidate", "red_flags") else None,
+                cv_id="cv_0000" if query_type in ("single_candidate", "red_flags") else None,
+            )
+            formatted.append(answer)
+        return run
+
+    print(f"Answers: {sum(len(v) for v in by_type.values())} | candidates in context: {len(chunks)}")
+    print(f"{'structure':<22}{'answers':>8}{'avg chars':>11}{'ms/answer':>11}")
+    print("-" * 52)
+    for query_type, outputs in by_type.items():
+        avg_chars = sum(len(o) for o in outputs) / len(outputs)
+        ms = timed(process(query_type), outputs, args.repeat)
+        print(f"{query_type:<22}{len(outputs):>8}{avg_chars:>11.0f}{ms:>11.3f}")
+
+    # Duplicate removal on the assembled answers, where it runs in production
+    answers = formatted[:200]
+    legacy = timed(legacy_remove_duplicate_paragraphs, answers, args.repeat)
+    indexed = timed(orchestrator._remove_duplicate_paragraphs, answers, args.repeat)
+    print()
+    print(f"{'dedup: all-pairs prefixes':<33}{legacy:>10.3f}")
+    print(f"{'dedup: indexed prefixes':<33}{indexed:>10.3f}")
+    print(f"{'  speedup':<33}{legacy / max(indexed, 1e-9):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
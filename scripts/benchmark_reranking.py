@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Benchmark reranking backends against a stubbed HTTP backend.
+
+Compares, over several chat turns on the same session:
+1. llm         - RerankingService (one OpenRouter call scoring every chunk)
+2. hf          - CrossEncoderRerankingService (HuggingFace Inference API,
+                 (query, chunk) score cache)
+3. lexical     - local BM25 + vector similarity backend
+4. onnx        - local ONNX cross-encoder (only with --onnx-model-dir)
+
+The remote paths hit a local FastAPI stub that answers like OpenRouter and
+the HF Inference API after --latency-ms (+ --per-doc-ms per chunk), so the
+numbers reflect network-bound behaviour without API keys. Every turn asks
+about the same retrieved set with a few new chunks, as follow-up questions
+do; the first turn is reported as cold and the rest as warm.
+
+Usage:
+    python scripts/benchmark_reranking.py
+    python scripts/benchmark_reranking.py --chunks 50 --turns 5 --latency-ms 400 --per-doc-ms 10
+    python scripts/benchmark_reranking.py --onnx-model-dir models/bge-reranker-base-onnx
+"""
+import argparse
+import asyncio
+import logging
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from statistics import mean
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(backend_path))
+
+# Keep per-call logging out of the timings
+logging.basicConfig(level=logging.ERROR)
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+from app.config import settings
+from app.providers.huggingface_client import HuggingFaceClient
+from app.services import local_reranker
+from app.services.local_reranker import (
+    LexicalSemanticBackend,
+    LocalRerankingService,
+    OnnxCrossEncoderBackend,
+    RerankScoreCache,
+)
+from app.services.reranking_service import RerankingService
+from app.services.reranking_service_v2 import CrossEncoderRerankingService
+
+SKILLS = ["Python", "AWS", "Kubernetes", "React", "Java", "SQL", "Terraform", "Go", "Django", "Spark"]
+ROLES = ["backend engineer", "data engineer", "frontend developer", "DevOps engineer", "ML engineer"]
+QUERY = "Which candidates have strong Python and AWS experience for a senior backend role?"
+
+
+def stub_backend(latency_ms: float, per_doc_ms: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        count = len(re.findall(r"^\[\d+\] ", prompt, flags=re.MULTILINE))
+        await asyncio.sleep((latency_ms + per_doc_ms * count) / 1000)
+        scores = [random.randint(0, 10) for _ in range(count)]
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": 3 * count}
+        return {"choices": [{"message": {"content": str(scores)}}], "usage": usage}
+
+    @app.post("/models/{model:path}")
+    async def hf_inference(model: str, request: Request):
+        pairs = (await request.json())["inputs"]
+        await asyncio.sleep((latency_ms + per_doc_ms * len(pairs)) / 1000)
+        return [random.random() for _ in pairs]
+
+    return app
+
+
+def start_stub(latency_ms: float, per_doc_ms: float) -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(stub_backend(latency_ms, per_doc_ms), host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def make_chunks(count: int, rng: random.Random, start: int = 0) -> list:
+    chunks = []
+    for i in range(start, start + count):
+        skills = rng.sample(SKILLS, 4)
+        content = (
+            f"Candidate {i} is a {rng.choice(ROLES)} with {rng.randint(1, 15)} years of experience "
+            f"using {', '.join(skills)}. Led projects on {rng.choice(SKILLS)} migrations and mentored juniors."
+        )
+        chunks.append({
+            "content": content,
+            "metadata": {"cv_id": f"cv_{i:04d}", "filename": f"candidate_{i}.pdf"},
+            "score": round(rng.uniform(0.3, 0.9), 3),
+        })
+    return chunks
+
+
+def turns(chunks: int, count: int, new_per_turn: int, seed: int) -> list:
+    """Retrieved sets per turn: the same base set plus a few new chunks each turn."""
+    rng = random.Random(seed)
+    base = make_chunks(chunks, rng)
+    return [base[new_per_turn * t:] + make_chunks(new_per_turn * t, rng, start=chunks + 1000 * t) for t in range(count)]
+
+
+async def run_backend(name: str, service, sets: list) -> dict:
+    latencies = []
+    for chunk_set in sets:
+        start = time.perf_counter()
+        await service.rerank(QUERY, chunk_set, top_k=None)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"name": name, "cold": latencies[0], "warm": mean(latencies[1:]) if len(latencies) > 1 else latencies[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reranking backends")
+    parser.add_argument("--chunks", type=int, default=30, help="Retrieved chunks per turn")
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--new-per-turn", type=int, default=3, help="Chunks not seen in earlier turns")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Stub round-trip latency")
+    parser.add_argument("--per-doc-ms", type=float, default=5, help="Stub time per scored chunk")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--onnx-model-dir", help="ONNX cross-encoder export (model.onnx + tokenizer.json)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    base_url = start_stub(args.latency_ms, args.per_doc_ms)
+    settings.openrouter_base_url = base_url
+    settings.llm_hedging_enabled = False
+    sets = turns(args.chunks, args.turns, args.new_per_turn, args.seed)
+
+    hf_client = HuggingFaceClient(api_key="hf-benchmark")
+    hf_client.BASE_URL = f"{base_url}/models"
+    backends = [
+        ("llm", RerankingService(model="stub/reranker", api_key="sk-benchmark")),
+        ("hf", CrossEncoderRerankingService(hf_client=hf_client)),
+        ("lexical", LocalRerankingService(LexicalSemanticBackend())),
+    ]
+    if args.onnx_model_dir:
+        backends.append(("onnx", LocalRerankingService(
+            OnnxCrossEncoderBackend(args.onnx_model_dir), cache=RerankScoreCache(), batch_size=args.batch_size
+        )))
+
+    print(
+        f"{args.chunks} chunks/turn, {args.turns} turns, {args.new_per_turn} new chunks/turn, "
+        f"stub latency {args.latency_ms:.0f}ms + {args.per_doc_ms:.0f}ms/chunk\n"
+    )
+    print(f"{'backend':<10} {'cold ms':>10} {'warm ms':>10} {'warm speedup vs llm':>20}")
+    results = []
+    for name, service in backends:
+        local_reranker._score_cache = RerankScoreCache()  # Fresh shared cache per backend
+        results.append(asyncio.run(run_backend(name, service, sets)))
+    llm_warm = results[0]["warm"]
+    for r in results:
+        print(f"{r['name']:<10} {r['cold']:>10.1f} {r['warm']:>10.1f} {llm_warm / max(r['warm'], 1e-6):>19.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
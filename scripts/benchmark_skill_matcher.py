@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Benchmark the shared skill matcher against per-term regex scanning.
+
+Measures, per CV:
+1. Skill extraction alone (compiled automaton vs. one regex per taxonomy term)
+2. Ingestion: SmartChunkingService.chunk_cv + PDFService.extract_skills
+3. Query analysis: QueryAnalyzer.analyze + ContextExtractor skill extraction
+
+Uses synthetic CVs by default; pass --pdf-dir to benchmark real PDFs.
+
+Usage:
+    python scripts/benchmark_skill_matcher.py
+    python scripts/benchmark_skill_matcher.py --cvs 200 --pdf-dir backend/storage
+"""
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(backend_path))
+
+# Keep per-CV warnings out of the timings
+logging.basicConfig(level=logging.ERROR)
+
+from app.services.output_processor.adaptive.query_analyzer import QueryAnalyzer
+from app.services.pdf_service import PDFService
+from app.services.skill_taxonomy import SKILL_TAXONOMY, get_skill_matcher
+from app.services.smart_chunking_service import SmartChunkingService
+from app.services.suggestion_engine.context_extractor import ContextExtractor
+
+QUERIES = [
+    "Who knows Python and Kubernetes?",
+    "What technologies do candidates with 5 years of experience have?",
+    "Compare the skills of the senior backend engineers",
+    "List candidates with React, Node.js and AWS",
+    "Which languages do the data scientists speak?",
+    "Find candidates with CI/CD and Terraform but without Java",
+]
+
+FILLER = (
+    "Led cross-functional initiatives, mentored junior colleagues and improved "
+    "delivery processes across several teams and stakeholders."
+)
+
+
+def synthetic_cv(rng: random.Random, index: int) -> str:
+    terms = [t for skills in SKILL_TAXONOMY.values() for t in skills]
+    skills = rng.sample(terms, 25)
+    jobs = []
+    for j in range(4):
+        start = 2010 + j * 3
+        used = ", ".join(rng.sample(terms, 6))
+        jobs.append(
+            f"Senior Engineer at Company{j} ({start} - {start + 3})\n"
+            f"{FILLER} Built systems with {used}. {FILLER}"
+        )
+    return (
+        f"Candidate {index}\ncandidate{index}@mail.com\n\n"
+        f"SUMMARY\n{FILLER}\n\n"
+        "EXPERIENCE\n" + "\n\n".join(jobs) + "\n\n"
+        "SKILLS\n" + "\n".join(f"• {s}" for s in skills) + "\n\n"
+        f"EDUCATION\nBachelor of Science in Computer Science, University {index}\n"
+    )
+
+
+def load_pdf_texts(pdf_dir: Path) -> list[str]:
+    pdf_service = PDFService()
+    return [pdf_service.extract_text_from_pdf(p) for p in sorted(pdf_dir.glob("*.pdf"))]
+
+
+def legacy_extract(text: str, patterns: list[tuple[str, re.Pattern]]) -> list[str]:
+    """Previous approach: one regex search per vocabulary term."""
+    return [term for term, pattern in patterns if pattern.search(text)]
+
+
+def timed(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) * 1000 / max(len(items), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=100, help="Number of synthetic CVs")
+    parser.add_argument("--pdf-dir", type=Path, help="Directory of real CV PDFs")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.pdf_dir:
+        texts = load_pdf_texts(args.pdf_dir)
+    else:
+        rng = random.Random(args.seed)
+        texts = [synthetic_cv(rng, i) for i in range(args.cvs)]
+    if not texts:
+        print("No CVs to benchmark")
+        return
+
+    matcher = get_skill_matcher()
+    legacy_patterns = [
+        (term, re.compile(rf"(?<!\w){re.escape(alias)}(?!\w)", re.IGNORECASE))
+        for skills in SKILL_TAXONOMY.values()
+        for term, aliases in skills.items()
+        for alias in (term, *aliases)
+    ]
+    chunker = SmartChunkingService()
+    pdf_service = PDFService()
+    analyzer = QueryAnalyzer()
+    extractor = ContextExtractor()
+
+    def ingest(text: str):
+        chunker.chunk_cv(text, cv_id="cv_bench", filename="bench.pdf")
+        pdf_service.extract_skills(text)
+
+    def analyze(query: str):
+        analyzer.analyze(query)
+        extractor._extract_skills(query)
+
+    queries = QUERIES * max(1, len(texts) // len(QUERIES))
+
+    print(f"CVs: {len(texts)} | vocabulary aliases: {len(legacy_patterns)}")
+    print(f"{'stage':<34}{'ms/item':>10}")
+    print("-" * 44)
+    legacy = timed(lambda t: legacy_extract(t, legacy_patterns), texts)
+    compiled = timed(matcher.find_terms, texts)
+    print(f"{'skills: per-term regex':<34}{legacy:>10.3f}")
+    print(f"{'skills: compiled matcher':<34}{compiled:>10.3f}")
+    print(f"{'  speedup':<34}{legacy / max(compiled, 1e-9):>9.1f}x")
+    print(f"{'ingestion per CV':<34}{timed(ingest, texts):>10.3f}")
+    print(f"{'query analysis per query':<34}{timed(analyze, queries):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,22 @@ Script to re-index all CVs with the new SmartChunkingService.
 
 This script will:
 1. Find all PDF files in the storage directory
-2. Clear the existing vector store
-3. Re-process each PDF with SmartChunkingService
-4. Create new embeddings with enriched metadata
+2. Re-process each PDF with SmartChunkingService
+3. Update each CV's chunks in place, matched to stored chunks by content hash:
+   unchanged texts keep their stored embeddings (only their metadata is
+   updated), new or changed texts are embedded, leftover chunks are removed
 
 Usage:
     cd backend
     python ../scripts/reindex_cvs.py
+    python ../scripts/reindex_cvs.py --full   # Clear the store and re-embed everything
 
-The script will prompt for confirmation before clearing existing data.
+Existing data is kept unless --full is given (use it after changing the
+embedding model). The script prompts for confirmation before it starts.
 """
 import sys
 import os
+import argparse
 import asyncio
 import logging
 from pathlib import Path
@@ -33,9 +37,11 @@ logger = logging.getLogger(__name__)
 
 # Import after path setup
 import pdfplumber
+from app.services.candidate_profile_service import get_profile_store
+from app.services.incremental_indexing import index_chunks
 from app.services.smart_chunking_service import SmartChunkingService
 from app.providers.local.vector_store import SimpleVectorStore
-from app.providers.local.embeddings import LocalEmbedder
+from app.providers.local.embeddings import LocalEmbeddingProvider
 
 
 def extract_text_from_pdf(pdf_path: Path) -> str:
@@ -53,8 +59,8 @@ def extract_text_from_pdf(pdf_path: Path) -> str:
         return ""
 
 
-async def reindex_all_cvs():
-    """Re-index all CVs with SmartChunkingService."""
+async def reindex_all_cvs(full: bool = False):
+    """Re-index all CVs with SmartChunkingService (incremental unless full)."""
     
     # Find storage directory
     storage_dir = backend_path.parent / "storage"
@@ -75,9 +81,12 @@ async def reindex_all_cvs():
     print("CV RE-INDEXING WITH SMART CHUNKING")
     print("="*60)
     print(f"\nThis will:")
-    print(f"  1. Clear all existing embeddings")
+    if full:
+        print(f"  1. Clear all existing embeddings")
+    else:
+        print(f"  1. Keep stored embeddings of unchanged chunk texts")
     print(f"  2. Re-process {len(pdf_files)} PDFs with SmartChunkingService")
-    print(f"  3. Create new embeddings with enriched metadata")
+    print(f"  3. Update chunks with enriched metadata (embedding new or changed texts only)")
     print(f"\nPDF files to process:")
     for pdf in pdf_files[:10]:
         print(f"  - {pdf.name}")
@@ -93,15 +102,18 @@ async def reindex_all_cvs():
     logger.info("Initializing services...")
     chunking_service = SmartChunkingService()
     vector_store = SimpleVectorStore()
-    embedder = LocalEmbedder()
+    embedder = LocalEmbeddingProvider()
     
     # Clear existing data
-    logger.info("Clearing existing vector store...")
-    await vector_store.delete_all_cvs()
+    if full:
+        logger.info("Clearing existing vector store...")
+        await vector_store.delete_all_cvs()
     
     # Process each PDF
     success_count = 0
     error_count = 0
+    embedded_count = 0
+    skipped_count = 0
     
     for i, pdf_path in enumerate(pdf_files, 1):
         logger.info(f"\n[{i}/{len(pdf_files)}] Processing: {pdf_path.name}")
@@ -138,14 +150,13 @@ async def reindex_all_cvs():
                 logger.info(f"  Current Role: {meta.get('current_role', 'Unknown')}")
                 logger.info(f"  Experience: {meta.get('total_experience_years', 0)} years")
             
-            # Create embeddings
-            contents = [chunk["content"] for chunk in chunks]
-            embedding_result = await embedder.embed_documents(contents)
+            # Embed new/changed texts and store (unchanged texts reuse their embeddings)
+            result = await index_chunks(chunks, vector_store, embedder, reuse_embeddings=not full)
+            get_profile_store().index_cv_chunks(chunks)
+            embedded_count += result.embedded
+            skipped_count += result.reused
             
-            # Store in vector store
-            await vector_store.add_documents(chunks, embedding_result.embeddings)
-            
-            logger.info(f"  ✓ Indexed successfully")
+            logger.info(f"  ✓ Indexed successfully ({result.embedded} embedded, {result.reused} skipped)")
             success_count += 1
             
         except Exception as e:
@@ -159,6 +170,8 @@ async def reindex_all_cvs():
     print(f"\nResults:")
     print(f"  ✓ Successfully indexed: {success_count}")
     print(f"  ✗ Errors: {error_count}")
+    print(f"  Embeddings computed: {embedded_count}")
+    print(f"  Embeddings skipped (unchanged text): {skipped_count}")
     
     # Show vector store stats
     stats = await vector_store.get_stats()
@@ -169,4 +182,7 @@ async def reindex_all_cvs():
 
 
 if __name__ == "__main__":
-    asyncio.run(reindex_all_cvs())
+    parser = argparse.ArgumentParser(description="Re-index all CVs with SmartChunkingService")
+    parser.add_argument("--full", action="store_true", help="Clear the store and re-embed every chunk")
+    args = parser.parse_args()
+    asyncio.run(reindex_all_cvs(full=args.full))
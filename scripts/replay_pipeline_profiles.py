@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+Replay logged queries under each RAG pipeline profile.
+
+Reads eval_logs/queries_*.jsonl, re-runs each distinct (session, query) against
+the session's current CVs once per profile (full, lookup, ranking, overview)
+and reports, per query type and profile:
+
+1. mean end-to-end latency and its delta vs. the full pipeline
+2. mean OpenRouter cost / tokens and their delta vs. full
+3. mean answer confidence and its delta vs. full (negative = quality lost)
+
+The profile the query type maps to today is marked with "*", so a row with a
+large latency/cost saving and a near-zero confidence delta confirms the
+mapping; a big confidence drop means the query type should use another
+profile (PIPELINE_PROFILE_OVERRIDES).
+
+Replays make real model calls with the models given on the command line; they
+are not written to eval_logs and never sampled for RAGAS.
+
+Usage:
+    python scripts/replay_pipeline_profiles.py --generation-model google/gemini-2.0-flash-001 \\
+        --understanding-model google/gemini-2.0-flash-001
+    python scripts/replay_pipeline_profiles.py --mode cloud --limit 50 --profiles full,lookup \\
+        --generation-model ... --understanding-model ... --reranking-model ...
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from statistics import mean
+
+# Add backend to path
+backend_path = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(backend_path))
+
+# Keep pipeline logging out of the report
+logging.basicConfig(level=logging.ERROR)
+
+from app.config import Mode, settings
+from app.services.pipeline_profiles import PIPELINE_PROFILES, select_profile
+from app.services.rag_service_v5 import RAGServiceV5
+
+DEFAULT_LOG_DIR = Path(__file__).resolve().parent.parent / "eval_logs"
+
+
+def load_queries(log_dir: Path, days: int, limit: int) -> list:
+    """Distinct (session_id, query) pairs logged in the last `days` days, newest first."""
+    dates = {(datetime.now() - timedelta(days=i)).strftime("%Y%m%d") for i in range(days)}
+    seen = set()
+    queries = []
+    for path in sorted(log_dir.glob("queries_*.jsonl"), reverse=True):
+        if path.stem.split("_")[-1] not in dates:
+            continue
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+        for line in reversed(lines):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            key = (entry.get("session_id"), entry.get("query"))
+            if not all(key) or key in seen:
+                continue
+            seen.add(key)
+            queries.append({"session_id": key[0], "query": key[1]})
+            if len(queries) >= limit:
+                return queries
+    return queries
+
+
+def session_cv_ids(mode: Mode, session_id: str) -> list:
+    if mode == Mode.CLOUD:
+        from app.providers.cloud.sessions import supabase_session_manager as manager
+    else:
+        from app.models.sessions import session_manager as manager
+    if not manager.get_session(session_id):
+        return []
+    return manager.get_cv_ids_for_session(session_id) or []
+
+
+def summarize(response) -> dict:
+    """Latency, cost, tokens, confidence and query type of one replayed answer."""
+    stages = response.metrics.to_dict()["stages"]
+    return {
+        "query_type": response.query_understanding.query_type if response.query_understanding else None,
+        "latency_ms": response.metrics.total_ms,
+        "cost": sum(s.get("openrouter_cost", 0.0) or 0.0 for s in stages.values()),
+        "tokens": sum((s.get("prompt_tokens", 0) or 0) + (s.get("completion_tokens", 0) or 0) for s in stages.values()),
+        "confidence": response.confidence_score,
+    }
+
+
+async def replay(args, queries: list, profiles: list) -> list:
+    mode = Mode(args.mode)
+    service = RAGServiceV5.from_factory(mode)
+    service.config.understanding_model = args.understanding_model
+    service.config.generation_model = args.generation_model
+    service.config.reranking_model = args.reranking_model or args.generation_model
+    service.config.verification_model = args.verification_model or args.generation_model
+    service.lazy_initialize_providers(api_key=args.api_key)
+
+    # Don't log replays into eval_logs or spend RAGAS calls on them
+    service._eval_service = None
+    settings.ragas_sample_rate = 0.0
+
+    runs = []
+    for i, item in enumerate(queries, 1):
+        cv_ids = session_cv_ids(mode, item["session_id"])
+        if not cv_ids:
+            print(f"[{i}/{len(queries)}] skipped (session {item['session_id']} has no CVs)")
+            continue
+        results = {}
+        for profile in profiles:
+            service.config.pipeline_profile = profile
+            await service.clear_caches()
+            response = await service.query(
+                question=item["query"],
+                session_id=item["session_id"],
+                cv_ids=cv_ids,
+                total_cvs_in_session=len(cv_ids)
+            )
+            results[profile] = summarize(response)
+        query_type = results.get("full", next(iter(results.values())))["query_type"]
+        runs.append({"query": item["query"], "query_type": query_type, "results": results})
+        print(f"[{i}/{len(queries)}] {query_type or '?':<16} {item['query'][:60]}")
+    return runs
+
+
+def report(runs: list, profiles: list) -> None:
+    by_type = defaultdict(list)
+    for run in runs:
+        by_type[run["query_type"] or "unknown"].append(run)
+
+    print(f"\n{len(runs)} queries replayed under {', '.join(profiles)}")
+    print("(* = profile the query type uses today; deltas are paired against 'full')\n")
+    header = f"{'query type':<16} {'profile':<10} {'n':>4} {'latency ms':>11} {'Δ':>8} {'cost $':>9} {'Δ':>9} {'tokens':>7} {'confidence':>10} {'Δ':>7}"
+    print(header)
+    print("-" * len(header))
+    for query_type, type_runs in sorted(by_type.items()):
+        current = select_profile(query_type).name
+        for profile in profiles:
+            rows = [r["results"] for r in type_runs if profile in r["results"]]
+            if not rows:
+                continue
+            latency = mean(r[profile]["latency_ms"] for r in rows)
+            cost = mean(r[profile]["cost"] for r in rows)
+            tokens = mean(r[profile]["tokens"] for r in rows)
+            confidence = mean(r[profile]["confidence"] for r in rows)
+            paired = [r for r in rows if "full" in r]
+            if paired and profile != "full":
+                d_latency = f"{mean(r[profile]['latency_ms'] - r['full']['latency_ms'] for r in paired):+8.0f}"
+                d_cost = f"{mean(r[profile]['cost'] - r['full']['cost'] for r in paired):+9.5f}"
+                d_conf = f"{mean(r[profile]['confidence'] - r['full']['confidence'] for r in paired):+7.3f}"
+            else:
+                d_latency, d_cost, d_conf = f"{'-':>8}", f"{'-':>9}", f"{'-':>7}"
+            marker = "*" if profile == current else " "
+            print(
+                f"{query_type:<16} {profile + marker:<10} {len(rows):>4} {latency:>11.0f} {d_latency} "
+                f"{cost:>9.5f} {d_cost} {tokens:>7.0f} {confidence:>10.3f} {d_conf}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay logged queries under each pipeline profile")
+    parser.add_argument("--log-dir", type=Path, default=DEFAULT_LOG_DIR)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--limit", type=int, default=20, help="Distinct queries to replay")
+    parser.add_argument("--profiles", default=",".join(PIPELINE_PROFILES), help="Comma-separated profile names")
+    parser.add_argument("--mode", choices=[m.value for m in Mode], default=Mode.LOCAL.value)
+    parser.add_argument("--understanding-model", required=True)
+    parser.add_argument("--generation-model", required=True)
+    parser.add_argument("--reranking-model")
+    parser.add_argument("--verification-model")
+    parser.add_argument("--api-key", default=None, help="OpenRouter key (default: OPENROUTER_API_KEY)")
+    parser.add_argument("--output", type=Path, help="Also write per-query results as JSON")
+    args = parser.parse_args()
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in PIPELINE_PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)} (available: {', '.join(PIPELINE_PROFILES)})")
+    if "full" not in profiles:
+        profiles.insert(0, "full")  # Baseline for the deltas
+
+    queries = load_queries(args.log_dir, args.days, args.limit)
+    if not queries:
+        print(f"No logged queries in {args.log_dir} (last {args.days} days)")
+        return 1
+
+    runs = asyncio.run(replay(args, queries, profiles))
+    if not runs:
+        print("No query could be replayed (sessions missing or empty)")
+        return 1
+    report(runs, profiles)
+    if args.output:
+        args.output.write_text(json.dumps(runs, indent=2), encoding="utf-8")
+        print(f"\nPer-query results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Tune QUERY_UNDERSTANDING_LOCAL_THRESHOLD against logged queries.
+
+Reads eval_logs/queries_*.jsonl and, for every query whose query_understanding
+stage recorded the local classifier's confidence, reports per candidate
+threshold:
+
+1. share of queries that would skip the LLM (local tier)
+2. for escalated queries above the threshold, how often the LLM agreed with
+   the local query type (low agreement = the threshold is too permissive)
+3. mean answer confidence per tier actually used, and understanding latency
+
+Usage:
+    python scripts/tune_understanding_threshold.py
+    python scripts/tune_understanding_threshold.py --log-dir eval_logs --days 14
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from statistics import mean
+
+DEFAULT_LOG_DIR = Path(__file__).resolve().parent.parent / "eval_logs"
+THRESHOLDS = [0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95]
+
+
+def load_records(log_dir: Path, days: int) -> list:
+    """Logged queries of the last `days` days that carry local classifier info."""
+    dates = {(datetime.now() - timedelta(days=i)).strftime("%Y%m%d") for i in range(days)}
+    records = []
+    for path in sorted(log_dir.glob("queries_*.jsonl")):
+        if path.stem.split("_")[-1] not in dates:
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                stage = (entry.get("metrics") or {}).get("stages", {}).get("query_understanding") or {}
+                if stage.get("local_confidence") is None:
+                    continue
+                records.append({
+                    "tier": stage.get("tier"),
+                    "local_confidence": stage["local_confidence"],
+                    "local_query_type": stage.get("local_query_type"),
+                    "query_type": stage.get("query_type"),
+                    "duration_ms": stage.get("duration_ms", 0.0),
+                    "answer_confidence": entry.get("confidence_score", 0.0),
+                })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the local query-understanding threshold")
+    parser.add_argument("--log-dir", type=Path, default=DEFAULT_LOG_DIR)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    records = load_records(args.log_dir, args.days)
+    if not records:
+        print(f"No queries with local classifier info in {args.log_dir} (last {args.days} days)")
+        return 1
+
+    print(f"{len(records)} queries from {args.log_dir}\n")
+    print("Per tier used:")
+    for tier in ("local", "llm", "heuristic"):
+        rows = [r for r in records if r["tier"] == tier]
+        if rows:
+            print(
+                f"  {tier:<10} n={len(rows):<5} understanding={mean(r['duration_ms'] for r in rows):8.1f}ms"
+                f"  answer confidence={mean(r['answer_confidence'] for r in rows):.3f}"
+            )
+
+    escalated = [r for r in records if r["tier"] == "llm"]
+    print("\nthreshold  local share  escalated above threshold  LLM agreement")
+    for threshold in THRESHOLDS:
+        local_share = sum(r["local_confidence"] >= threshold for r in records) / len(records)
+        above = [r for r in escalated if r["local_confidence"] >= threshold]
+        agreement = (
+            f"{sum(r['local_query_type'] == r['query_type'] for r in above) / len(above):.1%}"
+            if above else "-"
+        )
+        print(f"  {threshold:<9.2f} {local_share:>10.1%}  {len(above):>25}  {agreement:>13}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())